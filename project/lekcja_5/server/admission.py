@@ -0,0 +1,267 @@
+"""
+Kontrola przyjęć połączeń WebSocket (admission control) i zrzucanie obciążenia.
+
+websocket_endpoint przyjmował każde połączenie i każde auth_request - fala
+ponownych połączeń po wdrożeniu (tysiące klientów naraz) mogła przekroczyć
+limity pamięci i CPU serwera. AdmissionController odrzuca nowe połączenia
+i logowania, gdy:
+
+- połączeń jest już max_connections                 -> "too_many_connections"
+- trwa już max_pending_auth logowań (auth_request /
+  resume_request obsługiwanych w tej chwili)          -> "auth_busy"
+- pętla zdarzeń jest opóźniona o ponad max_loop_lag_ms -> "event_loop_lag"
+- w kolejce puli wątków bazy czeka ponad
+  max_queue_depth zapytań                             -> "queue_depth"
+
+Już zalogowani klienci nie są rozłączani - przeciążenie wstrzymuje tylko
+nowych. Odrzucone połączenie jest zamykane kodem OVERLOAD_CLOSE_CODE
+(1013 "Try Again Later", RFC 6455) z opisem w formacie JSON:
+
+    {"reason": "too_many_connections", "retry_after_ms": 2731}
+
+retry_after_ms jest losowany z przedziału [retry_after_ms, 2 * retry_after_ms),
+żeby odrzuceni klienci nie wrócili wszyscy w tej samej chwili.
+
+Połączenie, które nie przyśle auth_request / resume_request w ciągu
+auth_timeout_ms, jest zamykane kodem AUTH_TIMEOUT_CLOSE_CODE (1008 "Policy
+Violation") z opisem {"reason": "auth_timeout"} - inaczej bezczynne,
+niezalogowane gniazda zajmowałyby miejsca max_connections bez końca
+(receive_auth()).
+
+Opóźnienie pętli mierzy run(): co interval_ms sprawdza, o ile później
+niż powinno obudziło się asyncio.sleep(). Pomiar reaguje od razu na skok,
+a wraca do normy stopniowo (LAG_DECAY na pomiar).
+
+Przykład:
+    reason = admission.admit()
+    if reason:
+        await shed_connection(websocket, reason, admission.retry_after_ms())
+        return
+    try:
+        ...
+    finally:
+        admission.release()
+"""
+
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import codec
+from outbound import close_websocket
+
+# Kod zamknięcia odrzuconego połączenia - "Try Again Later" (RFC 6455)
+OVERLOAD_CLOSE_CODE = 1013
+
+# Kod zamknięcia połączenia, które nie zalogowało się na czas - "Policy Violation" (RFC 6455)
+AUTH_TIMEOUT_CLOSE_CODE = 1008
+
+# Powody odrzucenia (opis w ramce zamknięcia i klucze metryk)
+SHED_REASONS = ("too_many_connections", "auth_busy", "event_loop_lag", "queue_depth")
+
+# Mnożnik poprzedniego pomiaru opóźnienia pętli przy każdym kolejnym pomiarze
+LAG_DECAY = 0.5
+
+
+class AdmissionController:
+    """
+    Liczniki połączeń i trwających logowań oraz bieżące obciążenie serwera.
+
+    Progi równe 0 wyłączają dane ograniczenie. Stan dotyczy jednego procesu
+    (w trybie wielu procesów każdy worker ma własne limity).
+    """
+
+    def __init__(self, max_connections: int = 10_000, max_pending_auth: int = 64, max_loop_lag_ms: int = 250,
+                 max_queue_depth: int = 500, retry_after_ms: int = 2000,
+                 queue_depth: Optional[Callable[[], int]] = None, auth_timeout_ms: int = 10_000):
+        """
+        Args:
+            max_connections: Maksymalna liczba połączeń (także niezalogowanych)
+            max_pending_auth: Maksymalna liczba jednocześnie obsługiwanych logowań
+            max_loop_lag_ms: Opóźnienie pętli zdarzeń, powyżej którego nowi klienci są odrzucani
+            max_queue_depth: Głębokość kolejki bazy, powyżej której nowi klienci są odrzucani
+            retry_after_ms: Najkrótszy czas do ponownej próby podawany odrzuconym klientom
+            queue_depth: Funkcja zwracająca bieżącą głębokość kolejki bazy (None - brak pomiaru)
+            auth_timeout_ms: Czas na przysłanie ramki logowania po połączeniu (0 - bez limitu)
+        """
+        self.max_connections = max_connections
+        self.max_pending_auth = max_pending_auth
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.max_queue_depth = max_queue_depth
+        self.retry_after_ms_min = retry_after_ms
+        self._queue_depth = queue_depth
+        self.auth_timeout_ms = auth_timeout_ms
+
+        self.connections = 0
+        self.pending_auth = 0
+        # Opóźnienie pętli zdarzeń (ms) - ostatni pomiar run() z wygaszaniem
+        self.loop_lag_ms = 0.0
+        # Powód przeciążenia z ostatniego sprawdzenia (do komunikatu przy zmianie)
+        self._overloaded: Optional[str] = None
+
+        # Metryki
+        self.admitted = 0
+        self.peak_connections = 0
+        self.peak_loop_lag_ms = 0.0
+        self.shed: Dict[str, int] = {reason: 0 for reason in SHED_REASONS}
+        self.auth_timeouts = 0
+
+    def pressure(self) -> Optional[str]:
+        """
+        Sprawdza obciążenie serwera (opóźnienie pętli, kolejka bazy).
+
+        Returns:
+            Powód przeciążenia ("event_loop_lag" / "queue_depth") albo None
+        """
+        if self.max_loop_lag_ms and self.loop_lag_ms > self.max_loop_lag_ms:
+            return "event_loop_lag"
+        if self.max_queue_depth and self._queue_depth is not None and self._queue_depth() > self.max_queue_depth:
+            return "queue_depth"
+        return None
+
+    def admit(self) -> Optional[str]:
+        """
+        Przyjmuje nowe połączenie (po przyjęciu wymaga release()).
+
+        Returns:
+            None - połączenie przyjęte; w przeciwnym razie powód odrzucenia
+        """
+        if self.max_connections and self.connections >= self.max_connections:
+            return self._shed("too_many_connections")
+        reason = self.pressure()
+        if reason:
+            return self._shed(reason)
+
+        self.connections += 1
+        self.admitted += 1
+        self.peak_connections = max(self.peak_connections, self.connections)
+        return None
+
+    def release(self):
+        """Zwalnia miejsce połączenia przyjętego przez admit()."""
+        self.connections -= 1
+
+    def begin_auth(self) -> Optional[str]:
+        """
+        Zajmuje miejsce dla logowania (po zajęciu wymaga end_auth()).
+
+        Returns:
+            None - logowanie może być obsłużone; w przeciwnym razie powód odrzucenia
+        """
+        if self.max_pending_auth and self.pending_auth >= self.max_pending_auth:
+            return self._shed("auth_busy")
+        reason = self.pressure()
+        if reason:
+            return self._shed(reason)
+
+        self.pending_auth += 1
+        return None
+
+    def end_auth(self):
+        """Zwalnia miejsce logowania zajęte przez begin_auth()."""
+        self.pending_auth -= 1
+
+    def _shed(self, reason: str) -> str:
+        """Zlicza odrzucenie."""
+        self.shed[reason] += 1
+        return reason
+
+    async def receive_auth(self, websocket, receive: Awaitable[Any]) -> Optional[Any]:
+        """
+        Czeka na ramkę logowania najwyżej auth_timeout_ms.
+
+        Po przekroczeniu czasu zamyka połączenie kodem AUTH_TIMEOUT_CLOSE_CODE.
+
+        Args:
+            websocket: Przyjęte (accept()) połączenie WebSocket
+            receive: Odbiór ramki (np. wire.receive(websocket, protocol))
+
+        Returns:
+            Odebrana ramka albo None - czas minął, połączenie zamknięte
+        """
+        timeout = self.auth_timeout_ms / 1000 if self.auth_timeout_ms else None
+        try:
+            return await asyncio.wait_for(receive, timeout)
+        except asyncio.TimeoutError:
+            self.auth_timeouts += 1
+            await close_websocket(websocket, AUTH_TIMEOUT_CLOSE_CODE, reason=codec.encode({"reason": "auth_timeout"}))
+            return None
+
+    def retry_after_ms(self) -> int:
+        """Czas do ponownej próby dla odrzuconego klienta - losowy, żeby rozłożyć powroty."""
+        return int(self.retry_after_ms_min * (1 + random.random()))
+
+    def record_loop_lag(self, lag_ms: float):
+        """
+        Zapisuje pomiar opóźnienia pętli zdarzeń.
+
+        Args:
+            lag_ms: O ile ms później niż powinno obudziło się zadanie pomiarowe
+        """
+        self.loop_lag_ms = max(lag_ms, self.loop_lag_ms * LAG_DECAY)
+        self.peak_loop_lag_ms = max(self.peak_loop_lag_ms, lag_ms)
+
+        overloaded = self.pressure()
+        if overloaded != self._overloaded:
+            if overloaded:
+                print(f"⚠️  Przeciążenie ({overloaded}, pętla {self.loop_lag_ms:.0f} ms) - "
+                      f"nowe połączenia są odrzucane")
+            else:
+                print("✓ Obciążenie wróciło do normy - nowe połączenia są przyjmowane")
+            self._overloaded = overloaded
+
+    async def run(self, interval_ms: int = 100):
+        """
+        Zadanie w tle: co `interval_ms` mierzy opóźnienie pętli zdarzeń.
+
+        Args:
+            interval_ms: Odstęp między pomiarami
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval_ms / 1000)
+            self.record_loop_lag(max(0.0, (loop.time() - started) * 1000 - interval_ms))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Zwraca progi i bieżące obciążenie.
+
+        Returns:
+            Słownik z progami ("limits"), bieżącym stanem ("pressure") i licznikami odrzuceń
+        """
+        return {
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_pending_auth": self.max_pending_auth,
+                "max_loop_lag_ms": self.max_loop_lag_ms,
+                "max_queue_depth": self.max_queue_depth,
+                "retry_after_ms": self.retry_after_ms_min,
+                "auth_timeout_ms": self.auth_timeout_ms
+            },
+            "pressure": {
+                "connections": self.connections,
+                "pending_auth": self.pending_auth,
+                "loop_lag_ms": round(self.loop_lag_ms, 1),
+                "queue_depth": self._queue_depth() if self._queue_depth is not None else None,
+                "overloaded": self.pressure()
+            },
+            "admitted": self.admitted,
+            "peak_connections": self.peak_connections,
+            "peak_loop_lag_ms": round(self.peak_loop_lag_ms, 1),
+            "shed": dict(self.shed),
+            "auth_timeouts": self.auth_timeouts
+        }
+
+
+async def shed_connection(websocket, reason: str, retry_after_ms: int):
+    """
+    Zamyka odrzucone połączenie kodem OVERLOAD_CLOSE_CODE z powodem i czasem do ponownej próby.
+
+    Args:
+        websocket: Przyjęte (accept()) połączenie WebSocket
+        reason: Powód odrzucenia (SHED_REASONS)
+        retry_after_ms: Po ilu ms klient może połączyć się ponownie
+    """
+    await close_websocket(websocket, OVERLOAD_CLOSE_CODE,
+                          reason=codec.encode({"reason": reason, "retry_after_ms": retry_after_ms}))
@@ -0,0 +1,113 @@
+"""
+Benchmark: fala ponownych połączeń (reconnect storm) z kontrolą przyjęć i bez niej.
+
+CLIENTS klientów łączy się naraz (jak po restarcie serwera). Logowanie
+jest modelowane jako zapytanie do bazy (DB_MS w puli wątków) i praca
+w pętli zdarzeń (LOOP_MS - kodowanie auth_success, rejestracja). Mierzone:
+
+- najwięcej jednocześnie trwających logowań
+- najwyższe opóźnienie pętli zdarzeń (AdmissionController.run())
+- liczba odrzuceń (zamknięcie kodem 1013) - odrzucony klient próbuje
+  ponownie po retry_after_ms, aż się zaloguje
+- czas do zalogowania (mediana, p99) i czas całej fali
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_admission.py             # 2 000 klientów
+    python benchmarks/bench_admission.py 5000
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from admission import AdmissionController
+
+DB_MS = 2.0
+LOOP_MS = 0.5
+# Krótszy niż domyślny czas do ponownej próby - żeby benchmark trwał krótko
+RETRY_AFTER_MS = 200
+
+
+def busy(ms: float):
+    """Praca CPU przez `ms` milisekund."""
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+async def storm(clients: int, limited: bool) -> dict:
+    """Wszyscy klienci logują się naraz (odrzuceni wracają po retry_after_ms); zwraca metryki fali."""
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(config.DB_WORKERS)
+    if limited:
+        admission = AdmissionController(max_connections=config.MAX_CONNECTIONS,
+                                        max_pending_auth=config.MAX_PENDING_AUTH,
+                                        max_loop_lag_ms=config.SHED_LOOP_LAG_MS,
+                                        max_queue_depth=config.SHED_DB_QUEUE_DEPTH,
+                                        retry_after_ms=RETRY_AFTER_MS,
+                                        queue_depth=lambda: executor._work_queue.qsize())
+    else:
+        admission = AdmissionController(max_connections=0, max_pending_auth=0, max_loop_lag_ms=0, max_queue_depth=0)
+    monitor = asyncio.create_task(admission.run(config.LOOP_LAG_CHECK_INTERVAL_MS))
+    latencies = []
+    peak = {"pending": 0}
+
+    async def client():
+        started = time.perf_counter()
+        while True:
+            if admission.admit() is None:
+                try:
+                    if admission.begin_auth() is None:
+                        try:
+                            peak["pending"] = max(peak["pending"], admission.pending_auth)
+                            await loop.run_in_executor(executor, busy, DB_MS)
+                            busy(LOOP_MS)
+                            latencies.append((time.perf_counter() - started) * 1000)
+                            return
+                        finally:
+                            admission.end_auth()
+                finally:
+                    admission.release()
+            # Odrzucony - ponowna próba po czasie z retry_after_ms
+            await asyncio.sleep(admission.retry_after_ms() / 1000)
+
+    await asyncio.sleep(config.LOOP_LAG_CHECK_INTERVAL_MS / 1000)
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    monitor.cancel()
+    executor.shutdown()
+
+    latencies.sort()
+    return {
+        "shed": sum(admission.shed.values()),
+        "peak_pending": peak["pending"],
+        "peak_lag_ms": admission.peak_loop_lag_ms,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "elapsed_s": elapsed
+    }
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+
+    print(f"🌊 {clients} klientów naraz, logowanie: {DB_MS} ms bazy + {LOOP_MS} ms w pętli, "
+          f"MAX_PENDING_AUTH={config.MAX_PENDING_AUTH}")
+    print()
+    print(f"{'':22}{'odrzucenia':>11}{'logowania':>11}{'opóźn. pętli':>14}{'p50 [ms]':>10}{'p99 [ms]':>10}"
+          f"{'fala [s]':>10}")
+    for label, limited in (("bez kontroli", False), ("AdmissionController", True)):
+        result = asyncio.run(storm(clients, limited))
+        print(f"{label:22}{result['shed']:>11}{result['peak_pending']:>11}{result['peak_lag_ms']:>11.0f} ms"
+              f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['elapsed_s']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: koszt budowy auth_success przy fali logowań (np. po wdrożeniu
+wszyscy klienci logują się ponownie w ciągu kilku sekund).
+
+N równoczesnych logowań, porównanie:
+- poprzednia wersja: każde logowanie osobno pobiera listę kanałów i 50
+  wiadomości kanału general, buduje listę online i koduje cały auth_success
+- BootstrapSnapshot: wspólne, zakodowane fragmenty - zapytania tylko przy
+  pustej pamięci, auth_success sklejany z gotowych kawałków
+
+Liczone są zapytania do bazy i łączny czas budowy wszystkich ramek.
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_bootstrap.py             # 5 000 logowań
+    python benchmarks/bench_bootstrap.py 20000
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from bootstrap import BootstrapSnapshot
+from db_executor import AsyncDatabase
+from history_cache import HistoryCache
+from presence import PresenceAggregator
+from websocket_handler import ConnectionManager
+
+ONLINE_USERS = 500
+HISTORY_LIMIT = 50
+
+
+def build_database(path: str) -> sqlite3.Connection:
+    """Baza z przykładowymi danymi i co najmniej HISTORY_LIMIT wiadomościami w general."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    database.create_tables(conn)
+    database.seed_sample_data(conn)
+    for number in range(HISTORY_LIMIT):
+        database.add_message(conn, "general", "user_1", f"Wiadomość numer {number} - zażółć gęślą jaźń")
+    return conn
+
+
+def user(number: int) -> dict:
+    """Użytkownik w formacie API."""
+    return {"id": f"user_{number}", "name": f"Uzytkownik{number}"}
+
+
+async def previous_login(db: AsyncDatabase, online_users: list, number: int) -> str:
+    """auth_success jak w poprzedniej wersji handle_auth_request()."""
+    channels = await db.get_all_channels()
+    history = await db.get_messages_page("general", limit=HISTORY_LIMIT)
+    return json.dumps({
+        "type": "auth_success",
+        "payload": {
+            "user_info": user(number),
+            "channels": channels,
+            "online_users": list(online_users),
+            "initial_channel_history": {"channel_id": "general", **history}
+        }
+    }, ensure_ascii=False)
+
+
+async def run(logins: int, use_snapshot: bool, conn: sqlite3.Connection) -> dict:
+    """Buduje `logins` ramek auth_success równocześnie; zwraca czas, zapytania i bajty."""
+    db = AsyncDatabase(conn, max_pending=logins + 1)
+    presence = PresenceAggregator(ConnectionManager())
+    for number in range(1, ONLINE_USERS + 1):
+        presence.user_joined(user(number))
+    await presence.flush()
+
+    start = time.perf_counter()
+    if use_snapshot:
+        bootstrap = BootstrapSnapshot(db, HistoryCache(db), presence, history_limit=HISTORY_LIMIT)
+        frames = await asyncio.gather(*(
+            bootstrap.auth_success_frame(user(number), "token") for number in range(logins)
+        ))
+    else:
+        frames = await asyncio.gather(*(
+            previous_login(db, presence.snapshot(), number) for number in range(logins)
+        ))
+    elapsed = time.perf_counter() - start
+
+    queries = db.get_stats()["completed"]
+    db.close()
+    return {"seconds": elapsed, "queries": queries, "bytes": sum(len(frame) for frame in frames)}
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    work_dir = tempfile.mkdtemp()
+
+    try:
+        conn = build_database(os.path.join(work_dir, "chat.db"))
+        print(f"🔑 {logins} równoczesnych logowań ({ONLINE_USERS} użytkowników online, "
+              f"{HISTORY_LIMIT} wiadomości historii)")
+
+        previous = asyncio.run(run(logins, False, conn))
+        snapshot = asyncio.run(run(logins, True, conn))
+        conn.close()
+
+        print()
+        print(f"{'':30}{'zapytania':>12}{'czas [s]':>12}{'MiB':>10}")
+        for label, result in (("osobne zapytania + json.dumps", previous), ("BootstrapSnapshot", snapshot)):
+            print(f"{label:30}{result['queries']:>12}{result['seconds']:>12.2f}{result['bytes'] / 2**20:>10.1f}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
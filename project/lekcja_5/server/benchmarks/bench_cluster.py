@@ -0,0 +1,126 @@
+"""
+Benchmark: przepustowość rozgłaszania w trybie wielu procesów.
+
+CLIENTS klientów jednego kanału jest rozłożonych po równo na W workerów
+(osobne procesy połączone z brokerem przez gniazdo Unix - jak przy
+CHAT_WORKERS=W). Workery razem wysyłają MESSAGES wiadomości; każdy
+dostarcza każdą wiadomość (z seq od brokera) swoim klientom przez
+ConnectionManager - kodowanie JSON i kolejki wychodzące dzielą się między
+procesy. Mierzony jest czas do dostarczenia wszystkich wiadomości
+wszystkim klientom (bez gniazd WebSocket i bez zapisu do bazy).
+
+Na maszynie z jednym rdzeniem kolejne workery nie przyspieszają - czas
+rośnie o koszt brokera. Przyspieszenie widać przy W <= liczba rdzeni.
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_cluster.py               # 1, 2 i 4 workery
+    python benchmarks/bench_cluster.py 1 2 4 8
+"""
+
+import asyncio
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broker import Broker, BrokerServer, UnixBus
+from cluster import ClusterNode, ClusterPresence
+from history_cache import HistoryCache
+from message_writer import MessageWriter
+from websocket_handler import ConnectionManager
+
+CLIENTS = 2_000
+MESSAGES = 2_000
+
+
+class CountingWebSocket:
+    """Klient, który tylko zlicza odebrane ramki."""
+
+    def __init__(self, totals: dict):
+        self.totals = totals
+
+    async def send_text(self, text: str):
+        self.totals["frames"] += 1
+
+
+async def worker_main(path: str, node_id: int, workers: int, ready, start, results):
+    """Jeden worker: klienci, połączenie z brokerem, wysłanie swojej części wiadomości."""
+    totals = {"frames": 0}
+    manager = ConnectionManager(queue_size=MESSAGES)
+    clients = CLIENTS // workers
+    for number in range(clients):
+        manager.connect(CountingWebSocket(totals), f"user_{node_id}_{number}", f"U{node_id}_{number}", "general")
+
+    bus = UnixBus(path, node_id)
+    # Zapis do bazy pominięty - writer nie jest uruchomiony, a pamięć historii bez bazy
+    presence = ClusterPresence(manager, bus, node_id)
+    node = ClusterNode(bus, node_id, manager, MessageWriter(None), HistoryCache(None), presence)
+    await node.start()
+
+    ready.put(node_id)
+    await asyncio.to_thread(start.wait)
+
+    began = time.perf_counter()
+    for number in range(MESSAGES // workers):
+        node.publish_message("general", 1, "Jan", f"Wiadomość {number} od workera {node_id}")
+    while node.messages_delivered < MESSAGES // workers * workers:
+        await asyncio.sleep(0.001)
+    await manager.flush()
+    results.put((node_id, time.perf_counter() - began, totals["frames"]))
+    await node.close()
+
+
+def run_worker(path: str, node_id: int, workers: int, ready, start, results):
+    """Punkt wejścia procesu workera."""
+    asyncio.run(worker_main(path, node_id, workers, ready, start, results))
+
+
+async def measure(workers: int, path: str) -> tuple:
+    """Czas dostarczenia MESSAGES wiadomości CLIENTS klientom przez `workers` procesów."""
+    async def no_history(channel_id: str) -> int:
+        return 0
+
+    server = BrokerServer(Broker(no_history), path)
+    await server.start()
+
+    context = multiprocessing.get_context("spawn")
+    ready, results, start = context.Queue(), context.Queue(), context.Event()
+    processes = [context.Process(target=run_worker, args=(path, node_id, workers, ready, start, results))
+                 for node_id in range(workers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        await asyncio.to_thread(ready.get)
+
+    start.set()
+    reports = [await asyncio.to_thread(results.get) for _ in processes]
+    for process in processes:
+        await asyncio.to_thread(process.join)
+    await server.close()
+
+    elapsed = max(seconds for _, seconds, _ in reports)
+    frames = sum(frames for _, _, frames in reports)
+    return elapsed, frames
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4]
+    work_dir = tempfile.mkdtemp()
+
+    print(f"📡 {MESSAGES} wiadomości, {CLIENTS} klientów jednego kanału, {os.cpu_count()} rdzeni")
+    print()
+    print(f"{'workery':>8}{'czas [s]':>12}{'ramek/s':>14}")
+    try:
+        for workers in counts:
+            elapsed, frames = asyncio.run(measure(workers, os.path.join(work_dir, "broker.sock")))
+            print(f"{workers:>8}{elapsed:>12.2f}{frames / elapsed:>14,.0f}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: kodowanie i dekodowanie ramek JSON (codec.py).
+
+Porównanie na prawdziwych ramkach serwera (Message.to_dict(), polskie
+znaki i emoji w treści):
+- new_message - jedna wiadomość, kodowana przy każdym rozgłoszeniu
+- chat_history - 50 wiadomości (strona historii / initial_channel_history)
+- send_message - ramka od klienta, dekodowana w pętli odbioru
+
+Wiersz "json.dumps (poprzednio)" to dawne json.dumps(..., ensure_ascii=False)
+ze spacjami po "," i ":"; pozostałe - implementacje dostępne w codec.
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_codec.py                 # 20 000 powtórzeń
+    python benchmarks/bench_codec.py 100000
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec
+from models import Message
+
+HISTORY_LIMIT = 50
+
+
+def message(number: int) -> dict:
+    """Wiadomość w formacie API."""
+    return Message(
+        id=(1_727_517_600_000 << 22) | number,
+        channel_id="general",
+        user_id=number % 20 + 1,
+        username=f"Użytkownik{number % 20 + 1}",
+        text=f"Wiadomość numer {number} - zażółć gęślą jaźń 👋, jutro o 10:00 spotkanie zespołu",
+        timestamp=1_727_517_600_000 + number * 1000,
+        seq=number + 1
+    ).to_dict()
+
+
+def frames() -> dict:
+    """Ramki do kodowania i tekst ramki do dekodowania."""
+    new_message = {"type": "new_message", "payload": {"channel_id": "general", "message": message(1)}}
+    chat_history = {"type": "chat_history", "payload": {
+        "channel_id": "general",
+        "messages": [message(number) for number in range(HISTORY_LIMIT)],
+        "has_more": True
+    }}
+    send_message = json.dumps({"type": "send_message", "payload": {
+        "channel_id": "general", "text": "Cześć wszystkim! 👋 Kto idzie na kawę?"
+    }}, ensure_ascii=False)
+    return {"new_message": new_message, "chat_history": chat_history, "send_message": send_message}
+
+
+def measure(encode, decode, data: dict, repeat: int) -> dict:
+    """Czas jednej operacji w mikrosekundach dla każdej ramki."""
+    return {
+        "new_message": timeit.timeit(lambda: encode(data["new_message"]), number=repeat) / repeat * 1e6,
+        "chat_history": timeit.timeit(lambda: encode(data["chat_history"]), number=repeat) / repeat * 1e6,
+        "send_message": timeit.timeit(lambda: decode(data["send_message"]), number=repeat) / repeat * 1e6
+    }
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    data = frames()
+
+    results = {"json.dumps (poprzednio)": measure(lambda obj: json.dumps(obj, ensure_ascii=False),
+                                                  json.loads, data, repeat)}
+    for name in codec.available():
+        codec.use(name)
+        results[name] = measure(codec.encode, codec.decode, data, repeat)
+
+    history_bytes = len(codec.encode(data["chat_history"]).encode("utf-8"))
+    previous_bytes = len(json.dumps(data["chat_history"], ensure_ascii=False).encode("utf-8"))
+    print(f"🧩 {repeat} powtórzeń, chat_history: {HISTORY_LIMIT} wiadomości "
+          f"({previous_bytes} B poprzednio, {history_bytes} B zwarty JSON)")
+    print()
+    print(f"{'[µs / ramkę]':26}{'new_message':>14}{'chat_history':>14}{'send_message':>14}")
+    for label, result in results.items():
+        print(f"{label:26}{result['new_message']:>14.2f}{result['chat_history']:>14.2f}{result['send_message']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
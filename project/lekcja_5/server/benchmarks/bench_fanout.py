@@ -0,0 +1,118 @@
+"""
+Benchmark: koszt rozgłoszenia jednej wiadomości (broadcast_to_channel).
+
+Łączy CONNECTIONS udawanych klientów rozłożonych po CHANNELS kanałach
+i porównuje:
+- poprzednią wersję: przegląd wszystkich active_connections, porównanie
+  current_channel i await send_text() każdego odbiorcy po kolei
+  (LinearScanManager poniżej)
+- indeks kanał -> połączenia + kolejki wychodzące (ConnectionManager)
+
+Dwa scenariusze:
+1. wszyscy klienci szybcy - średni czas na wiadomość łącznie z wysłaniem
+   do wszystkich odbiorców
+2. w każdym kanale jeden klient wysyła wolno (SLOW_SEND_MS) - jak długo
+   handler nadawcy czeka na broadcast_to_channel()
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_fanout.py                # 10 000 połączeń, 1 000 kanałów
+    python benchmarks/bench_fanout.py 50000 1000
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_handler import ConnectionManager
+
+MESSAGES = 20_000
+SLOW_MESSAGES = 200
+SLOW_SEND_MS = 1
+
+
+class FakeWebSocket:
+    """Klient, który niczego nie wysyła (opcjonalnie - wolno)."""
+
+    def __init__(self, slow: bool = False):
+        self.slow = slow
+
+    async def send_text(self, text: str):
+        if self.slow:
+            await asyncio.sleep(SLOW_SEND_MS / 1000)
+
+
+class LinearScanManager(ConnectionManager):
+    """ConnectionManager z rozgłaszaniem sprzed indeksu kanałów i kolejek."""
+
+    async def broadcast_to_channel(self, message: dict, channel_id: str, exclude_ws: Optional[FakeWebSocket] = None,
+                                   coalesce_key: Optional[str] = None):
+        message_json = json.dumps(message, ensure_ascii=False)
+
+        for websocket, user_info in self.active_connections.items():
+            if websocket != exclude_ws and user_info["current_channel"] == channel_id:
+                try:
+                    await websocket.send_text(message_json)
+                except Exception as e:
+                    print(f"Błąd wysyłania do {user_info['username']}: {e}")
+
+
+def fill(manager: ConnectionManager, connections: int, channels: int, slow_clients: bool = False) -> None:
+    """Łączy `connections` klientów na losowych kanałach (+ opcjonalnie wolnego w każdym kanale)."""
+    rng = random.Random(42)
+    for number in range(connections):
+        manager.connect(FakeWebSocket(), f"user_{number}", f"Uzytkownik{number}",
+                        f"channel_{rng.randrange(channels)}")
+    if slow_clients:
+        for channel in range(channels):
+            manager.connect(FakeWebSocket(slow=True), f"slow_{channel}", f"Wolny{channel}", f"channel_{channel}")
+
+
+async def measure(manager: ConnectionManager, channels: int, messages: int, wait_for_delivery: bool) -> float:
+    """Średni czas (µs) na wiadomość do losowego kanału."""
+    rng = random.Random(7)
+    message = {"type": "new_message", "payload": {"message": {"text": "Cześć!"}}}
+    targets = [f"channel_{rng.randrange(channels)}" for _ in range(messages)]
+
+    start = time.perf_counter()
+    for channel_id in targets:
+        await manager.broadcast_to_channel(message, channel_id)
+    if wait_for_delivery:
+        await manager.flush()
+    elapsed = (time.perf_counter() - start) / messages * 1_000_000
+
+    for websocket in list(manager.active_connections):
+        manager.disconnect(websocket)
+    return elapsed
+
+
+async def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    channels = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+
+    print(f"📡 {connections} połączeń, {channels} kanałów "
+          f"(średnio {connections / channels:.0f} odbiorców na wiadomość)")
+
+    managers = (("przegląd + await send_text", LinearScanManager),
+                ("indeks kanałów + kolejki", ConnectionManager))
+
+    print("\n1. Wszyscy klienci szybcy - czas na wiadomość z wysłaniem do odbiorców")
+    for label, manager_class in managers:
+        manager = manager_class(queue_size=256)
+        fill(manager, connections, channels)
+        print(f"   {label:30}{await measure(manager, channels, MESSAGES, True):>10.1f} µs")
+
+    print(f"\n2. Jeden wolny klient ({SLOW_SEND_MS} ms na ramkę) w każdym kanale - czas oczekiwania nadawcy")
+    for label, manager_class in managers:
+        manager = manager_class(queue_size=256)
+        fill(manager, connections, channels, slow_clients=True)
+        print(f"   {label:30}{await measure(manager, channels, SLOW_MESSAGES, False):>10.1f} µs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
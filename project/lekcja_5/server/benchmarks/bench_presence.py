@@ -0,0 +1,104 @@
+"""
+Benchmark: ruch sieciowy przy fali logowań (np. restart serwera, wszyscy
+klienci łączą się ponownie).
+
+N użytkowników loguje się w ciągu STORM_SECONDS. Porównanie:
+- poprzednia wersja: po każdym logowaniu user_joined do pozostałych
+  i pełna lista user_list_update do wszystkich - O(N²) bajtów
+- PresenceAggregator: jedna zmiana (added / removed) na okno, pełna
+  lista tylko w auth_success (tu nieliczona - jest w obu wersjach)
+
+Liczone są ramki i bajty wysłane do wszystkich klientów łącznie.
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_presence.py              # 2 000 użytkowników
+    python benchmarks/bench_presence.py 10000
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from presence import PresenceAggregator
+from websocket_handler import ConnectionManager
+
+STORM_SECONDS = 5
+
+
+class CountingWebSocket:
+    """Klient, który tylko zlicza odebrane ramki i bajty."""
+
+    def __init__(self, totals: dict):
+        self.totals = totals
+
+    async def send_text(self, text: str):
+        self.totals["frames"] += 1
+        self.totals["bytes"] += len(text.encode("utf-8"))
+
+
+def user(number: int) -> dict:
+    """Użytkownik w formacie API."""
+    return {"id": f"user_{number}", "name": f"Uzytkownik{number}"}
+
+
+def previous_protocol(user_count: int) -> dict:
+    """Liczy ramki i bajty poprzedniej wersji (bez wysyłania - to O(N²) ramek)."""
+    totals = {"frames": 0, "bytes": 0}
+    roster = []
+    for number in range(1, user_count + 1):
+        roster.append(user(number))
+        joined = json.dumps({"type": "user_joined", "payload": {"user": user(number)}}, ensure_ascii=False)
+        update = json.dumps({"type": "user_list_update", "payload": {"online_users": roster}}, ensure_ascii=False)
+        totals["frames"] += (number - 1) + number
+        totals["bytes"] += len(joined.encode("utf-8")) * (number - 1) + len(update.encode("utf-8")) * number
+    return totals
+
+
+async def aggregated_protocol(user_count: int) -> dict:
+    """Wysyła zmiany przez PresenceAggregator - logowania rozłożone na kolejne okna."""
+    totals = {"frames": 0, "bytes": 0}
+    manager = ConnectionManager(queue_size=1024)
+    presence = PresenceAggregator(manager, config.PRESENCE_WINDOW_MS)
+
+    window = config.PRESENCE_WINDOW_MS / 1000
+    windows = max(1, int(STORM_SECONDS / window))
+    joined = 0
+    for index in range(1, windows + 1):
+        # Logowania rozłożone równomiernie na okna
+        target = user_count * index // windows
+        while joined < target:
+            joined += 1
+            manager.connect(CountingWebSocket(totals), f"user_{joined}", f"Uzytkownik{joined}", "general")
+            presence.user_joined(user(joined))
+        await presence.flush()
+        await manager.flush()
+    return totals
+
+
+def main():
+    user_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+
+    print(f"👥 {user_count} logowań w ciągu {STORM_SECONDS} s (okno {config.PRESENCE_WINDOW_MS} ms)")
+
+    start = time.perf_counter()
+    previous = previous_protocol(user_count)
+    previous_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    aggregated = asyncio.run(aggregated_protocol(user_count))
+    aggregated_time = time.perf_counter() - start
+
+    print()
+    print(f"{'':28}{'ramki':>14}{'MiB':>12}")
+    print(f"{'user_joined + pełna lista':28}{previous['frames']:>14}{previous['bytes'] / 2**20:>12.1f}")
+    print(f"{'PresenceAggregator':28}{aggregated['frames']:>14}{aggregated['bytes'] / 2**20:>12.1f}")
+    print(f"\nCzas: {previous_time:.2f} s (tylko kodowanie) vs {aggregated_time:.2f} s (kodowanie i wysłanie)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: limity zdarzeń (ratelimit.RateLimiter).
+
+1. Koszt acquire() na zdarzenie - przepuszczone i odrzucone
+2. Zalew send_message: CLIENTS klientów wysyła po FLOOD wiadomości naraz -
+   ile dochodzi do handlera (zapisu w bazie i rozgłoszenia), ile jest
+   odrzucanych; pamięć stanu limitów na użytkownika i zwolnienie jej
+   po okresie bezczynności (expire())
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_ratelimit.py             # 1 000 klientów
+    python benchmarks/bench_ratelimit.py 10000
+"""
+
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from ratelimit import RateLimiter
+
+FLOOD = 1_000
+REPEAT = 200_000
+
+
+def limiter() -> RateLimiter:
+    """Limiter z domyślnymi limitami serwera (config.py)."""
+    return RateLimiter({
+        "send_message": (config.RATE_SEND_MESSAGE_PER_S, config.RATE_SEND_MESSAGE_BURST),
+        "request_history": (config.RATE_HISTORY_PER_S, config.RATE_HISTORY_BURST),
+        "search_messages": (config.RATE_SEARCH_MESSAGES_PER_S, config.RATE_SEARCH_MESSAGES_BURST)
+    })
+
+
+def acquire_cost():
+    """Czas jednego acquire() w mikrosekundach."""
+    allowed = limiter()
+    # Odstęp między zdarzeniami większy niż 1 / rate - zawsze jest żeton
+    clock = iter(range(0, REPEAT * 10, 10))
+    allowed_us = timeit.timeit(lambda: allowed.acquire("ws", "send_message", now=next(clock)),
+                               number=REPEAT) / REPEAT * 1e6
+
+    limited = limiter()
+    limited_us = timeit.timeit(lambda: limited.acquire("ws", "send_message", now=0.0),
+                               number=REPEAT) / REPEAT * 1e6
+
+    print(f"⏱️  acquire(): przepuszczone {allowed_us:.2f} µs, odrzucone {limited_us:.2f} µs")
+
+
+def flood(clients: int):
+    """Zalew send_message - ile zdarzeń dochodzi do handlera; pamięć na użytkownika."""
+    rate_limiter = limiter()
+    start = time.perf_counter()
+    passed = 0
+    for number in range(clients):
+        for _ in range(FLOOD):
+            passed += not rate_limiter.acquire(number, "send_message", now=0.0)
+    elapsed = time.perf_counter() - start
+
+    # Pamięć mierzona osobno (tracemalloc spowalnia pomiar czasu)
+    measured = limiter()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for number in range(clients):
+        measured.acquire(number, "send_message", now=0.0)
+    per_user = (tracemalloc.get_traced_memory()[0] - before) / clients
+    tracemalloc.stop()
+
+    total = clients * FLOOD
+    print(f"🌊 {clients} klientów x {FLOOD} send_message naraz: do handlera {passed} "
+          f"({passed / total:.1%}), odrzucone {total - passed}, {elapsed / total * 1e6:.2f} µs / zdarzenie")
+    print(f"💾 Stan limitów: ok. {per_user:.0f} B na użytkownika (jedno wiadro)")
+
+    # Stan przetrwa rozłączenie; po uzupełnieniu wiader (burst / rate sekund) jest usuwany
+    refill_s = config.RATE_SEND_MESSAGE_BURST / config.RATE_SEND_MESSAGE_PER_S
+    start = time.perf_counter()
+    rate_limiter.expire(now=refill_s)
+    elapsed = time.perf_counter() - start
+    print(f"🧹 expire() po {refill_s:.0f} s bezczynności: {rate_limiter.get_stats()['users']} użytkowników "
+          f"w limiterze ({elapsed * 1000:.1f} ms)")
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    acquire_cost()
+    print()
+    flood(clients)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: rozmiar bazy i czas zapytania o historię - schemat v1 vs v2.
+
+Tworzy tymczasową bazę v1 (tekstowe klucze i daty) z wygenerowanymi
+wiadomościami, mierzy rozmiar pliku i czas pobrania strony historii,
+a potem migruje ją do v2 (migrate_v2.py) i mierzy to samo jeszcze raz.
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_schema_v2.py            # 200 000 wiadomości
+    python benchmarks/bench_schema_v2.py 1000000
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrate_v2
+from ids import MessageIdGenerator
+from models import format_timestamp
+
+CHANNELS = 20
+USERS = 500
+PAGE_SIZE = 50
+REPEATS = 2000
+
+# Ta sama strona historii w obu schematach: wiadomości starsze od kursora seq
+PAGE_QUERY = """
+    SELECT m.id, m.user_id, u.username, m.text, m.created_at, m.edited_at, m.seq
+    FROM messages m
+    JOIN users u ON m.user_id = u.id
+    WHERE m.channel_id = ? AND m.seq < ?
+    ORDER BY m.seq DESC
+    LIMIT ?
+"""
+
+
+def build_v1_database(path: str, message_count: int) -> None:
+    """Tworzy bazę v1 z `message_count` wiadomościami w CHANNELS kanałach."""
+    conn = sqlite3.connect(path)
+    conn.executescript(migrate_v2.V1_SCHEMA)
+
+    start_ms = 1735689600000
+    created = format_timestamp(start_ms)
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?)",
+                     [(f"user_{i}", f"Uzytkownik{i}", "ircAMP2024!", created) for i in range(1, USERS + 1)])
+    conn.executemany("INSERT INTO channels VALUES (?, ?, ?, ?)",
+                     [(f"channel_{i}", f"Kanał {i}", "public", created) for i in range(1, CHANNELS + 1)])
+
+    generator = MessageIdGenerator()
+    rng = random.Random(42)
+    last_seq = [0] * (CHANNELS + 1)
+    rows = []
+    for i in range(message_count):
+        channel = rng.randint(1, CHANNELS)
+        last_seq[channel] += 1
+        rows.append((
+            generator.next_id(), f"channel_{channel}", f"user_{rng.randint(1, USERS)}",
+            f"Wiadomość testowa numer {i}", format_timestamp(start_ms + i * 1000), None, last_seq[channel]
+        ))
+    conn.executemany("INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def measure_page_query(path: str, channel_id) -> float:
+    """Średni czas (µs) pobrania strony historii ze środka kanału."""
+    conn = sqlite3.connect(path)
+    middle = conn.execute("SELECT MAX(seq) FROM messages WHERE channel_id = ?", (channel_id,)).fetchone()[0] // 2
+
+    conn.execute(PAGE_QUERY, (channel_id, middle, PAGE_SIZE)).fetchall()  # rozgrzanie cache
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        conn.execute(PAGE_QUERY, (channel_id, middle, PAGE_SIZE)).fetchall()
+    elapsed = time.perf_counter() - start
+
+    conn.close()
+    return elapsed / REPEATS * 1_000_000
+
+
+def main():
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    work_dir = tempfile.mkdtemp()
+    v1_path = os.path.join(work_dir, "chat_v1.db")
+    v2_path = os.path.join(work_dir, "chat_v2.db")
+
+    try:
+        print(f"📦 Generowanie bazy v1: {message_count} wiadomości, {CHANNELS} kanałów, {USERS} użytkowników...")
+        build_v1_database(v1_path, message_count)
+        shutil.copy(v1_path, v2_path)
+
+        conn = sqlite3.connect(v2_path)
+        start = time.perf_counter()
+        migrate_v2.migrate(conn)
+        migration_time = time.perf_counter() - start
+        conn.close()
+
+        v1_size = os.path.getsize(v1_path)
+        v2_size = os.path.getsize(v2_path)
+        v1_query = measure_page_query(v1_path, "channel_1")
+        v2_query = measure_page_query(v2_path, 1)
+
+        print()
+        print(f"{'':28}{'v1 (TEXT)':>14}{'v2 (INTEGER)':>14}{'zmiana':>10}")
+        print(f"{'Rozmiar pliku [MiB]':28}{v1_size / 2**20:>14.2f}{v2_size / 2**20:>14.2f}"
+              f"{(v2_size - v1_size) / v1_size:>+10.0%}")
+        print(f"{'Strona historii [µs]':28}{v1_query:>14.1f}{v2_query:>14.1f}"
+              f"{(v2_query - v1_query) / v1_query:>+10.0%}")
+        print(f"\nMigracja v1 -> v2: {migration_time:.2f} s")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark: wyszukiwanie wiadomości - FTS5 vs LIKE '%...%'.
+
+Tworzy tymczasową bazę (schemat v2 z indeksem FTS5) z wygenerowanymi
+wiadomościami i mierzy czas database.search_messages() dla słów rzadkich,
+częstych, prefiksów i z filtrem kanału. Dla porównania mierzy LIKE,
+które musi przeczytać każdy wiersz tabeli messages.
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_search.py             # 1 000 000 wiadomości
+    python benchmarks/bench_search.py 3000000
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+CHANNELS = 20
+USERS = 500
+REPEATS = 20
+
+# Słownik z rozkładem zbliżonym do naturalnego (pierwsze słowa są najczęstsze)
+COMMON_WORDS = ["jest", "nie", "się", "to", "na", "ale", "czy", "tak", "już", "jak",
+                "projekt", "serwer", "kod", "test", "błąd", "baza", "klient", "wiadomość"]
+RARE_WORDS = [f"słowo{i}" for i in range(20_000)]
+
+QUERIES = [
+    ("rzadkie słowo", "słowo12345", None),
+    ("częste słowo", "projekt", None),
+    ("dwa słowa", "serwer błąd", None),
+    ("prefiks", "wiadom*", None),
+    ("krótki prefiks", "pr*", None),
+    ("częste słowo + kanał", "projekt", "channel_1"),
+]
+
+
+def random_text(rng: random.Random) -> str:
+    """Losowa treść wiadomości: kilka częstych słów i jedno rzadkie."""
+    words = rng.choices(COMMON_WORDS, weights=range(len(COMMON_WORDS), 0, -1), k=rng.randint(3, 8))
+    words.append(rng.choice(RARE_WORDS))
+    rng.shuffle(words)
+    return " ".join(words)
+
+
+def build_database(path: str, message_count: int) -> sqlite3.Connection:
+    """Tworzy bazę v2 z `message_count` wiadomościami (indeks FTS5 przez wyzwalacze)."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    database.create_tables(conn)
+
+    now = database.get_timestamp_ms()
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?)",
+                     [(i, f"Uzytkownik{i}", "x", now) for i in range(1, USERS + 1)])
+    conn.executemany("INSERT INTO channels VALUES (?, ?, ?, ?, ?)",
+                     [(i, f"channel_{i}", f"Kanał {i}", "public", now) for i in range(1, CHANNELS + 1)])
+
+    rng = random.Random(42)
+    last_seq = [0] * (CHANNELS + 1)
+    batch = []
+    for i in range(1, message_count + 1):
+        channel = rng.randint(1, CHANNELS)
+        last_seq[channel] += 1
+        batch.append((i, channel, rng.randint(1, USERS), random_text(rng), now + i, last_seq[channel]))
+        if len(batch) == 50_000:
+            conn.executemany("INSERT INTO messages (id, channel_id, user_id, text, created_at, seq) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    conn.executemany("INSERT INTO messages (id, channel_id, user_id, text, created_at, seq) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    # Scalenie segmentów indeksu - stan jak po dłuższej pracy serwera
+    conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('optimize')")
+    conn.commit()
+    return conn
+
+
+def timed(func, *args) -> float:
+    """Średni czas wywołania w milisekundach."""
+    func(*args)  # rozgrzanie cache
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func(*args)
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def like_search(conn: sqlite3.Connection, word: str) -> list:
+    """Wyszukiwanie bez indeksu - dla porównania."""
+    return conn.execute(
+        "SELECT id FROM messages WHERE text LIKE ? ORDER BY id DESC LIMIT 20", (f"%{word}%",)
+    ).fetchall()
+
+
+def main():
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    work_dir = tempfile.mkdtemp()
+
+    try:
+        print(f"📦 Generowanie bazy: {message_count} wiadomości...")
+        start = time.perf_counter()
+        conn = build_database(os.path.join(work_dir, "chat.db"), message_count)
+        print(f"   gotowe w {time.perf_counter() - start:.1f} s")
+
+        print()
+        print(f"{'Zapytanie':26}{'search_messages [ms]':>22}{'trafień':>10}")
+        for label, query, channel_id in QUERIES:
+            elapsed = timed(database.search_messages, conn, query, channel_id, 20, 0)
+            total = conn.execute("SELECT COUNT(*) FROM messages_fts WHERE messages_fts MATCH ?",
+                                 (database.build_search_query(query),)).fetchone()[0]
+            print(f"{label:26}{elapsed:>22.2f}{total:>10}")
+
+        elapsed = timed(like_search, conn, "słowo12345")
+        print(f"\n{'LIKE rzadkie słowo':26}{elapsed:>22.2f}")
+        conn.close()
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: wyszukiwanie użytkowników po prefiksie - UserIndex vs SQLite LIKE.
+
+Tworzy bazę w pamięci z wygenerowanymi użytkownikami i mierzy czas
+znalezienia pierwszych USER_SEARCH_LIMIT użytkowników dla prefiksów
+o różnej długości: w indeksie w pamięci (bisect) i zapytaniem LIKE.
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_user_search.py            # 100 000 użytkowników
+    python benchmarks/bench_user_search.py 1000000
+"""
+
+import os
+import random
+import sqlite3
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import database
+from user_index import UserIndex
+
+REPEATS = 2000
+PREFIXES = ["a", "an", "ann", "kowal", "zzzz"]
+
+LIKE_QUERY = "SELECT id, username FROM users WHERE username LIKE ? ORDER BY username LIMIT ?"
+
+
+def random_username(rng: random.Random) -> str:
+    """Losowa nazwa w formacie dozwolonym przez validate_username()."""
+    alphabet = string.ascii_letters + string.digits + "_"
+    return rng.choice(["anna", "jan", "kowal", "piotr", ""]) + "".join(rng.choices(alphabet, k=rng.randint(3, 12)))
+
+
+def timed_us(func, *args) -> float:
+    """Średni czas wywołania w mikrosekundach."""
+    func(*args)  # rozgrzanie
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func(*args)
+    return (time.perf_counter() - start) / REPEATS * 1_000_000
+
+
+def main():
+    user_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    limit = config.USER_SEARCH_LIMIT
+
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    database.create_tables(conn)
+
+    rng = random.Random(42)
+    names = {random_username(rng) for _ in range(user_count)}
+    conn.executemany("INSERT INTO users (username, password_hash, created_at) VALUES (?, 'x', 0)",
+                     [(name,) for name in names])
+    conn.commit()
+    print(f"📦 {len(names)} użytkowników")
+
+    start = time.perf_counter()
+    index = UserIndex(database.get_all_users(conn))
+    print(f"   budowa indeksu: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def like_search(prefix):
+        return conn.execute(LIKE_QUERY, (prefix + "%", limit)).fetchall()
+
+    print()
+    print(f"{'Prefiks':10}{'UserIndex [µs]':>16}{'LIKE [µs]':>14}")
+    for prefix in PREFIXES:
+        print(f"{prefix:10}{timed_us(index.search, prefix, limit):>16.1f}{timed_us(like_search, prefix):>14.1f}")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        index.add(f"user_new_{i}", f"Nowy{i}")
+    print(f"\nadd(): {(time.perf_counter() - start) * 1000:.1f} µs / użytkownik")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
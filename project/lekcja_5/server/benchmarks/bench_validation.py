@@ -0,0 +1,111 @@
+"""
+Benchmark: walidacja ramek od klienta (schemas.parse_event).
+
+1. Poprawna ramka send_message: dawne codec.decode() + dict.get() i
+   sprawdzanie pól w handlerze a parse_event (parsowanie i walidacja
+   w jednym przejściu)
+2. Zalew błędnych ramek (jak przy fuzzingu): losowe typy zdarzeń,
+   pola złych typów, ramki niebędące obiektem, niepoprawny JSON i ramki
+   większe niż MAX_FRAME_BYTES - ile odrzuceń na sekundę
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_validation.py            # 50 000 ramek
+    python benchmarks/bench_validation.py 200000
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec
+import config
+import schemas
+from schemas import validate_message_text
+
+SEND_MESSAGE = json.dumps({"type": "send_message", "payload": {
+    "channel_id": "general", "text": "Cześć wszystkim! 👋 Kto idzie na kawę?"
+}}, ensure_ascii=False)
+
+
+def legacy_send_message(frame: str):
+    """Dawna ścieżka: dekodowanie całej ramki i sprawdzanie pól w handlerze."""
+    message = codec.decode(frame)
+    if message.get("type") != "send_message":
+        return None
+    payload = message.get("payload", {})
+    channel_id = payload.get("channel_id", "").strip()
+    text = payload.get("text", "")
+    if not channel_id or not validate_message_text(text)[0]:
+        return None
+    return channel_id, text
+
+
+def fuzz_frames(count: int) -> list:
+    """Błędne ramki: zły typ, złe pola, nie-obiekt, niepoprawny JSON, za duże."""
+    rng = random.Random(7)
+    junk = [None, True, -1, 10 ** 30, "", " ", [], {}, "x" * 400, [1, 2]]
+    oversized = "x" * (config.MAX_FRAME_BYTES + 1)
+    frames = []
+    for number in range(count):
+        kind = number % 5
+        if kind == 0:
+            frames.append(json.dumps({"type": f"event_{rng.randrange(1000)}", "payload": {}}))
+        elif kind == 1:
+            frames.append(json.dumps({"type": rng.choice(["send_message", "request_history", "search_messages"]),
+                                      "payload": {"channel_id": rng.choice(junk), "text": rng.choice(junk),
+                                                  "query": rng.choice(junk), "limit": rng.choice(junk)}}))
+        elif kind == 2:
+            frames.append(json.dumps(rng.choice(junk)))
+        elif kind == 3:
+            frames.append(SEND_MESSAGE[:rng.randrange(1, len(SEND_MESSAGE))])
+        else:
+            frames.append(oversized)
+    return frames
+
+
+def reject_all(frames: list) -> int:
+    """Przepuszcza ramki przez parse_event; zwraca liczbę odrzuconych."""
+    rejected = 0
+    for frame in frames:
+        try:
+            event = schemas.parse_event(frame, schemas.SESSION_EVENTS)
+        except codec.DecodeError:
+            rejected += 1
+            continue
+        rejected += isinstance(event, schemas.InvalidEvent)
+    return rejected
+
+
+def rate(function, frames: list) -> float:
+    """Czas jednej ramki w mikrosekundach."""
+    start = time.perf_counter()
+    for frame in frames:
+        function(frame)
+    return (time.perf_counter() - start) / len(frames) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+
+    print(f"🧩 Kodek JSON: {codec.BACKEND}, {count} ramek")
+    print()
+    valid = [SEND_MESSAGE] * count
+    print(f"{'send_message [µs / ramkę]':34}")
+    print(f"{'decode + dict.get (poprzednio)':34}{rate(legacy_send_message, valid):>8.2f}")
+    print(f"{'parse_event':34}{rate(lambda frame: schemas.parse_event(frame, schemas.SESSION_EVENTS), valid):>8.2f}")
+
+    frames = fuzz_frames(count)
+    start = time.perf_counter()
+    rejected = reject_all(frames)
+    elapsed = time.perf_counter() - start
+    print()
+    print(f"🛡️  Błędne ramki: odrzucono {rejected} / {len(frames)} "
+          f"({elapsed / len(frames) * 1e6:.2f} µs / ramkę, {len(frames) / elapsed:,.0f} ramek / s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: ramki MessagePack (podprotokół msgpack) a JSON.
+
+1. Strona historii chat_history (50 wiadomości): rozmiar ramki i czas
+   dekodowania po stronie klienta (json.loads / msgpack.unpackb)
+2. Rozgłoszenie new_message na kanale z CLIENTS klientami, z których
+   połowa używa MessagePack:
+   - kodowanie dla każdego odbiorcy osobno (jak gdyby bez podziału na formaty)
+   - ConnectionManager - jedno kodowanie na format
+
+Wymaga pakietu msgpack.
+
+Użycie (z katalogu server/):
+    python benchmarks/bench_wire.py                  # 1 000 klientów
+    python benchmarks/bench_wire.py 10000
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import msgpack
+
+import codec
+import wire
+from models import Message
+from websocket_handler import ConnectionManager
+
+HISTORY_LIMIT = 50
+MESSAGES = 200
+
+
+class NullWebSocket:
+    """Klient, który niczego nie wysyła (liczy się tylko kodowanie i kolejki)."""
+
+    def __init__(self, subprotocols):
+        self.scope = {"subprotocols": subprotocols}
+
+    async def send_text(self, text: str):
+        pass
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+
+def message(number: int) -> dict:
+    """Wiadomość w formacie API."""
+    return Message(
+        id=(1_727_517_600_000 << 22) | number,
+        channel_id="general",
+        user_id=number % 20 + 1,
+        username=f"Użytkownik{number % 20 + 1}",
+        text=f"Wiadomość numer {number} - zażółć gęślą jaźń 👋, jutro o 10:00 spotkanie zespołu",
+        timestamp=1_727_517_600_000 + number * 1000,
+        seq=number + 1
+    ).to_dict()
+
+
+def history_sizes(repeat: int = 5_000):
+    """Rozmiar i czas dekodowania strony historii w obu formatach."""
+    frame = {"type": "chat_history", "payload": {
+        "channel_id": "general",
+        "messages": [message(number) for number in range(HISTORY_LIMIT)],
+        "has_more": True
+    }}
+    text = wire.encode(frame, wire.JSON).encode("utf-8")
+    packed = wire.encode(frame, wire.MSGPACK)
+    json_us = timeit.timeit(lambda: json.loads(text), number=repeat) / repeat * 1e6
+    msgpack_us = timeit.timeit(lambda: msgpack.unpackb(packed), number=repeat) / repeat * 1e6
+
+    print(f"📜 chat_history, {HISTORY_LIMIT} wiadomości")
+    print(f"{'':12}{'bajty':>10}{'dekodowanie [µs]':>20}")
+    print(f"{'JSON':12}{len(text):>10}{json_us:>20.1f}")
+    print(f"{'MessagePack':12}{len(packed):>10}{msgpack_us:>20.1f}")
+
+
+async def broadcast(clients: int, per_recipient: bool) -> float:
+    """Średni czas rozgłoszenia jednej wiadomości (ms) na mieszanym kanale."""
+    manager = ConnectionManager(queue_size=MESSAGES + 1)
+    for number in range(clients):
+        manager.connect(NullWebSocket(["msgpack"] if number % 2 else []), f"user_{number}", f"U{number}", "general")
+
+    frame = {"type": "new_message", "payload": {"channel_id": "general", "message": message(1)}}
+    start = time.perf_counter()
+    for _ in range(MESSAGES):
+        if per_recipient:
+            for websocket in manager.channel_subscribers["general"]:
+                manager.outbound[websocket].put(wire.encode(frame, manager.protocols[websocket]))
+        else:
+            await manager.broadcast_to_channel(frame, "general")
+    elapsed = time.perf_counter() - start
+
+    await manager.flush()
+    return elapsed / MESSAGES * 1000
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+
+    print(f"🧩 Kodek JSON: {codec.BACKEND}")
+    print()
+    history_sizes()
+
+    print()
+    print(f"📡 new_message, {clients} klientów (połowa MessagePack), {MESSAGES} wiadomości")
+    for label, per_recipient in (("kodowanie dla każdego odbiorcy", True), ("raz na format", False)):
+        print(f"{label:34}{asyncio.run(broadcast(clients, per_recipient)):>8.3f} ms / wiadomość")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Wspólny, gotowy do wysłania stan początkowy dla auth_success.
+
+Każde logowanie osobno pobierało listę kanałów i historię kanału general,
+budowało listę online i kodowało cały auth_success. Przy fali logowań po
+restarcie (tysiące klientów w kilka sekund) to tysiące identycznych zapytań
+i kodowań tych samych danych. BootstrapSnapshot trzyma zakodowane fragmenty:
+
+- lista kanałów - pobierana z bazy raz (ponownie po invalidate_channels())
+- lista online - kodowana raz na wersję listy obecności (presence.version)
+- historia kanału general - z HistoryCache, kodowana raz na zmianę kanału
+
+auth_success powstaje przez sklejenie fragmentów z danymi użytkownika
+(user_info, resume_token) - bez zapytań do bazy i bez kodowania całości.
+
+Lekki klient (bot, panel statystyk) może w auth_request wskazać, których
+sekcji potrzebuje (BootstrapSections) - pominięte sekcje nie są ani
+budowane, ani wysyłane. Można je pobrać później: request_channels,
+request_user_list i request_history.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import codec
+import wire
+from db_executor import AsyncDatabase
+from history_cache import HistoryCache
+from presence import PresenceAggregator
+
+
+@dataclass
+class BootstrapSections:
+    """Sekcje auth_success, o które prosi klient (pole "bootstrap" w auth_request)."""
+    channels: bool = True
+    roster: bool = True
+    history: bool = True
+    history_limit: int = 50
+
+    @classmethod
+    def parse(cls, options: Any, default_limit: int, max_limit: int) -> "BootstrapSections":
+        """
+        Odczytuje i waliduje sekcje z auth_request.
+
+        Brak pola oznacza wszystkie sekcje (jak dotychczas).
+
+        Args:
+            options: Wartość pola "bootstrap", np. {"history": False, "roster": True}
+            default_limit: Liczba wiadomości historii, gdy brak "history_limit"
+            max_limit: Największy dozwolony "history_limit"
+
+        Returns:
+            Wybrane sekcje
+
+        Raises:
+            ValueError: Jeśli pole ma zły format, nieznany klucz lub limit spoza zakresu
+        """
+        if options is None:
+            return cls(history_limit=default_limit)
+        if not isinstance(options, dict):
+            raise ValueError("Bootstrap options must be an object")
+
+        unknown = set(options) - {"channels", "roster", "history", "history_limit"}
+        if unknown:
+            raise ValueError(f"Unknown bootstrap section: {sorted(unknown)[0]}")
+        for name in ("channels", "roster", "history"):
+            if not isinstance(options.get(name, True), bool):
+                raise ValueError(f"Bootstrap section '{name}' must be true or false")
+
+        limit = options.get("history_limit", default_limit)
+        if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= max_limit:
+            raise ValueError(f"History limit must be between 1 and {max_limit}")
+
+        return cls(
+            channels=options.get("channels", True),
+            roster=options.get("roster", True),
+            history=options.get("history", True),
+            history_limit=limit
+        )
+
+
+class BootstrapSnapshot:
+    """
+    Buduje ramki auth_success ze wspólnych, zakodowanych fragmentów.
+
+    Przykład:
+        bootstrap = BootstrapSnapshot(db, history_cache, presence)
+        frame = await bootstrap.auth_success_frame(user_public, resume_token)
+    """
+
+    def __init__(self, db: AsyncDatabase, history: HistoryCache, presence: PresenceAggregator,
+                 channel_id: str = "general", history_limit: int = 50):
+        """
+        Args:
+            db: Asynchroniczna warstwa dostępu do bazy (lista kanałów)
+            history: Pamięć ostatnich wiadomości kanałów
+            presence: Zbiorcze powiadomienia o obecności (lista online i jej wersja)
+            channel_id: Kanał, którego historia trafia do auth_success
+            history_limit: Liczba wiadomości historii w auth_success
+        """
+        self.db = db
+        self.history = history
+        self.presence = presence
+        self.channel_id = channel_id
+        self.history_limit = history_limit
+
+        self._channels_json: Optional[str] = None
+        # Równoczesne logowania przy pustej pamięci czekają na jedno zapytanie
+        self._channels_lock = asyncio.Lock()
+        # (wersja listy obecności, zakodowana lista online)
+        self._roster: Optional[Tuple[int, str]] = None
+
+        # Metryki
+        self.frames_built = 0
+        self.channel_loads = 0
+        self.roster_encodes = 0
+
+    def invalidate_channels(self):
+        """Unieważnia listę kanałów (np. po dodaniu kanału) - zostanie pobrana ponownie."""
+        self._channels_json = None
+        self.history.invalidate_channels()
+
+    async def _channels(self) -> str:
+        """Zakodowana lista kanałów."""
+        if self._channels_json is None:
+            async with self._channels_lock:
+                if self._channels_json is None:
+                    channels = await self.db.get_all_channels()
+                    self._channels_json = codec.encode(channels)
+                    self.channel_loads += 1
+        return self._channels_json
+
+    def _roster_fragment(self) -> Tuple[int, str]:
+        """Zakodowana lista online z jej wersją."""
+        version = self.presence.version
+        if self._roster is None or self._roster[0] != version:
+            self._roster = (version, codec.encode(self.presence.snapshot()))
+            self.roster_encodes += 1
+        return self._roster
+
+    async def auth_success_frame(self, user_info: Dict[str, str], resume_token: str,
+                                 sections: Optional[BootstrapSections] = None,
+                                 protocol: str = wire.JSON) -> wire.Frame:
+        """
+        Buduje ramkę auth_success dla zalogowanego użytkownika.
+
+        Args:
+            user_info: Użytkownik w formacie {"id": "user_1", "name": "Jan"}
+            resume_token: Token wznowienia sesji dla tego użytkownika
+            sections: Sekcje, o które prosi klient (domyślnie - wszystkie)
+            protocol: Format ramek połączenia (wire.JSON lub wire.MSGPACK)
+
+        Returns:
+            Ramka gotowa do wysłania (str - JSON, bytes - MessagePack)
+        """
+        if sections is None:
+            sections = BootstrapSections(history_limit=self.history_limit)
+
+        # (klucz, wartość, czy wartość jest wspólnym zakodowanym fragmentem)
+        fields = [
+            ("user_info", user_info, False),
+            ("resume_token", resume_token, False)
+        ]
+        if sections.channels:
+            fields.append(("channels", await self._channels(), True))
+        if sections.history:
+            history = await self.history.get_latest_payload(self.channel_id, sections.history_limit)
+            fields.append(("initial_channel_history", history, True))
+        if sections.roster:
+            # Lista i wersja pobierane razem po ostatnim await - muszą do siebie pasować
+            presence_version, online_users = self._roster_fragment()
+            fields.append(("online_users", online_users, True))
+            fields.append(("presence_version", presence_version, False))
+        self.frames_built += 1
+
+        return wire.build_frame("auth_success", fields, protocol)
+
+    async def channel_list_frame(self, protocol: str = wire.JSON) -> wire.Frame:
+        """
+        Buduje ramkę channel_list (odpowiedź na request_channels).
+
+        Args:
+            protocol: Format ramek połączenia (wire.JSON lub wire.MSGPACK)
+
+        Returns:
+            Ramka gotowa do wysłania (str - JSON, bytes - MessagePack)
+        """
+        return wire.build_frame("channel_list", [("channels", await self._channels(), True)], protocol)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Zwraca metryki stanu początkowego.
+
+        Returns:
+            Słownik z liczbą zbudowanych ramek i przebudów fragmentów
+        """
+        return {
+            "frames_built": self.frames_built,
+            "channel_loads": self.channel_loads,
+            "roster_encodes": self.roster_encodes,
+            "presence_version": self._roster[0] if self._roster else None
+        }
@@ -0,0 +1,379 @@
+"""
+Broker zdarzeń dla trybu wielu procesów (CHAT_WORKERS > 1).
+
+Jeden proces uvicorn wykonuje całe rozgłaszanie i kodowanie JSON na jednym
+rdzeniu. W trybie wielu procesów kilka procesów (workerów) przyjmuje
+połączenia WebSocket na tym samym porcie, a zdarzenia, które muszą dotrzeć
+do klientów pozostałych workerów (nowe wiadomości, zmiany obecności),
+przechodzą przez lokalny broker:
+
+    worker 0 ──┐                             ┌──> worker 0 -> jego klienci
+    worker 1 ──┼──> Broker (seq, obecność) ──┼──> worker 1 -> jego klienci
+    worker 2 ──┘                             └──> worker 2 -> jego klienci
+
+- broker nadaje wiadomościom numer w kanale (seq) - liczniki w pamięci
+  każdego workera dawałyby te same numery; zdarzenia są rozsyłane
+  w kolejności nadania, więc każdy worker dostaje wiadomości kanału po kolei
+- broker pamięta, kto jest połączony z którym workerem: nowy worker
+  dostaje stan obecności zaraz po dołączeniu, a użytkownicy workera,
+  który się odłączył (np. awaria procesu), są ogłaszani jako rozłączeni
+- transport: BrokerServer / UnixBus (gniazdo Unix, jedna linia JSON na
+  zdarzenie) albo LocalBus - ten sam Broker w jednym procesie (testy)
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import codec
+
+# Maksymalna długość jednej linii (zdarzenia) w gnieździe brokera
+MAX_EVENT_BYTES = 1024 * 1024
+
+EventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    """Koduje zdarzenie jako jedną linię JSON (zwarty JSON nie zawiera znaków nowej linii)."""
+    return codec.encode(event).encode("utf-8") + b"\n"
+
+
+class Broker:
+    """
+    Rozsyła zdarzenia do wszystkich workerów, nadaje seq wiadomościom i śledzi obecność.
+
+    Niezależny od transportu - worker dołącza przez attach() z funkcją, która
+    przekazuje mu zakodowane zdarzenie (nie może blokować ani czekać).
+
+    Zdarzenia:
+        {"type": "message", "node": 1, "channel_id": "general", ...}  -> dostaje "seq"
+        {"type": "presence", "node": 1, "user": {"id", "name"}, "online": true}
+    """
+
+    def __init__(self, load_last_seq: Callable[[str], Awaitable[int]]):
+        """
+        Args:
+            load_last_seq: Zwraca ostatni seq kanału z bazy (wołane raz na kanał)
+        """
+        self._load_last_seq = load_last_seq
+        # Ostatni nadany numer wiadomości w każdym kanale
+        self._last_seq: Dict[str, int] = {}
+        # Numer workera -> funkcja przekazująca mu zakodowane zdarzenie
+        self._nodes: Dict[int, Callable[[bytes], None]] = {}
+        # Numer workera -> połączeni z nim użytkownicy (ID -> {"id", "name"})
+        self._presence: Dict[int, Dict[str, Dict[str, str]]] = {}
+
+        # Metryki
+        self.events = 0
+        self.messages = 0
+
+    def attach(self, node_id: int, deliver: Callable[[bytes], None]) -> None:
+        """
+        Dołącza workera i przekazuje mu obecność użytkowników pozostałych workerów.
+
+        Args:
+            node_id: Numer workera (config.NODE_ID)
+            deliver: Funkcja przekazująca workerowi zakodowane zdarzenie
+
+        Raises:
+            ValueError: Jeśli worker o tym numerze jest już dołączony
+        """
+        if node_id in self._nodes:
+            raise ValueError(f"Node {node_id} is already attached")
+        for other_id, users in self._presence.items():
+            for user in users.values():
+                deliver(encode_event({"type": "presence", "node": other_id, "user": user, "online": True}))
+        self._nodes[node_id] = deliver
+        self._presence[node_id] = {}
+
+    async def detach(self, node_id: int) -> None:
+        """
+        Odłącza workera; jego użytkownicy są ogłaszani pozostałym jako rozłączeni.
+
+        Args:
+            node_id: Numer workera
+        """
+        self._nodes.pop(node_id, None)
+        for user in self._presence.pop(node_id, {}).values():
+            await self.publish({"type": "presence", "node": node_id, "user": user, "online": False})
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        """
+        Rozsyła zdarzenie do wszystkich workerów (także do nadawcy).
+
+        Wiadomość dostaje tu numer w kanale. Między nadaniem numeru a rozesłaniem
+        nie ma await, więc kolejność rozsyłania = kolejność seq.
+
+        Args:
+            event: Zdarzenie od workera
+        """
+        if event["type"] == "message":
+            event["seq"] = await self._next_seq(event["channel_id"])
+            self.messages += 1
+        elif event["type"] == "presence":
+            users = self._presence.get(event["node"])
+            if users is not None:
+                if event["online"]:
+                    users[event["user"]["id"]] = event["user"]
+                else:
+                    users.pop(event["user"]["id"], None)
+
+        frame = encode_event(event)
+        for deliver in self._nodes.values():
+            deliver(frame)
+        self.events += 1
+
+    async def _next_seq(self, channel_id: str) -> int:
+        """Nadaje kolejny numer wiadomości w kanale (jak MessageWriter._next_seq w jednym procesie)."""
+        if channel_id not in self._last_seq:
+            last_seq = await self._load_last_seq(channel_id)
+            # Inna wiadomość mogła zainicjalizować licznik podczas odczytu z bazy
+            self._last_seq.setdefault(channel_id, last_seq)
+        self._last_seq[channel_id] += 1
+        return self._last_seq[channel_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Zwraca metryki brokera.
+
+        Returns:
+            Słownik z liczbą workerów, zdarzeń i użytkowników na workerach
+        """
+        return {
+            "nodes": sorted(self._nodes),
+            "events": self.events,
+            "messages": self.messages,
+            "channels": len(self._last_seq),
+            "users": {node_id: len(users) for node_id, users in self._presence.items()}
+        }
+
+
+class BrokerServer:
+    """
+    Broker dostępny dla workerów przez gniazdo Unix (uruchamiany w procesie nadzorującym).
+
+    Pierwsza linia od workera to {"type": "hello", "node": <numer>}, kolejne to zdarzenia.
+    """
+
+    def __init__(self, broker: Broker, path: str):
+        """
+        Args:
+            broker: Broker rozsyłający zdarzenia
+            path: Ścieżka gniazda Unix
+        """
+        self.broker = broker
+        self.path = path
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Połączenia workerów i zadania, które je obsługują (do zamknięcia w close())
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        """Zaczyna przyjmować workery (gniazdo pozostałe po poprzednim uruchomieniu jest usuwane)."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path, limit=MAX_EVENT_BYTES)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Obsługuje jednego workera: dołączenie, zdarzenia po kolei, odłączenie."""
+        node_id = None
+        attached = False
+        self._connections[writer] = asyncio.current_task()
+        try:
+            hello = codec.decode(await reader.readline())
+            node_id = hello["node"]
+            self.broker.attach(node_id, writer.write)
+            attached = True
+            print(f"🔗 Worker {node_id} połączony z brokerem")
+
+            # Zdarzenia jednego workera są rozsyłane w kolejności wysłania
+            while line := await reader.readline():
+                await self.broker.publish(codec.decode(line))
+
+        except Exception as e:
+            print(f"❌ Błąd połączenia brokera z workerem {node_id}: {e}")
+
+        finally:
+            if attached:
+                print(f"🔌 Worker {node_id} odłączony od brokera")
+                await self.broker.detach(node_id)
+            writer.close()
+            self._connections.pop(writer, None)
+
+    async def close(self) -> None:
+        """Zamyka gniazdo brokera i połączenia workerów."""
+        if self._server is not None:
+            self._server.close()
+            # Zamknięcie połączeń kończy pętle _serve() (koniec strumienia)
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*self._connections.values(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class UnixBus:
+    """
+    Połączenie workera z brokerem przez gniazdo Unix.
+
+    Przykład:
+        bus = UnixBus("chat-broker.sock", node_id=1)
+        await bus.start(handle_event)       # handle_event(event) dla każdego zdarzenia
+        bus.publish({"type": "presence", ...})
+    """
+
+    def __init__(self, path: str, node_id: int):
+        """
+        Args:
+            path: Ścieżka gniazda Unix brokera
+            node_id: Numer tego workera
+        """
+        self.path = path
+        self.node_id = node_id
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metryki
+        self.published = 0
+        self.received = 0
+
+    async def start(self, handler: EventHandler) -> None:
+        """
+        Łączy się z brokerem i zaczyna przekazywać zdarzenia do handlera (po kolei).
+
+        Args:
+            handler: Funkcja async wywoływana dla każdego zdarzenia
+        """
+        reader, self._writer = await asyncio.open_unix_connection(self.path, limit=MAX_EVENT_BYTES)
+        self._writer.write(encode_event({"type": "hello", "node": self.node_id}))
+        self._task = asyncio.create_task(self._run(reader, handler))
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """
+        Wysyła zdarzenie do brokera (bez czekania - kolejność wysyłania jest zachowana).
+
+        Args:
+            event: Zdarzenie
+        """
+        self._writer.write(encode_event(event))
+        self.published += 1
+
+    async def _run(self, reader: asyncio.StreamReader, handler: EventHandler) -> None:
+        """Pętla odbioru zdarzeń od brokera."""
+        while line := await reader.readline():
+            self.received += 1
+            try:
+                await handler(codec.decode(line))
+            except Exception as e:
+                print(f"❌ Błąd obsługi zdarzenia brokera: {e}")
+        print("❌ Utracono połączenie z brokerem - zdarzenia innych workerów nie docierają")
+
+    async def close(self) -> None:
+        """Zamyka połączenie z brokerem."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Zwraca metryki połączenia z brokerem.
+
+        Returns:
+            Słownik z liczbą wysłanych i odebranych zdarzeń
+        """
+        return {"transport": "unix", "path": self.path, "published": self.published, "received": self.received}
+
+
+class LocalBus:
+    """
+    Worker i Broker w tym samym procesie - zamiennik UnixBus (testy, benchmarki).
+
+    Zdarzenia są kodowane i dekodowane tak samo jak w gnieździe, a kolejki
+    zachowują kolejność wysyłania i odbioru.
+    """
+
+    def __init__(self, broker: Broker, node_id: int):
+        """
+        Args:
+            broker: Wspólny Broker workerów tego procesu
+            node_id: Numer tego workera
+        """
+        self.broker = broker
+        self.node_id = node_id
+        self._outbox: Optional[asyncio.Queue] = None
+        self._inbox: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        # Metryki
+        self.published = 0
+        self.received = 0
+
+    async def start(self, handler: EventHandler) -> None:
+        """
+        Dołącza do brokera i zaczyna przekazywać zdarzenia do handlera (po kolei).
+
+        Args:
+            handler: Funkcja async wywoływana dla każdego zdarzenia
+        """
+        self._outbox = asyncio.Queue()
+        self._inbox = asyncio.Queue()
+        self.broker.attach(self.node_id, self._inbox.put_nowait)
+        self._tasks = [asyncio.create_task(self._send()), asyncio.create_task(self._receive(handler))]
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """
+        Wysyła zdarzenie do brokera (bez czekania - kolejność wysyłania jest zachowana).
+
+        Args:
+            event: Zdarzenie
+        """
+        self._outbox.put_nowait(encode_event(event))
+        self.published += 1
+
+    async def _send(self) -> None:
+        """Przekazuje wysłane zdarzenia do brokera po kolei."""
+        while True:
+            frame = await self._outbox.get()
+            try:
+                await self.broker.publish(codec.decode(frame))
+            except Exception as e:
+                print(f"❌ Błąd brokera: {e}")
+            finally:
+                self._outbox.task_done()
+
+    async def _receive(self, handler: EventHandler) -> None:
+        """Przekazuje zdarzenia od brokera do handlera po kolei."""
+        while True:
+            frame = await self._inbox.get()
+            self.received += 1
+            try:
+                await handler(codec.decode(frame))
+            except Exception as e:
+                print(f"❌ Błąd obsługi zdarzenia brokera: {e}")
+            finally:
+                self._inbox.task_done()
+
+    async def flush(self) -> None:
+        """Czeka, aż wysłane zdarzenia trafią do brokera, a odebrane zostaną obsłużone."""
+        await self._outbox.join()
+        await self._inbox.join()
+
+    async def close(self) -> None:
+        """Odłącza workera od brokera."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        await self.broker.detach(self.node_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Zwraca metryki połączenia z brokerem.
+
+        Returns:
+            Słownik z liczbą wysłanych i odebranych zdarzeń
+        """
+        return {"transport": "local", "published": self.published, "received": self.received}
@@ -6,6 +6,8 @@ Użycie: python check_database.py
 import sqlite3
 import os
 
+from models import format_timestamp, format_user_id
+
 def main():
     db_path = "chat.db"
 
@@ -29,20 +31,20 @@ def main():
 
     if users:
         for user_id, username, created_at in users:
-            print(f"  • {username:15} (ID: {user_id:10}) - {created_at}")
+            print(f"  • {username:15} (ID: {format_user_id(user_id):10}) - {format_timestamp(created_at)}")
     else:
         print("  (brak użytkowników)")
 
     # Kanały
     print("\n📺 KANAŁY:")
     print("-" * 60)
-    cursor.execute("SELECT id, name, type FROM channels")
+    cursor.execute("SELECT id, slug, name, type FROM channels")
     channels = cursor.fetchall()
 
     if channels:
-        for channel_id, name, channel_type in channels:
+        for channel_key, channel_id, name, channel_type in channels:
             # Policz wiadomości w kanale
-            cursor.execute("SELECT COUNT(*) FROM messages WHERE channel_id = ?", (channel_id,))
+            cursor.execute("SELECT COUNT(*) FROM messages WHERE channel_id = ?", (channel_key,))
             msg_count = cursor.fetchone()[0]
             print(f"  • {name:15} ({channel_id:10}) - {msg_count} wiadomości")
     else:
@@ -52,10 +54,11 @@ def main():
     print("\n💬 OSTATNIE WIADOMOŚCI (10 najnowszych):")
     print("-" * 60)
     cursor.execute("""
-        SELECT m.text, u.username, m.channel_id, m.created_at
+        SELECT m.text, u.username, c.slug, m.created_at
         FROM messages m
         JOIN users u ON m.user_id = u.id
-        ORDER BY m.created_at DESC
+        JOIN channels c ON m.channel_id = c.id
+        ORDER BY m.id DESC
         LIMIT 10
     """)
     messages = cursor.fetchall()
@@ -64,7 +67,7 @@ def main():
         for text, username, channel_id, created_at in messages:
             text_preview = text[:50] + "..." if len(text) > 50 else text
             print(f"  [{channel_id:10}] {username:10}: {text_preview}")
-            print(f"               └─ {created_at}")
+            print(f"               └─ {format_timestamp(created_at)}")
     else:
         print("  (brak wiadomości)")
 
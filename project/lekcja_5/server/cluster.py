@@ -0,0 +1,266 @@
+"""
+Worker w trybie wielu procesów - obsługa zdarzeń brokera (broker.py).
+
+W jednym procesie handler send_message sam nadaje seq, dopisuje wiadomość
+do pamięci historii i rozgłasza ją, a logowanie / wylogowanie trafia
+prosto do PresenceAggregator. W trybie wielu procesów te zdarzenia idą
+przez broker i wracają do KAŻDEGO workera (także nadawcy) w tej samej
+kolejności:
+
+- ClusterNode.publish_message() - wiadomość bez seq trafia do brokera;
+  po jej powrocie (już z seq) każdy worker dopisuje ją do swojej pamięci
+  historii i rozgłasza własnym klientom, a worker nadawcy zapisuje ją
+  w bazie (MessageWriter.enqueue)
+- ClusterPresence - logowania i wylogowania wszystkich workerów; użytkownik
+  jest online, dopóki jest połączony z którymkolwiek workerem (powrót na
+  innym workerze w okresie karencji jest niewidoczny dla pozostałych)
+"""
+
+from typing import Any, Dict, Optional, Set
+
+import database
+from history_cache import HistoryCache
+from message_writer import FailureCallback, MessageWriter
+from models import Message
+from presence import PresenceAggregator
+
+# Każdy worker numeruje wersje listy obecności we własnym zakresie
+# (node_id * PRESENCE_VERSION_RANGE + n) - wersja z innego workera (np. po
+# wznowieniu sesji na innym procesie) nigdy nie trafia w historię zmian
+# i klient dostaje pełną listę. Zakres mieści się w liczbach całkowitych
+# bezpiecznych w JavaScript (1023 * 2^40 < 2^53).
+PRESENCE_VERSION_RANGE = 1 << 40
+
+
+class ClusterPresence(PresenceAggregator):
+    """
+    PresenceAggregator, który łączy obecność użytkowników wszystkich workerów.
+
+    user_joined() / user_left() (wołane przez handlery) tylko wysyłają zdarzenie
+    do brokera. Zmiana listy następuje w apply() - po powrocie zdarzenia
+    z brokera, u wszystkich workerów w tej samej kolejności.
+    """
+
+    def __init__(self, manager, bus, node_id: int, window_ms: int = 250, history_size: int = 100,
+                 reconnect_grace_ms: int = 0):
+        """
+        Args:
+            manager: ConnectionManager - rozgłaszanie zmian klientom tego workera
+            bus: Połączenie z brokerem (UnixBus lub LocalBus)
+            node_id: Numer tego workera
+            window_ms: Długość okna zbierania zmian
+            history_size: Liczba ostatnich zmian pamiętanych dla request_user_list
+            reconnect_grace_ms: Czas na ponowne połączenie, zanim wyjście zostanie ogłoszone
+        """
+        super().__init__(manager, window_ms, history_size, reconnect_grace_ms,
+                         first_version=node_id * PRESENCE_VERSION_RANGE)
+        self.bus = bus
+        self.node_id = node_id
+        # ID użytkownika -> numery workerów, z którymi jest połączony
+        self._nodes: Dict[str, Set[int]] = {}
+        # Nazwa użytkownika -> numery workerów (is_connected_elsewhere)
+        self._names: Dict[str, Set[int]] = {}
+
+    def user_joined(self, user: Dict[str, str]):
+        """
+        Zgłasza brokerowi połączenie użytkownika z tym workerem.
+
+        Args:
+            user: Użytkownik w formacie {"id": "user_1", "name": "Jan"}
+        """
+        self.bus.publish({"type": "presence", "node": self.node_id, "user": user, "online": True})
+
+    def user_left(self, user: Dict[str, str], now: Optional[float] = None):
+        """
+        Zgłasza brokerowi rozłączenie użytkownika z tym workerem.
+
+        Args:
+            user: Użytkownik w formacie {"id": "user_1", "name": "Jan"}
+            now: Nieużywane - okres karencji liczy się od odebrania zdarzenia
+        """
+        self.bus.publish({"type": "presence", "node": self.node_id, "user": user, "online": False})
+
+    def apply(self, event: Dict[str, Any]):
+        """
+        Uwzględnia zdarzenie obecności od brokera (dowolnego workera).
+
+        Użytkownik dołącza przy pierwszym połączeniu i wychodzi (z okresem
+        karencji) po rozłączeniu z ostatnim workerem.
+
+        Args:
+            event: {"type": "presence", "node": 1, "user": {"id", "name"}, "online": bool}
+        """
+        user, node_id = event["user"], event["node"]
+        nodes = self._nodes.setdefault(user["id"], set())
+        names = self._names.setdefault(user["name"], set())
+
+        if event["online"]:
+            first = not nodes
+            nodes.add(node_id)
+            names.add(node_id)
+            if first:
+                super().user_joined(user)
+            return
+
+        nodes.discard(node_id)
+        names.discard(node_id)
+        if not names:
+            del self._names[user["name"]]
+        if not nodes:
+            del self._nodes[user["id"]]
+            super().user_left(user)
+
+    def is_connected_elsewhere(self, username: str) -> bool:
+        """
+        Sprawdza, czy użytkownik jest połączony z innym workerem.
+
+        Args:
+            username: Nazwa użytkownika
+
+        Returns:
+            True jeśli użytkownik jest połączony z innym workerem
+        """
+        return bool(self._names.get(username, set()) - {self.node_id})
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Zwraca metryki powiadomień o obecności (z liczbą użytkowników wszystkich workerów).
+
+        Returns:
+            Słownik z wersją listy, liczbą oczekujących zmian i wysłanych aktualizacji
+        """
+        stats = super().get_stats()
+        stats["connected_users"] = len(self._nodes)
+        return stats
+
+
+class ClusterNode:
+    """
+    Dostarcza zdarzenia brokera klientom tego workera.
+
+    Przykład:
+        node = ClusterNode(UnixBus(path, node_id), node_id, manager, writer, history, presence)
+        await node.start()
+        node.publish_message("general", 1, "Jan", "Hej!")   # rozgłasza handle_event()
+    """
+
+    def __init__(self, bus, node_id: int, manager, writer: MessageWriter, history: HistoryCache,
+                 presence: ClusterPresence):
+        """
+        Args:
+            bus: Połączenie z brokerem (UnixBus lub LocalBus)
+            node_id: Numer tego workera
+            manager: ConnectionManager - klienci tego workera
+            writer: Kolejka zapisu wiadomości (zapisuje tylko worker nadawcy)
+            history: Pamięć ostatnich wiadomości kanałów
+            presence: Obecność użytkowników wszystkich workerów
+        """
+        self.bus = bus
+        self.node_id = node_id
+        self.manager = manager
+        self.writer = writer
+        self.history = history
+        self.presence = presence
+
+        # Wiadomości wysłane z tego workera, czekające na powrót od brokera:
+        # klucz wiadomości -> callback niezapisanej wiadomości (powiadomienie nadawcy)
+        self._on_failure: Dict[int, FailureCallback] = {}
+
+        # Metryki
+        self.messages_published = 0
+        self.messages_delivered = 0
+
+    async def start(self):
+        """Łączy się z brokerem i zaczyna obsługiwać jego zdarzenia."""
+        await self.bus.start(self.handle_event)
+
+    async def close(self):
+        """Zamyka połączenie z brokerem."""
+        await self.bus.close()
+
+    def publish_message(self, channel_id: str, user_key: int, username: str, text: str,
+                        on_failure: Optional[FailureCallback] = None) -> int:
+        """
+        Wysyła nową wiadomość do brokera (ID i timestamp nadawane od razu, seq - przez broker).
+
+        Kanał musi istnieć - sprawdza go wywołujący (HistoryCache.has_channel),
+        zanim wiadomość trafi do brokera i dostanie seq.
+
+        Args:
+            channel_id: ID kanału
+            user_key: Klucz autora (parse_user_id)
+            username: Nazwa autora
+            text: Treść wiadomości
+            on_failure: Wywoływany, jeśli wiadomość nie zostanie zapisana (MessageWriter.enqueue)
+
+        Returns:
+            Klucz wiadomości
+        """
+        message_key = database.generate_message_id()
+        if on_failure is not None:
+            self._on_failure[message_key] = on_failure
+        self.bus.publish({
+            "type": "message",
+            "node": self.node_id,
+            "channel_id": channel_id,
+            "key": message_key,
+            "user_key": user_key,
+            "username": username,
+            "text": text,
+            "created_at": database.get_timestamp_ms()
+        })
+        self.messages_published += 1
+        return message_key
+
+    async def handle_event(self, event: Dict[str, Any]):
+        """
+        Obsługuje zdarzenie od brokera.
+
+        Args:
+            event: Zdarzenie "message" (z seq) lub "presence"
+        """
+        if event["type"] == "message":
+            await self._deliver_message(event)
+        elif event["type"] == "presence":
+            self.presence.apply(event)
+
+    async def _deliver_message(self, event: Dict[str, Any]):
+        """Zapisuje (tylko worker nadawcy), dopisuje do historii i rozgłasza wiadomość."""
+        channel_id = event["channel_id"]
+        if event["node"] == self.node_id:
+            self.writer.enqueue(event["key"], channel_id, event["user_key"], event["text"],
+                                event["created_at"], event["seq"], self._on_failure.pop(event["key"], None))
+
+        message = Message(
+            id=event["key"],
+            channel_id=channel_id,
+            user_id=event["user_key"],
+            username=event["username"],
+            text=event["text"],
+            timestamp=event["created_at"],
+            seq=event["seq"]
+        ).to_dict()
+        self.history.append(channel_id, message)
+
+        await self.manager.broadcast_to_channel({
+            "type": "new_message",
+            "payload": {
+                "channel_id": channel_id,
+                "message": message
+            }
+        }, channel_id)
+        self.messages_delivered += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Zwraca metryki workera.
+
+        Returns:
+            Słownik z numerem workera, liczbą wiadomości i metrykami połączenia z brokerem
+        """
+        return {
+            "node_id": self.node_id,
+            "messages_published": self.messages_published,
+            "messages_delivered": self.messages_delivered,
+            "bus": self.bus.get_stats()
+        }
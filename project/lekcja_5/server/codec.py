@@ -0,0 +1,159 @@
+"""
+Kodowanie i dekodowanie ramek JSON (koperta {"type": ..., "payload": ...}).
+
+Wszystkie ramki wysyłane do klientów i odbierane od nich przechodzą przez
+ten moduł - encode() w ConnectionManager, send_error(), gotowych ramkach
+historii i auth_success, decode() w pętli odbioru serwera (a także
+zdarzenia brokera w trybie wielu procesów).
+
+Dostępne implementacje (backend):
+- "orjson"  - najszybsza, jeśli pakiet orjson jest zainstalowany
+- "msgspec" - jeśli zainstalowany jest msgspec
+- "json"    - biblioteka standardowa, zawsze dostępna
+- "auto"    - pierwsza dostępna z powyższych (domyślnie)
+
+Wszystkie dają ten sam tekst: zwarty JSON (bez spacji po "," i ":"),
+znaki spoza ASCII bez escapowania (UTF-8). Wyjątek to liczby
+zmiennoprzecinkowe w notacji wykładniczej (1e-07 / 1e-7) - protokół ich
+nie używa. Obiekty, których szybka implementacja nie obsługuje (np. klucze
+słownika niebędące tekstem), są kodowane biblioteką standardową.
+
+Implementację wybiera config.JSON_CODEC (CHAT_JSON_CODEC) przy imporcie
+modułu; use() zmienia ją później (np. w testach i benchmarkach). Funkcje
+są wtedy podmieniane - należy je wołać jako codec.encode(), a nie
+importować (from codec import encode zapamiętałby poprzednią).
+
+Przykład:
+    import codec
+    text = codec.encode({"type": "error_message", "payload": {"message": "Błąd"}})
+    codec.decode(text)["type"]   # "error_message"
+"""
+
+import json
+from typing import Any, Callable, Dict, Tuple, Union
+
+import config
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+class DecodeError(ValueError):
+    """Odebrana ramka nie jest poprawnym JSON-em."""
+
+
+def _json_encode(obj: Any) -> str:
+    """Koduje obiekt biblioteką standardową."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _json_decode(data: Union[str, bytes]) -> Any:
+    """Dekoduje JSON biblioteką standardową."""
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        raise DecodeError(str(e)) from e
+
+
+def _load_json() -> Tuple[Callable, Callable]:
+    """Implementacja z biblioteki standardowej."""
+    return _json_encode, _json_decode
+
+
+def _load_orjson() -> Tuple[Callable, Callable]:
+    """Implementacja orjson (ImportError, jeśli nie jest zainstalowany)."""
+    import orjson
+
+    dumps, loads = orjson.dumps, orjson.loads
+
+    def encode(obj: Any) -> str:
+        try:
+            return dumps(obj).decode("utf-8")
+        except TypeError:
+            return _json_encode(obj)
+
+    def decode(data: Union[str, bytes]) -> Any:
+        try:
+            return loads(data)
+        except ValueError as e:
+            raise DecodeError(str(e)) from e
+
+    return encode, decode
+
+
+def _load_msgspec() -> Tuple[Callable, Callable]:
+    """Implementacja msgspec (ImportError, jeśli nie jest zainstalowany)."""
+    import msgspec
+
+    encoder, decoder = msgspec.json.Encoder(), msgspec.json.Decoder()
+
+    def encode(obj: Any) -> str:
+        try:
+            return encoder.encode(obj).decode("utf-8")
+        except (TypeError, OverflowError, msgspec.EncodeError):
+            return _json_encode(obj)
+
+    def decode(data: Union[str, bytes]) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise DecodeError(str(e)) from e
+
+    return encode, decode
+
+
+_LOADERS: Dict[str, Callable[[], Tuple[Callable, Callable]]] = {
+    "orjson": _load_orjson,
+    "msgspec": _load_msgspec,
+    "json": _load_json
+}
+
+# Aktualna implementacja - ustawiana przez use()
+BACKEND = "json"
+encode: Callable[[Any], str] = _json_encode
+decode: Callable[[Union[str, bytes]], Any] = _json_decode
+
+
+def available() -> Tuple[str, ...]:
+    """
+    Zwraca zainstalowane implementacje.
+
+    Returns:
+        Nazwy implementacji w kolejności wyboru przez "auto"
+    """
+    names = []
+    for name in BACKENDS:
+        try:
+            _LOADERS[name]()
+        except ImportError:
+            continue
+        names.append(name)
+    return tuple(names)
+
+
+def use(name: str = "auto") -> str:
+    """
+    Ustawia implementację kodowania.
+
+    Args:
+        name: "auto", "orjson", "msgspec" lub "json"
+
+    Returns:
+        Nazwa wybranej implementacji
+
+    Raises:
+        ValueError: Nieznana nazwa
+        ImportError: Wybrana implementacja nie jest zainstalowana
+    """
+    global BACKEND, encode, decode
+
+    if name == "auto":
+        name = available()[0]
+    if name not in _LOADERS:
+        raise ValueError(f"Nieznany kodek JSON: {name} (dostępne: auto, {', '.join(BACKENDS)})")
+
+    encode, decode = _LOADERS[name]()
+    BACKEND = name
+    return name
+
+
+use(config.JSON_CODEC)
@@ -0,0 +1,188 @@
+"""
+Konfiguracja serwera czatu.
+
+Wszystkie wartości mają rozsądne ustawienia domyślne. Każdą można nadpisać
+zmienną środowiskową o tej samej nazwie z prefiksem CHAT_, np.:
+
+    CHAT_MESSAGE_FLUSH_INTERVAL_MS=20 python server.py
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    """Odczytuje liczbę całkowitą ze zmiennej środowiskowej CHAT_<name>."""
+    value = os.environ.get(f"CHAT_{name}")
+    return int(value) if value else default
+
+
+def _env_str(name: str, default: str) -> str:
+    """Odczytuje tekst ze zmiennej środowiskowej CHAT_<name>."""
+    return os.environ.get(f"CHAT_{name}") or default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Odczytuje wartość logiczną ze zmiennej środowiskowej CHAT_<name>."""
+    value = os.environ.get(f"CHAT_{name}")
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+# ====== SERWER ======
+
+# Numer procesu serwera (0 - 1023) zapisywany w ID wiadomości - przy kilku
+# procesach każdy musi mieć inny, żeby ID nie mogły się powtórzyć
+NODE_ID = _env_int("NODE_ID", 0)
+# Liczba procesów (workerów) przyjmujących połączenia na wspólnym porcie.
+# Przy więcej niż jednym nowe wiadomości i obecność przechodzą przez broker
+# w procesie nadzorującym (gniazdo Unix - tylko Linux / macOS), a workery
+# dostają kolejne numery NODE_ID, NODE_ID + 1, ...
+WORKERS = _env_int("WORKERS", 1)
+# Ścieżka gniazda Unix brokera (tryb wielu procesów)
+BROKER_PATH = _env_str("BROKER_PATH", "chat-broker.sock")
+# Kodowanie ramek JSON: "auto" (orjson lub msgspec, jeśli zainstalowany,
+# w przeciwnym razie biblioteka standardowa), "orjson", "msgspec" lub "json"
+JSON_CODEC = _env_str("JSON_CODEC", "auto")
+
+# ====== POŁĄCZENIA ======
+
+# Maksymalny rozmiar ramki od klienta (bajty / znaki) - dłuższa jest odrzucana
+# bez parsowania i kończy połączenie (wiadomość ma najwyżej 300 znaków)
+MAX_FRAME_BYTES = _env_int("MAX_FRAME_BYTES", 65_536)
+# Maksymalna liczba ramek czekających na wysłanie do jednego klienta
+OUTBOUND_QUEUE_SIZE = _env_int("OUTBOUND_QUEUE_SIZE", 256)
+# Co zrobić, gdy kolejka klienta jest pełna: "drop_oldest" (usuń najstarszą
+# ramkę), "disconnect" (zamknij połączenie) lub "coalesce" (nowsza pełna
+# lista online_users zastępuje czekającą, w pozostałych przypadkach drop_oldest)
+OUTBOUND_OVERFLOW_POLICY = _env_str("OUTBOUND_OVERFLOW_POLICY", "coalesce")
+# Klient jest "wolny", gdy wysłanie jednej ramki trwa dłużej niż tyle ms...
+SLOW_CONSUMER_LATENCY_MS = _env_int("SLOW_CONSUMER_LATENCY_MS", 2000)
+# ...albo w jego kolejce czeka więcej niż tyle bajtów
+SLOW_CONSUMER_BACKLOG_BYTES = _env_int("SLOW_CONSUMER_BACKLOG_BYTES", 1_048_576)
+# Jak długo klient może pozostać wolny, zanim zostanie rozłączony (kod 4001)
+SLOW_CONSUMER_GRACE_MS = _env_int("SLOW_CONSUMER_GRACE_MS", 10_000)
+# Co ile ms sprawdzać kolejki klientów
+SLOW_CONSUMER_CHECK_INTERVAL_MS = _env_int("SLOW_CONSUMER_CHECK_INTERVAL_MS", 1000)
+
+# ====== KONTROLA PRZYJĘĆ ======
+
+# Nowe połączenia i logowania ponad te progi są odrzucane (zamknięcie kodem
+# 1013 z czasem do ponownej próby); zalogowani klienci nie są rozłączani.
+# Progi dotyczą jednego procesu. 0 - bez danego ograniczenia
+# Maksymalna liczba połączeń WebSocket (także przed zalogowaniem)
+MAX_CONNECTIONS = _env_int("MAX_CONNECTIONS", 10_000)
+# Maksymalna liczba jednocześnie obsługiwanych auth_request / resume_request
+MAX_PENDING_AUTH = _env_int("MAX_PENDING_AUTH", 64)
+# Opóźnienie pętli zdarzeń (ms), powyżej którego nowi klienci są odrzucani
+SHED_LOOP_LAG_MS = _env_int("SHED_LOOP_LAG_MS", 250)
+# Liczba zapytań czekających w kolejce bazy, powyżej której nowi klienci są odrzucani
+SHED_DB_QUEUE_DEPTH = _env_int("SHED_DB_QUEUE_DEPTH", 500)
+# Najkrótszy czas do ponownej próby podawany odrzuconym (losowo do 2x dłuższy)
+SHED_RETRY_AFTER_MS = _env_int("SHED_RETRY_AFTER_MS", 2000)
+# Czas (ms) na przysłanie auth_request / resume_request po połączeniu - potem
+# połączenie jest zamykane kodem 1008 i zwalnia miejsce. 0 - bez limitu
+AUTH_TIMEOUT_MS = _env_int("AUTH_TIMEOUT_MS", 10_000)
+# Co ile ms mierzyć opóźnienie pętli zdarzeń
+LOOP_LAG_CHECK_INTERVAL_MS = _env_int("LOOP_LAG_CHECK_INTERVAL_MS", 100)
+
+# ====== LIMITY ZDARZEŃ ======
+
+# Każdy typ zdarzenia ma osobny limit na użytkownika (wspólny dla jego
+# połączeń i nieodnawiany po ponownym połączeniu): *_PER_S zdarzeń na
+# sekundę, chwilowo do *_BURST naraz (token bucket). Nadmiarowe zdarzenie
+# jest odrzucane z error_message "rate_limited" i retry_after_ms.
+# *_PER_S = 0 - bez limitu dla tego zdarzenia
+RATE_SEND_MESSAGE_PER_S = _env_int("RATE_SEND_MESSAGE_PER_S", 5)
+RATE_SEND_MESSAGE_BURST = _env_int("RATE_SEND_MESSAGE_BURST", 10)
+# Przełączanie kanałów i przewijanie historii
+RATE_HISTORY_PER_S = _env_int("RATE_HISTORY_PER_S", 10)
+RATE_HISTORY_BURST = _env_int("RATE_HISTORY_BURST", 20)
+# Wyszukiwanie pełnotekstowe (najdroższe zapytanie do bazy)
+RATE_SEARCH_MESSAGES_PER_S = _env_int("RATE_SEARCH_MESSAGES_PER_S", 2)
+RATE_SEARCH_MESSAGES_BURST = _env_int("RATE_SEARCH_MESSAGES_BURST", 5)
+# Podpowiedzi nazw użytkowników (zapytanie przy każdym naciśnięciu klawisza)
+RATE_SEARCH_USERS_PER_S = _env_int("RATE_SEARCH_USERS_PER_S", 10)
+RATE_SEARCH_USERS_BURST = _env_int("RATE_SEARCH_USERS_BURST", 20)
+# request_user_list i request_channels (każde z osobnym limitem)
+RATE_LISTS_PER_S = _env_int("RATE_LISTS_PER_S", 2)
+RATE_LISTS_BURST = _env_int("RATE_LISTS_BURST", 5)
+# Błędne ramki (nieznany typ, niepoprawne pola) - każda kosztuje walidację
+# i odpowiedź z błędem
+RATE_INVALID_PER_S = _env_int("RATE_INVALID_PER_S", 2)
+RATE_INVALID_BURST = _env_int("RATE_INVALID_BURST", 10)
+
+# ====== OBECNOŚĆ UŻYTKOWNIKÓW ======
+
+# Przez tyle ms zbierane są logowania i wylogowania przed wysłaniem jednej
+# wspólnej zmiany user_list_update (added / removed, nowa wersja listy)
+PRESENCE_WINDOW_MS = _env_int("PRESENCE_WINDOW_MS", 250)
+# Liczba ostatnich zmian listy pamiętanych dla request_user_list - klient
+# z wersją starszą niż ta historia dostaje pełną listę
+PRESENCE_HISTORY_SIZE = _env_int("PRESENCE_HISTORY_SIZE", 100)
+# Wyjście użytkownika jest ogłaszane dopiero, gdy nie połączy się ponownie
+# w ciągu tylu ms (0 - bez karencji); powrót w tym czasie jest niewidoczny
+PRESENCE_RECONNECT_GRACE_MS = _env_int("PRESENCE_RECONNECT_GRACE_MS", 5000)
+
+# ====== WZNAWIANIE SESJI ======
+
+# Klucz podpisu tokenów wznowienia (resume_token). Musi być stały i taki sam
+# na wszystkich procesach, żeby tokeny przetrwały restart serwera; pusty -
+# losowy klucz przy każdym starcie
+RESUME_SECRET = _env_str("RESUME_SECRET", "")
+# Czas ważności tokenu wznowienia w sekundach
+RESUME_TOKEN_TTL_S = _env_int("RESUME_TOKEN_TTL_S", 3600)
+# Maksymalna liczba kanałów w resume_request (last_seq)
+RESUME_MAX_CHANNELS = _env_int("RESUME_MAX_CHANNELS", 100)
+
+# ====== BAZA DANYCH ======
+
+# Liczba połączeń tylko do odczytu (historia, kanały, logowanie)
+DB_READERS = _env_int("DB_READERS", 4)
+# Liczba wątków wykonujących zapytania SQLite (czytelnicy + jeden zapisujący)
+DB_WORKERS = _env_int("DB_WORKERS", DB_READERS + 1)
+# PRAGMA synchronous: NORMAL w trybie WAL nie gubi danych przy awarii procesu,
+# FULL dodatkowo chroni przed utratą ostatnich transakcji przy zaniku zasilania
+DB_SYNCHRONOUS = _env_str("DB_SYNCHRONOUS", "NORMAL")
+# PRAGMA cache_size: wartość ujemna = rozmiar w KiB (-8000 = ok. 8 MB na połączenie)
+DB_CACHE_SIZE = _env_int("DB_CACHE_SIZE", -8000)
+# PRAGMA mmap_size: ile bajtów pliku bazy mapować w pamięci (0 = wyłączone)
+DB_MMAP_SIZE = _env_int("DB_MMAP_SIZE", 64 * 1024 * 1024)
+# Maksymalna liczba zapytań czekających w kolejce puli wątków
+DB_MAX_PENDING = _env_int("DB_MAX_PENDING", 1000)
+
+# ====== ZAPIS WIADOMOŚCI (write-behind) ======
+
+# Co ile milisekund zapisywać zebrane wiadomości
+MESSAGE_FLUSH_INTERVAL_MS = _env_int("MESSAGE_FLUSH_INTERVAL_MS", 50)
+# Po ilu wiadomościach zapisać paczkę bez czekania na interwał
+MESSAGE_FLUSH_MAX_BATCH = _env_int("MESSAGE_FLUSH_MAX_BATCH", 100)
+# True = handle_send_message czeka na commit przed rozgłoszeniem wiadomości
+# (nieużywane w trybie wielu procesów - rozgłasza worker po otrzymaniu seq od brokera)
+MESSAGE_ACK_AFTER_COMMIT = _env_bool("MESSAGE_ACK_AFTER_COMMIT", False)
+
+# ====== HISTORIA ======
+
+# Domyślna liczba wiadomości na stronie historii (auth_success, request_history)
+HISTORY_PAGE_SIZE = _env_int("HISTORY_PAGE_SIZE", 50)
+# Maksymalna liczba wiadomości, o którą klient może poprosić w request_history
+HISTORY_MAX_PAGE_SIZE = _env_int("HISTORY_MAX_PAGE_SIZE", 100)
+# Liczba ostatnich wiadomości trzymanych w pamięci dla każdego kanału
+HISTORY_CACHE_SIZE = _env_int("HISTORY_CACHE_SIZE", 100)
+# Maksymalna liczba kanałów z historią w pamięci (najdawniej używane są usuwane)
+HISTORY_CACHE_CHANNELS = _env_int("HISTORY_CACHE_CHANNELS", 1000)
+# Maksymalna liczba zakodowanych ramek starszych stron historii (kursor "before")
+HISTORY_PAGE_FRAMES = _env_int("HISTORY_PAGE_FRAMES", 1000)
+
+# ====== WYSZUKIWANIE ======
+
+# Maksymalna liczba użytkowników zwracanych przez search_users
+USER_SEARCH_LIMIT = _env_int("USER_SEARCH_LIMIT", 10)
+# Domyślna liczba wyników na stronie wyszukiwania (search_messages)
+SEARCH_PAGE_SIZE = _env_int("SEARCH_PAGE_SIZE", 20)
+# Maksymalna liczba wyników, o którą klient może poprosić na jednej stronie
+SEARCH_MAX_PAGE_SIZE = _env_int("SEARCH_MAX_PAGE_SIZE", 50)
+# Liczba najnowszych trafień sortowanych według trafności (bm25) - ogranicza
+# koszt zapytania niezależnie od rozmiaru bazy; starsze trafienia są na
+# kolejnych stronach, od najnowszych
+SEARCH_RANK_WINDOW = _env_int("SEARCH_RANK_WINDOW", 200)
@@ -6,14 +6,125 @@ Ten moduł odpowiada za:
 - Tworzenie tabel
 - Ładowanie przykładowych danych (seed data)
 - Operacje CRUD (Create, Read, Update, Delete)
+
+Schemat v2: klucze są liczbami (INTEGER PRIMARY KEY), a czas liczbą
+milisekund od 1970 r. Wiersze, indeksy i złączenia są dzięki temu mniejsze
+niż przy tekstowych ID i datach. Tekstowe ID i daty ISO 8601 tworzą modele
+(models.py) dopiero przy wysyłaniu do klienta. Kanały zachowują tekstowe,
+publiczne ID (np. "general") w kolumnie slug.
 """
 
 import sqlite3
 import os
-import uuid
+import re
+import time
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any
-from models import User, Channel, Message
+from typing import Optional, List, Dict, Any, Union
+
+import config
+from ids import MessageIdGenerator, format_message_id, parse_message_id
+from models import User, Channel, Message, format_timestamp, format_user_id, parse_user_id
+
+# Wersja schematu zapisywana w PRAGMA user_version
+SCHEMA_VERSION = 2
+
+# Wspólny generator ID wiadomości dla całego procesu (bezpieczny wątkowo)
+_message_ids = MessageIdGenerator(config.NODE_ID)
+
+# Struktura tabel (schemat v2) - używana przez create_tables() i migrate_v2.py
+SCHEMA_TABLES = [
+    # Tabela użytkowników
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        created_at INTEGER NOT NULL
+    )
+    """,
+    # Tabela kanałów (slug = publiczne ID kanału, np. "general")
+    """
+    CREATE TABLE IF NOT EXISTS channels (
+        id INTEGER PRIMARY KEY,
+        slug TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        type TEXT NOT NULL CHECK(type IN ('public', 'private')),
+        created_at INTEGER NOT NULL
+    )
+    """,
+    # Tabela wiadomości
+    """
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY,
+        channel_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        edited_at INTEGER,
+        seq INTEGER NOT NULL,
+        FOREIGN KEY (channel_id) REFERENCES channels(id),
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """,
+    # Tabela członków kanałów (relacja wiele-do-wielu)
+    """
+    CREATE TABLE IF NOT EXISTS channel_members (
+        user_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        PRIMARY KEY (user_id, channel_id),
+        FOREIGN KEY (user_id) REFERENCES users(id),
+        FOREIGN KEY (channel_id) REFERENCES channels(id)
+    ) WITHOUT ROWID
+    """,
+]
+
+# Indeksy:
+# - idx_messages_channel_seq: UNIQUE (channel_id, seq) - każda strona historii
+#   kanału to wyszukanie zakresu w indeksie, bez skanowania tabeli i bez
+#   sortowania. Koszt strony nie zależy od liczby wiadomości w kanale.
+#   Unikalność gwarantuje, że dwie wiadomości nie dostaną tego samego numeru.
+SCHEMA_INDEXES = [
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_channel_seq
+    ON messages (channel_id, seq)
+    """,
+]
+
+# Wyszukiwanie pełnotekstowe (FTS5, tabela "external content"):
+# - messages_fts przechowuje tylko indeks słów, tekst czyta z tabeli messages
+#   (rowid = messages.id), więc nie dubluje treści wiadomości
+# - tokenizer unicode61 z remove_diacritics: "zazolc" znajduje "zażółć"
+# - wyzwalacze aktualizują indeks przy każdym INSERT / UPDATE / DELETE,
+#   także przy zapisie paczek przez add_messages_batch()
+SCHEMA_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        text,
+        content='messages',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF text ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+]
+
+# Minimalna długość ostatniego słowa zapytania, od której jest ono prefiksem
+SEARCH_MIN_PREFIX = 3
 
 
 def get_timestamp() -> str:
@@ -25,13 +136,27 @@ def get_timestamp() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
+def get_timestamp_ms() -> int:
+    """Zwraca aktualny czas w milisekundach od 1970 r. (format kolumn *_at w bazie)."""
+    return int(time.time() * 1000)
+
+
+def generate_message_id() -> int:
+    """
+    Generuje unikalny, rosnący w czasie klucz wiadomości.
+
+    W API występuje jako "msg_" + 16 znaków hex (ids.format_message_id) - szczegóły w ids.py
+    """
+    return _message_ids.next_int()
+
+
 def init_database() -> sqlite3.Connection:
     """
     Inteligentna inicjalizacja bazy danych.
 
     Sprawdza czy plik chat.db istnieje:
     - Jeśli NIE: tworzy bazę i ładuje przykładowe dane
-    - Jeśli TAK: tylko łączy się z istniejącą bazą
+    - Jeśli TAK: łączy się z istniejącą bazą (starszą wersję najpierw migruje)
 
     Returns:
         sqlite3.Connection: Połączenie z bazą danych
@@ -55,6 +180,12 @@ def init_database() -> sqlite3.Connection:
         print("✓ Baza danych utworzona z przykładowymi danymi")
     else:
         # Kolejne uruchomienie - tylko połączenie
+        # (baza utworzona przez starszą wersję jest najpierw przebudowana do v2)
+        if get_schema_version(conn) < SCHEMA_VERSION:
+            import migrate_v2
+            migrate_v2.migrate(conn)
+        # (i indeksem wyszukiwania, jeśli baza powstała przed jego dodaniem)
+        create_search_index(conn)
         print("✓ Połączono z istniejącą bazą danych")
 
     return conn
@@ -62,7 +193,7 @@ def init_database() -> sqlite3.Connection:
 
 def create_tables(conn: sqlite3.Connection) -> None:
     """
-    Tworzy strukturę tabel w bazie danych.
+    Tworzy strukturę tabel w bazie danych (schemat v2).
 
     Tabele:
     - users: użytkownicy systemu
@@ -72,54 +203,64 @@ def create_tables(conn: sqlite3.Connection) -> None:
     """
     cursor = conn.cursor()
 
-    # Tabela użytkowników
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id TEXT PRIMARY KEY,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TEXT NOT NULL
-        )
-    """)
+    for statement in SCHEMA_TABLES:
+        cursor.execute(statement)
 
-    # Tabela kanałów
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS channels (
-            id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            type TEXT NOT NULL CHECK(type IN ('public', 'private')),
-            created_at TEXT NOT NULL
-        )
-    """)
-
-    # Tabela wiadomości
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS messages (
-            id TEXT PRIMARY KEY,
-            channel_id TEXT NOT NULL,
-            user_id TEXT NOT NULL,
-            text TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            edited_at TEXT,
-            FOREIGN KEY (channel_id) REFERENCES channels(id),
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    """)
+    create_indexes(conn)
+    create_search_index(conn)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
 
-    # Tabela członków kanałów (relacja wiele-do-wielu)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS channel_members (
-            user_id TEXT NOT NULL,
-            channel_id TEXT NOT NULL,
-            PRIMARY KEY (user_id, channel_id),
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            FOREIGN KEY (channel_id) REFERENCES channels(id)
-        )
-    """)
 
+def create_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Tworzy indeksy przyspieszające najczęstsze zapytania (lista w SCHEMA_INDEXES).
+    """
+    for statement in SCHEMA_INDEXES:
+        conn.execute(statement)
     conn.commit()
 
 
+def create_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    Tworzy indeks wyszukiwania pełnotekstowego (SCHEMA_SEARCH), jeśli go nie ma.
+
+    W istniejącej bazie indeks jest od razu wypełniany wszystkimi wiadomościami.
+    Jeśli SQLite nie ma modułu FTS5, serwer działa dalej - bez wyszukiwania.
+
+    Returns:
+        True jeśli wyszukiwanie jest dostępne
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+    ).fetchone()
+    if exists:
+        return True
+
+    try:
+        with conn:
+            for statement in SCHEMA_SEARCH:
+                conn.execute(statement)
+            # Indeksowanie wiadomości zapisanych przed utworzeniem indeksu
+            conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+    except sqlite3.OperationalError as e:
+        print(f"⚠️  Wyszukiwanie wiadomości niedostępne (brak FTS5 w SQLite): {e}")
+        return False
+    return True
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """
+    Zwraca wersję schematu bazy.
+
+    Bazy sprzed wersji 2 nie ustawiały PRAGMA user_version (wartość 0).
+
+    Returns:
+        Numer wersji schematu (0 lub 1 = tekstowe klucze, 2 = klucze INTEGER)
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
 def seed_sample_data(conn: sqlite3.Connection) -> None:
     """
     Ładuje przykładowe dane do bazy (wywoływane tylko przy pierwszym uruchomieniu).
@@ -132,11 +273,13 @@ def seed_sample_data(conn: sqlite3.Connection) -> None:
     """
     cursor = conn.cursor()
 
-    # Przykładowi użytkownicy
+    now = get_timestamp_ms()
+
+    # Przykładowi użytkownicy (w API: user_1, user_2, user_3)
     users_data = [
-        ("user_1", "Jan", "ircAMP2024!", get_timestamp()),
-        ("user_2", "Anna", "ircAMP2024!", get_timestamp()),
-        ("user_3", "Piotr", "ircAMP2024!", get_timestamp()),
+        (1, "Jan", "ircAMP2024!", now),
+        (2, "Anna", "ircAMP2024!", now),
+        (3, "Piotr", "ircAMP2024!", now),
     ]
 
     cursor.executemany(
@@ -146,19 +289,19 @@ def seed_sample_data(conn: sqlite3.Connection) -> None:
 
     # Kanały publiczne
     channels_data = [
-        ("general", "Ogólny", "public", get_timestamp()),
-        ("random", "Ciekawostki", "public", get_timestamp()),
+        (1, "general", "Ogólny", "public", now),
+        (2, "random", "Ciekawostki", "public", now),
     ]
 
     cursor.executemany(
-        "INSERT INTO channels (id, name, type, created_at) VALUES (?, ?, ?, ?)",
+        "INSERT INTO channels (id, slug, name, type, created_at) VALUES (?, ?, ?, ?, ?)",
         channels_data
     )
 
     # Przypisanie wszystkich użytkowników do obu kanałów
     channel_members_data = []
-    for user_id in ["user_1", "user_2", "user_3"]:
-        for channel_id in ["general", "random"]:
+    for user_id in [1, 2, 3]:
+        for channel_id in [1, 2]:
             channel_members_data.append((user_id, channel_id))
 
     cursor.executemany(
@@ -166,20 +309,23 @@ def seed_sample_data(conn: sqlite3.Connection) -> None:
         channel_members_data
     )
 
-    # Przykładowe wiadomości w kanale "general"
-    # Używamy prostych ID jak msg_1, msg_2, etc.
+    # Przykładowe wiadomości w kanale "general" (id = seq = 1..7)
+    texts = [
+        (2, "Cześć wszystkim!"),
+        (1, "Hej! Jak leci?"),
+        (3, "Witam! Super że tu jesteśmy"),
+        (2, "Ktoś już testował nowy projekt?"),
+        (1, "Ja zaczynam właśnie!"),
+        (3, "Trzymajcie się! Do roboty! 💪"),
+        (2, "Powodzenia wszystkim!"),
+    ]
     messages_data = [
-        ("msg_1", "general", "user_2", "Cześć wszystkim!", get_timestamp()),
-        ("msg_2", "general", "user_1", "Hej! Jak leci?", get_timestamp()),
-        ("msg_3", "general", "user_3", "Witam! Super że tu jesteśmy", get_timestamp()),
-        ("msg_4", "general", "user_2", "Ktoś już testował nowy projekt?", get_timestamp()),
-        ("msg_5", "general", "user_1", "Ja zaczynam właśnie!", get_timestamp()),
-        ("msg_6", "general", "user_3", "Trzymajcie się! Do roboty! 💪", get_timestamp()),
-        ("msg_7", "general", "user_2", "Powodzenia wszystkim!", get_timestamp()),
+        (number, 1, user_id, text, now, number)
+        for number, (user_id, text) in enumerate(texts, start=1)
     ]
 
     cursor.executemany(
-        "INSERT INTO messages (id, channel_id, user_id, text, created_at) VALUES (?, ?, ?, ?, ?)",
+        "INSERT INTO messages (id, channel_id, user_id, text, created_at, seq) VALUES (?, ?, ?, ?, ?, ?)",
         messages_data
     )
 
@@ -225,21 +371,21 @@ def get_channel_by_id(conn: sqlite3.Connection, channel_id: str) -> Optional[Cha
 
     Args:
         conn: Połączenie z bazą danych
-        channel_id: ID kanału
+        channel_id: Publiczne ID kanału (np. "general")
 
     Returns:
         Channel lub None jeśli nie znaleziono
     """
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT id, name, type, created_at FROM channels WHERE id = ?",
+        "SELECT slug, name, type, created_at FROM channels WHERE slug = ?",
         (channel_id,)
     )
     row = cursor.fetchone()
 
     if row:
         return Channel(
-            id=row['id'],
+            id=row['slug'],
             name=row['name'],
             type=row['type'],
             created_at=row['created_at']
@@ -258,13 +404,13 @@ def get_all_channels(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
         Lista słowników z danymi kanałów
     """
     cursor = conn.cursor()
-    cursor.execute("SELECT id, name, type, created_at FROM channels ORDER BY created_at")
+    cursor.execute("SELECT slug, name, type, created_at FROM channels ORDER BY created_at, id")
     rows = cursor.fetchall()
 
     channels = []
     for row in rows:
         channel = Channel(
-            id=row['id'],
+            id=row['slug'],
             name=row['name'],
             type=row['type'],
             created_at=row['created_at']
@@ -274,6 +420,36 @@ def get_all_channels(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
     return channels
 
 
+def get_all_users(conn: sqlite3.Connection) -> List[Dict[str, str]]:
+    """
+    Zwraca listę wszystkich zarejestrowanych użytkowników (bez haseł).
+
+    Args:
+        conn: Połączenie z bazą danych
+
+    Returns:
+        Lista słowników {"id": "user_1", "name": "Jan"}
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, username FROM users ORDER BY id")
+    return [{"id": format_user_id(row['id']), "name": row['username']} for row in cursor.fetchall()]
+
+
+def get_channel_key(conn: sqlite3.Connection, channel_id: str) -> Optional[int]:
+    """
+    Zamienia publiczne ID kanału ("general") na klucz INTEGER używany w tabelach.
+
+    Args:
+        conn: Połączenie z bazą danych
+        channel_id: Publiczne ID kanału
+
+    Returns:
+        Klucz kanału lub None jeśli kanał nie istnieje
+    """
+    row = conn.execute("SELECT id FROM channels WHERE slug = ?", (channel_id,)).fetchone()
+    return row[0] if row else None
+
+
 def get_messages_for_channel(conn: sqlite3.Connection, channel_id: str, limit: int = 50) -> List[Dict[str, Any]]:
     """
     Zwraca ostatnie wiadomości z kanału.
@@ -284,44 +460,269 @@ def get_messages_for_channel(conn: sqlite3.Connection, channel_id: str, limit: i
         limit: Maksymalna liczba wiadomości (domyślnie 50)
 
     Returns:
-        Lista słowników z wiadomościami, posortowane chronologicznie
+        Lista słowników z wiadomościami (najnowsze `limit`), posortowane chronologicznie
+    """
+    return get_messages_page(conn, channel_id, limit)["messages"]
+
+
+def get_messages_page(conn: sqlite3.Connection, channel_id: str, limit: int = 50,
+                      before: Optional[Union[str, int]] = None,
+                      after: Optional[Union[str, int]] = None) -> Dict[str, Any]:
+    """
+    Zwraca jedną stronę historii kanału (paginacja kursorem - keyset pagination).
+
+    Kursorem jest ID wiadomości (str) albo jej numer sekwencyjny w kanale (int).
+    Zamiast OFFSET (który musi przejść przez wszystkie pominięte wiersze)
+    szukamy w indeksie (channel_id, seq) pozycji kursora i czytamy `limit`
+    kolejnych wpisów.
+
+    - bez kursora: najnowsze wiadomości
+    - before: wiadomości starsze niż wskazana
+    - after: wiadomości nowsze niż wskazana (np. after=ostatni znany seq
+      zwraca dokładnie wiadomości, które klient przegapił)
+
+    Args:
+        conn: Połączenie z bazą danych
+        channel_id: ID kanału
+        limit: Maksymalna liczba wiadomości na stronie
+        before: ID lub seq wiadomości - zwróć starsze od niej
+        after: ID lub seq wiadomości - zwróć nowsze od niej
+
+    Returns:
+        Słownik {"messages": [...], "has_more": bool} - wiadomości posortowane
+        chronologicznie, has_more mówi czy w kierunku stronicowania są kolejne
+
+    Raises:
+        ValueError: Jeśli podano oba kursory lub ID kursora nie należy do kanału
     """
+    if before is not None and after is not None:
+        raise ValueError("Use either 'before' or 'after', not both")
+
+    cursor_value = before if before is not None else after
+    channel_key = get_channel_key(conn, channel_id)
+    if channel_key is None:
+        if isinstance(cursor_value, str):
+            raise ValueError(f"Unknown history cursor: {cursor_value}")
+        return {"messages": [], "has_more": False}
+
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT m.id, m.channel_id, m.user_id, u.username, m.text, m.created_at, m.edited_at
+    params: List[Any] = [channel_key]
+    condition = ""
+
+    if cursor_value is not None:
+        anchor_seq = cursor_value
+        if isinstance(cursor_value, str):
+            anchor = None
+            try:
+                message_key = parse_message_id(cursor_value)
+            except ValueError:
+                message_key = None
+            if message_key is not None:
+                cursor.execute(
+                    "SELECT seq FROM messages WHERE id = ? AND channel_id = ?",
+                    (message_key, channel_key)
+                )
+                anchor = cursor.fetchone()
+            if not anchor:
+                raise ValueError(f"Unknown history cursor: {cursor_value}")
+            anchor_seq = anchor['seq']
+        condition = "AND m.seq > ?" if after is not None else "AND m.seq < ?"
+        params.append(anchor_seq)
+
+    # Dla "after" idziemy w przód, w pozostałych przypadkach od najnowszych wstecz
+    order = "ASC" if after is not None else "DESC"
+
+    # Pobieramy o jeden wiersz więcej, żeby wiedzieć czy istnieje kolejna strona
+    params.append(limit + 1)
+    cursor.execute(f"""
+        SELECT m.id, m.user_id, u.username, m.text, m.created_at, m.edited_at, m.seq
         FROM messages m
         JOIN users u ON m.user_id = u.id
-        WHERE m.channel_id = ?
-        ORDER BY m.created_at ASC
+        WHERE m.channel_id = ? {condition}
+        ORDER BY m.seq {order}
         LIMIT ?
-    """, (channel_id, limit))
+    """, params)
 
     rows = cursor.fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after is None:
+        rows.reverse()
 
     messages = []
     for row in rows:
         message = Message(
             id=row['id'],
-            channel_id=row['channel_id'],
+            channel_id=channel_id,
             user_id=row['user_id'],
             username=row['username'],
             text=row['text'],
             timestamp=row['created_at'],
-            edited_at=row['edited_at']
+            edited_at=row['edited_at'],
+            seq=row['seq']
         )
         messages.append(message.to_dict())
 
-    return messages
+    return {"messages": messages, "has_more": has_more}
+
+
+def get_last_seq(conn: sqlite3.Connection, channel_id: str) -> int:
+    """
+    Zwraca numer sekwencyjny ostatniej wiadomości w kanale.
 
+    Args:
+        conn: Połączenie z bazą danych
+        channel_id: ID kanału
 
-def add_message(conn: sqlite3.Connection, channel_id: str, user_id: str, text: str) -> tuple[str, str]:
+    Returns:
+        Największy seq w kanale lub 0 jeśli kanał nie ma wiadomości
+    """
+    row = conn.execute("""
+        SELECT COALESCE(MAX(seq), 0) FROM messages
+        WHERE channel_id = (SELECT id FROM channels WHERE slug = ?)
+    """, (channel_id,)).fetchone()
+    return row[0]
+
+
+def build_search_query(query: str) -> str:
+    """
+    Zamienia tekst wpisany przez użytkownika na bezpieczne zapytanie FTS5.
+
+    Składnia FTS5 (cudzysłowy, AND/OR/NOT, nawiasy) nie jest przekazywana
+    dalej - każde słowo staje się osobną frazą, a wszystkie muszą wystąpić.
+    Gwiazdka na końcu zamienia ostatnie słowo w prefiks ("wiadom*" znajduje
+    "wiadomość"). Prefiks musi mieć co najmniej SEARCH_MIN_PREFIX znaków,
+    a i tak jest wolniejszy od pełnego słowa - FTS5 scala listy trafień
+    wszystkich pasujących słów, zamiast czytać tylko najnowsze.
+
+    Raises:
+        ValueError: Jeśli zapytanie nie zawiera żadnego słowa
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    phrases = [f'"{term}"' for term in terms]
+    if query.rstrip().endswith("*") and len(terms[-1]) >= SEARCH_MIN_PREFIX:
+        phrases[-1] += "*"
+    return " ".join(phrases)
+
+
+def search_messages(conn: sqlite3.Connection, query: str, channel_id: Optional[str] = None,
+                    limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+    """
+    Wyszukuje wiadomości zawierające wszystkie słowa zapytania (FTS5).
+
+    Wyniki są posortowane od najlepiej dopasowanych (ranking bm25), a przy
+    równym dopasowaniu - od najnowszych. Ranking obejmuje tylko
+    config.SEARCH_RANK_WINDOW najnowszych trafień: indeks FTS5 zwraca je
+    w kolejności malejących ID (= od najnowszych) i kończy po tylu wierszach,
+    więc koszt zapytania nie rośnie z rozmiarem bazy ani liczbą trafień.
+    Starsze trafienia następują po nich, od najnowszych (bez rankingu) -
+    has_more jest liczone także za oknem rankingu.
+
+    Args:
+        conn: Połączenie z bazą danych
+        query: Tekst wpisany przez użytkownika
+        channel_id: Opcjonalnie - szukaj tylko w tym kanale
+        limit: Maksymalna liczba wyników na stronie
+        offset: Liczba wyników do pominięcia (kolejne strony)
+
+    Returns:
+        Słownik {"messages": [...], "has_more": bool}; każda wiadomość ma
+        format Message.to_dict() z dodatkowym polem "channel_id"
+
+    Raises:
+        ValueError: Jeśli zapytanie nie zawiera żadnego słowa
+    """
+    match = build_search_query(query)
+    params: List[Any] = [match]
+    channel_filter = ""
+
+    if channel_id is not None:
+        channel_key = get_channel_key(conn, channel_id)
+        if channel_key is None:
+            return {"messages": [], "has_more": False}
+        channel_filter = "JOIN messages cm ON cm.id = f.rowid AND cm.channel_id = ?"
+        params.insert(0, channel_key)
+
+    window = config.SEARCH_RANK_WINDOW
+    columns = """
+        SELECT m.id, m.user_id, u.username, m.text, m.created_at, m.edited_at, m.seq, c.slug
+    """
+    joins = """
+        JOIN messages m ON m.id = hits.id
+        JOIN users u ON u.id = m.user_id
+        JOIN channels c ON c.id = m.channel_id
+    """
+
+    # Pobieramy o jeden wiersz więcej, żeby wiedzieć czy istnieje kolejna strona
+    rows = conn.execute(f"""
+        {columns}
+        FROM (
+            SELECT f.rowid AS id, bm25(messages_fts) AS score
+            FROM messages_fts f {channel_filter}
+            WHERE messages_fts MATCH ?
+            ORDER BY f.rowid DESC
+            LIMIT ?
+        ) AS hits
+        {joins}
+        ORDER BY hits.score, hits.id DESC
+        LIMIT ? OFFSET ?
+    """, params + [window, limit + 1, offset]).fetchall()
+
+    # Strona sięga końca okna rankingu - dopełniamy ją starszymi trafieniami
+    if len(rows) <= limit and (not rows or offset + len(rows) >= window):
+        ranked, oldest = conn.execute(f"""
+            SELECT count(*), min(id) FROM (
+                SELECT f.rowid AS id
+                FROM messages_fts f {channel_filter}
+                WHERE messages_fts MATCH ?
+                ORDER BY f.rowid DESC
+                LIMIT ?
+            )
+        """, params + [window]).fetchone()
+
+        if ranked == window:
+            rows += conn.execute(f"""
+                {columns}
+                FROM (
+                    SELECT f.rowid AS id
+                    FROM messages_fts f {channel_filter}
+                    WHERE messages_fts MATCH ? AND f.rowid < ?
+                    ORDER BY f.rowid DESC
+                    LIMIT ? OFFSET ?
+                ) AS hits
+                {joins}
+                ORDER BY hits.id DESC
+            """, params + [oldest, limit + 1 - len(rows), max(0, offset - ranked)]).fetchall()
+
+    has_more = len(rows) > limit
+    messages = []
+    for row in rows[:limit]:
+        message = Message(
+            id=row['id'],
+            channel_id=row['slug'],
+            user_id=row['user_id'],
+            username=row['username'],
+            text=row['text'],
+            timestamp=row['created_at'],
+            edited_at=row['edited_at'],
+            seq=row['seq']
+        ).to_dict()
+        message["channel_id"] = row['slug']
+        messages.append(message)
+
+    return {"messages": messages, "has_more": has_more}
+
+
+def add_message(conn: sqlite3.Connection, channel_id: str, user_id: Union[str, int], text: str) -> tuple[str, str]:
     """
     Dodaje nową wiadomość do bazy danych.
 
     Args:
         conn: Połączenie z bazą danych
         channel_id: ID kanału
-        user_id: ID użytkownika
+        user_id: ID użytkownika ("user_1" lub klucz 1)
         text: Treść wiadomości
 
     Returns:
@@ -329,16 +730,38 @@ def add_message(conn: sqlite3.Connection, channel_id: str, user_id: str, text: s
     """
     cursor = conn.cursor()
 
-    # Generowanie unikalnego ID używając UUID - eliminuje race condition
-    message_id = f"msg_{uuid.uuid4().hex[:8]}"
+    # ID rosnące w czasie i unikalne (ids.py) - eliminuje race condition
+    message_key = generate_message_id()
 
-    timestamp = get_timestamp()
+    created_at = get_timestamp_ms()
+    # Nieistniejący kanał -> NULL -> IntegrityError (jak wcześniej przy kluczu obcym)
+    channel_key = get_channel_key(conn, channel_id)
 
+    # Numer w kanale liczony w tej samej transakcji co INSERT
     cursor.execute("""
-        INSERT INTO messages (id, channel_id, user_id, text, created_at)
-        VALUES (?, ?, ?, ?, ?)
-    """, (message_id, channel_id, user_id, text, timestamp))
+        INSERT INTO messages (id, channel_id, user_id, text, created_at, seq)
+        VALUES (?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM messages WHERE channel_id = ?))
+    """, (message_key, channel_key, parse_user_id(user_id), text, created_at, channel_key))
 
     conn.commit()
 
-    return message_id, timestamp
+    return format_message_id(message_key), format_timestamp(created_at)
+
+
+def add_messages_batch(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    """
+    Zapisuje wiele wiadomości w jednej transakcji (group commit).
+
+    Jeden commit (i jeden fsync) na całą paczkę zamiast na każdą wiadomość.
+    Jeśli którykolwiek wiersz jest niepoprawny, cała transakcja jest wycofywana.
+
+    Args:
+        conn: Połączenie z bazą danych
+        rows: Lista krotek (message_key, channel_id, user_key, text, created_at_ms, seq),
+              gdzie channel_id to publiczne ID kanału ("general")
+    """
+    with conn:
+        conn.executemany("""
+            INSERT INTO messages (id, channel_id, user_id, text, created_at, seq)
+            VALUES (?, (SELECT id FROM channels WHERE slug = ?), ?, ?, ?, ?)
+        """, rows)
@@ -0,0 +1,228 @@
+"""
+Asynchroniczna warstwa dostępu do bazy danych.
+
+Funkcje z database.py są synchroniczne - wywołane bezpośrednio z pętli
+asyncio blokują WSZYSTKIE połączenia WebSocket na czas zapytania
+(np. jeden wolny conn.commit() zatrzymuje cały serwer).
+
+Ten moduł przenosi operacje na bazie do osobnej, ograniczonej puli wątków:
+- AsyncDatabase: obiekt zwracający awaitable dla każdej operacji
+- Ograniczenie liczby oczekujących zadań (backpressure)
+- Metryki: głębokość kolejki, liczba zadań w toku, licznik wykonanych
+- Odczyty przez pulę połączeń read-only, zapisy przez jedno połączenie (db_pool.py)
+
+Synchroniczne funkcje z database.py pozostają bez zmian - nadal używają ich
+check_database.py i testy.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import database
+from db_pool import ConnectionPool
+from models import User
+
+
+class AsyncDatabase:
+    """
+    Wykonuje operacje z database.py w dedykowanej puli wątków.
+
+    Pula ma stały rozmiar (max_workers), a liczba zadań oczekujących
+    w kolejce jest ograniczona (max_pending). Gdy kolejka jest pełna,
+    kolejne wywołania czekają (bez blokowania pętli zdarzeń) aż zwolni się
+    miejsce.
+
+    Odczyty (read) korzystają z połączeń tylko do odczytu z ConnectionPool
+    i mogą działać równolegle, zapisy (write) przechodzą przez jedno
+    połączenie zapisujące.
+    """
+
+    def __init__(self, conn, max_workers: Optional[int] = None, max_pending: int = 1000):
+        """
+        Args:
+            conn: ConnectionPool albo pojedyncze połączenie z bazą (z init_database())
+            max_workers: Liczba wątków wykonujących zapytania
+                         (domyślnie: liczba połączeń czytających + 1)
+            max_pending: Maksymalna liczba zadań czekających w kolejce
+        """
+        if not isinstance(conn, ConnectionPool):
+            # Pojedyncze połączenie - pula bez czytelników (odczyty przez writer)
+            conn = ConnectionPool(conn, readers=0)
+        self.pool = conn
+        if max_workers is None:
+            max_workers = self.pool.reader_count + 1
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # Liczniki do metryk (modyfikowane z wątków puli - chronione blokadą)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._peak_queued = 0
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Wykonuje dowolną funkcję w puli wątków bazy danych.
+
+        Args:
+            func: Funkcja synchroniczna do wykonania
+            *args, **kwargs: Argumenty funkcji
+
+        Returns:
+            Wynik funkcji (wyjątki są przekazywane do wywołującego)
+        """
+        if self._slots is None:
+            # Semafor tworzymy leniwie - musi należeć do działającej pętli
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        async with self._slots:
+            with self._lock:
+                self._queued += 1
+                self._peak_queued = max(self._peak_queued, self._queued)
+
+            try:
+                job = self._executor.submit(partial(self._call, func, *args, **kwargs))
+            except Exception:
+                # Pula zamknięta - zadanie nie trafiło do kolejki
+                with self._lock:
+                    self._queued -= 1
+                raise
+            # Anulowanie wywołującego anuluje czekające zadanie - _call wtedy nie
+            # ruszy, więc kolejkę zmniejsza callback
+            job.add_done_callback(self._on_job_done)
+            try:
+                return await asyncio.wrap_future(job)
+            except Exception:
+                with self._lock:
+                    self._failed += 1
+                raise
+
+    async def read(self, func: Callable, *args) -> Any:
+        """
+        Wykonuje func(conn, *args) na połączeniu tylko do odczytu z puli.
+
+        Args:
+            func: Funkcja z database.py przyjmująca połączenie jako pierwszy argument
+            *args: Pozostałe argumenty funkcji
+        """
+        return await self.run(self._with_reader, func, *args)
+
+    async def write(self, func: Callable, *args) -> Any:
+        """
+        Wykonuje func(conn, *args) na połączeniu zapisującym.
+
+        Args:
+            func: Funkcja z database.py przyjmująca połączenie jako pierwszy argument
+            *args: Pozostałe argumenty funkcji
+        """
+        return await self.run(self._with_writer, func, *args)
+
+    def _with_reader(self, func: Callable, *args) -> Any:
+        """Wywołuje funkcję z wypożyczonym połączeniem do odczytu (w wątku puli)."""
+        with self.pool.reading() as conn:
+            return func(conn, *args)
+
+    def _with_writer(self, func: Callable, *args) -> Any:
+        """Wywołuje funkcję z połączeniem zapisującym (w wątku puli)."""
+        with self.pool.writing() as conn:
+            return func(conn, *args)
+
+    @property
+    def conn(self):
+        """Połączenie zapisujące (np. do bezpośrednich zapytań w testach)."""
+        return self.pool.writer
+
+    def _call(self, func: Callable, *args, **kwargs) -> Any:
+        """Wykonuje funkcję w wątku puli i aktualizuje liczniki."""
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def _on_job_done(self, job: Future) -> None:
+        """Zadanie anulowane, zanim dostało wątek - zdejmuje je z licznika kolejki."""
+        if job.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    # ====== OPERACJE NA BAZIE ======
+
+    async def get_user_by_username(self, username: str) -> Optional[User]:
+        """Asynchroniczna wersja database.get_user_by_username()."""
+        return await self.read(database.get_user_by_username, username)
+
+    async def get_all_channels(self) -> List[Dict[str, Any]]:
+        """Asynchroniczna wersja database.get_all_channels()."""
+        return await self.read(database.get_all_channels)
+
+    async def get_messages_for_channel(self, channel_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Asynchroniczna wersja database.get_messages_for_channel()."""
+        return await self.read(database.get_messages_for_channel, channel_id, limit)
+
+    async def get_messages_page(self, channel_id: str, limit: int = 50,
+                                before: Optional[Union[str, int]] = None,
+                                after: Optional[Union[str, int]] = None) -> Dict[str, Any]:
+        """Asynchroniczna wersja database.get_messages_page()."""
+        return await self.read(database.get_messages_page, channel_id, limit, before, after)
+
+    async def get_last_seq(self, channel_id: str) -> int:
+        """Asynchroniczna wersja database.get_last_seq()."""
+        return await self.read(database.get_last_seq, channel_id)
+
+    async def search_messages(self, query: str, channel_id: Optional[str] = None,
+                              limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Asynchroniczna wersja database.search_messages()."""
+        return await self.read(database.search_messages, query, channel_id, limit, offset)
+
+    async def add_message(self, channel_id: str, user_id: str, text: str) -> tuple[str, str]:
+        """Asynchroniczna wersja database.add_message()."""
+        return await self.write(database.add_message, channel_id, user_id, text)
+
+    # ====== METRYKI I ZAMYKANIE ======
+
+    @property
+    def queue_depth(self) -> int:
+        """Liczba zadań czekających na wolny wątek."""
+        return self._queued
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Zwraca metryki puli wątków bazy danych.
+
+        Returns:
+            Słownik z głębokością kolejki i licznikami zadań
+        """
+        with self._lock:
+            stats = {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "queue_depth": self._queued,
+                "peak_queue_depth": self._peak_queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+        stats.update(self.pool.get_stats())
+        return stats
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Zamyka pulę wątków i połączenia czytające.
+
+        Args:
+            wait: Czy czekać na dokończenie zadań w kolejce
+        """
+        self._executor.shutdown(wait=wait)
+        self.pool.close()
@@ -0,0 +1,136 @@
+"""
+Pula połączeń SQLite: jeden zapisujący + N połączeń tylko do odczytu.
+
+Jedno współdzielone połączenie sprawia, że odczyt historii i zapis wiadomości
+czekają na siebie nawzajem. W trybie WAL (Write-Ahead Logging) SQLite
+pozwala czytać równolegle z zapisem - pod warunkiem, że każdy czytelnik ma
+własne połączenie.
+
+ConnectionPool:
+- writer: jedno połączenie do zapisu (journal_mode=WAL), chronione blokadą
+- readers: pula połączeń otwartych w trybie read-only (mode=ro)
+- konfigurowalne pragmy: synchronous, cache_size, mmap_size
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+
+def apply_pragmas(conn: sqlite3.Connection, synchronous: str, cache_size: int, mmap_size: int) -> None:
+    """
+    Ustawia pragmy wydajnościowe dla połączenia.
+
+    Args:
+        conn: Połączenie z bazą danych
+        synchronous: Tryb synchronizacji z dyskiem (OFF, NORMAL, FULL, EXTRA)
+        cache_size: Rozmiar cache stron (wartość ujemna = KiB, dodatnia = liczba stron)
+        mmap_size: Rozmiar mapowania pliku w pamięci w bajtach (0 = wyłączone)
+    """
+    if synchronous.upper() not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+        raise ValueError(f"Invalid synchronous mode: {synchronous}")
+
+    conn.execute(f"PRAGMA synchronous = {synchronous.upper()}")
+    conn.execute(f"PRAGMA cache_size = {int(cache_size)}")
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+
+
+class ConnectionPool:
+    """
+    Połączenie zapisujące w trybie WAL oraz pula połączeń tylko do odczytu.
+
+    Przykład:
+        pool = ConnectionPool(init_database(), readers=4)
+        with pool.reading() as conn:
+            get_all_channels(conn)
+        with pool.writing() as conn:
+            add_message(conn, "general", "user_1", "Hej!")
+
+    Jeśli readers=0 (albo baza jest w pamięci), odczyty korzystają
+    z połączenia zapisującego - tak jak przed wprowadzeniem puli.
+    """
+
+    def __init__(self, writer: sqlite3.Connection, readers: int = 4, synchronous: str = "NORMAL",
+                 cache_size: int = -8000, mmap_size: int = 0):
+        """
+        Args:
+            writer: Połączenie zapisujące (np. z init_database())
+            readers: Liczba połączeń tylko do odczytu
+            synchronous: Pragma synchronous dla wszystkich połączeń
+            cache_size: Pragma cache_size dla wszystkich połączeń
+            mmap_size: Pragma mmap_size dla wszystkich połączeń
+        """
+        self.writer = writer
+        self._write_lock = threading.Lock()
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._reader_list = []
+
+        # Ścieżka pliku bazy - połączenia czytające otwierają ten sam plik
+        self.path = writer.execute("PRAGMA database_list").fetchone()[2]
+        if not self.path:
+            # Baza w pamięci - nie da się otworzyć drugiego połączenia do niej
+            readers = 0
+
+        if self.path:
+            writer.execute("PRAGMA journal_mode = WAL")
+        apply_pragmas(writer, synchronous, cache_size, mmap_size)
+
+        # URI z zakodowaną ścieżką - znaki takie jak "?", "#" czy "%" w nazwie
+        # katalogu nie mogą zostać odczytane jako parametry URI
+        uri = f"{Path(self.path).absolute().as_uri()}?mode=ro" if self.path else None
+        for _ in range(readers):
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            apply_pragmas(conn, synchronous, cache_size, mmap_size)
+            self._reader_list.append(conn)
+            self._readers.put(conn)
+
+    @property
+    def reader_count(self) -> int:
+        """Liczba połączeń tylko do odczytu w puli."""
+        return len(self._reader_list)
+
+    @contextmanager
+    def writing(self) -> Iterator[sqlite3.Connection]:
+        """Wypożycza połączenie zapisujące (jeden zapisujący naraz)."""
+        with self._write_lock:
+            yield self.writer
+
+    @contextmanager
+    def reading(self) -> Iterator[sqlite3.Connection]:
+        """
+        Wypożycza połączenie do odczytu z puli.
+
+        Jeśli wszystkie połączenia są zajęte, czeka na zwolnienie jednego.
+        """
+        if not self._reader_list:
+            with self.writing() as conn:
+                yield conn
+            return
+
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Zwraca metryki puli połączeń.
+
+        Returns:
+            Słownik z liczbą połączeń czytających (wszystkich i wolnych)
+        """
+        return {
+            "readers": len(self._reader_list),
+            "readers_idle": self._readers.qsize(),
+        }
+
+    def close(self) -> None:
+        """Zamyka połączenia czytające (połączenie zapisujące zamyka właściciel)."""
+        for conn in self._reader_list:
+            conn.close()
+        self._reader_list = []
@@ -0,0 +1,539 @@
+"""
+Pamięć podręczna ostatnich wiadomości kanałów (hot history).
+
+Każde logowanie i każde request_history pobierało z SQLite te same
+50 wiadomości i budowało je od nowa. HistoryCache trzyma ostatnie K
+wiadomości każdego kanału w buforze pierścieniowym (deque z maxlen):
+- pierwsza strona historii jest zwracana bez dostępu do bazy
+- przy braku kanału w pamięci bufor jest wypełniany z SQLite (leniwie)
+- nowe wiadomości są dopisywane do bufora (write-through)
+- liczba kanałów w pamięci jest ograniczona (LRU - najdawniej używany wylatuje;
+  kanał z wiadomościami, których nie ma jeszcze w bazie, nie jest usuwany -
+  po ponownym wczytaniu z bazy by ich brakowało)
+- równoczesne chybienia tego samego kanału czekają na jeden odczyt z bazy
+
+Dodatkowo przechowuje gotowe, zakodowane ramki chat_history (JSON jako str):
+powtarzające się request_history (np. podczas fali logowań) kosztują tylko
+odczyt ze słownika i wysłanie - bez to_dict() i kodowania JSON.
+- ramki najnowszej strony są unieważniane przy każdej nowej wiadomości w kanale
+- strony "after" (uzupełnianie luki w seq) powstają z bufora, a strony
+  z bazy są uzupełniane wiadomościami z bufora, których baza jeszcze nie
+  ma (czekają w kolejce MessageWriter); kursor-ID takiej wiadomości jest
+  rozpoznawany w buforze
+- ramki starszych stron (kursor "before") trzymane są w LRU - ale tylko
+  strony, które już się nie zmienią: przy zapisie w tle (MessageWriter)
+  starsza wiadomość może jeszcze czekać w kolejce, więc strona kanału
+  z niezapisanymi wiadomościami jest pobierana z bazy bez zapamiętywania,
+  a zapis paczki usuwa ramki jej kanałów (drop_page_frames)
+
+Zna też listę istniejących kanałów (has_channel) - handlery odrzucają
+zdarzenia dla nieznanego kanału, zanim wiadomość dostanie seq i trafi
+do kolejki zapisu, pamięci historii lub do odbiorców. Bufory powstają
+tylko dla istniejących kanałów (klient nie może zapełnić pamięci
+dowolnymi nazwami w request_history / resume_request).
+"""
+
+import asyncio
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+import codec
+from db_executor import AsyncDatabase
+
+
+def encode_history_payload(channel_id: str, page: Dict[str, Any]) -> str:
+    """
+    Koduje stronę historii jako JSON {"channel_id", "messages", "has_more"}
+    (payload chat_history, a także initial_channel_history w auth_success).
+
+    Args:
+        channel_id: ID kanału
+        page: Słownik {"messages": [...], "has_more": bool}
+
+    Returns:
+        Tekst JSON
+    """
+    payload = {
+        "channel_id": channel_id,
+        "messages": page["messages"],
+        "has_more": page["has_more"]
+    }
+    return codec.encode(payload)
+
+
+def encode_chat_history(channel_id: str, page: Dict[str, Any]) -> str:
+    """
+    Koduje stronę historii jako ramkę chat_history.
+
+    Args:
+        channel_id: ID kanału
+        page: Słownik {"messages": [...], "has_more": bool}
+
+    Returns:
+        Tekst JSON gotowy do wysłania przez websocket.send_text()
+    """
+    return '{"type":"chat_history","payload":' + encode_history_payload(channel_id, page) + '}'
+
+
+class ChannelHistory:
+    """Bufor ostatnich wiadomości jednego kanału."""
+
+    def __init__(self, capacity: int):
+        # Wiadomości w kolejności chronologicznej; najstarsze wypadają same
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        # Czy w bazie są wiadomości starsze niż najstarsza w buforze
+        self.has_older = False
+        # Czy bufor został wypełniony z bazy (False = tylko dopisane nowe wiadomości)
+        self.loaded = False
+        # Zakodowane ramki chat_history najnowszej strony: limit -> JSON
+        self.frames: Dict[int, str] = {}
+        # Zakodowane payloady najnowszej strony (bez koperty chat_history): limit -> JSON
+        self.payloads: Dict[int, str] = {}
+
+    def append(self, message: Dict[str, Any]) -> None:
+        """Dopisuje wiadomość; przy pełnym buforze najstarsza jest usuwana."""
+        if len(self.messages) == self.messages.maxlen:
+            self.has_older = True
+        self.messages.append(message)
+        # Najnowsza strona się zmieniła - gotowe ramki są nieaktualne
+        self.frames.clear()
+        self.payloads.clear()
+
+
+class HistoryCache:
+    """
+    Ograniczona pamięć ostatnich wiadomości dla wielu kanałów.
+
+    Pamięć: najwyżej max_channels * capacity wiadomości.
+
+    Przykład:
+        cache = HistoryCache(db, capacity=100, max_channels=1000)
+        page = await cache.get_latest("general", 50)   # {"messages": [...], "has_more": bool}
+        cache.append("general", message_dict)
+    """
+
+    def __init__(self, db: AsyncDatabase, capacity: int = 100, max_channels: int = 1000,
+                 max_page_frames: int = 1000, has_unsaved: Optional[Callable[[str], bool]] = None):
+        """
+        Args:
+            db: Asynchroniczna warstwa dostępu do bazy (do wypełniania bufora)
+            capacity: Liczba wiadomości trzymanych dla jednego kanału (K)
+            max_channels: Maksymalna liczba kanałów w pamięci
+            max_page_frames: Maksymalna liczba zakodowanych ramek starszych stron
+                             (0 - ramki starszych stron nie są zapamiętywane)
+            has_unsaved: Funkcja sprawdzająca, czy kanał ma wiadomości jeszcze
+                         niezapisane w bazie (MessageWriter.has_unsaved; None - zapis
+                         bez opóźnienia)
+        """
+        self.db = db
+        self.capacity = capacity
+        self.max_channels = max_channels
+        self.max_page_frames = max_page_frames
+        self._has_unsaved = has_unsaved
+        self._channels: "OrderedDict[str, ChannelHistory]" = OrderedDict()
+        # Ramki starszych stron: (channel_id, before, limit) -> JSON
+        self._page_frames: "OrderedDict[Tuple[str, Union[str, int], int], str]" = OrderedDict()
+        # Liczba zapisów paczek (drop_page_frames) - strona pobrana w trakcie zapisu nie jest zapamiętywana
+        self._commits = 0
+        # Trwające wypełnianie buforów z bazy: channel_id -> zadanie. Równoczesne
+        # chybienia tego samego kanału (fala logowań) czekają na jedno zapytanie
+        self._loading: Dict[str, "asyncio.Task[ChannelHistory]"] = {}
+        # ID istniejących kanałów - pobierane z bazy raz (ponownie po invalidate_channels())
+        self._channel_ids: Optional[FrozenSet[str]] = None
+        self._channel_ids_lock = asyncio.Lock()
+
+        # Liczniki do metryk
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._evictions = 0
+        self._frame_hits = 0
+        self._frame_misses = 0
+        self._shared_loads = 0
+
+    async def has_channel(self, channel_id: str) -> bool:
+        """
+        Sprawdza, czy kanał istnieje (lista kanałów z bazy jest pobierana raz).
+
+        Args:
+            channel_id: Publiczne ID kanału (np. "general")
+
+        Returns:
+            True jeśli kanał istnieje
+        """
+        if self._channel_ids is None:
+            async with self._channel_ids_lock:
+                if self._channel_ids is None:
+                    channels = await self.db.get_all_channels()
+                    self._channel_ids = frozenset(channel["id"] for channel in channels)
+        return channel_id in self._channel_ids
+
+    def invalidate_channels(self):
+        """Unieważnia listę kanałów (np. po dodaniu kanału) - zostanie pobrana ponownie."""
+        self._channel_ids = None
+
+    async def get_latest(self, channel_id: str, limit: int) -> Dict[str, Any]:
+        """
+        Zwraca najnowszą stronę historii kanału.
+
+        Args:
+            channel_id: ID kanału
+            limit: Liczba wiadomości na stronie
+
+        Returns:
+            Słownik {"messages": [...], "has_more": bool} - jak database.get_messages_page()
+        """
+        if limit > self.capacity:
+            # Strona większa niż bufor - tylko baza ma pełną odpowiedź
+            self._bypassed += 1
+            return await self.db.get_messages_page(channel_id, limit=limit)
+
+        entry = self._channels.get(channel_id)
+        if entry is not None and entry.loaded:
+            self._hits += 1
+            self._channels.move_to_end(channel_id)
+        else:
+            self._misses += 1
+            entry = await self._load(channel_id)
+
+        messages: List[Dict[str, Any]] = list(entry.messages)
+        has_more = len(messages) > limit or entry.has_older
+        return {"messages": messages[-limit:], "has_more": has_more}
+
+    async def get_latest_frame(self, channel_id: str, limit: int) -> str:
+        """
+        Zwraca zakodowaną ramkę chat_history z najnowszą stroną historii.
+
+        Args:
+            channel_id: ID kanału
+            limit: Liczba wiadomości na stronie
+
+        Returns:
+            Tekst JSON ramki chat_history
+        """
+        entry = self._channels.get(channel_id)
+        if entry is not None and entry.loaded and limit in entry.frames:
+            self._frame_hits += 1
+            self._channels.move_to_end(channel_id)
+            return entry.frames[limit]
+
+        self._frame_misses += 1
+        page = await self.get_latest(channel_id, limit)
+        frame = encode_chat_history(channel_id, page)
+
+        entry = self._channels.get(channel_id)
+        if limit <= self.capacity and entry is not None and entry.loaded:
+            entry.frames[limit] = frame
+        return frame
+
+    async def get_latest_payload(self, channel_id: str, limit: int) -> str:
+        """
+        Zwraca zakodowany payload najnowszej strony historii (bez koperty chat_history).
+
+        Args:
+            channel_id: ID kanału
+            limit: Liczba wiadomości na stronie
+
+        Returns:
+            Tekst JSON {"channel_id", "messages", "has_more"}
+        """
+        entry = self._channels.get(channel_id)
+        if entry is not None and entry.loaded and limit in entry.payloads:
+            self._frame_hits += 1
+            self._channels.move_to_end(channel_id)
+            return entry.payloads[limit]
+
+        self._frame_misses += 1
+        page = await self.get_latest(channel_id, limit)
+        payload = encode_history_payload(channel_id, page)
+
+        entry = self._channels.get(channel_id)
+        if limit <= self.capacity and entry is not None and entry.loaded:
+            entry.payloads[limit] = payload
+        return payload
+
+    async def get_page_frame(self, channel_id: str, limit: int, before: Optional[Union[str, int]] = None,
+                             after: Optional[Union[str, int]] = None) -> str:
+        """
+        Zwraca zakodowaną ramkę chat_history dla strony wskazanej kursorem.
+
+        Kursor to ID wiadomości lub jej seq; ID wiadomości z bufora jest
+        zamieniane na jej seq (wiadomość mogła jeszcze nie trafić do bazy).
+        Strony "after" (nowsze od kursora, np. uzupełnienie luki w seq)
+        powstają z bufora (get_since) - najnowsze wiadomości mogą czekać
+        w kolejce zapisu - a z bazy tylko wtedy, gdy bufor nie obejmuje luki.
+        Strony "before" są pobierane z bazy i uzupełniane niezapisanymi
+        wiadomościami z bufora; gdy wszystkie starsze od kursora są już
+        w bazie, strona się nie zmienia i jej ramka jest zapamiętywana
+        (_page_is_final).
+
+        Raises:
+            ValueError: Jeśli kursor jest nieznany (z database.get_messages_page())
+        """
+        if before is None and after is None:
+            return await self.get_latest_frame(channel_id, limit)
+
+        if after is not None:
+            self._frame_misses += 1
+            entry = await self._loaded(channel_id)
+            after = self._cursor_seq(entry, after)
+            if isinstance(after, int):
+                page = await self.get_since(channel_id, after, limit)
+            else:
+                # Kursor starszy niż bufor - nowsze od niego wiadomości z bazy i bufora
+                page = await self.db.get_messages_page(channel_id, limit=limit, after=after)
+                page = self._with_unsaved_after(entry, page, None, limit)
+            return encode_chat_history(channel_id, page)
+
+        entry = self._channels.get(channel_id)
+        if entry is not None:
+            before = self._cursor_seq(entry, before)
+
+        key = (channel_id, before, limit)
+        if key in self._page_frames:
+            self._frame_hits += 1
+            self._page_frames.move_to_end(key)
+            return self._page_frames[key]
+
+        self._frame_misses += 1
+        # Stan przed odczytem - niezapisane wiadomości mogłyby trafić do bazy w trakcie
+        cacheable = self.max_page_frames > 0 and not self._unsaved(channel_id)
+        commits = self._commits
+        page = await self.db.get_messages_page(channel_id, limit=limit, before=before)
+        if isinstance(before, int):
+            page = self._with_unsaved_before(channel_id, page, before, limit)
+        frame = encode_chat_history(channel_id, page)
+
+        if cacheable and commits == self._commits and self._page_is_final(before, page):
+            self._page_frames[key] = frame
+            if len(self._page_frames) > self.max_page_frames:
+                self._page_frames.popitem(last=False)
+        return frame
+
+    @staticmethod
+    def _cursor_seq(entry: ChannelHistory, cursor: Union[str, int]) -> Union[str, int]:
+        """Zamienia kursor-ID wiadomości z bufora na jej seq (pozostałe kursory bez zmian)."""
+        if isinstance(cursor, str):
+            for message in reversed(entry.messages):
+                if message["id"] == cursor:
+                    return message["seq"]
+        return cursor
+
+    def _with_unsaved_before(self, channel_id: str, page: Dict[str, Any], before: int,
+                             limit: int) -> Dict[str, Any]:
+        """
+        Uzupełnia stronę "before" z bazy o wiadomości z bufora, których baza jeszcze nie ma.
+
+        Baza zwraca najnowsze zapisane wiadomości o seq < before - brakujące
+        (niezapisane) są od nich nowsze.
+        """
+        entry = self._channels.get(channel_id)
+        if entry is None:
+            return page
+        messages = page["messages"]
+        newest = messages[-1]["seq"] if messages else None
+        unsaved = [m for m in entry.messages if m["seq"] < before and (newest is None or m["seq"] > newest)]
+        if not unsaved:
+            return page
+        merged = messages + unsaved
+        return {"messages": merged[-limit:], "has_more": page["has_more"] or len(merged) > limit}
+
+    @staticmethod
+    def _with_unsaved_after(entry: ChannelHistory, page: Dict[str, Any], after_seq: Optional[int],
+                            limit: int) -> Dict[str, Any]:
+        """
+        Uzupełnia stronę "after" z bazy o wiadomości z bufora, których baza jeszcze nie ma.
+
+        Gdy baza nie ma już nowszych wiadomości (has_more=False), brakujące
+        (niezapisane) są nowsze od ostatniej na stronie - lub od after_seq przy
+        pustej stronie (None - kursor starszy niż cały bufor).
+        """
+        if page["has_more"]:
+            return page
+        messages = page["messages"]
+        newest = messages[-1]["seq"] if messages else after_seq
+        unsaved = [m for m in entry.messages if newest is None or m["seq"] > newest]
+        if not unsaved:
+            return page
+        merged = messages + unsaved
+        return {"messages": merged[:limit], "has_more": len(merged) > limit}
+
+    def _unsaved(self, channel_id: str) -> bool:
+        """Czy kanał ma wiadomości jeszcze niezapisane w bazie (kolejka MessageWriter)."""
+        return self._has_unsaved is not None and self._has_unsaved(channel_id)
+
+    @staticmethod
+    def _page_is_final(before: Union[str, int], page: Dict[str, Any]) -> bool:
+        """
+        Czy strona "before" pobrana bez niezapisanych wiadomości kanału już się nie zmieni.
+
+        Kursor-ID wskazuje wiadomość zapisaną w bazie (inaczej ValueError), więc
+        wszystkie starsze też już są zapisane. Kursor-seq może wskazywać numer,
+        którego jeszcze nie nadano (before_seq=1000000 to "najnowsze") - strona
+        jest stała, tylko jeśli wiadomość before - 1 jest na niej (nowe
+        wiadomości dostaną większe numery).
+        """
+        if isinstance(before, str):
+            return True
+        messages = page["messages"]
+        return bool(messages) and messages[-1]["seq"] == before - 1
+
+    def drop_page_frames(self, channel_ids: Iterable[str]) -> None:
+        """
+        Usuwa zapamiętane ramki starszych stron kanałów (MessageWriter.on_commit).
+
+        Args:
+            channel_ids: Kanały, których wiadomości właśnie trafiły do bazy
+        """
+        self._commits += 1
+        channel_ids = set(channel_ids)
+        for key in [key for key in self._page_frames if key[0] in channel_ids]:
+            del self._page_frames[key]
+
+    async def get_since(self, channel_id: str, after_seq: int, limit: int) -> Dict[str, Any]:
+        """
+        Zwraca wiadomości nowsze niż after_seq (np. przegapione podczas rozłączenia).
+
+        Jeśli bufor kanału obejmuje wiadomość after_seq + 1 (klient był
+        rozłączony krótko), odpowiedź powstaje bez dostępu do bazy. W przeciwnym
+        razie strona z bazy jest uzupełniana niezapisanymi wiadomościami z bufora.
+
+        Args:
+            channel_id: ID kanału
+            after_seq: Ostatni seq znany klientowi
+            limit: Maksymalna liczba wiadomości
+
+        Returns:
+            Słownik {"messages": [...], "has_more": bool} - jak
+            database.get_messages_page(after=after_seq)
+        """
+        entry = await self._loaded(channel_id)
+
+        messages = entry.messages
+        # Bufor obejmuje lukę, jeśli zaczyna się najpóźniej od after_seq + 1 (lub ma cały kanał)
+        if entry.has_older and (not messages or messages[0]["seq"] > after_seq + 1):
+            self._misses += 1
+            page = await self.db.get_messages_page(channel_id, limit=limit, after=after_seq)
+            # Najnowsze wiadomości mogą jeszcze czekać w kolejce zapisu - są tylko w buforze
+            return self._with_unsaved_after(entry, page, after_seq, limit)
+
+        self._hits += 1
+        missed = [message for message in messages if message["seq"] > after_seq]
+        return {"messages": missed[:limit], "has_more": len(missed) > limit}
+
+    def append(self, channel_id: str, message: Dict[str, Any]) -> None:
+        """
+        Dopisuje nową wiadomość do bufora kanału (write-through).
+
+        Jeśli kanału nie ma w pamięci, wiadomość trafia do tymczasowego bufora,
+        który zostanie połączony z danymi z bazy przy pierwszym odczycie
+        (wiadomość może jeszcze czekać w kolejce zapisu MessageWriter).
+
+        Args:
+            channel_id: ID kanału (istniejący - sprawdza wywołujący, has_channel)
+            message: Wiadomość w formacie Message.to_dict()
+        """
+        self._entry(channel_id).append(message)
+
+    def remove(self, channel_id: str, message_id: str) -> None:
+        """
+        Usuwa wiadomość z bufora kanału (np. gdy MessageWriter nie zdołał jej zapisać).
+
+        Args:
+            channel_id: ID kanału
+            message_id: ID wiadomości w API
+        """
+        entry = self._channels.get(channel_id)
+        if entry is None:
+            return
+        kept = [message for message in entry.messages if message["id"] != message_id]
+        if len(kept) != len(entry.messages):
+            entry.messages = deque(kept, maxlen=self.capacity)
+            entry.frames.clear()
+            entry.payloads.clear()
+
+    async def _loaded(self, channel_id: str) -> ChannelHistory:
+        """Zwraca bufor kanału wypełniony z bazy (wczytuje go, jeśli trzeba)."""
+        entry = self._channels.get(channel_id)
+        if entry is None or not entry.loaded:
+            return await self._load(channel_id)
+        self._channels.move_to_end(channel_id)
+        return entry
+
+    def _entry(self, channel_id: str) -> ChannelHistory:
+        """Zwraca (lub tworzy) bufor kanału i oznacza go jako ostatnio używany."""
+        entry = self._channels.get(channel_id)
+        if entry is None:
+            entry = ChannelHistory(self.capacity)
+            self._store(channel_id, entry)
+        else:
+            self._channels.move_to_end(channel_id)
+        return entry
+
+    def _store(self, channel_id: str, entry: ChannelHistory) -> None:
+        """
+        Zapisuje bufor kanału jako najnowszy i usuwa najdawniej używany ponad limit.
+
+        Kanały z niezapisanymi wiadomościami są pomijane - gdy mają je wszystkie,
+        limit jest chwilowo przekraczany (do najbliższego zapisu paczki).
+        """
+        self._channels.pop(channel_id, None)
+        self._channels[channel_id] = entry
+        if len(self._channels) > self.max_channels:
+            for victim in self._channels:
+                if victim != channel_id and not self._unsaved(victim):
+                    del self._channels[victim]
+                    self._evictions += 1
+                    break
+
+    async def _load(self, channel_id: str) -> ChannelHistory:
+        """Wypełnia bufor kanału z bazy (jedno zapytanie na kanał, nawet przy równoczesnych chybieniach)."""
+        task = self._loading.get(channel_id)
+        if task is not None:
+            self._shared_loads += 1
+        else:
+            task = asyncio.ensure_future(self._fill(channel_id))
+            self._loading[channel_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(channel_id, None))
+        # shield - anulowanie jednego czekającego nie przerywa odczytu pozostałym
+        return await asyncio.shield(task)
+
+    async def _fill(self, channel_id: str) -> ChannelHistory:
+        """Wypełnia bufor kanału z bazy, zachowując wiadomości dopisane w międzyczasie."""
+        page = await self.db.get_messages_page(channel_id, limit=self.capacity)
+
+        # Wiadomości dopisane przed/podczas odczytu, których baza jeszcze nie zna
+        previous = self._channels.get(channel_id)
+        known_ids = {message["id"] for message in page["messages"]}
+        newer = [m for m in previous.messages if m["id"] not in known_ids] if previous else []
+
+        entry = ChannelHistory(self.capacity)
+        entry.has_older = page["has_more"]
+        for message in page["messages"] + newer:
+            entry.append(message)
+        entry.loaded = True
+
+        self._store(channel_id, entry)
+        return entry
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Zwraca metryki pamięci historii.
+
+        Returns:
+            Słownik z liczbą kanałów w pamięci i licznikami trafień/chybień
+            (osobno dla wiadomości i dla zakodowanych ramek)
+        """
+        return {
+            "channels": len(self._channels),
+            "max_channels": self.max_channels,
+            "capacity": self.capacity,
+            "hits": self._hits,
+            "misses": self._misses,
+            "bypassed": self._bypassed,
+            "evictions": self._evictions,
+            "frame_hits": self._frame_hits,
+            "frame_misses": self._frame_misses,
+            "page_frames": len(self._page_frames),
+            "shared_loads": self._shared_loads,
+        }
@@ -0,0 +1,97 @@
+"""
+Generowanie identyfikatorów wiadomości uporządkowanych w czasie.
+
+Poprzednie ID ("msg_" + 8 znaków z UUID) miały tylko 32 losowe bity - mogły
+się powtórzyć i nie dało się ich sortować. Nowe ID działają jak "Snowflake":
+
+    64 bity = 42 bity czasu (ms od EPOCH_MS) | 10 bitów numeru węzła | 12 bitów licznika
+
+- rosną w czasie (sortowanie po ID = sortowanie po czasie utworzenia)
+- są unikalne: licznik rozróżnia ID z tej samej milisekundy (do 4096/ms),
+  a numer węzła - ID z różnych procesów serwera
+- zapis tekstowy ma stałą długość (16 znaków hex), więc porównanie napisów
+  daje tę samą kolejność co porównanie liczb
+"""
+
+import threading
+import time
+
+# Początek liczenia czasu: 2025-01-01T00:00:00Z (42 bity ms wystarczą na ~139 lat)
+EPOCH_MS = 1735689600000
+
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+MESSAGE_ID_PREFIX = "msg_"
+
+
+class MessageIdGenerator:
+    """
+    Generator monotonicznych, unikalnych 64-bitowych ID (bezpieczny wątkowo).
+
+    Jeśli zegar systemowy cofnie się, generator dalej używa ostatniego
+    znanego czasu - ID nigdy nie maleją.
+    """
+
+    def __init__(self, node_id: int = 0):
+        """
+        Args:
+            node_id: Numer procesu serwera (0 - 1023), unikalny w obrębie wdrożenia
+        """
+        if not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"node_id must be between 0 and {MAX_NODE_ID}")
+        self.node_id = node_id
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_int(self) -> int:
+        """Zwraca kolejne ID jako liczbę całkowitą."""
+        with self._lock:
+            now_ms = max(int(time.time() * 1000) - EPOCH_MS, self._last_ms)
+
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Wyczerpany licznik w tej milisekundzie - przechodzimy do następnej
+                    now_ms += 1
+            else:
+                self._sequence = 0
+
+            self._last_ms = now_ms
+            return (now_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+
+    def next_id(self) -> str:
+        """Zwraca kolejne ID wiadomości w formacie "msg_<16 znaków hex>"."""
+        return format_message_id(self.next_int())
+
+
+def format_message_id(value: int) -> str:
+    """Zamienia liczbowe ID na tekst "msg_<16 znaków hex>" (stała długość)."""
+    return f"{MESSAGE_ID_PREFIX}{value:016x}"
+
+
+def parse_message_id(message_id: str) -> int:
+    """
+    Zamienia tekstowe ID wiadomości z powrotem na liczbę.
+
+    Przyjmuje też krótsze ID ze starszych wersji ("msg_1", "msg_3f2a9c1b").
+
+    Raises:
+        ValueError: Jeśli tekst nie ma formatu "msg_<hex>"
+    """
+    if not isinstance(message_id, str) or not message_id.startswith(MESSAGE_ID_PREFIX):
+        raise ValueError(f"Invalid message id: {message_id}")
+    return int(message_id[len(MESSAGE_ID_PREFIX):], 16)
+
+
+def message_id_timestamp_ms(message_id: str) -> int:
+    """
+    Odczytuje czas utworzenia (ms od 1970 r.) zapisany w ID wiadomości.
+
+    Args:
+        message_id: ID w formacie "msg_<16 znaków hex>"
+    """
+    return (parse_message_id(message_id) >> (NODE_BITS + SEQUENCE_BITS)) + EPOCH_MS
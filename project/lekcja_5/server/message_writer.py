@@ -0,0 +1,322 @@
+"""
+Zapis wiadomości w tle (write-behind) z grupowym commitem.
+
+database.add_message() robi conn.commit() dla każdej wiadomości, więc każda
+linijka czatu kosztuje jeden fsync - przepustowość jest ograniczona
+szybkością dysku.
+
+MessageWriter:
+- przyjmuje wiadomości do kolejki w pamięci
+- od razu nadaje ID, timestamp i numer w kanale (handler może od razu rozgłosić wiadomość)
+- zapisuje paczki przez executemany w JEDNEJ transakcji co N ms lub co M wiadomości
+- przy zamykaniu serwera zapisuje wszystko, co zostało w kolejce
+- tryb "ack after commit": wywołujący czeka aż wiadomość trafi na dysk
+- bez tego trybu o niezapisanej wiadomości informuje callback on_failure
+  (handler wysyła wtedy nadawcy error_message) - wiersz nie ginie po cichu
+- seq niezapisanej wiadomości nie jest nadawany ponownie - wiadomość została
+  już rozgłoszona z tym numerem, więc w numeracji kanału zostaje trwała
+  luka (zliczana w metrykach - seq_gaps)
+"""
+
+import asyncio
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+import database
+from db_executor import AsyncDatabase
+from ids import format_message_id
+from models import parse_user_id
+
+
+# Callback niezapisanej wiadomości - dostaje klucz wiadomości i wyjątek zapisu
+FailureCallback = Callable[[int, Exception], None]
+
+
+class MessageWriter:
+    """
+    Kolejka zapisu wiadomości z grupowym commitem.
+
+    Przykład:
+        writer = MessageWriter(db, flush_interval_ms=50, max_batch=100)
+        await writer.start()
+        message_key, created_at, seq = await writer.submit("general", "user_1", "Hej!")
+        ...
+        await writer.close()  # zapisuje resztę kolejki
+    """
+
+    def __init__(self, db: AsyncDatabase, flush_interval_ms: int = 50, max_batch: int = 100,
+                 ack_after_commit: bool = False, on_commit: Optional[Callable[[Set[str]], None]] = None):
+        """
+        Args:
+            db: Asynchroniczna warstwa dostępu do bazy
+            flush_interval_ms: Maksymalny czas oczekiwania wiadomości w kolejce
+            max_batch: Liczba wiadomości, po której paczka jest zapisywana od razu
+            ack_after_commit: Domyślny tryb potwierdzania (True = czekaj na commit)
+            on_commit: Wywoływany po zapisie paczki ze zbiorem kanałów, których
+                       wiadomości trafiły do bazy (np. HistoryCache.drop_page_frames)
+        """
+        self.db = db
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.ack_after_commit = ack_after_commit
+        self.on_commit = on_commit
+
+        # Kolejka: (wiersz do zapisu, future do potwierdzenia lub None,
+        #          callback wywoływany, gdy wiersz nie zostanie zapisany, lub None)
+        self._pending: List[Tuple[tuple, Optional[asyncio.Future], Optional[FailureCallback]]] = []
+        # Kanał -> liczba wiadomości jeszcze niezapisanych (w kolejce i w trwającym zapisie)
+        self._unsaved: Counter = Counter()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        # Ostatni nadany numer wiadomości w każdym kanale (seq), wczytywany leniwie z bazy
+        self._last_seq: Dict[str, int] = {}
+
+        # Liczniki do metryk
+        self._batches = 0
+        self._written = 0
+        self._failed = 0
+        self._largest_batch = 0
+        # Numery seq niezapisanych wiadomości, które zostały w kanale jako trwała luka
+        self._seq_gaps = 0
+
+    def _ensure_primitives(self) -> None:
+        """Tworzy obiekty asyncio leniwie - muszą należeć do działającej pętli."""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """Uruchamia zadanie w tle, które cyklicznie zapisuje kolejkę."""
+        self._ensure_primitives()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, channel_id: str, user_id: Union[str, int], text: str,
+                     ack_after_commit: Optional[bool] = None,
+                     on_failure: Optional[FailureCallback] = None) -> tuple[int, int, int]:
+        """
+        Dodaje wiadomość do kolejki zapisu.
+
+        Kanał musi istnieć - sprawdza go wywołujący (HistoryCache.has_channel),
+        zanim wiadomość dostanie seq.
+
+        Args:
+            channel_id: ID kanału
+            user_id: ID użytkownika ("user_1" lub klucz 1)
+            text: Treść wiadomości
+            ack_after_commit: Nadpisuje domyślny tryb (True = czekaj na commit)
+            on_failure: Wywoływany z kluczem wiadomości i wyjątkiem, jeśli wiadomość
+                        nie zostanie zapisana (w trybie ack_after_commit wyjątek
+                        dostaje wywołujący)
+
+        Returns:
+            Tuple (message_key, created_at_ms, seq) - nadane od razu, przed zapisem
+            na dysk; tekstowe ID i datę tworzy Message.to_dict()
+        """
+        if self._closed:
+            raise RuntimeError("MessageWriter is closed")
+        self._ensure_primitives()
+        user_key = parse_user_id(user_id)
+
+        seq = await self._next_seq(channel_id)
+        message_key = database.generate_message_id()
+        created_at = database.get_timestamp_ms()
+
+        wait = self.ack_after_commit if ack_after_commit is None else ack_after_commit
+        future = asyncio.get_running_loop().create_future() if wait else None
+
+        self._append((message_key, channel_id, user_key, text, created_at, seq), future, on_failure)
+
+        if future is not None:
+            await future
+
+        return message_key, created_at, seq
+
+    def enqueue(self, message_key: int, channel_id: str, user_id: Union[str, int], text: str,
+                created_at: int, seq: int, on_failure: Optional[FailureCallback] = None) -> None:
+        """
+        Dodaje do kolejki wiadomość z nadanym już ID, datą i numerem w kanale.
+
+        Używane w trybie wielu procesów - seq nadaje broker (cluster.ClusterNode),
+        a licznik _last_seq tego obiektu nie jest wtedy używany. Nie czeka na commit.
+
+        Args:
+            message_key: Klucz wiadomości (z database.generate_message_id())
+            channel_id: ID kanału
+            user_id: ID użytkownika ("user_1" lub klucz 1)
+            text: Treść wiadomości
+            created_at: Czas utworzenia w ms
+            seq: Numer wiadomości w kanale
+            on_failure: Wywoływany z kluczem wiadomości i wyjątkiem, jeśli wiadomość
+                        nie zostanie zapisana
+        """
+        if self._closed:
+            raise RuntimeError("MessageWriter is closed")
+        self._ensure_primitives()
+        self._append((message_key, channel_id, parse_user_id(user_id), text, created_at, seq), None, on_failure)
+
+    def _append(self, row: tuple, future: Optional[asyncio.Future], on_failure: Optional[FailureCallback]) -> None:
+        """Dopisuje wiersz do kolejki; przy pełnej paczce budzi zadanie zapisu."""
+        self._pending.append((row, future, on_failure))
+        self._unsaved[row[1]] += 1
+
+        # Pełna paczka - obudź zadanie zapisu bez czekania na interwał
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def _next_seq(self, channel_id: str) -> int:
+        """
+        Nadaje kolejny numer wiadomości w kanale.
+
+        Wszystkie wiadomości przechodzą przez ten obiekt, więc licznik w pamięci
+        wystarcza - baza jest pytana tylko przy pierwszej wiadomości w kanale.
+        Numer jest nadawany w tej samej chwili, w której wiadomość trafia do
+        kolejki, więc kolejność seq = kolejność zapisu i rozgłaszania.
+        """
+        if channel_id not in self._last_seq:
+            last_seq = await self.db.get_last_seq(channel_id)
+            # Inna wiadomość mogła zainicjalizować licznik podczas odczytu z bazy
+            self._last_seq.setdefault(channel_id, last_seq)
+        self._last_seq[channel_id] += 1
+        return self._last_seq[channel_id]
+
+    async def _run(self) -> None:
+        """Pętla zadania w tle: czekaj na interwał lub pełną paczkę, potem zapisz."""
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Błąd zapisu paczki wiadomości: {e}")
+
+    async def flush(self) -> int:
+        """
+        Zapisuje wszystkie oczekujące wiadomości w jednej transakcji.
+
+        Jeśli paczka zostanie odrzucona (np. nieistniejący kanał), wiadomości
+        są zapisywane pojedynczo - błędny wiersz nie blokuje pozostałych.
+        O niezapisanym wierszu dowiaduje się czekający na commit (wyjątek)
+        albo callback on_failure podany przy submit() / enqueue().
+
+        Returns:
+            Liczba zapisanych wiadomości
+        """
+        self._ensure_primitives()
+
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, []
+            rows = [row for row, _, _ in batch]
+
+            try:
+                await self.db.write(database.add_messages_batch, rows)
+                errors = [None] * len(batch)
+            except Exception:
+                errors = [await self._write_single(row) for row in rows]
+
+            written = 0
+            committed: Set[str] = set()
+            for (row, future, on_failure), error in zip(batch, errors):
+                channel_id = row[1]
+                self._unsaved[channel_id] -= 1
+                if not self._unsaved[channel_id]:
+                    del self._unsaved[channel_id]
+
+                if error is None:
+                    written += 1
+                    committed.add(channel_id)
+                else:
+                    self._failed += 1
+                    # Numer został już rozgłoszony - zostaje luką, nie jest nadawany ponownie
+                    self._seq_gaps += 1
+                    print(f"❌ Nie zapisano wiadomości {format_message_id(row[0])} "
+                          f"(luka: seq {row[5]} w kanale {channel_id}): {error}")
+
+                if future is not None and not future.done():
+                    if error is None:
+                        future.set_result(None)
+                    else:
+                        future.set_exception(error)
+                elif error is not None and on_failure is not None:
+                    try:
+                        on_failure(row[0], error)
+                    except Exception as e:
+                        print(f"❌ Błąd powiadomienia o niezapisanej wiadomości: {e}")
+
+            if committed and self.on_commit is not None:
+                try:
+                    self.on_commit(committed)
+                except Exception as e:
+                    print(f"❌ Błąd powiadomienia o zapisanej paczce: {e}")
+
+            self._batches += 1
+            self._written += written
+            self._largest_batch = max(self._largest_batch, len(batch))
+            return written
+
+    async def _write_single(self, row: tuple) -> Optional[Exception]:
+        """Zapisuje pojedynczy wiersz. Zwraca wyjątek lub None jeśli się udało."""
+        try:
+            await self.db.write(database.add_messages_batch, [row])
+            return None
+        except Exception as e:
+            return e
+
+    async def close(self) -> None:
+        """
+        Zatrzymuje zadanie w tle i zapisuje wszystko, co zostało w kolejce.
+
+        Wywoływane przy zamykaniu serwera - żadna przyjęta wiadomość nie ginie.
+        """
+        self._closed = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    @property
+    def pending_count(self) -> int:
+        """Liczba wiadomości czekających na zapis."""
+        return len(self._pending)
+
+    def has_unsaved(self, channel_id: str) -> bool:
+        """
+        Sprawdza, czy kanał ma wiadomości, których jeszcze nie ma w bazie.
+
+        Args:
+            channel_id: ID kanału
+
+        Returns:
+            True jeśli wiadomości kanału czekają w kolejce lub są właśnie zapisywane
+        """
+        return channel_id in self._unsaved
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Zwraca metryki kolejki zapisu.
+
+        Returns:
+            Słownik z liczbą oczekujących, zapisanych i odrzuconych wiadomości
+            oraz luk w numeracji seq (niezapisane wiadomości)
+        """
+        return {
+            "pending": len(self._pending),
+            "batches": self._batches,
+            "written": self._written,
+            "failed": self._failed,
+            "seq_gaps": self._seq_gaps,
+            "largest_batch": self._largest_batch,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "max_batch": self.max_batch,
+            "ack_after_commit": self.ack_after_commit,
+        }
@@ -0,0 +1,295 @@
+"""
+Migracja bazy chat.db do schematu v2 (klucze INTEGER, czas w milisekundach).
+
+Schemat v1 przechowywał wszystkie klucze ("user_1", "general", "msg_...")
+i wszystkie daty ("2025-09-28T10:01:00Z") jako TEXT. Schemat v2 (database.py)
+używa liczb - wiersze, indeksy i złączenia są kilka razy mniejsze.
+
+Migracja działa w miejscu, w jednej transakcji (błąd = baza bez zmian):
+1. stare tabele są przemianowywane na *_v1
+2. tworzone są tabele v2 (database.SCHEMA_TABLES)
+3. dane są przepisywane z zamianą kluczy i dat na liczby
+4. tabele *_v1 są usuwane, a plik zmniejszany (VACUUM)
+
+Zamiana kluczy:
+- "user_7" -> 7 (inne ID użytkowników dostają kolejne wolne numery)
+- "msg_<hex>" -> liczba z zapisu hex (stare kursory historii dalej działają)
+- ID kanału ("general") zostaje publicznym ID w kolumnie slug
+
+Serwer uruchamia migrację sam, gdy wykryje starszą bazę. Ręcznie:
+
+    python migrate_v2.py              # chat.db w bieżącym katalogu
+    python migrate_v2.py inna.db
+"""
+
+import os
+import sqlite3
+import sys
+from typing import Dict, Optional
+
+import database
+from ids import parse_message_id
+from models import parse_timestamp, parse_user_id
+
+# Schemat v1 (ostatnia wersja z tekstowymi kluczami) - do testów i benchmarku
+V1_SCHEMA = """
+    CREATE TABLE users (
+        id TEXT PRIMARY KEY,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    );
+    CREATE TABLE channels (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        type TEXT NOT NULL CHECK(type IN ('public', 'private')),
+        created_at TEXT NOT NULL
+    );
+    CREATE TABLE messages (
+        id TEXT PRIMARY KEY,
+        channel_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        text TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        edited_at TEXT,
+        seq INTEGER NOT NULL,
+        FOREIGN KEY (channel_id) REFERENCES channels(id),
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    );
+    CREATE TABLE channel_members (
+        user_id TEXT NOT NULL,
+        channel_id TEXT NOT NULL,
+        PRIMARY KEY (user_id, channel_id),
+        FOREIGN KEY (user_id) REFERENCES users(id),
+        FOREIGN KEY (channel_id) REFERENCES channels(id)
+    );
+    CREATE UNIQUE INDEX idx_messages_channel_seq ON messages (channel_id, seq);
+"""
+
+TABLES = ["users", "channels", "messages", "channel_members"]
+
+# Liczba wiadomości przepisywanych jednym executemany
+BATCH_SIZE = 5000
+
+
+def needs_migration(conn: sqlite3.Connection) -> bool:
+    """Czy baza ma schemat starszy niż v2."""
+    return database.get_schema_version(conn) < database.SCHEMA_VERSION
+
+
+def migrate(conn: sqlite3.Connection, vacuum: bool = True) -> Dict[str, int]:
+    """
+    Przebudowuje bazę v1 do schematu v2 w miejscu.
+
+    Args:
+        conn: Połączenie z bazą (nie może być w trakcie transakcji)
+        vacuum: Czy po migracji zmniejszyć plik (VACUUM)
+
+    Returns:
+        Słownik z liczbą przeniesionych użytkowników, kanałów i wiadomości
+        oraz liczbą pominiętych wiadomości (bez autora lub kanału)
+    """
+    if not needs_migration(conn):
+        return {"users": 0, "channels": 0, "messages": 0, "skipped": 0}
+
+    print("🔧 Migracja bazy do schematu v2 (klucze INTEGER, czas w ms)...")
+    conn.commit()
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF")
+
+    try:
+        conn.execute("BEGIN")
+        _rename_v1_tables(conn)
+        for statement in database.SCHEMA_TABLES:
+            conn.execute(statement)
+
+        user_keys = _copy_users(conn)
+        channel_keys = _copy_channels(conn)
+        _copy_channel_members(conn, user_keys, channel_keys)
+        copied, skipped = _copy_messages(conn, user_keys, channel_keys)
+
+        for table in TABLES:
+            conn.execute(f"DROP TABLE {table}_v1")
+        for statement in database.SCHEMA_INDEXES:
+            conn.execute(statement)
+        conn.execute(f"PRAGMA user_version = {database.SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+
+    # Indeks wyszukiwania (FTS5) dla przepisanych wiadomości
+    database.create_search_index(conn)
+
+    if vacuum:
+        conn.execute("VACUUM")
+
+    stats = {"users": len(user_keys), "channels": len(channel_keys), "messages": copied, "skipped": skipped}
+    print(f"✓ Migracja zakończona: {stats['users']} użytkowników, {stats['channels']} kanałów, "
+          f"{stats['messages']} wiadomości")
+    if skipped:
+        print(f"⚠️  Pominięto {skipped} wiadomości bez istniejącego autora lub kanału")
+    return stats
+
+
+def _rename_v1_tables(conn: sqlite3.Connection) -> None:
+    """Usuwa stare indeksy (nazwy są takie same w v2) i przemianowuje tabele na *_v1."""
+    indexes = conn.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN (?, ?, ?, ?)
+    """, TABLES).fetchall()
+    for (name,) in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    for table in TABLES:
+        conn.execute(f"ALTER TABLE {table} RENAME TO {table}_v1")
+
+
+def _copy_users(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Przepisuje użytkowników. Zwraca mapowanie stare ID -> nowy klucz."""
+    rows = conn.execute("SELECT id, username, password_hash, created_at FROM users_v1 ORDER BY rowid").fetchall()
+
+    keys: Dict[str, int] = {}
+    taken = set()
+    for row in rows:
+        key = _parse_or_none(parse_user_id, row[0])
+        if key is not None and key not in taken:
+            keys[row[0]] = key
+            taken.add(key)
+    next_key = max(keys.values(), default=0) + 1
+    for row in rows:
+        if row[0] not in keys:
+            keys[row[0]] = next_key
+            next_key += 1
+
+    conn.executemany(
+        "INSERT INTO users (id, username, password_hash, created_at) VALUES (?, ?, ?, ?)",
+        [(keys[row[0]], row[1], row[2], parse_timestamp(row[3])) for row in rows]
+    )
+    return keys
+
+
+def _copy_channels(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Przepisuje kanały (stare ID -> slug). Zwraca mapowanie slug -> nowy klucz."""
+    rows = conn.execute("SELECT id, name, type, created_at FROM channels_v1 ORDER BY rowid").fetchall()
+
+    keys = {row[0]: number for number, row in enumerate(rows, start=1)}
+    conn.executemany(
+        "INSERT INTO channels (id, slug, name, type, created_at) VALUES (?, ?, ?, ?, ?)",
+        [(keys[row[0]], row[0], row[1], row[2], parse_timestamp(row[3])) for row in rows]
+    )
+    return keys
+
+
+def _copy_channel_members(conn: sqlite3.Connection, user_keys: Dict[str, int],
+                          channel_keys: Dict[str, int]) -> None:
+    """Przepisuje członkostwa w kanałach (pomija wpisy bez użytkownika lub kanału)."""
+    rows = conn.execute("SELECT user_id, channel_id FROM channel_members_v1").fetchall()
+    conn.executemany(
+        "INSERT INTO channel_members (user_id, channel_id) VALUES (?, ?)",
+        [(user_keys[user_id], channel_keys[channel_id]) for user_id, channel_id in rows
+         if user_id in user_keys and channel_id in channel_keys]
+    )
+
+
+def _copy_messages(conn: sqlite3.Connection, user_keys: Dict[str, int],
+                   channel_keys: Dict[str, int]) -> tuple[int, int]:
+    """
+    Przepisuje wiadomości paczkami.
+
+    Bazy sprzed numerów sekwencyjnych (bez kolumny seq) dostają seq
+    w kolejności zapisu: (created_at, rowid) w każdym kanale.
+
+    Returns:
+        Tuple (liczba przepisanych, liczba pominiętych)
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(messages_v1)")}
+    has_seq = "seq" in columns
+    order = "channel_id, seq" if has_seq else "channel_id, created_at, rowid"
+
+    source = conn.execute(f"""
+        SELECT id, channel_id, user_id, text, created_at, edited_at, {'seq' if has_seq else 'NULL'}
+        FROM messages_v1 ORDER BY {order}
+    """)
+
+    used_keys = set()
+    last_seq: Dict[str, int] = {}
+    copied = skipped = 0
+    batch = []
+
+    for message_id, channel_id, user_id, text, created_at, edited_at, seq in source:
+        if channel_id not in channel_keys or user_id not in user_keys:
+            skipped += 1
+            continue
+
+        key = _parse_or_none(parse_message_id, message_id)
+        if key is None or key in used_keys:
+            key = database.generate_message_id()
+        used_keys.add(key)
+
+        if seq is None:
+            seq = last_seq.get(channel_id, 0) + 1
+        last_seq[channel_id] = seq
+
+        batch.append((
+            key, channel_keys[channel_id], user_keys[user_id], text,
+            parse_timestamp(created_at), parse_timestamp(edited_at) if edited_at else None, seq
+        ))
+        if len(batch) >= BATCH_SIZE:
+            _insert_messages(conn, batch)
+            copied += len(batch)
+            batch = []
+
+    _insert_messages(conn, batch)
+    copied += len(batch)
+    return copied, skipped
+
+
+def _insert_messages(conn: sqlite3.Connection, rows: list) -> None:
+    """Zapisuje paczkę przepisanych wiadomości."""
+    conn.executemany("""
+        INSERT INTO messages (id, channel_id, user_id, text, created_at, edited_at, seq)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+
+def _parse_or_none(parse, value) -> Optional[int]:
+    """Wywołuje parse_*(value); zwraca None zamiast wyjątku dla nietypowych ID."""
+    try:
+        return parse(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "chat.db"
+
+    if not os.path.exists(db_path):
+        print(f"❌ Baza danych {db_path} nie istnieje!")
+        return
+
+    conn = sqlite3.connect(db_path)
+    if not needs_migration(conn):
+        print(f"✓ Baza {db_path} ma już schemat v{database.SCHEMA_VERSION}")
+        conn.close()
+        return
+
+    # Kopia zapasowa przed zmianą struktury
+    backup_path = f"{db_path}.v1.bak"
+    with sqlite3.connect(backup_path) as backup:
+        conn.backup(backup)
+    backup.close()
+    print(f"💾 Kopia zapasowa: {backup_path}")
+
+    size_before = os.path.getsize(db_path)
+    migrate(conn)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    size_after = os.path.getsize(db_path)
+
+    print(f"📦 Rozmiar pliku: {size_before / 1024:.0f} KiB -> {size_after / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
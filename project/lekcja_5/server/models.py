@@ -2,24 +2,67 @@
 Modele danych dla aplikacji czatu.
 
 Ten moduł definiuje struktury danych używane w całej aplikacji.
+
+Baza (schemat v2) przechowuje klucze jako INTEGER, a czas jako liczbę
+milisekund od 1970 r. Modele trzymają te same wartości liczbowe - tekstowe ID
+("user_1", "msg_...") i daty ISO 8601 powstają dopiero w to_dict(),
+czyli na granicy API. Funkcje parse_* zamieniają tekst z API z powrotem na liczby.
 """
 
 from dataclasses import dataclass
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+from ids import format_message_id, parse_message_id
+
+USER_ID_PREFIX = "user_"
+
+
+def format_user_id(user_id: int) -> str:
+    """Zamienia klucz użytkownika z bazy na ID w API (1 -> "user_1")."""
+    return f"{USER_ID_PREFIX}{user_id}"
+
+
+def parse_user_id(user_id: Union[int, str]) -> int:
+    """
+    Zamienia ID użytkownika z API na klucz w bazie ("user_1" -> 1).
+
+    Raises:
+        ValueError: Jeśli tekst nie ma formatu "user_<liczba>"
+    """
+    if isinstance(user_id, int):
+        return user_id
+    if not user_id.startswith(USER_ID_PREFIX):
+        raise ValueError(f"Invalid user id: {user_id}")
+    return int(user_id[len(USER_ID_PREFIX):])
+
+
+def format_timestamp(timestamp_ms: int) -> str:
+    """Zamienia czas w ms na format API: "2025-09-28T10:01:00Z" (ISO 8601 UTC)."""
+    moment = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_timestamp(value: str) -> int:
+    """Zamienia datę ISO 8601 (np. "2025-09-28T10:01:00Z") na czas w ms."""
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
 
 
 @dataclass
 class User:
     """Model użytkownika"""
-    id: str
+    id: int
     username: str
     password_hash: str
-    created_at: str
+    created_at: int  # ms od 1970 r.
 
     def to_dict(self) -> dict:
         """Konwersja do słownika (bez hasła dla bezpieczeństwa)"""
         return {
-            "id": self.id,
+            "id": format_user_id(self.id),
             "name": self.username
         }
 
@@ -27,10 +70,10 @@ class User:
 @dataclass
 class Channel:
     """Model kanału"""
-    id: str
+    id: str  # publiczne ID kanału (np. "general") - w bazie kolumna slug
     name: str
     type: str  # 'public' lub 'private'
-    created_at: str
+    created_at: int  # ms od 1970 r.
 
     def to_dict(self) -> dict:
         """Konwersja do słownika"""
@@ -44,27 +87,31 @@ class Channel:
 @dataclass
 class Message:
     """Model wiadomości"""
-    id: str
+    id: int
     channel_id: str
-    user_id: str
+    user_id: int
     username: str
     text: str
-    timestamp: str
-    edited_at: Optional[str] = None
+    timestamp: int  # ms od 1970 r.
+    edited_at: Optional[int] = None
+    seq: Optional[int] = None  # numer wiadomości w kanale (1, 2, 3, ... bez przerw)
 
     def to_dict(self) -> dict:
         """Konwersja do słownika zgodnie z api_design.md"""
         message_dict = {
-            "id": self.id,
+            "id": format_message_id(self.id),
             "user": {
-                "id": self.user_id,
+                "id": format_user_id(self.user_id),
                 "name": self.username
             },
             "text": self.text,
-            "timestamp": self.timestamp
+            "timestamp": format_timestamp(self.timestamp)
         }
 
+        if self.seq is not None:
+            message_dict["seq"] = self.seq
+
         if self.edited_at:
-            message_dict["edited_at"] = self.edited_at
+            message_dict["edited_at"] = format_timestamp(self.edited_at)
 
         return message_dict
@@ -0,0 +1,251 @@
+"""
+Kolejka wychodząca jednego połączenia WebSocket.
+
+Rozgłaszanie czekało na websocket.send_text() każdego odbiorcy po kolei -
+jeden wolny lub zawieszony klient opóźniał wszystkich następnych i blokował
+handler nadawcy. Teraz każde połączenie ma własną, ograniczoną kolejkę
+gotowych ramek (str - JSON, bytes - MessagePack) i własne zadanie, które ją opróżnia:
+- rozgłoszenie to tylko dopisanie ramki do kolejek (bez await)
+- wolny klient spowalnia wyłącznie swoje zadanie wysyłające
+- kolejka mierzy czas wysyłania i rozmiar czekających ramek - na tej
+  podstawie ConnectionManager wykrywa klientów, którzy nie nadążają
+- rozmiar kolejki jest ograniczony - po przepełnieniu działa polityka:
+
+    drop_oldest - najstarsza ramka w kolejce jest usuwana
+    disconnect  - kolejka jest zamykana, a połączenie rozłączane
+                  (kod SLOW_CONSUMER_CLOSE_CODE)
+    coalesce    - ramka z kluczem (np. pełna lista online_users) zastępuje czekającą
+                  ramkę z tym samym kluczem; gdy nie ma czego zastąpić,
+                  usuwana jest najstarsza ramka
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Union
+
+from fastapi import WebSocket
+
+OVERFLOW_POLICIES = ("drop_oldest", "disconnect", "coalesce")
+
+# Kod zamknięcia WebSocket dla klienta, który nie nadąża z odbiorem
+# (zakres 4000-4999 jest zarezerwowany dla aplikacji)
+SLOW_CONSUMER_CLOSE_CODE = 4001
+
+# Waga nowego pomiaru w średniej wykładniczej czasu wysyłania
+LATENCY_SMOOTHING = 0.2
+
+# Maksymalny czas (s) oczekiwania na zamknięcie połączenia
+CLOSE_TIMEOUT = 1.0
+
+
+class OutboundQueue:
+    """
+    Ograniczona kolejka ramek do wysłania jednym połączeniem.
+
+    Zadanie wysyłające jest uruchamiane przy pierwszej ramce i kończy się
+    przy close() lub przy błędzie wysyłania (zerwane połączenie).
+    """
+
+    def __init__(self, websocket: WebSocket, max_size: int = 256, overflow_policy: str = "drop_oldest"):
+        """
+        Args:
+            websocket: Połączenie, do którego trafiają ramki
+            max_size: Maksymalna liczba ramek czekających na wysłanie
+            overflow_policy: "drop_oldest", "disconnect" lub "coalesce"
+
+        Raises:
+            ValueError: Przy nieznanej polityce lub rozmiarze < 1
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {', '.join(OVERFLOW_POLICIES)}")
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.websocket = websocket
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+
+        # Elementy kolejki to listy [klucz, ramka] - coalesce podmienia ramkę w miejscu
+        self._frames: Deque[List[Any]] = deque()
+        # Klucz -> element kolejki z czekającą ramką o tym kluczu
+        self._keyed: Dict[str, List[Any]] = {}
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+        # True - kolejka zamknięta z powodu przepełnienia (polityka disconnect)
+        self.overflowed = False
+        # Czas rozpoczęcia trwającego send_text() (None - nic nie jest wysyłane)
+        self._send_started: Optional[float] = None
+
+        # Metryki
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.peak_depth = 0
+        # Rozmiar czekających ramek w znakach (dla ramek ASCII = bajty)
+        self.backlog_bytes = 0
+        # Średni czas wysłania ramki (średnia wykładnicza, ms)
+        self.send_latency_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Liczba ramek czekających na wysłanie."""
+        return len(self._frames)
+
+    def put(self, frame: Union[str, bytes], key: Optional[str] = None) -> bool:
+        """
+        Dodaje ramkę do kolejki (nie czeka na wysłanie).
+
+        Args:
+            frame: Zakodowana wiadomość (str - JSON, bytes - MessagePack)
+            key: Opcjonalny klucz - w polityce coalesce nowsza ramka z tym
+                 samym kluczem zastępuje czekającą
+
+        Returns:
+            False jeśli ramka została odrzucona (kolejka zamknięta lub
+            połączenie zamykane z powodu przepełnienia)
+        """
+        if self.closed:
+            return False
+
+        if key is not None and self.overflow_policy == "coalesce":
+            pending = self._keyed.get(key)
+            if pending is not None:
+                self.backlog_bytes += len(frame) - len(pending[1])
+                pending[1] = frame
+                self.coalesced += 1
+                return True
+
+        if len(self._frames) >= self.max_size:
+            if self.overflow_policy == "disconnect":
+                self.dropped += len(self._frames) + 1
+                self._close_slow_consumer()
+                return False
+            self._pop_oldest()
+            self.dropped += 1
+
+        entry = [key, frame]
+        self._frames.append(entry)
+        self.backlog_bytes += len(frame)
+        if key is not None and self.overflow_policy == "coalesce":
+            self._keyed[key] = entry
+        if len(self._frames) > self.peak_depth:
+            self.peak_depth = len(self._frames)
+
+        self._idle.clear()
+        self._ready.set()
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return True
+
+    async def wait_idle(self):
+        """Czeka, aż wszystkie ramki z kolejki zostaną wysłane (lub kolejka zamknięta)."""
+        await self._idle.wait()
+
+    def current_latency_ms(self, now: Optional[float] = None) -> float:
+        """
+        Zwraca opóźnienie wysyłania: średnie lub czas trwającego send_text(),
+        jeśli jest dłuższy (klient, który całkiem przestał odbierać).
+
+        Args:
+            now: Aktualny czas z time.monotonic() (domyślnie - teraz)
+        """
+        if self._send_started is None:
+            return self.send_latency_ms
+        now = time.monotonic() if now is None else now
+        return max(self.send_latency_ms, (now - self._send_started) * 1000)
+
+    def close(self):
+        """Zamyka kolejkę: zatrzymuje zadanie wysyłające i porzuca czekające ramki."""
+        self.closed = True
+        self._frames.clear()
+        self._keyed.clear()
+        self.backlog_bytes = 0
+        self._idle.set()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Zwraca metryki kolejki.
+
+        Returns:
+            Słownik z głębokością kolejki i licznikami ramek
+        """
+        return {
+            "depth": self.depth,
+            "peak_depth": self.peak_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "backlog_bytes": self.backlog_bytes,
+            "send_latency_ms": round(self.current_latency_ms(), 1)
+        }
+
+    def _pop_oldest(self) -> List[Any]:
+        """Usuwa najstarszą ramkę z kolejki (i z indeksu kluczy)."""
+        entry = self._frames.popleft()
+        self.backlog_bytes -= len(entry[1])
+        if entry[0] is not None and self._keyed.get(entry[0]) is entry:
+            del self._keyed[entry[0]]
+        return entry
+
+    def _close_slow_consumer(self):
+        """
+        Zamyka kolejkę klienta, który nie odbiera ramek (polityka disconnect).
+
+        Samo połączenie zamyka ConnectionManager.check_slow_consumers() razem
+        ze zgłoszeniem wyjścia użytkownika do pozostałych.
+        """
+        self.close()
+        self.overflowed = True
+        print(f"🐢 Kolejka wychodząca przepełniona ({self.max_size}) - połączenie do zamknięcia")
+
+    async def _run(self):
+        """Zadanie wysyłające - opróżnia kolejkę w kolejności dodawania."""
+        while not self.closed:
+            if not self._frames:
+                self._ready.clear()
+                self._idle.set()
+                await self._ready.wait()
+                continue
+
+            _, frame = self._pop_oldest()
+            self._send_started = time.monotonic()
+            try:
+                if isinstance(frame, bytes):
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+                self.sent += 1
+                elapsed_ms = (time.monotonic() - self._send_started) * 1000
+                self.send_latency_ms += LATENCY_SMOOTHING * (elapsed_ms - self.send_latency_ms)
+            except Exception as e:
+                # Zerwane połączenie - kolejną ramkę i tak czekałby ten sam błąd
+                print(f"Błąd wysyłania: {e}")
+                self.close()
+            finally:
+                self._send_started = None
+
+
+async def close_websocket(websocket: WebSocket, code: int, timeout: float = CLOSE_TIMEOUT,
+                          reason: Optional[str] = None):
+    """
+    Zamyka WebSocket, nie czekając dłużej niż `timeout` sekund.
+
+    Błędy są ignorowane - połączenie mogło już zostać zerwane.
+
+    Args:
+        websocket: Połączenie do zamknięcia
+        code: Kod zamknięcia
+        timeout: Maksymalny czas oczekiwania (s)
+        reason: Opcjonalny opis w ramce zamknięcia (najwyżej 123 bajty)
+    """
+    try:
+        closing = websocket.close(code=code) if reason is None else websocket.close(code=code, reason=reason)
+        await asyncio.wait_for(closing, timeout)
+    except Exception:
+        pass
@@ -0,0 +1,265 @@
+"""
+Zbiorcze, wersjonowane powiadomienia o obecności użytkowników (kto jest online).
+
+Każde logowanie i wylogowanie wysyłało do wszystkich user_joined / user_left
+oraz pełną listę online_users. Przy N jednoczesnych logowaniach to N pełnych
+list do N klientów - O(N²) bajtów. PresenceAggregator zbiera zmiany przez
+krótkie okno (window_ms) i wysyła jedną wspólną zmianę (delta):
+
+    {"type": "user_list_update",
+     "payload": {"from_version": 7, "version": 8, "added": [...], "removed": [...]}}
+
+- lista obecności ma numer wersji, zwiększany przy każdej wysłanej zmianie;
+  klient z wersją from_version dokłada "added" i usuwa "removed"
+- logowanie i wylogowanie tego samego użytkownika w jednym oknie znoszą się
+- wyjście jest ogłaszane dopiero po reconnect_grace_ms - klient na
+  niestabilnym łączu, który zdąży połączyć się ponownie, wraca po cichu
+  (bez żadnej zmiany listy dla pozostałych)
+- pełna lista (snapshot) jest wysyłana tylko przy logowaniu (auth_success)
+  i na żądanie klienta, który zauważył lukę w wersjach (request_user_list):
+
+    {"type": "user_list_update", "payload": {"version": 8, "online_users": [...]}}
+
+- ostatnie zmiany są pamiętane (history_size), więc klient z niedawną
+  wersją dostaje tylko połączoną zmianę od swojej wersji
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Klucz coalesce dla ramek z pełną listą - nowsza zastępuje czekającą w kolejce
+ROSTER_COALESCE_KEY = "user_list_snapshot"
+
+
+class PresenceAggregator:
+    """
+    Zbiera zmiany obecności i rozgłasza je zbiorczo przez ConnectionManager.
+
+    Metody user_joined() / user_left() tylko zapisują zmianę; wysyłaniem
+    zajmuje się flush() wywoływane co window_ms przez run(). Lista
+    opublikowana (snapshot()) zmienia się tylko we flush() - razem z wersją.
+    """
+
+    def __init__(self, manager, window_ms: int = 250, history_size: int = 100, reconnect_grace_ms: int = 0,
+                 first_version: int = 0):
+        """
+        Args:
+            manager: ConnectionManager - rozgłaszanie zmian
+            window_ms: Długość okna zbierania zmian
+            history_size: Liczba ostatnich zmian pamiętanych dla request_user_list
+            reconnect_grace_ms: Czas na ponowne połączenie, zanim wyjście zostanie ogłoszone
+                                (0 - wyjście ogłaszane w najbliższym oknie)
+            first_version: Wersja pustej listy (w trybie wielu procesów każdy proces
+                           numeruje wersje we własnym zakresie)
+        """
+        self.manager = manager
+        self.window_ms = window_ms
+        self.reconnect_grace_ms = reconnect_grace_ms
+
+        # ID użytkownika -> (czy online, {"id", "name"}) - stan docelowy z bieżącego okna
+        self._pending: Dict[str, Tuple[bool, Dict[str, str]]] = {}
+        # ID użytkownika -> (termin ogłoszenia wyjścia, {"id", "name"}) - rozłączeni
+        # w okresie karencji; terminy rosną w kolejności dopisywania
+        self._leaving: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        # Lista opublikowana w wersji self.version (w kolejności dołączania)
+        self._published: Dict[str, Dict[str, str]] = {}
+        self.version = first_version
+        # Ostatnie zmiany: (wersja po zmianie, dodani, usunięci)
+        self._history: Deque[Tuple[int, List[Dict[str, str]], List[Dict[str, str]]]] = deque(maxlen=history_size)
+        # Pełna lista budowana raz na wersję
+        self._snapshot: Optional[List[Dict[str, str]]] = None
+
+        # Metryki
+        self.updates_sent = 0
+        self.snapshots_sent = 0
+        self.changes_cancelled = 0
+        self.reconnects_resumed = 0
+
+    def user_joined(self, user: Dict[str, str]):
+        """
+        Zapisuje dołączenie użytkownika (rozgłoszone przy najbliższym flush()).
+
+        Args:
+            user: Użytkownik w formacie {"id": "user_1", "name": "Jan"}
+        """
+        if self._leaving.pop(user["id"], None) is not None:
+            # Powrót w okresie karencji - dla pozostałych nic się nie zmieniło
+            self._pending.pop(user["id"], None)
+            self.reconnects_resumed += 1
+            return
+        self._pending[user["id"]] = (True, user)
+
+    def user_left(self, user: Dict[str, str], now: Optional[float] = None):
+        """
+        Zapisuje wyjście użytkownika.
+
+        Wyjście użytkownika z opublikowanej listy jest rozgłaszane dopiero
+        po reconnect_grace_ms (jeśli w tym czasie nie wróci).
+
+        Args:
+            user: Użytkownik w formacie {"id": "user_1", "name": "Jan"}
+            now: Aktualny czas z time.monotonic() (domyślnie - teraz)
+        """
+        if self.reconnect_grace_ms <= 0 or user["id"] not in self._published:
+            self._pending[user["id"]] = (False, user)
+            return
+        now = time.monotonic() if now is None else now
+        self._pending.pop(user["id"], None)
+        self._leaving.pop(user["id"], None)
+        self._leaving[user["id"]] = (now + self.reconnect_grace_ms / 1000, user)
+
+    def is_connected_elsewhere(self, username: str) -> bool:
+        """
+        Sprawdza, czy użytkownik jest połączony z innym procesem serwera.
+
+        W trybie jednego procesu wszyscy połączeni są w ConnectionManager,
+        więc zawsze False (zob. cluster.ClusterPresence).
+
+        Args:
+            username: Nazwa użytkownika
+
+        Returns:
+            True jeśli użytkownik jest połączony z innym procesem
+        """
+        return False
+
+    def snapshot(self) -> List[Dict[str, str]]:
+        """
+        Zwraca opublikowaną listę użytkowników online (w wersji self.version).
+
+        Lista jest budowana raz na wersję i współdzielona - nie wolno jej modyfikować.
+
+        Returns:
+            Lista {"id", "name"}
+        """
+        if self._snapshot is None:
+            self._snapshot = list(self._published.values())
+        return self._snapshot
+
+    def changes_since(self, version: Optional[int]) -> Dict[str, Any]:
+        """
+        Buduje user_list_update dla klienta znającego listę w danej wersji.
+
+        Args:
+            version: Wersja listy klienta (None - klient nie ma listy)
+
+        Returns:
+            Wiadomość ze zmianą od `version` albo z pełną listą, jeśli tej
+            wersji nie ma już w historii (lub jest z przyszłości)
+        """
+        oldest = self._history[0][0] - 1 if self._history else self.version
+        if version is None or not oldest <= version <= self.version:
+            self.snapshots_sent += 1
+            return {
+                "type": "user_list_update",
+                "payload": {"version": self.version, "online_users": self.snapshot()}
+            }
+
+        # Złożenie kolejnych zmian - dołączenie i wyjście tej samej osoby się znoszą
+        added: Dict[str, Dict[str, str]] = {}
+        removed: Dict[str, Dict[str, str]] = {}
+        for change_version, change_added, change_removed in self._history:
+            if change_version <= version:
+                continue
+            for user in change_added:
+                if removed.pop(user["id"], None) is None:
+                    added[user["id"]] = user
+            for user in change_removed:
+                if added.pop(user["id"], None) is None:
+                    removed[user["id"]] = user
+
+        return {
+            "type": "user_list_update",
+            "payload": {
+                "from_version": version,
+                "version": self.version,
+                "added": list(added.values()),
+                "removed": list(removed.values())
+            }
+        }
+
+    async def flush(self, now: Optional[float] = None) -> bool:
+        """
+        Publikuje zebrane zmiany jako nową wersję i rozgłasza je jednym user_list_update.
+
+        Wyjścia, którym minął okres karencji, trafiają do tej samej zmiany.
+
+        Args:
+            now: Aktualny czas z time.monotonic() (domyślnie - teraz)
+
+        Returns:
+            True jeśli zmiana została wysłana (False - brak zmian lub wszystkie się zniosły)
+        """
+        if self._leaving:
+            now = time.monotonic() if now is None else now
+            while self._leaving:
+                user_id, (deadline, user) = next(iter(self._leaving.items()))
+                if deadline > now:
+                    break
+                del self._leaving[user_id]
+                self._pending[user_id] = (False, user)
+
+        if not self._pending:
+            return False
+
+        added, removed = [], []
+        for user_id, (online, user) in self._pending.items():
+            if online and user_id not in self._published:
+                self._published[user_id] = user
+                added.append(user)
+            elif not online and user_id in self._published:
+                del self._published[user_id]
+                removed.append(user)
+            else:
+                self.changes_cancelled += 1
+        self._pending.clear()
+
+        if not added and not removed:
+            return False
+
+        self.version += 1
+        self._snapshot = None
+        self._history.append((self.version, added, removed))
+
+        await self.manager.broadcast_to_all({
+            "type": "user_list_update",
+            "payload": {
+                "from_version": self.version - 1,
+                "version": self.version,
+                "added": added,
+                "removed": removed
+            }
+        })
+        self.updates_sent += 1
+        return True
+
+    async def run(self):
+        """Zadanie w tle: co window_ms wysyła zebrane zmiany."""
+        while True:
+            await asyncio.sleep(self.window_ms / 1000)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Błąd podczas wysyłania zmian obecności: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Zwraca metryki powiadomień o obecności.
+
+        Returns:
+            Słownik z wersją listy, liczbą oczekujących zmian i wysłanych aktualizacji
+        """
+        return {
+            "version": self.version,
+            "online": len(self._published),
+            "pending": len(self._pending),
+            "leaving": len(self._leaving),
+            "updates_sent": self.updates_sent,
+            "snapshots_sent": self.snapshots_sent,
+            "changes_cancelled": self.changes_cancelled,
+            "reconnects_resumed": self.reconnects_resumed,
+            "window_ms": self.window_ms,
+            "reconnect_grace_ms": self.reconnect_grace_ms
+        }
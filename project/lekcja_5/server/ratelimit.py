@@ -0,0 +1,159 @@
+"""
+Limity zdarzeń od klienta (token bucket) - osobny budżet dla każdego typu zdarzenia.
+
+Nic nie powstrzymywało klienta przed wysłaniem tysięcy send_message czy
+request_history na sekundę - każde trafiało do bazy i było rozgłaszane na
+cały kanał. RateLimiter sprawdza zdarzenie w pętli websocket_endpoint,
+zanim trafi do handlera:
+
+- każdy typ zdarzenia ma własne "wiadro": do `burst` żetonów, uzupełniane
+  w tempie `rate` na sekundę; zdarzenie zabiera jeden żeton
+- brak żetonu - zdarzenie jest odrzucane (bez dostępu do bazy), a klient
+  dostaje error_message z czasem, po którym może spróbować ponownie:
+
+    {"type": "error_message",
+     "payload": {"message": "Rate limit exceeded", "code": "rate_limited",
+                 "event": "send_message", "retry_after_ms": 180}}
+
+- odrzucone zdarzenie nie zużywa żetonu
+- błędne ramki (schemas.InvalidEvent) też mają swoje wiadro ("invalid") -
+  zalew niepoprawnymi zdarzeniami nie omija limitów
+
+Wiadra należą do użytkownika (klucz to jego ID), nie do połączenia:
+rozłączenie, ponowne połączenie czy wznowienie sesji nie odnawia budżetu,
+a kilka połączeń tego samego użytkownika (np. stare, jeszcze niezamknięte,
+i nowe po wznowieniu) dzieli jeden limit. Stan nie jest usuwany przy
+rozłączeniu - expire() usuwa użytkownika dopiero, gdy wszystkie jego
+wiadra są znów pełne (był bezczynny co najmniej burst / rate sekund).
+Takie wiadro niczym nie różni się od nowego, więc usunięcie niczego nie
+zmienia w limitach, a pamięć jest zwalniana. acquire() wywołuje expire()
+co `expire_interval` sekund. Limity dotyczą jednego procesu (w trybie
+wielu procesów każdy worker ma własne).
+
+Przykład:
+    limiter = RateLimiter({"send_message": (5, 10)})
+    retry_after = limiter.acquire(user_id, "send_message")
+    if retry_after:
+        ...  # odrzuć, klient może spróbować za retry_after sekund
+"""
+
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """Stan wiadra jednego typu zdarzeń jednego użytkownika."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """
+    Limity zdarzeń użytkowników - wiadro (TokenBucket) na typ zdarzenia i użytkownika.
+
+    Typy zdarzeń bez limitu (brak w `limits` lub rate <= 0) zawsze przechodzą.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]], expire_interval: float = 60.0):
+        """
+        Args:
+            limits: Typ zdarzenia -> (żetony na sekundę, pojemność wiadra);
+                    rate <= 0 - bez limitu
+            expire_interval: Co ile sekund acquire() usuwa stan bezczynnych użytkowników
+        """
+        self.limits = {event_type: (rate, max(1, burst))
+                       for event_type, (rate, burst) in limits.items() if rate > 0}
+
+        # Klucz użytkownika (ID) -> typ zdarzenia -> wiadro
+        self._buckets: Dict[Any, Dict[str, TokenBucket]] = {}
+        self.expire_interval = expire_interval
+        self._expired_at: Optional[float] = None
+
+        # Metryki
+        self.limited: Dict[str, int] = {event_type: 0 for event_type in self.limits}
+        self.expired = 0
+
+    def acquire(self, key: Any, event_type: str, now: Optional[float] = None) -> float:
+        """
+        Zabiera żeton na zdarzenie.
+
+        Args:
+            key: Użytkownik (ID)
+            event_type: Typ zdarzenia
+            now: Aktualny czas z time.monotonic() (domyślnie - teraz)
+
+        Returns:
+            0.0 - zdarzenie przepuszczone; w przeciwnym razie liczba sekund,
+            po której będzie dostępny kolejny żeton (zdarzenie odrzucone)
+        """
+        limit = self.limits.get(event_type)
+        if limit is None:
+            return 0.0
+        rate, burst = limit
+        now = time.monotonic() if now is None else now
+
+        if self._expired_at is None:
+            self._expired_at = now
+        elif now - self._expired_at >= self.expire_interval:
+            self.expire(now)
+
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            buckets = self._buckets[key] = {}
+        bucket = buckets.get(event_type)
+        if bucket is None:
+            # Nowe wiadro jest pełne - pierwsze `burst` zdarzeń przechodzi od razu
+            bucket = buckets[event_type] = TokenBucket(burst, now)
+
+        tokens = min(burst, bucket.tokens + (now - bucket.updated) * rate)
+        bucket.updated = now
+        if tokens >= 1:
+            bucket.tokens = tokens - 1
+            return 0.0
+
+        bucket.tokens = tokens
+        self.limited[event_type] += 1
+        return (1 - tokens) / rate
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Usuwa stan użytkowników, których wszystkie wiadra są znów pełne.
+
+        Args:
+            now: Aktualny czas z time.monotonic() (domyślnie - teraz)
+
+        Returns:
+            Liczba usuniętych użytkowników
+        """
+        now = time.monotonic() if now is None else now
+        self._expired_at = now
+        idle = [key for key, buckets in self._buckets.items()
+                if all(self._is_full(event_type, bucket, now) for event_type, bucket in buckets.items())]
+        for key in idle:
+            del self._buckets[key]
+        self.expired += len(idle)
+        return len(idle)
+
+    def _is_full(self, event_type: str, bucket: TokenBucket, now: float) -> bool:
+        """Czy wiadro uzupełniło się do pełna (jest takie jak nowe)."""
+        rate, burst = self.limits[event_type]
+        return bucket.tokens + (now - bucket.updated) * rate >= burst
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Zwraca metryki limitów.
+
+        Returns:
+            Słownik z limitami, liczbą śledzonych użytkowników i odrzuconych zdarzeń (per typ)
+        """
+        return {
+            "limits": {event_type: {"rate_per_s": rate, "burst": burst}
+                       for event_type, (rate, burst) in self.limits.items()},
+            "users": len(self._buckets),
+            "expired": self.expired,
+            "limited": dict(self.limited)
+        }
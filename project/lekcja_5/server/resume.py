@@ -0,0 +1,101 @@
+"""
+Tokeny wznowienia sesji (resume_request).
+
+Każde ponowne połączenie (restart serwera, chwilowa utrata sieci) oznaczało
+pełne logowanie: sprawdzenie hasła w SQLite i cały auth_success z listą
+kanałów, listą użytkowników i 50 wiadomościami historii. Teraz auth_success
+zawiera token wznowienia, a klient po ponownym połączeniu wysyła
+resume_request z tokenem i ostatnim znanym seq każdego kanału - dostaje
+tylko wiadomości, które go ominęły.
+
+Token jest podpisany HMAC-SHA256 i niczego nie trzeba przechowywać po
+stronie serwera (przetrwa też restart, jeśli klucz jest stały):
+
+    base64url(JSON {"uid", "name", "exp"}) + "." + base64url(podpis)
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Dict, Optional, Union
+
+
+def _b64encode(data: bytes) -> str:
+    """base64url bez dopełnienia '='."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    """Odwrotność _b64encode()."""
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class ResumeTokens:
+    """
+    Wystawia i sprawdza tokeny wznowienia sesji.
+
+    Przykład:
+        tokens = ResumeTokens("tajny-klucz", ttl_s=3600)
+        token = tokens.issue("user_1", "Jan")
+        tokens.verify(token)   # {"id": "user_1", "name": "Jan"}
+    """
+
+    def __init__(self, secret: Union[str, bytes], ttl_s: int = 3600):
+        """
+        Args:
+            secret: Klucz podpisu (ten sam na wszystkich procesach serwera)
+            ttl_s: Czas ważności tokenu w sekundach
+        """
+        self._secret = secret.encode("utf-8") if isinstance(secret, str) else secret
+        self.ttl_s = ttl_s
+
+    def _sign(self, body: str) -> str:
+        """Podpis HMAC-SHA256 treści tokenu (base64url)."""
+        return _b64encode(hmac.new(self._secret, body.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, user_id: str, username: str, now: Optional[float] = None) -> str:
+        """
+        Wystawia token dla zalogowanego użytkownika.
+
+        Args:
+            user_id: ID użytkownika ("user_1")
+            username: Nazwa użytkownika
+            now: Aktualny czas uniksowy w sekundach (domyślnie - teraz)
+
+        Returns:
+            Token w formacie "treść.podpis"
+        """
+        now = time.time() if now is None else now
+        claims = {"uid": user_id, "name": username, "exp": int(now) + self.ttl_s}
+        body = _b64encode(json.dumps(claims, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        return f"{body}.{self._sign(body)}"
+
+    def verify(self, token: str, now: Optional[float] = None) -> Dict[str, str]:
+        """
+        Sprawdza podpis i ważność tokenu.
+
+        Args:
+            token: Token z issue()
+            now: Aktualny czas uniksowy w sekundach (domyślnie - teraz)
+
+        Returns:
+            Użytkownik w formacie {"id": "user_1", "name": "Jan"}
+
+        Raises:
+            ValueError: Jeśli token jest uszkodzony, ma zły podpis lub wygasł
+        """
+        body, _, signature = token.partition(".")
+        if not token.isascii() or not body or not signature or not hmac.compare_digest(signature, self._sign(body)):
+            raise ValueError("Invalid resume token")
+
+        try:
+            claims = json.loads(_b64decode(body))
+        except ValueError:
+            raise ValueError("Invalid resume token")
+
+        now = time.time() if now is None else now
+        if claims["exp"] <= now:
+            raise ValueError("Resume token expired")
+        return {"id": claims["uid"], "name": claims["name"]}
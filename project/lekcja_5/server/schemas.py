@@ -0,0 +1,370 @@
+"""
+Schematy zdarzeń od klienta - walidacja ramek przed obsługą.
+
+Handlery same wyciągały pola z payloadu łańcuchami dict.get() i sprawdzały
+ich typy (isinstance) - każdy po swojemu, już po zdekodowaniu całej ramki.
+Teraz każde zdarzenie klienta ma model (pydantic) z typami i ograniczeniami
+pól, a wszystkie modele tworzą unię rozróżnianą polem "type", kompilowaną
+raz (TypeAdapter). parse_event():
+
+- odrzuca za dużą ramkę, zanim zacznie ją parsować (FrameTooLarge)
+- ramkę JSON parsuje i waliduje w jednym przejściu (pydantic-core, bez
+  pośredniego słownika); ramkę MessagePack - po zdekodowaniu (wire.decode)
+- niepoprawny JSON / MessagePack - codec.DecodeError (serwer zamyka
+  połączenie, jak dotąd)
+- poprawną ramkę z błędnymi polami lub nieznanym typem zwraca jako
+  InvalidEvent z komunikatem dla klienta (tym samym co wcześniej w handlerach)
+
+Handler dostaje gotowy model - pola mają właściwe typy i wartości domyślne.
+
+Przykład:
+    event = parse_event(frame, SESSION_EVENTS)
+    if isinstance(event, InvalidEvent):
+        await send_error(websocket, event.message, manager)
+    elif event.type == "send_message":
+        event.payload.channel_id, event.payload.text
+"""
+
+import re
+from typing import Annotated, Any, Callable, ClassVar, Dict, Literal, Optional, Tuple, Union
+
+from pydantic import (AfterValidator, BaseModel, ConfigDict, Field, StringConstraints, TypeAdapter,
+                      ValidationError, WrapValidator, model_validator)
+
+import codec
+import config
+import wire
+
+
+class FrameTooLarge(codec.DecodeError):
+    """Ramka przekracza config.MAX_FRAME_BYTES - odrzucona bez parsowania."""
+
+
+class InvalidEvent:
+    """
+    Ramka z poprawnym kodowaniem, ale błędnymi polami lub nieznanym typem.
+
+    Attributes:
+        type: Typ zdarzenia podany przez klienta (None - brak lub nie tekst)
+        message: Komunikat błędu dla klienta
+    """
+
+    __slots__ = ("type", "message")
+
+    def __init__(self, event_type: Optional[str], message: str):
+        self.type = event_type
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f"InvalidEvent(type={self.type!r}, message={self.message!r})"
+
+
+# ====== FUNKCJE WALIDACJI ======
+
+def validate_username(username: str) -> Tuple[bool, Optional[str]]:
+    """
+    Waliduje nazwę użytkownika.
+
+    Zasady:
+    - 3-20 znaków
+    - Tylko litery, cyfry i podkreślniki
+
+    Returns:
+        (is_valid, error_message)
+    """
+    if not username:
+        return False, "Username cannot be empty"
+
+    if len(username) < 3 or len(username) > 20:
+        return False, "Username must be between 3 and 20 characters"
+
+    if not re.match(r'^[a-zA-Z0-9_]+$', username):
+        return False, "Username can only contain letters, numbers, and underscores"
+
+    return True, None
+
+
+def validate_message_text(text: str) -> Tuple[bool, Optional[str]]:
+    """
+    Waliduje treść wiadomości.
+
+    Zasady:
+    - Nie może być pusta
+    - Maksymalnie 300 znaków
+
+    Returns:
+        (is_valid, error_message)
+    """
+    if not text or not text.strip():
+        return False, "Message cannot be empty"
+
+    if len(text) > 300:
+        return False, "Message too long (max 300 characters)"
+
+    return True, None
+
+
+def _check(validate: Callable[[str], Tuple[bool, Optional[str]]]) -> AfterValidator:
+    """Pole sprawdzane funkcją validate_* - jej komunikat trafia do klienta."""
+    def check(value: str) -> str:
+        is_valid, error_msg = validate(value)
+        if not is_valid:
+            raise ValueError(error_msg)
+        return value
+    return AfterValidator(check)
+
+
+def _or_default(default: Any) -> WrapValidator:
+    """Niepoprawna wartość pola opcjonalnego jest zastępowana domyślną (bez błędu)."""
+    def validate(value: Any, handler) -> Any:
+        try:
+            return handler(value)
+        except ValidationError:
+            return default
+    return WrapValidator(validate)
+
+
+def _query_not_blank(value: str) -> str:
+    """Zapytanie wyszukiwania musi zawierać coś poza białymi znakami (bez obcinania)."""
+    if not value.strip():
+        raise ValueError("Search query is required")
+    return value
+
+
+# Typy pól
+Stripped = Annotated[str, StringConstraints(strip_whitespace=True)]
+ChannelId = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+NonNegativeInt = Annotated[int, Field(ge=0)]
+# Pusty tekst oznacza brak wartości (jak `payload.get(...) or None`)
+OptionalText = Annotated[Optional[str], AfterValidator(lambda value: value or None)]
+
+
+# ====== PAYLOADY ======
+
+class Payload(BaseModel):
+    """Wspólna konfiguracja payloadów: ścisłe typy (bez konwersji "5" -> 5), nieznane pola pomijane."""
+
+    model_config = ConfigDict(strict=True, extra="ignore", frozen=True)
+
+    # Komunikat dla klienta przy błędnym typie / zakresie pola (błędy
+    # walidatorów - ValueError - mają własne komunikaty)
+    ERRORS: ClassVar[Dict[str, str]] = {}
+
+
+class AuthPayload(Payload):
+    """auth_request - logowanie nazwą i hasłem."""
+
+    username: Annotated[Stripped, _check(validate_username)] = Field("", validate_default=True)
+    password: str = Field("", min_length=1, validate_default=True)
+    # Sekcje auth_success - sprawdzane przez BootstrapSections.parse()
+    bootstrap: Optional[Dict[str, Any]] = None
+
+    ERRORS: ClassVar[Dict[str, str]] = {
+        "username": "Username cannot be empty",
+        "password": "Password is required",
+        "bootstrap": "Bootstrap options must be an object"
+    }
+
+
+class ResumePayload(Payload):
+    """resume_request - wznowienie sesji tokenem."""
+
+    resume_token: str = Field("", min_length=1, validate_default=True)
+    last_seq: Dict[str, NonNegativeInt] = Field(default_factory=dict, max_length=config.RESUME_MAX_CHANNELS)
+    # Niepoprawna wersja listy lub kanał nie są błędem - klient dostanie pełną listę / general
+    presence_version: Annotated[Optional[int], _or_default(None)] = None
+    current_channel: Annotated[str, Field(min_length=1), _or_default("general")] = "general"
+
+    ERRORS: ClassVar[Dict[str, str]] = {
+        "resume_token": "Resume token is required",
+        "last_seq": "last_seq must map channel IDs to non-negative integers"
+    }
+
+
+class SendMessagePayload(Payload):
+    """send_message - nowa wiadomość w kanale."""
+
+    channel_id: ChannelId = Field("", validate_default=True)
+    text: Annotated[str, _check(validate_message_text)] = Field("", validate_default=True)
+
+    ERRORS: ClassVar[Dict[str, str]] = {
+        "channel_id": "Channel ID is required",
+        "text": "Message cannot be empty"
+    }
+
+
+class RequestHistoryPayload(Payload):
+    """request_history - strona historii (najwyżej jeden kursor)."""
+
+    channel_id: ChannelId = Field("", validate_default=True)
+    before: OptionalText = None
+    after: OptionalText = None
+    before_seq: Optional[NonNegativeInt] = None
+    after_seq: Optional[NonNegativeInt] = None
+    limit: int = Field(config.HISTORY_PAGE_SIZE, ge=1, le=config.HISTORY_MAX_PAGE_SIZE)
+
+    ERRORS: ClassVar[Dict[str, str]] = {
+        "channel_id": "Channel ID is required",
+        "before": "Invalid history cursor",
+        "after": "Invalid history cursor",
+        "before_seq": "Sequence cursor must be a non-negative integer",
+        "after_seq": "Sequence cursor must be a non-negative integer",
+        "limit": f"Limit must be between 1 and {config.HISTORY_MAX_PAGE_SIZE}"
+    }
+
+    @model_validator(mode="after")
+    def _one_cursor(self):
+        cursors = [c for c in (self.before, self.after, self.before_seq, self.after_seq) if c is not None]
+        if len(cursors) > 1:
+            raise ValueError("Use only one of 'before', 'after', 'before_seq', 'after_seq'")
+        return self
+
+
+class SearchMessagesPayload(Payload):
+    """search_messages - wyszukiwanie pełnotekstowe."""
+
+    query: Annotated[str, AfterValidator(_query_not_blank)] = Field("", validate_default=True)
+    channel_id: OptionalText = None
+    limit: int = Field(config.SEARCH_PAGE_SIZE, ge=1, le=config.SEARCH_MAX_PAGE_SIZE)
+    offset: NonNegativeInt = 0
+
+    ERRORS: ClassVar[Dict[str, str]] = {
+        "query": "Search query is required",
+        "channel_id": "Channel ID must be a string",
+        "limit": f"Limit must be between 1 and {config.SEARCH_MAX_PAGE_SIZE}",
+        "offset": "Offset must be a non-negative integer"
+    }
+
+
+class SearchUsersPayload(Payload):
+    """search_users - wyszukiwanie użytkowników po początku nazwy."""
+
+    query: Annotated[Stripped, Field(min_length=1)] = Field("", validate_default=True)
+
+    ERRORS: ClassVar[Dict[str, str]] = {"query": "Search query is required"}
+
+
+class RequestUserListPayload(Payload):
+    """request_user_list - lista online od podanej wersji."""
+
+    version: Optional[NonNegativeInt] = None
+
+    ERRORS: ClassVar[Dict[str, str]] = {"version": "Invalid version"}
+
+
+class EmptyPayload(Payload):
+    """Zdarzenie bez parametrów (request_channels)."""
+
+
+# ====== ZDARZENIA ======
+
+class Event(BaseModel):
+    """Koperta zdarzenia {"type": ..., "payload": {...}} (brak payloadu = pusty obiekt)."""
+
+    model_config = ConfigDict(strict=True, extra="ignore", frozen=True)
+
+
+class AuthRequest(Event):
+    type: Literal["auth_request"]
+    payload: AuthPayload = Field(default_factory=dict, validate_default=True)
+
+
+class ResumeRequest(Event):
+    type: Literal["resume_request"]
+    payload: ResumePayload = Field(default_factory=dict, validate_default=True)
+
+
+class SendMessage(Event):
+    type: Literal["send_message"]
+    payload: SendMessagePayload = Field(default_factory=dict, validate_default=True)
+
+
+class RequestHistory(Event):
+    type: Literal["request_history"]
+    payload: RequestHistoryPayload = Field(default_factory=dict, validate_default=True)
+
+
+class SearchMessages(Event):
+    type: Literal["search_messages"]
+    payload: SearchMessagesPayload = Field(default_factory=dict, validate_default=True)
+
+
+class SearchUsers(Event):
+    type: Literal["search_users"]
+    payload: SearchUsersPayload = Field(default_factory=dict, validate_default=True)
+
+
+class RequestUserList(Event):
+    type: Literal["request_user_list"]
+    payload: RequestUserListPayload = Field(default_factory=dict, validate_default=True)
+
+
+class RequestChannels(Event):
+    type: Literal["request_channels"]
+    payload: EmptyPayload = Field(default_factory=dict, validate_default=True)
+
+
+# Pierwsze zdarzenie połączenia (przed zalogowaniem)
+AUTH_EVENTS = TypeAdapter(Annotated[Union[AuthRequest, ResumeRequest], Field(discriminator="type")])
+# Zdarzenia zalogowanego klienta
+SESSION_EVENTS = TypeAdapter(Annotated[Union[SendMessage, RequestHistory, SearchMessages, SearchUsers,
+                                             RequestUserList, RequestChannels], Field(discriminator="type")])
+
+# Typ zdarzenia -> model payloadu (komunikaty błędów pól)
+_PAYLOADS: Dict[str, type] = {
+    "auth_request": AuthPayload,
+    "resume_request": ResumePayload,
+    "send_message": SendMessagePayload,
+    "request_history": RequestHistoryPayload,
+    "search_messages": SearchMessagesPayload,
+    "search_users": SearchUsersPayload,
+    "request_user_list": RequestUserListPayload,
+    "request_channels": EmptyPayload
+}
+
+
+def parse_event(frame: wire.Frame, events: TypeAdapter) -> Union[Event, InvalidEvent]:
+    """
+    Parsuje i waliduje ramkę od klienta.
+
+    Args:
+        frame: Ramka (str - JSON, bytes - MessagePack)
+        events: Dozwolone zdarzenia (AUTH_EVENTS lub SESSION_EVENTS)
+
+    Returns:
+        Model zdarzenia albo InvalidEvent (błędne pola, nieznany typ)
+
+    Raises:
+        FrameTooLarge: Ramka dłuższa niż config.MAX_FRAME_BYTES
+        codec.DecodeError: Niepoprawny JSON / MessagePack
+    """
+    if len(frame) > config.MAX_FRAME_BYTES:
+        raise FrameTooLarge(f"Frame exceeds {config.MAX_FRAME_BYTES} bytes")
+
+    try:
+        if isinstance(frame, str):
+            return events.validate_json(frame)
+        return events.validate_python(wire.decode(frame))
+    except ValidationError as e:
+        return _invalid_event(e)
+
+
+def _invalid_event(error: ValidationError) -> InvalidEvent:
+    """Zamienia pierwszy błąd walidacji na komunikat dla klienta."""
+    first = error.errors(include_url=False, include_input=False)[0]
+    kind, loc = first["type"], first["loc"]
+
+    if kind == "json_invalid":
+        raise codec.DecodeError(first["msg"])
+    if kind == "union_tag_invalid":
+        return InvalidEvent(first["ctx"]["tag"], f"Unknown message type: {first['ctx']['tag']}")
+    if kind == "union_tag_not_found":
+        return InvalidEvent(None, "Unknown message type: None")
+    if not loc:
+        return InvalidEvent(None, "Message must be an object")
+
+    event_type = loc[0]
+    if kind == "value_error":
+        return InvalidEvent(event_type, str(first["ctx"]["error"]))
+    field = loc[2] if len(loc) > 2 else None
+    return InvalidEvent(event_type, _PAYLOADS[event_type].ERRORS.get(field, "Payload must be an object"))
@@ -13,18 +13,47 @@ Funkcjonalności:
 
 import sys
 import os
-import json
+import asyncio
+import multiprocessing
+import secrets
+import signal
+import socket
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-from database import init_database
+import codec
+import config
+import schemas
+import wire
+from admission import AdmissionController, shed_connection
+from bootstrap import BootstrapSnapshot
+from broker import Broker, BrokerServer, UnixBus
+from cluster import ClusterNode, ClusterPresence
+from database import get_all_users, init_database
+from db_executor import AsyncDatabase
+from db_pool import ConnectionPool
+from history_cache import HistoryCache
+from ids import MAX_NODE_ID
+from message_writer import MessageWriter
+from presence import PresenceAggregator
+from ratelimit import RateLimiter
+from resume import ResumeTokens
+from user_index import UserIndex
 from websocket_handler import (
     ConnectionManager,
     handle_auth_request,
+    handle_disconnect,
     handle_send_message,
+    handle_request_channels,
     handle_request_history,
-    send_error
+    handle_request_user_list,
+    handle_resume_request,
+    handle_search_messages,
+    handle_search_users,
+    monitor_slow_consumers,
+    send_error,
+    send_rate_limited
 )
 
 # Inicjalizacja aplikacji FastAPI
@@ -45,11 +74,79 @@ app.add_middleware(
 )
 
 # Globalna instancja ConnectionManager
-manager = ConnectionManager()
+manager = ConnectionManager(
+    queue_size=config.OUTBOUND_QUEUE_SIZE,
+    overflow_policy=config.OUTBOUND_OVERFLOW_POLICY,
+    slow_latency_ms=config.SLOW_CONSUMER_LATENCY_MS,
+    slow_backlog_bytes=config.SLOW_CONSUMER_BACKLOG_BYTES,
+    slow_grace_ms=config.SLOW_CONSUMER_GRACE_MS
+)
+
+# Zbiorcze powiadomienia o obecności (user_list_update raz na okno)
+presence = PresenceAggregator(
+    manager,
+    window_ms=config.PRESENCE_WINDOW_MS,
+    history_size=config.PRESENCE_HISTORY_SIZE,
+    reconnect_grace_ms=config.PRESENCE_RECONNECT_GRACE_MS
+)
+
+# Tokeny wznowienia sesji (resume_request) - bez stałego klucza (CHAT_RESUME_SECRET)
+# tokeny tracą ważność przy restarcie serwera
+resume_tokens = ResumeTokens(config.RESUME_SECRET or secrets.token_hex(32), config.RESUME_TOKEN_TTL_S)
+
+# Limity zdarzeń od klientów - osobny na każdy typ zdarzenia i połączenie
+rate_limiter = RateLimiter({
+    "send_message": (config.RATE_SEND_MESSAGE_PER_S, config.RATE_SEND_MESSAGE_BURST),
+    "request_history": (config.RATE_HISTORY_PER_S, config.RATE_HISTORY_BURST),
+    "search_messages": (config.RATE_SEARCH_MESSAGES_PER_S, config.RATE_SEARCH_MESSAGES_BURST),
+    "search_users": (config.RATE_SEARCH_USERS_PER_S, config.RATE_SEARCH_USERS_BURST),
+    "request_user_list": (config.RATE_LISTS_PER_S, config.RATE_LISTS_BURST),
+    "request_channels": (config.RATE_LISTS_PER_S, config.RATE_LISTS_BURST),
+    "invalid": (config.RATE_INVALID_PER_S, config.RATE_INVALID_BURST)
+})
+
+# Kontrola przyjęć - odrzucanie nowych połączeń i logowań przy przeciążeniu
+admission = AdmissionController(
+    max_connections=config.MAX_CONNECTIONS,
+    max_pending_auth=config.MAX_PENDING_AUTH,
+    max_loop_lag_ms=config.SHED_LOOP_LAG_MS,
+    max_queue_depth=config.SHED_DB_QUEUE_DEPTH,
+    retry_after_ms=config.SHED_RETRY_AFTER_MS,
+    queue_depth=lambda: db.queue_depth if db else 0,
+    auth_timeout_ms=config.AUTH_TIMEOUT_MS
+)
 
 # Połączenie z bazą danych (będzie zainicjalizowane w main())
 db_connection = None
 
+# Asynchroniczna warstwa dostępu do bazy - zapytania wykonywane w puli wątków
+# zamiast bezpośrednio w pętli zdarzeń (będzie zainicjalizowana w main())
+db = None
+
+# Kolejka zapisu wiadomości z grupowym commitem (będzie zainicjalizowana w main())
+message_writer = None
+
+# Zadanie w tle rozłączające klientów, którzy nie nadążają z odbiorem
+slow_consumer_task = None
+
+# Zadanie w tle wysyłające zebrane zmiany obecności
+presence_task = None
+
+# Zadanie w tle mierzące opóźnienie pętli zdarzeń (kontrola przyjęć)
+loop_lag_task = None
+
+# Pamięć ostatnich wiadomości kanałów (będzie zainicjalizowana w main())
+history_cache = None
+
+# Indeks nazw użytkowników dla search_users (będzie zainicjalizowany w main())
+user_index = None
+
+# Wspólny stan początkowy dla auth_success (będzie zainicjalizowany w main())
+bootstrap = None
+
+# Połączenie z brokerem w trybie wielu procesów (None - jeden proces)
+cluster = None
+
 
 @app.get("/")
 async def root():
@@ -66,70 +163,246 @@ async def root():
     }
 
 
+@app.get("/stats")
+async def stats():
+    """
+    Endpoint diagnostyczny - metryki serwera.
+
+    Returns:
+        JSON z metrykami połączeń i puli wątków bazy danych (m.in. głębokość kolejek)
+    """
+    return {
+        "connections": manager.get_stats(),
+        "presence": presence.get_stats(),
+        "rate_limits": rate_limiter.get_stats(),
+        "admission": admission.get_stats(),
+        "database": db.get_stats() if db else None,
+        "message_writer": message_writer.get_stats() if message_writer else None,
+        "history_cache": history_cache.get_stats() if history_cache else None,
+        "bootstrap": bootstrap.get_stats() if bootstrap else None,
+        "cluster": cluster.get_stats() if cluster else None,
+        "codec": codec.BACKEND,
+        "wire": wire.get_stats()
+    }
+
+
+@app.get("/stats/connections")
+async def connection_stats():
+    """
+    Endpoint diagnostyczny - kolejka wychodząca każdego połączenia.
+
+    Returns:
+        JSON z listą połączeń (od najdłuższej kolejki) i metrykami ich kolejek
+    """
+    return {"connections": manager.get_connection_stats()}
+
+
+@app.on_event("startup")
+async def startup():
+    """
+    Start serwera - uruchomienie zadań w tle: zapisu wiadomości, powiadomień
+    o obecności i rozłączania klientów, którzy nie nadążają z odbiorem.
+    """
+    global slow_consumer_task, presence_task, loop_lag_task
+
+    if cluster:
+        # Przed przyjęciem pierwszego klienta - broker przekaże obecność pozostałych workerów
+        await cluster.start()
+    if message_writer:
+        await message_writer.start()
+    slow_consumer_task = asyncio.create_task(
+        monitor_slow_consumers(manager, presence, config.SLOW_CONSUMER_CHECK_INTERVAL_MS)
+    )
+    presence_task = asyncio.create_task(presence.run())
+    loop_lag_task = asyncio.create_task(admission.run(config.LOOP_LAG_CHECK_INTERVAL_MS))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    Zamknięcie serwera - zapis oczekujących wiadomości, dokończenie zadań
+    bazy danych i zwolnienie wątków.
+    """
+    if slow_consumer_task:
+        slow_consumer_task.cancel()
+    if presence_task:
+        presence_task.cancel()
+    if loop_lag_task:
+        loop_lag_task.cancel()
+    if cluster:
+        await cluster.close()
+    if message_writer:
+        await message_writer.close()
+    if db:
+        db.close(wait=True)
+
+
+@app.get("/admin/admission")
+async def admission_stats():
+    """
+    Endpoint administracyjny - kontrola przyjęć.
+
+    Returns:
+        JSON z progami, bieżącym obciążeniem (połączenia, trwające logowania,
+        opóźnienie pętli zdarzeń, kolejka bazy) i liczbą odrzuconych połączeń
+    """
+    return admission.get_stats()
+
+
+async def begin_auth(websocket: WebSocket) -> bool:
+    """
+    Zajmuje miejsce dla logowania (admission.begin_auth()).
+
+    Returns:
+        True - można obsłużyć logowanie (potem admission.end_auth());
+        False - serwer przeciążony, połączenie zamknięte kodem 1013
+    """
+    reason = admission.begin_auth()
+    if reason is None:
+        return True
+    await shed_connection(websocket, reason, admission.retry_after_ms())
+    return False
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """
     Główny endpoint WebSocket dla komunikacji z klientami.
 
     Proces:
-    1. Akceptacja połączenia
-    2. Oczekiwanie na auth_request
-    3. Jeśli auth OK - pętla obsługi wiadomości
+    1. Akceptacja połączenia (z podprotokołem msgpack, jeśli klient go wybrał - wire.py);
+       przy przeciążeniu zamknięcie kodem 1013 (admission.py)
+    2. Oczekiwanie na auth_request (lub resume_request - wznowienie sesji;
+       gdy się nie uda, klient może wysłać auth_request); liczba
+       jednocześnie obsługiwanych logowań jest ograniczona, a klient, który
+       nie przyśle ramki w ciągu config.AUTH_TIMEOUT_MS, jest rozłączany (kod 1008)
+    3. Jeśli auth OK - pętla obsługi wiadomości (walidacja - schemas.py,
+       limity zdarzeń - ratelimit.py, potem handler)
     4. Obsługa rozłączenia
 
     Args:
         websocket: Obiekt WebSocket z FastAPI
     """
-    await websocket.accept()
-    print("🔌 Nowe połączenie WebSocket")
+    protocol = wire.protocol_of(websocket)
+    await websocket.accept(subprotocol=wire.negotiate(websocket))
+
+    # Kontrola przyjęć - za dużo połączeń lub przeciążony serwer
+    shed_reason = admission.admit()
+    if shed_reason:
+        await shed_connection(websocket, shed_reason, admission.retry_after_ms())
+        return
+    print(f"🔌 Nowe połączenie WebSocket ({protocol})")
 
     authenticated = False
     user_info = None
 
     try:
         # Faza 1: Autentykacja
-        # Czekamy na auth_request jako pierwszą wiadomość
-        auth_data_raw = await websocket.receive_text()
-        auth_data = json.loads(auth_data_raw)
-
-        if auth_data.get("type") != "auth_request":
-            await send_error(websocket, "First message must be auth_request")
-            await websocket.close()
+        # Czekamy na auth_request (lub resume_request) jako pierwszą wiadomość
+        # najwyżej config.AUTH_TIMEOUT_MS - potem połączenie jest zamykane
+        # (zdarzenie z błędnymi polami trafia do handlera jako schemas.InvalidEvent)
+        data = await admission.receive_auth(websocket, wire.receive(websocket, protocol))
+        if data is None:
             return
-
-        # Obsłuż autentykację
-        authenticated = await handle_auth_request(auth_data, websocket, manager, db_connection)
+        request = schemas.parse_event(data, schemas.AUTH_EVENTS)
+
+        if request.type == "resume_request":
+            if not await begin_auth(websocket):
+                return
+            try:
+                authenticated = await handle_resume_request(request, websocket, manager, history_cache,
+                                                            presence, resume_tokens)
+            finally:
+                admission.end_auth()
+            if not authenticated:
+                # Nieudane wznowienie - klient loguje się hasłem na tym samym połączeniu
+                data = await admission.receive_auth(websocket, wire.receive(websocket, protocol))
+                if data is None:
+                    return
+                request = schemas.parse_event(data, schemas.AUTH_EVENTS)
 
         if not authenticated:
-            # Autentykacja nie powiodła się - połączenie już zamknięte przez handle_auth_request
+            if request.type != "auth_request":
+                await send_error(websocket, "First message must be auth_request", manager)
+                await websocket.close()
+                return
+
+            # Obsłuż autentykację
+            if not await begin_auth(websocket):
+                return
+            try:
+                authenticated = await handle_auth_request(request, websocket, manager, db, bootstrap,
+                                                          presence, resume_tokens)
+            finally:
+                admission.end_auth()
+
+            if not authenticated:
+                # Autentykacja nie powiodła się - połączenie już zamknięte przez handle_auth_request
+                return
+
+        # Limity zdarzeń są liczone per użytkownik (także po ponownym połączeniu)
+        user_info = manager.get_user_info(websocket)
+        if user_info is None:
+            # Rozłączony za wolny odbiór jeszcze podczas logowania
             return
 
         # Faza 2: Główna pętla obsługi wiadomości
         while True:
-            # Odbierz wiadomość od klienta
-            message_raw = await websocket.receive_text()
-            message = json.loads(message_raw)
-
-            message_type = message.get("type")
+            # Odbierz i zwaliduj wiadomość od klienta (schemas.py) - błędna ramka
+            # jest odrzucana, zanim dotrze do handlera lub bazy
+            request = schemas.parse_event(await wire.receive(websocket, protocol), schemas.SESSION_EVENTS)
+            invalid = isinstance(request, schemas.InvalidEvent)
+            message_type = "invalid" if invalid else request.type
+
+            # Limit zdarzeń tego typu (ratelimit.py) - nadmiarowe nie dochodzi do handlera;
+            # błędne ramki mają osobny limit ("invalid")
+            retry_after = rate_limiter.acquire(user_info["user_id"], message_type)
+            if retry_after:
+                await send_rate_limited(websocket, message_type, retry_after, manager)
+                continue
+
+            if invalid:
+                # Nieznany typ lub błędne pola
+                await send_error(websocket, request.message, manager)
+                continue
 
             # Routing wiadomości do odpowiednich handlerów
             if message_type == "send_message":
-                await handle_send_message(message, websocket, manager, db_connection)
+                await handle_send_message(request, websocket, manager, message_writer, history_cache, cluster)
 
             elif message_type == "request_history":
-                await handle_request_history(message, websocket, db_connection)
+                await handle_request_history(request, websocket, manager, history_cache)
 
-            else:
-                # Nieznany typ wiadomości
-                await send_error(websocket, f"Unknown message type: {message_type}")
+            elif message_type == "request_user_list":
+                await handle_request_user_list(request, websocket, manager, presence)
+
+            elif message_type == "request_channels":
+                await handle_request_channels(request, websocket, manager, bootstrap)
+
+            elif message_type == "search_messages":
+                await handle_search_messages(request, websocket, manager, db)
+
+            elif message_type == "search_users":
+                await handle_search_users(request, websocket, manager, user_index, presence)
 
     except WebSocketDisconnect:
         # Klient rozłączył się
         print("🔌 Klient rozłączony")
 
-    except json.JSONDecodeError:
-        # Błędny format JSON
-        await send_error(websocket, "Invalid JSON format")
+    except schemas.FrameTooLarge:
+        # Ramka większa niż config.MAX_FRAME_BYTES - odrzucona bez parsowania.
+        # Połączenie jest kończone: najpierw wyrejestrowanie (zamyka kolejkę
+        # wychodzącą), potem błąd wysłany bezpośrednio
+        if authenticated:
+            await handle_disconnect(websocket, manager, presence)
+        await send_error(websocket, "Frame too large", manager)
+
+    except codec.DecodeError:
+        # Błędny format JSON / MessagePack - jak wyżej, połączenie jest kończone
+        if authenticated:
+            await handle_disconnect(websocket, manager, presence)
+        await send_error(websocket, "Invalid MessagePack format" if protocol == wire.MSGPACK else "Invalid JSON format",
+                         manager)
 
     except Exception as e:
         # Ogólny błąd
@@ -137,47 +410,167 @@ async def websocket_endpoint(websocket: WebSocket):
 
     finally:
         # Cleanup: Usuń połączenie i powiadom innych użytkowników
+        # (klient rozłączony za wolny odbiór mógł już zostać wyrejestrowany)
+        admission.release()
         if authenticated:
-            user_info = manager.disconnect(websocket)
-
-            if user_info:
-                # Rozgłoś user_left
-                user_left_msg = {
-                    "type": "user_left",
-                    "payload": {
-                        "user": {
-                            "id": user_info["user_id"],
-                            "name": user_info["username"]
-                        }
-                    }
-                }
-                await manager.broadcast_to_all(user_left_msg)
-
-                # Rozgłoś zaktualizowaną listę użytkowników
-                online_users = manager.get_online_users()
-                user_list_update = {
-                    "type": "user_list_update",
-                    "payload": {
-                        "online_users": online_users
-                    }
-                }
-                await manager.broadcast_to_all(user_list_update)
-
-                print(f"✓ Użytkownik {user_info['username']} rozłączył się")
+            await handle_disconnect(websocket, manager, presence)
+
+
+def init_state():
+    """
+    Inicjalizuje bazę danych i obiekty współdzielone przez handlery.
+    """
+    global db_connection, db, message_writer, history_cache, user_index, bootstrap, presence, cluster
+
+    print(f"🧩 Kodek JSON: {codec.BACKEND}")
+    db_connection = init_database()
+    pool = ConnectionPool(
+        db_connection,
+        readers=config.DB_READERS,
+        synchronous=config.DB_SYNCHRONOUS,
+        cache_size=config.DB_CACHE_SIZE,
+        mmap_size=config.DB_MMAP_SIZE
+    )
+    db = AsyncDatabase(pool, max_workers=config.DB_WORKERS, max_pending=config.DB_MAX_PENDING)
+    message_writer = MessageWriter(
+        db,
+        flush_interval_ms=config.MESSAGE_FLUSH_INTERVAL_MS,
+        max_batch=config.MESSAGE_FLUSH_MAX_BATCH,
+        ack_after_commit=config.MESSAGE_ACK_AFTER_COMMIT
+    )
+    history_cache = HistoryCache(
+        db,
+        capacity=config.HISTORY_CACHE_SIZE,
+        max_channels=config.HISTORY_CACHE_CHANNELS,
+        # W trybie wielu procesów wiadomości zapisuje worker nadawcy - ten proces
+        # nie wie, czy starsza strona jest już kompletna w bazie
+        max_page_frames=config.HISTORY_PAGE_FRAMES if config.WORKERS == 1 else 0,
+        has_unsaved=message_writer.has_unsaved
+    )
+    # Zapis paczki unieważnia ramki starszych stron jej kanałów
+    message_writer.on_commit = history_cache.drop_page_frames
+    user_index = UserIndex(get_all_users(db_connection))
+
+    if config.WORKERS > 1:
+        # Ten proces jest jednym z workerów (zob. run_cluster()) - wiadomości
+        # i obecność przechodzą przez broker
+        bus = UnixBus(config.BROKER_PATH, config.NODE_ID)
+        presence = ClusterPresence(
+            manager,
+            bus,
+            config.NODE_ID,
+            window_ms=config.PRESENCE_WINDOW_MS,
+            history_size=config.PRESENCE_HISTORY_SIZE,
+            reconnect_grace_ms=config.PRESENCE_RECONNECT_GRACE_MS
+        )
+        cluster = ClusterNode(bus, config.NODE_ID, manager, message_writer, history_cache, presence)
+
+    bootstrap = BootstrapSnapshot(db, history_cache, presence, history_limit=config.HISTORY_PAGE_SIZE)
+
+    if not config.RESUME_SECRET:
+        print("⚠️  Brak CHAT_RESUME_SECRET - tokeny wznowienia nie przetrwają restartu serwera")
+
+
+def run_worker(listener: socket.socket):
+    """
+    Proces workera (tryb wielu procesów): własny stan i uvicorn na wspólnym gnieździe.
+
+    Args:
+        listener: Gniazdo nasłuchujące utworzone przez proces nadzorujący
+    """
+    init_state()
+    uvicorn.Server(uvicorn.Config(app, log_level="info", ws_max_size=config.MAX_FRAME_BYTES)).run(sockets=[listener])
+
+
+async def supervise_workers(listener: socket.socket, broker_db: AsyncDatabase):
+    """
+    Uruchamia broker i procesy workerów; działa, dopóki żyje którykolwiek worker.
+
+    Args:
+        listener: Gniazdo nasłuchujące współdzielone przez workery
+        broker_db: Dostęp do bazy dla brokera (ostatni seq kanałów)
+    """
+    broker_server = BrokerServer(Broker(broker_db.get_last_seq), config.BROKER_PATH)
+    await broker_server.start()
+
+    context = multiprocessing.get_context("spawn")
+    workers = []
+    for index in range(config.WORKERS):
+        # Proces potomny czyta konfigurację ze środowiska przy imporcie config
+        os.environ["CHAT_NODE_ID"] = str(config.NODE_ID + index)
+        worker = context.Process(target=run_worker, args=(listener,), name=f"chat-worker-{index}")
+        worker.start()
+        workers.append(worker)
+
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+
+    while not stop.is_set() and any(worker.is_alive() for worker in workers):
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1)
+        except asyncio.TimeoutError:
+            pass
+
+    # SIGTERM - uvicorn zamyka się łagodnie (MessageWriter zapisuje kolejkę);
+    # broker działa dalej, dopóki workery się nie zakończą
+    for worker in workers:
+        if worker.is_alive():
+            worker.terminate()
+    for worker in workers:
+        await asyncio.to_thread(worker.join, 10)
+        if worker.is_alive():
+            worker.kill()
+    await broker_server.close()
+
+
+def run_cluster():
+    """
+    Tryb wielu procesów: broker w tym procesie i config.WORKERS procesów uvicorn
+    przyjmujących połączenia na wspólnym gnieździe.
+    """
+    if not 0 <= config.NODE_ID <= MAX_NODE_ID - config.WORKERS + 1:
+        raise ValueError(f"NODE_ID + WORKERS - 1 must not exceed {MAX_NODE_ID}")
+
+    # Baza tworzona (lub migrowana) raz, zanim otworzą ją workery
+    broker_pool = ConnectionPool(init_database(), readers=1, synchronous=config.DB_SYNCHRONOUS)
+    broker_db = AsyncDatabase(broker_pool, max_workers=2)
+
+    if not config.RESUME_SECRET:
+        # Wspólny klucz - sesję można wznowić na dowolnym workerze
+        os.environ["CHAT_RESUME_SECRET"] = secrets.token_hex(32)
+        print("⚠️  Brak CHAT_RESUME_SECRET - tokeny wznowienia nie przetrwają restartu serwera")
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("0.0.0.0", 8000))
+    listener.set_inheritable(True)
+
+    print(f"\n🚀 Uruchamianie {config.WORKERS} workerów (broker: {config.BROKER_PATH})...")
+    print("   WebSocket endpoint: ws://localhost:8000/ws")
+    print("\n💡 Aby zatrzymać serwer, naciśnij Ctrl+C\n")
+
+    try:
+        asyncio.run(supervise_workers(listener, broker_db))
+    finally:
+        listener.close()
+        broker_db.close(wait=True)
 
 
 def main():
     """
     Funkcja główna - inicjalizacja i uruchomienie serwera.
     """
-    global db_connection
-
     print("=" * 60)
     print("  AI-POWERED TEAM CHAT - Backend Server")
     print("=" * 60)
 
+    if config.WORKERS > 1:
+        run_cluster()
+        return
+
     # Inicjalizacja bazy danych
-    db_connection = init_database()
+    init_state()
 
     print("\n🚀 Uruchamianie serwera FastAPI...")
     print("   HTTP endpoint: http://localhost:8000")
@@ -189,7 +582,8 @@ def main():
         app,
         host="0.0.0.0",  # Nasłuchuj na wszystkich interfejsach
         port=8000,
-        log_level="info"
+        log_level="info",
+        ws_max_size=config.MAX_FRAME_BYTES
     )
 
 
@@ -198,6 +592,10 @@ if __name__ == "__main__":
     if "--reset" in sys.argv:
         if os.path.exists('chat.db'):
             os.remove('chat.db')
+            # Pliki trybu WAL (dziennik zapisu i pamięć współdzielona)
+            for suffix in ('-wal', '-shm'):
+                if os.path.exists('chat.db' + suffix):
+                    os.remove('chat.db' + suffix)
             print("🔄 Baza danych została zresetowana")
             print("")
         else:
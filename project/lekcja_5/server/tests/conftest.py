@@ -0,0 +1,23 @@
+"""
+Wspólne fixture'y testów.
+
+Testy async tworzą kolejki wychodzące (outbound.OutboundQueue) i inne
+zadania w tle. pytest-asyncio zamyka pętlę zdarzeń po teście bez
+kończenia takich zadań - Python zgłasza je potem jako "Task was destroyed
+but it is pending!". finish_pending_tasks kończy je po każdym teście.
+"""
+
+import asyncio
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def finish_pending_tasks(event_loop):
+    """Po teście anuluje zadania, które zostały w pętli zdarzeń, i czeka na ich zakończenie."""
+    yield
+    pending = asyncio.all_tasks(event_loop)
+    for task in pending:
+        task.cancel()
+    if pending:
+        event_loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
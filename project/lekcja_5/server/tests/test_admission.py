@@ -0,0 +1,150 @@
+"""
+Testy jednostkowe dla kontroli przyjęć (admission.py)
+
+Ten plik testuje:
+- Limit połączeń i jednocześnie obsługiwanych logowań
+- Odrzucanie nowych klientów przy opóźnionej pętli zdarzeń lub długiej kolejce bazy
+- Pomiar opóźnienia pętli zdarzeń (run)
+- Zamknięcie odrzuconego połączenia kodem 1013 z czasem do ponownej próby
+- Limit czasu na ramkę logowania (zamknięcie kodem 1008)
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import AUTH_TIMEOUT_CLOSE_CODE, LAG_DECAY, OVERLOAD_CLOSE_CODE, AdmissionController, shed_connection
+
+
+class FakeWebSocket:
+    """Zastępuje WebSocket - zapamiętuje kod i opis zamknięcia."""
+
+    def __init__(self):
+        self.closed = None
+
+    async def close(self, code: int = 1000, reason=None):
+        self.closed = (code, reason)
+
+
+# ====== TESTY ======
+
+def test_connection_and_auth_limits():
+    """
+    Test 1.1: Ponad max_connections / max_pending_auth - odrzucenie; zwolnienie miejsca - przyjęcie
+    """
+    admission = AdmissionController(max_connections=2, max_pending_auth=1)
+
+    assert admission.admit() is None
+    assert admission.admit() is None
+    assert admission.admit() == "too_many_connections"
+    admission.release()
+    assert admission.admit() is None
+
+    assert admission.begin_auth() is None
+    assert admission.begin_auth() == "auth_busy"
+    admission.end_auth()
+    assert admission.begin_auth() is None
+
+    stats = admission.get_stats()
+    assert stats["pressure"]["connections"] == 2 and stats["pressure"]["pending_auth"] == 1
+    assert stats["shed"]["too_many_connections"] == 1 and stats["shed"]["auth_busy"] == 1
+    assert (stats["admitted"], stats["peak_connections"]) == (3, 2)
+
+    unlimited = AdmissionController(max_connections=0, max_pending_auth=0)
+    for _ in range(100):
+        assert unlimited.admit() is None and unlimited.begin_auth() is None, "0 - bez limitu"
+
+
+def test_pressure_sheds_new_clients():
+    """
+    Test 1.2: Opóźniona pętla zdarzeń lub długa kolejka bazy - odrzucanie nowych połączeń i logowań
+    """
+    depth = {"value": 0}
+    admission = AdmissionController(max_loop_lag_ms=100, max_queue_depth=10, queue_depth=lambda: depth["value"])
+    assert admission.admit() is None
+
+    admission.record_loop_lag(300)
+    assert admission.admit() == "event_loop_lag"
+    assert admission.begin_auth() == "event_loop_lag"
+    assert admission.get_stats()["pressure"]["overloaded"] == "event_loop_lag"
+
+    # Skok jest wygaszany stopniowo
+    admission.record_loop_lag(0)
+    assert admission.loop_lag_ms == 300 * LAG_DECAY
+    admission.record_loop_lag(0)
+    assert admission.admit() is None
+
+    depth["value"] = 11
+    assert admission.admit() == "queue_depth"
+    depth["value"] = 10
+    assert admission.admit() is None
+
+    stats = admission.get_stats()
+    assert stats["shed"]["event_loop_lag"] == 2 and stats["shed"]["queue_depth"] == 1
+    assert stats["peak_loop_lag_ms"] == 300
+    assert stats["pressure"]["connections"] == 3, "Odrzucone połączenia nie są liczone"
+
+
+async def test_run_measures_event_loop_lag():
+    """
+    Test 1.3: Zablokowana pętla zdarzeń - run() mierzy opóźnienie
+    """
+    admission = AdmissionController()
+    task = asyncio.create_task(admission.run(interval_ms=10))
+    await asyncio.sleep(0.02)
+
+    time.sleep(0.1)  # Blokuje pętlę zdarzeń
+    await asyncio.sleep(0.005)
+    task.cancel()
+
+    assert admission.peak_loop_lag_ms >= 50
+
+
+async def test_shed_connection_closes_with_retry_hint():
+    """
+    Test 1.4: Odrzucone połączenie - kod 1013, powód i losowy czas do ponownej próby w opisie
+    """
+    admission = AdmissionController(retry_after_ms=1000)
+    hints = {admission.retry_after_ms() for _ in range(50)}
+    assert all(1000 <= hint < 2000 for hint in hints)
+    assert len(hints) > 1, "Czas jest losowy - odrzuceni nie wracają naraz"
+
+    websocket = FakeWebSocket()
+    await shed_connection(websocket, "too_many_connections", 1234)
+    code, reason = websocket.closed
+    assert code == OVERLOAD_CLOSE_CODE == 1013
+    assert json.loads(reason) == {"reason": "too_many_connections", "retry_after_ms": 1234}
+    assert len(reason.encode("utf-8")) <= 123, "Limit opisu w ramce zamknięcia"
+
+
+async def test_receive_auth_closes_idle_connection():
+    """
+    Test 1.5: Brak ramki logowania w czasie auth_timeout_ms - zamknięcie kodem 1008 i zliczenie
+    """
+    admission = AdmissionController(auth_timeout_ms=20)
+    assert admission.admit() is None
+
+    websocket = FakeWebSocket()
+    started = time.perf_counter()
+    frame = await admission.receive_auth(websocket, asyncio.Event().wait())
+    assert frame is None
+    assert time.perf_counter() - started < 1.0
+    code, reason = websocket.closed
+    assert code == AUTH_TIMEOUT_CLOSE_CODE == 1008
+    assert json.loads(reason) == {"reason": "auth_timeout"}
+    assert admission.get_stats()["auth_timeouts"] == 1
+
+    # Ramka przysłana na czas jest zwracana bez zamykania połączenia
+    websocket = FakeWebSocket()
+
+    async def frame_soon():
+        await asyncio.sleep(0.001)
+        return '{"type": "auth_request"}'
+
+    assert await admission.receive_auth(websocket, frame_soon()) == '{"type": "auth_request"}'
+    assert websocket.closed is None
+    assert admission.auth_timeouts == 1
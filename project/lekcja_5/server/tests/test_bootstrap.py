@@ -0,0 +1,177 @@
+"""
+Testy jednostkowe dla modułu bootstrap.py
+
+Ten plik testuje:
+- Poprawność ramki auth_success sklejonej z fragmentów
+- Współdzielenie fragmentów przez równoczesne logowania (jedno zapytanie)
+- Przebudowę fragmentów tylko po zmianie danych
+- Wybór sekcji auth_success (pole "bootstrap" w auth_request)
+"""
+
+import os
+import sys
+import json
+import asyncio
+import sqlite3
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bootstrap import BootstrapSections, BootstrapSnapshot
+from database import create_tables, seed_sample_data
+from db_executor import AsyncDatabase
+from history_cache import HistoryCache
+from presence import PresenceAggregator
+from websocket_handler import ConnectionManager
+
+
+# ====== FIXTURES ======
+
+@pytest.fixture
+def async_db():
+    """
+    Tworzy AsyncDatabase na tymczasowej bazie z przykładowymi danymi.
+    """
+    test_dir = tempfile.mkdtemp()
+    db_path = os.path.join(test_dir, 'chat.db')
+
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    create_tables(conn)
+    seed_sample_data(conn)
+
+    db = AsyncDatabase(conn)
+
+    yield db
+
+    # Cleanup
+    db.close()
+    conn.close()
+    for name in os.listdir(test_dir):
+        os.remove(os.path.join(test_dir, name))
+    os.rmdir(test_dir)
+
+
+def make_bootstrap(db):
+    """BootstrapSnapshot z pustą listą obecności i pamięcią historii."""
+    presence = PresenceAggregator(ConnectionManager())
+    return BootstrapSnapshot(db, HistoryCache(db), presence, history_limit=5), presence
+
+
+# ====== TESTY ======
+
+async def test_frame_matches_separately_built_payload(async_db):
+    """
+    Test 1.1: Sklejona ramka to poprawny JSON z tymi samymi danymi co osobne zapytania
+    """
+    bootstrap, presence = make_bootstrap(async_db)
+    presence.user_joined({"id": "user_2", "name": "Anna"})
+    await presence.flush()
+
+    frame = json.loads(await bootstrap.auth_success_frame({"id": "user_1", "name": "Jan"}, "token\"1"))
+    payload = frame["payload"]
+
+    assert frame["type"] == "auth_success"
+    assert payload["user_info"] == {"id": "user_1", "name": "Jan"}
+    assert payload["resume_token"] == "token\"1"
+    assert payload["channels"] == await async_db.get_all_channels()
+    assert payload["online_users"] == [{"id": "user_2", "name": "Anna"}]
+    assert payload["presence_version"] == 1
+    expected = await async_db.get_messages_page("general", limit=5)
+    assert payload["initial_channel_history"] == {"channel_id": "general", **expected}
+
+
+async def test_concurrent_logins_share_fragments(async_db):
+    """
+    Test 1.2: 100 równoczesnych logowań - jedno zapytanie o kanały i jedno o historię
+    """
+    bootstrap, _ = make_bootstrap(async_db)
+
+    frames = await asyncio.gather(*(
+        bootstrap.auth_success_frame({"id": f"user_{i}", "name": f"U{i}"}, "t") for i in range(100)
+    ))
+
+    assert len({json.dumps(json.loads(f)["payload"]["channels"]) for f in frames}) == 1
+    assert async_db.get_stats()["completed"] == 2, "get_all_channels + jedno wypełnienie bufora historii"
+    stats = bootstrap.get_stats()
+    assert (stats["frames_built"], stats["channel_loads"], stats["roster_encodes"]) == (100, 1, 1)
+
+
+async def test_fragments_rebuilt_only_after_change(async_db):
+    """
+    Test 1.3: Nowa wersja listy obecności / nowa wiadomość przebudowuje tylko swój fragment
+    """
+    bootstrap, presence = make_bootstrap(async_db)
+    user = {"id": "user_1", "name": "Jan"}
+    await bootstrap.auth_success_frame(user, "t")
+    await bootstrap.auth_success_frame(user, "t")
+    assert bootstrap.get_stats()["roster_encodes"] == 1
+
+    presence.user_joined({"id": "user_2", "name": "Anna"})
+    await presence.flush()
+    bootstrap.history.append("general", {"id": "msg_new", "user": user, "text": "Nowa",
+                                         "timestamp": "2030-01-01T00:00:00Z", "seq": 8})
+    payload = json.loads(await bootstrap.auth_success_frame(user, "t"))["payload"]
+
+    assert payload["presence_version"] == 1 and len(payload["online_users"]) == 1
+    assert payload["initial_channel_history"]["messages"][-1]["id"] == "msg_new"
+    assert bootstrap.get_stats()["roster_encodes"] == 2
+    assert bootstrap.get_stats()["channel_loads"] == 1
+
+
+async def test_partial_frame_skips_unrequested_sections(async_db):
+    """
+    Test 1.4: Klient bez historii i listy kanałów - sekcje nie są budowane ani wysyłane
+    """
+    bootstrap, _ = make_bootstrap(async_db)
+    user = {"id": "user_1", "name": "Jan"}
+
+    lite = await bootstrap.auth_success_frame(user, "t", BootstrapSections(channels=False, history=False))
+    payload = json.loads(lite)["payload"]
+
+    assert set(payload) == {"user_info", "resume_token", "online_users", "presence_version"}
+    assert async_db.get_stats()["completed"] == 0, "Bez zapytań do bazy"
+    assert len(lite) < len(await bootstrap.auth_success_frame(user, "t"))
+
+    short = json.loads(await bootstrap.auth_success_frame(user, "t", BootstrapSections(roster=False, history_limit=2)))
+    assert "online_users" not in short["payload"] and "presence_version" not in short["payload"]
+    assert len(short["payload"]["initial_channel_history"]["messages"]) == 2
+    assert short["payload"]["initial_channel_history"]["has_more"] is True
+
+    channel_list = json.loads(await bootstrap.channel_list_frame())
+    assert channel_list == {"type": "channel_list", "payload": {"channels": await async_db.get_all_channels()}}
+
+
+def test_sections_parse_and_validation():
+    """
+    Test 1.5: Pole "bootstrap" z auth_request - wartości domyślne i odrzucanie błędnych opcji
+    """
+    assert BootstrapSections.parse(None, 50, 100) == BootstrapSections(True, True, True, 50)
+    assert BootstrapSections.parse({"history": False}, 50, 100) == BootstrapSections(True, True, False, 50)
+    assert BootstrapSections.parse({"history_limit": 100}, 50, 100).history_limit == 100
+
+    for options in ([], {"avatars": True}, {"roster": 1}, {"history_limit": 0},
+                    {"history_limit": 101}, {"history_limit": True}):
+        with pytest.raises(ValueError):
+            BootstrapSections.parse(options, 50, 100)
+
+
+async def test_msgpack_frame_carries_same_payload(async_db):
+    """
+    Test 1.6: auth_success i channel_list w MessagePack - te same dane co w JSON
+    """
+    msgpack = pytest.importorskip("msgpack")
+    bootstrap, presence = make_bootstrap(async_db)
+    presence.user_joined({"id": "user_2", "name": "Anna"})
+    await presence.flush()
+    user = {"id": "user_1", "name": "Łukasz"}
+
+    text = await bootstrap.auth_success_frame(user, "token", protocol="json")
+    packed = await bootstrap.auth_success_frame(user, "token", protocol="msgpack")
+    assert isinstance(packed, bytes)
+    assert msgpack.unpackb(packed) == json.loads(text)
+
+    packed = await bootstrap.channel_list_frame(protocol="msgpack")
+    assert msgpack.unpackb(packed) == json.loads(await bootstrap.channel_list_frame())
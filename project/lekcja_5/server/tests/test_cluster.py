@@ -0,0 +1,256 @@
+"""
+Testy jednostkowe dla trybu wielu procesów (broker.py, cluster.py)
+
+Ten plik testuje:
+- Numerowanie wiadomości (seq) przez broker i dostarczanie ich klientom wszystkich workerów
+- Zapis wiadomości tylko przez worker nadawcy
+- Łączenie obecności użytkowników z wielu workerów (także okres karencji)
+- Ogłaszanie wyjścia użytkowników odłączonego workera i stan dla nowego workera
+- Transport przez gniazdo Unix (BrokerServer / UnixBus)
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import asyncio
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broker import Broker, BrokerServer, LocalBus, UnixBus
+from cluster import PRESENCE_VERSION_RANGE, ClusterNode, ClusterPresence
+from database import create_tables, seed_sample_data
+from db_executor import AsyncDatabase
+from history_cache import HistoryCache
+from message_writer import MessageWriter
+from websocket_handler import ConnectionManager
+
+
+class FakeWebSocket:
+    """Zastępuje WebSocket - zapamiętuje wysłane ramki."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+
+# ====== FIXTURES ======
+
+@pytest.fixture
+def async_db():
+    """
+    Tworzy AsyncDatabase na tymczasowej bazie z przykładowymi danymi (7 wiadomości w general).
+    """
+    test_dir = tempfile.mkdtemp()
+    db_path = os.path.join(test_dir, 'chat.db')
+
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    create_tables(conn)
+    seed_sample_data(conn)
+
+    db = AsyncDatabase(conn)
+
+    yield db
+
+    # Cleanup
+    db.close()
+    conn.close()
+    for name in os.listdir(test_dir):
+        os.remove(os.path.join(test_dir, name))
+    os.rmdir(test_dir)
+
+
+async def start_worker(broker, db, node_id, reconnect_grace_ms=0):
+    """Worker połączony z brokerem przez LocalBus."""
+    manager = ConnectionManager()
+    bus = LocalBus(broker, node_id)
+    presence = ClusterPresence(manager, bus, node_id, reconnect_grace_ms=reconnect_grace_ms)
+    node = ClusterNode(bus, node_id, manager, MessageWriter(db), HistoryCache(db), presence)
+    await node.start()
+    return node
+
+
+async def stop_workers(*nodes):
+    """Odłącza workery od brokera (zatrzymuje zadania LocalBus)."""
+    for node in nodes:
+        await node.close()
+
+
+async def settle(*nodes):
+    """Czeka, aż wszystkie zdarzenia przejdą przez broker i zostaną obsłużone."""
+    for _ in range(2):
+        for node in nodes:
+            await node.bus.flush()
+
+
+def login(node, number):
+    """Łączy klienta z workerem i zgłasza obecność; zwraca połączenie."""
+    websocket = FakeWebSocket()
+    node.manager.connect(websocket, f"user_{number}", f"Uzytkownik{number}", "general")
+    node.presence.user_joined({"id": f"user_{number}", "name": f"Uzytkownik{number}"})
+    return websocket
+
+
+# ====== TESTY ======
+
+async def test_messages_are_sequenced_and_delivered_to_all_workers(async_db):
+    """
+    Test 1.1: Wiadomości z dwóch workerów - kolejne seq, ta sama kolejność u wszystkich klientów
+    """
+    broker = Broker(async_db.get_last_seq)
+    a, b = await start_worker(broker, async_db, 1), await start_worker(broker, async_db, 2)
+    client_a, client_b = login(a, 1), login(b, 2)
+
+    for number in range(10):
+        node = a if number % 2 else b
+        node.publish_message("general", node.node_id, f"Uzytkownik{node.node_id}", f"Wiadomość {number}")
+    await settle(a, b)
+    await a.manager.flush()
+    await b.manager.flush()
+
+    received_a = [m["payload"]["message"]["seq"] for m in client_a.sent if m["type"] == "new_message"]
+    received_b = [m["payload"]["message"]["seq"] for m in client_b.sent if m["type"] == "new_message"]
+    assert received_a == received_b == list(range(8, 18)), "Seed ma 7 wiadomości w general"
+
+    page = await b.history.get_latest("general", 3)
+    assert [m["seq"] for m in page["messages"]] == [15, 16, 17]
+    await stop_workers(a, b)
+
+
+async def test_only_origin_worker_writes_message(async_db):
+    """
+    Test 1.2: Każdą wiadomość zapisuje tylko worker nadawcy - bez duplikatów w bazie
+    """
+    broker = Broker(async_db.get_last_seq)
+    a, b = await start_worker(broker, async_db, 1), await start_worker(broker, async_db, 2)
+
+    a.publish_message("general", 1, "Jan", "Z workera 1")
+    b.publish_message("general", 2, "Anna", "Z workera 2")
+    await settle(a, b)
+    await a.writer.flush()
+    await b.writer.flush()
+
+    page = await async_db.get_messages_page("general", limit=2)
+    assert [(m["text"], m["seq"]) for m in page["messages"]] == [("Z workera 1", 8), ("Z workera 2", 9)]
+    assert a.writer.get_stats()["written"] == b.writer.get_stats()["written"] == 1
+    await stop_workers(a, b)
+
+
+async def test_origin_worker_reports_unsaved_message(async_db):
+    """
+    Test 1.7: Niezapisana wiadomość - callback nadawcy wywołuje tylko worker nadawcy
+    """
+    broker = Broker(async_db.get_last_seq)
+    a, b = await start_worker(broker, async_db, 1), await start_worker(broker, async_db, 2)
+    failures = []
+
+    message_key = a.publish_message("ghost", 1, "Jan", "Do nieistniejącego kanału",
+                                    lambda key, e: failures.append(key))
+    await settle(a, b)
+    await a.writer.flush()
+
+    assert failures == [message_key]
+    assert a._on_failure == {}
+    await stop_workers(a, b)
+
+
+async def test_presence_is_merged_across_workers(async_db):
+    """
+    Test 1.3: Użytkownik połączony z jednym workerem jest online dla wszystkich
+    """
+    broker = Broker(async_db.get_last_seq)
+    a, b = await start_worker(broker, async_db, 1), await start_worker(broker, async_db, 2)
+    login(a, 1)
+    login(b, 2)
+    await settle(a, b)
+    await a.presence.flush()
+    await b.presence.flush()
+
+    for node in (a, b):
+        assert [user["id"] for user in node.presence.snapshot()] == ["user_1", "user_2"]
+    assert b.presence.is_connected_elsewhere("Uzytkownik1")
+    assert not a.presence.is_connected_elsewhere("Uzytkownik1"), "Połączony z tym samym workerem"
+    assert a.presence.version == PRESENCE_VERSION_RANGE + 1
+    assert b.presence.version == 2 * PRESENCE_VERSION_RANGE + 1
+    await stop_workers(a, b)
+
+
+async def test_reconnect_to_other_worker_within_grace_is_silent(async_db):
+    """
+    Test 1.4: Powrót na innym workerze w okresie karencji - lista się nie zmienia
+    """
+    broker = Broker(async_db.get_last_seq)
+    a = await start_worker(broker, async_db, 1, reconnect_grace_ms=5000)
+    b = await start_worker(broker, async_db, 2, reconnect_grace_ms=5000)
+    login(a, 1)
+    await settle(a, b)
+    await a.presence.flush()
+    await b.presence.flush()
+
+    a.presence.user_left({"id": "user_1", "name": "Uzytkownik1"})
+    login(b, 1)
+    await settle(a, b)
+
+    for node in (a, b):
+        assert await node.presence.flush() is False
+        assert node.presence.get_stats()["reconnects_resumed"] == 1
+    assert a.presence.is_connected_elsewhere("Uzytkownik1")
+    await stop_workers(a, b)
+
+
+async def test_detached_worker_users_leave_and_new_worker_gets_state(async_db):
+    """
+    Test 1.5: Odłączenie workera ogłasza wyjście jego użytkowników; nowy worker zna obecność
+    """
+    broker = Broker(async_db.get_last_seq)
+    a, b = await start_worker(broker, async_db, 1), await start_worker(broker, async_db, 2)
+    login(a, 1)
+    login(b, 2)
+    await settle(a, b)
+
+    c = await start_worker(broker, async_db, 3)
+    await settle(c)
+    await c.presence.flush()
+    assert [user["id"] for user in c.presence.snapshot()] == ["user_1", "user_2"]
+
+    await a.close()
+    await settle(b, c)
+    await c.presence.flush()
+    assert [user["id"] for user in c.presence.snapshot()] == ["user_2"]
+    assert broker.get_stats()["nodes"] == [2, 3]
+
+    with pytest.raises(ValueError):
+        broker.attach(2, lambda frame: None)
+    await stop_workers(b, c)
+
+
+async def test_unix_socket_transport(async_db):
+    """
+    Test 1.6: BrokerServer i UnixBus - zdarzenie dociera do wszystkich workerów z seq
+    """
+    socket_dir = tempfile.mkdtemp()
+    path = os.path.join(socket_dir, "broker.sock")
+    server = BrokerServer(Broker(async_db.get_last_seq), path)
+    await server.start()
+
+    received = {1: asyncio.Queue(), 2: asyncio.Queue()}
+    buses = [UnixBus(path, node_id) for node_id in (1, 2)]
+    for bus in buses:
+        await bus.start(received[bus.node_id].put)
+
+    buses[0].publish({"type": "message", "node": 1, "channel_id": "general", "text": "Zażółć"})
+    for node_id in (1, 2):
+        event = await asyncio.wait_for(received[node_id].get(), timeout=5)
+        assert (event["text"], event["seq"]) == ("Zażółć", 8)
+
+    for bus in buses:
+        await bus.close()
+    await server.close()
+    assert not os.path.exists(path)
+    os.rmdir(socket_dir)
@@ -0,0 +1,99 @@
+"""
+Testy jednostkowe dla kodowania ramek JSON (codec.py)
+
+Ten plik testuje:
+- Identyczny tekst ze wszystkich zainstalowanych implementacji (orjson, msgspec, json)
+- Dekodowanie i błąd DecodeError dla niepoprawnego JSON-u
+- Zapasowe kodowanie biblioteką standardową (obiekty nieobsługiwane przez szybką implementację)
+- Gotowe ramki chat_history takie same jak zakodowany słownik
+"""
+
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec
+from history_cache import encode_chat_history
+
+
+MESSAGE = {
+    "id": "msg_034bb1eec8400001",
+    "channel_id": "general",
+    "user": {"id": "user_1", "name": "Łukasz"},
+    "text": "Zażółć gęślą jaźń 👋 \"cytat\" \\ \n\t\x01 ✓",
+    "timestamp": "2025-09-28T10:00:00.123Z",
+    "seq": 42
+}
+
+FRAMES = [
+    {"type": "new_message", "payload": {"channel_id": "general", "message": MESSAGE}},
+    {"type": "chat_history", "payload": {"channel_id": "general", "messages": [MESSAGE] * 3, "has_more": True}},
+    {"type": "user_list_update", "payload": {"version": 7, "from_version": 6, "added": [],
+                                             "removed": [{"id": "user_2", "name": "Anna"}]}},
+    {"type": "error_message", "payload": {"message": "Invalid JSON format"}},
+    {"type": "auth_failure", "payload": {"reason": None}}
+]
+
+
+@pytest.fixture(params=codec.available())
+def backend(request):
+    """Każda zainstalowana implementacja po kolei (po teście przywraca poprzednią)."""
+    previous = codec.BACKEND
+    codec.use(request.param)
+    yield request.param
+    codec.use(previous)
+
+
+# ====== TESTY ======
+
+def test_all_backends_produce_identical_text(backend):
+    """
+    Test 1.1: Tekst identyczny ze zwartym json.dumps - niezależnie od implementacji
+    """
+    for frame in FRAMES:
+        text = codec.encode(frame)
+        assert text == json.dumps(frame, ensure_ascii=False, separators=(",", ":"))
+        assert codec.decode(text) == frame
+        assert codec.decode(text.encode("utf-8")) == frame
+
+
+def test_invalid_json_raises_decode_error(backend):
+    """
+    Test 1.2: Niepoprawny JSON - DecodeError (podklasa ValueError)
+    """
+    for data in ("{", "", '{"type": "send_message",}', b"\xff"):
+        with pytest.raises(codec.DecodeError):
+            codec.decode(data)
+    assert issubclass(codec.DecodeError, ValueError)
+
+
+def test_unsupported_objects_fall_back_to_stdlib(backend):
+    """
+    Test 1.3: Klucze niebędące tekstem i duże liczby - kodowane jak w bibliotece standardowej
+    """
+    for value in ({1: "a", "b": 2}, {"big": 2 ** 70}):
+        assert codec.encode(value) == json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def test_prebuilt_chat_history_frame_matches_encoded_dict(backend):
+    """
+    Test 1.4: Sklejona ramka chat_history - bajt w bajt jak zakodowany słownik
+    """
+    page = {"messages": [MESSAGE], "has_more": False}
+    expected = codec.encode({"type": "chat_history",
+                             "payload": {"channel_id": "general", "messages": [MESSAGE], "has_more": False}})
+    assert encode_chat_history("general", page) == expected
+
+
+def test_use_rejects_unknown_backend():
+    """
+    Test 1.5: Nieznana nazwa kodeka - ValueError, implementacja bez zmian
+    """
+    previous = codec.BACKEND
+    with pytest.raises(ValueError):
+        codec.use("yaml")
+    assert codec.BACKEND == previous
+    assert codec.available()[-1] == "json", "Biblioteka standardowa jest zawsze dostępna"
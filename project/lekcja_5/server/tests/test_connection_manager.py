@@ -0,0 +1,428 @@
+"""
+Testy jednostkowe dla ConnectionManager (websocket_handler.py)
+
+Ten plik testuje:
+- Indeks kanał -> połączenia przy connect / disconnect
+- Przełączanie kanału (set_channel)
+- Rozgłaszanie new_message tylko do subskrybentów kanału
+- Kolejki wychodzące: wolny klient nie opóźnia pozostałych
+- Wykrywanie i rozłączanie klientów, którzy nie nadążają z odbiorem
+- Obsługę zdarzeń: logowanie, wznowienie sesji, wysyłanie wiadomości, historię
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bootstrap import BootstrapSnapshot
+from history_cache import HistoryCache
+from models import User
+from outbound import SLOW_CONSUMER_CLOSE_CODE
+from presence import PresenceAggregator
+from resume import ResumeTokens
+from schemas import AUTH_EVENTS, SESSION_EVENTS, parse_event
+from websocket_handler import (ConnectionManager, evict_slow_consumers, handle_auth_request, handle_disconnect,
+                               handle_request_history, handle_resume_request, handle_send_message)
+
+
+class FakeWebSocket:
+    """Zastępuje WebSocket - zapamiętuje wysłane ramki."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def connect_users(manager, channels):
+    """Łączy po jednym użytkowniku na każdy podany kanał; zwraca listę połączeń."""
+    sockets = []
+    for number, channel_id in enumerate(channels, start=1):
+        websocket = FakeWebSocket()
+        manager.connect(websocket, f"user_{number}", f"Uzytkownik{number}", channel_id)
+        sockets.append(websocket)
+    return sockets
+
+
+def test_connect_and_disconnect_maintain_channel_index():
+    """
+    Test 1.1: connect() dopisuje połączenie do kanału, disconnect() je usuwa
+    """
+    manager = ConnectionManager()
+    a, b = connect_users(manager, ["general", "general"])
+
+    assert manager.channel_subscribers == {"general": {a, b}}
+
+    manager.disconnect(a)
+    manager.disconnect(b)
+
+    assert manager.channel_subscribers == {}, "Pusty kanał powinien zniknąć z indeksu"
+
+
+def test_online_users_cached_until_connections_change():
+    """
+    Test 1.6: get_online_users() buduje listę raz - do następnego connect() / disconnect()
+    """
+    manager = ConnectionManager()
+    a, b = connect_users(manager, ["general", "random"])
+
+    users = manager.get_online_users()
+    assert users == [{"id": "user_1", "name": "Uzytkownik1"}, {"id": "user_2", "name": "Uzytkownik2"}]
+    assert manager.get_online_users() is users
+
+    manager.disconnect(a)
+    assert manager.get_online_users() == [{"id": "user_2", "name": "Uzytkownik2"}]
+
+
+def test_set_channel_moves_subscription():
+    """
+    Test 1.2: set_channel() przenosi połączenie do nowego kanału
+    """
+    manager = ConnectionManager()
+    a, b = connect_users(manager, ["general", "general"])
+
+    assert manager.set_channel(a, "random") is True
+    assert manager.set_channel(a, "random") is False, "Ten sam kanał - bez zmian"
+    assert manager.set_channel(FakeWebSocket(), "random") is False, "Nieznane połączenie"
+
+    assert manager.channel_subscribers == {"general": {b}, "random": {a}}
+    assert manager.get_user_info(a)["current_channel"] == "random"
+
+
+async def test_broadcast_reaches_only_channel_subscribers():
+    """
+    Test 1.3: broadcast_to_channel() wysyła tylko do użytkowników na kanale
+    """
+    manager = ConnectionManager()
+    a, b, c = connect_users(manager, ["general", "random", "general"])
+    manager.set_channel(b, "general")
+    manager.set_channel(c, "random")
+
+    await manager.broadcast_to_channel({"type": "new_message"}, "general", exclude_ws=a)
+    await manager.broadcast_to_channel({"type": "new_message"}, "nie-istnieje")
+    await manager.flush()
+
+    assert [len(ws.sent) for ws in (a, b, c)] == [0, 1, 0]
+
+
+async def test_stalled_client_does_not_delay_others():
+    """
+    Test 1.4: Klient, który nie odbiera, nie wstrzymuje rozgłaszania do pozostałych
+    """
+    manager = ConnectionManager()
+    a, b, c = connect_users(manager, ["general", "general", "general"])
+    stalled = asyncio.Event()
+
+    async def never_sends(text):
+        await stalled.wait()
+
+    a.send_text = never_sends
+    for number in range(3):
+        await manager.broadcast_to_channel({"type": "new_message", "n": number}, "general")
+    await asyncio.wait_for(asyncio.gather(manager.outbound[b].wait_idle(), manager.outbound[c].wait_idle()), 1)
+
+    assert [m["n"] for m in b.sent] == [0, 1, 2]
+    assert [m["n"] for m in c.sent] == [0, 1, 2]
+    assert manager.get_stats()["queued_frames"] == 2, "Pierwsza ramka klienta a jest w trakcie wysyłania"
+
+    manager.disconnect(a)
+    assert a not in manager.outbound
+
+
+async def test_personal_message_keeps_order_with_broadcasts():
+    """
+    Test 1.5: Wiadomość osobista trafia do tej samej kolejki co rozgłoszenia
+    """
+    manager = ConnectionManager()
+    a, = connect_users(manager, ["general"])
+
+    await manager.send_personal_message({"type": "auth_success"}, a)
+    await manager.broadcast_to_all({"type": "user_list_update"})
+    await manager.flush()
+
+    assert [m["type"] for m in a.sent] == ["auth_success", "user_list_update"]
+    assert manager.get_connection_stats()[0]["sent"] == 2
+
+
+# ====== TESTY WOLNYCH KLIENTÓW ======
+
+async def stall_client(manager, websocket, frames=1):
+    """Wstrzymuje wysyłanie do klienta i wrzuca mu `frames` ramek."""
+    stalled = asyncio.Event()
+
+    async def never_sends(text):
+        await stalled.wait()
+
+    websocket.send_text = never_sends
+    for _ in range(frames):
+        await manager.send_personal_message({"type": "new_message"}, websocket)
+    await asyncio.sleep(0)
+
+
+async def test_slow_client_is_marked_then_evicted_after_grace():
+    """
+    Test 2.1: Klient z długim send_text() jest oznaczany jako wolny, a po okresie łaski rozłączany
+    """
+    manager = ConnectionManager(slow_latency_ms=100, slow_grace_ms=1000)
+    a, b = connect_users(manager, ["general", "general"])
+    await stall_client(manager, a)
+    started = time.monotonic()
+
+    assert manager.check_slow_consumers(started + 0.05) == []
+    assert manager.check_slow_consumers(started + 0.2) == []
+    assert manager.get_stats()["slow"] == 1
+    assert manager.check_slow_consumers(started + 1.3) == [a]
+    assert manager.get_stats()["evicted"] == 1
+
+
+async def test_slow_client_recovers_within_grace():
+    """
+    Test 2.2: Klient, który nadrobi zaległości przed końcem okresu łaski, zostaje
+    """
+    manager = ConnectionManager(slow_backlog_bytes=100, slow_grace_ms=1000)
+    a, = connect_users(manager, ["general"])
+    await stall_client(manager, a, frames=10)
+    now = time.monotonic()
+
+    assert manager.check_slow_consumers(now) == []
+    assert manager.get_connection_stats()[0]["slow"] is True
+
+    manager.outbound[a]._frames.clear()
+    manager.outbound[a].backlog_bytes = 0
+    assert manager.check_slow_consumers(now + 0.5) == []
+
+    stats = manager.get_stats()
+    assert (stats["slow"], stats["slow_marked"], stats["slow_recovered"]) == (0, 1, 1)
+
+
+async def test_evicted_client_gets_close_code_and_others_user_left():
+    """
+    Test 2.3: Rozłączenie wolnego klienta - kod 4001 i zwykłe "removed" dla pozostałych
+    """
+    manager = ConnectionManager(queue_size=2, overflow_policy="disconnect")
+    presence = PresenceAggregator(manager)
+    a, b = connect_users(manager, ["general", "general"])
+    for user in manager.get_online_users():
+        presence.user_joined(user)
+    await presence.flush()
+    await manager.flush()
+    b.sent.clear()
+    close_codes = []
+
+    async def close(code=1000):
+        close_codes.append(code)
+
+    a.close = close
+    await stall_client(manager, a, frames=4)
+
+    assert await evict_slow_consumers(manager, presence) == 1
+    assert await handle_disconnect(a, manager, presence) is None, "Drugie rozłączenie nie powiela wyjścia"
+    await presence.flush()
+    await manager.flush()
+
+    assert close_codes == [SLOW_CONSUMER_CLOSE_CODE]
+    assert a not in manager.active_connections
+    assert [m["type"] for m in b.sent] == ["user_list_update"]
+    assert b.sent[0]["payload"]["removed"] == [{"id": "user_1", "name": "Uzytkownik1"}]
+
+
+# ====== TESTY OBSŁUGI ZDARZEŃ ======
+
+class FakeDatabase:
+    """Zastępuje AsyncDatabase - użytkownik "Jan", kanał "general"; zapytanie oddaje sterowanie pętli."""
+
+    async def get_all_channels(self):
+        return [{"id": "general", "name": "General", "type": "public"}]
+
+    async def get_messages_page(self, channel_id, limit=50, before=None, after=None):
+        return {"messages": [], "has_more": False}
+
+    async def get_user_by_username(self, username):
+        await asyncio.sleep(0.01)
+        if username == "Jan":
+            return User(id=1, username="Jan", password_hash="haslo", created_at=0)
+        return None
+
+
+def auth_request(username="Jan", password="haslo", history=False):
+    """auth_request bez sekcji stanu początkowego (domyślnie także bez historii)."""
+    return parse_event(json.dumps({
+        "type": "auth_request",
+        "payload": {"username": username, "password": password,
+                    "bootstrap": {"channels": False, "roster": False, "history": history}}
+    }), AUTH_EVENTS)
+
+
+async def login(manager, db, websocket, request=None):
+    """Wywołuje handle_auth_request z pozostałymi zależnościami na wartościach testowych."""
+    presence = PresenceAggregator(manager)
+    bootstrap = BootstrapSnapshot(db, None, presence)
+    return await handle_auth_request(request or auth_request(), websocket, manager, db, bootstrap, presence,
+                                     ResumeTokens("klucz"))
+
+
+async def test_concurrent_logins_with_same_nick():
+    """
+    Test 3.1: Dwa równoczesne logowania na ten sam nick - udaje się tylko jedno
+    """
+    manager = ConnectionManager()
+    db = FakeDatabase()
+    a, b = FakeWebSocket(), FakeWebSocket()
+
+    results = await asyncio.gather(login(manager, db, a), login(manager, db, b))
+    await manager.flush()
+
+    assert sorted(results) == [False, True]
+    assert len(manager.active_connections) == 1
+    rejected = b if results[0] else a
+    assert rejected.sent == [{"type": "auth_failure", "payload": {"reason": "Nickname already in use."}}]
+    assert manager.pending_usernames == set()
+
+
+async def test_failed_login_releases_nick():
+    """
+    Test 3.2: Nieudane logowanie (złe hasło) zwalnia rezerwację nicku
+    """
+    manager = ConnectionManager()
+    db = FakeDatabase()
+
+    assert await login(manager, db, FakeWebSocket(), auth_request(password="zle")) is False
+    assert not manager.is_username_taken("Jan")
+    assert await login(manager, db, FakeWebSocket()) is True
+
+
+async def test_login_error_after_connect_unregisters_connection():
+    """
+    Test 3.3: Błąd przy budowie auth_success - połączenie nie zostaje zarejestrowane, nick jest wolny
+    """
+    manager = ConnectionManager()
+    db = FakeDatabase()
+    websocket = FakeWebSocket()
+    # Sekcja history wymaga BootstrapSnapshot.history, której login() nie podaje
+    assert await login(manager, db, websocket, auth_request(history=True)) is False
+    assert manager.active_connections == {} and manager.outbound == {}
+    assert not manager.is_username_taken("Jan")
+    assert websocket.sent[-1]["type"] == "error_message"
+
+
+class FakeWriter:
+    """Zastępuje MessageWriter - zapamiętuje przekazane wiadomości i callbacki."""
+
+    def __init__(self):
+        self.submitted = []
+
+    async def submit(self, channel_id, user_id, text, ack_after_commit=None, on_failure=None):
+        self.submitted.append((channel_id, text, on_failure))
+        return len(self.submitted), 0, len(self.submitted)
+
+
+def send_message(channel_id, text="Hej!"):
+    """Zwalidowane zdarzenie send_message."""
+    return parse_event(json.dumps({"type": "send_message", "payload": {"channel_id": channel_id, "text": text}}),
+                       SESSION_EVENTS)
+
+
+async def test_message_to_unknown_channel_is_rejected():
+    """
+    Test 3.4: Wiadomość do nieistniejącego kanału - error_message, bez seq, historii i rozgłoszenia
+    """
+    manager = ConnectionManager()
+    writer, history = FakeWriter(), HistoryCache(FakeDatabase())
+    a, b = connect_users(manager, ["ghost", "ghost"])
+
+    await handle_send_message(send_message("ghost"), a, manager, writer, history)
+    await manager.flush()
+
+    assert writer.submitted == []
+    assert history.get_stats()["channels"] == 0
+    assert a.sent == [{"type": "error_message", "payload": {"message": "Channel not found"}}]
+    assert b.sent == []
+
+
+async def test_unsaved_message_is_reported_to_sender():
+    """
+    Test 3.5: Nieudany zapis w tle - nadawca dostaje error_message z ID wiadomości, historia jej nie ma
+    """
+    manager = ConnectionManager()
+    writer, history = FakeWriter(), HistoryCache(FakeDatabase())
+    a, b = connect_users(manager, ["general", "general"])
+
+    await handle_send_message(send_message("general"), a, manager, writer, history)
+    on_failure = writer.submitted[0][2]
+    on_failure(1, RuntimeError("disk I/O error"))
+    await manager.flush()
+
+    error = a.sent[-1]
+    assert error["type"] == "error_message"
+    assert error["payload"]["code"] == "message_not_saved"
+    assert error["payload"]["message_id"] == a.sent[0]["payload"]["message"]["id"]
+    assert [m["type"] for m in b.sent] == ["new_message"]
+    assert list(history._channels["general"].messages) == [], "Niezapisanej wiadomości nie ma w historii"
+
+    manager.disconnect(a)
+    on_failure(1, RuntimeError("disk I/O error"))
+
+
+async def test_history_of_unknown_channel_is_rejected():
+    """
+    Test 3.6: request_history dla nieistniejącego kanału - error_message, bez bufora i zmiany kanału
+    """
+    manager = ConnectionManager()
+    history = HistoryCache(FakeDatabase())
+    a, = connect_users(manager, ["general"])
+    request = parse_event(json.dumps({"type": "request_history", "payload": {"channel_id": "ghost"}}), SESSION_EVENTS)
+
+    await handle_request_history(request, a, manager, history)
+    await manager.flush()
+
+    assert a.sent == [{"type": "error_message", "payload": {"message": "Channel not found"}}]
+    assert history.get_stats()["channels"] == 0
+    assert manager.get_user_info(a)["current_channel"] == "general"
+
+
+async def test_resume_skips_unknown_channels():
+    """
+    Test 3.7: resume_request z nieznanymi kanałami - pominięte w missed_messages, bez buforów w pamięci
+    """
+    manager = ConnectionManager()
+    history = HistoryCache(FakeDatabase())
+    tokens = ResumeTokens("klucz")
+    websocket = FakeWebSocket()
+    request = parse_event(json.dumps({"type": "resume_request", "payload": {
+        "resume_token": tokens.issue("user_1", "Jan"),
+        "last_seq": {"general": 0, **{f"ghost{number}": 0 for number in range(50)}},
+        "current_channel": "ghost0"
+    }}), AUTH_EVENTS)
+
+    assert await handle_resume_request(request, websocket, manager, history, PresenceAggregator(manager), tokens)
+    await manager.flush()
+
+    assert list(websocket.sent[0]["payload"]["missed_messages"]) == ["general"]
+    assert list(history._channels) == ["general"]
+    assert manager.get_user_info(websocket)["current_channel"] == "general"
+
+
+async def test_history_reply_goes_through_outbound_queue():
+    """
+    Test 3.8: chat_history trafia do kolejki wychodzącej - po wcześniej rozgłoszonych wiadomościach
+    """
+    manager = ConnectionManager()
+    history = HistoryCache(FakeDatabase())
+    a, = connect_users(manager, ["general"])
+    request = parse_event(json.dumps({"type": "request_history", "payload": {"channel_id": "general"}}),
+                          SESSION_EVENTS)
+
+    await manager.broadcast_to_channel({"type": "new_message"}, "general")
+    await handle_request_history(request, a, manager, history)
+    await manager.flush()
+
+    assert [m["type"] for m in a.sent] == ["new_message", "chat_history"]
+    assert manager.get_connection_stats()[0]["sent"] == 2
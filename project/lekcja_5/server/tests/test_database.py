@@ -5,6 +5,10 @@ Ten plik testuje:
 - Inicjalizację bazy danych
 - Ładowanie przykładowych danych
 - Funkcje CRUD (get_user_by_username, get_messages_for_channel, add_message)
+- Stronicowanie historii kursorem (get_messages_page), także po seq
+- Numery sekwencyjne wiadomości
+- Schemat v2: klucze INTEGER w bazie, tekstowe ID dopiero w to_dict()
+- Wyszukiwanie pełnotekstowe (search_messages, indeks FTS5)
 - Izolację testów (każdy test używa tymczasowej bazy)
 """
 
@@ -26,9 +30,15 @@ from database import (
     get_channel_by_id,
     get_all_channels,
     get_messages_for_channel,
+    get_messages_page,
     add_message,
+    get_last_seq,
+    add_messages_batch,
+    search_messages,
+    build_search_query,
     get_timestamp
 )
+from ids import format_message_id, parse_message_id
 
 
 # ====== FIXTURES ======
@@ -243,7 +253,8 @@ def test_get_user_by_username_finds_existing_user(temp_db_with_data):
     # Sprawdź że użytkownik został znaleziony
     assert user is not None, "Użytkownik Jan powinien zostać znaleziony"
     assert user.username == "Jan"
-    assert user.id == "user_1"
+    assert user.id == 1, "W bazie klucz użytkownika jest liczbą"
+    assert user.to_dict()["id"] == "user_1", "W API ID użytkownika ma format user_<n>"
     assert user.password_hash == "ircAMP2024!"
 
 
@@ -346,6 +357,128 @@ def test_get_messages_for_channel_includes_user_info(temp_db_with_data):
     assert 'timestamp' in message, "Wiadomość powinna zawierać pole 'timestamp'"
 
 
+def test_get_messages_for_channel_returns_newest_messages(temp_db_with_data):
+    """
+    Test 3.5: get_messages_for_channel() z limitem zwraca NAJNOWSZE wiadomości
+    """
+    conn = temp_db_with_data
+
+    messages = get_messages_for_channel(conn, "general", limit=2)
+
+    assert [m['id'] for m in messages] == [format_message_id(6), format_message_id(7)], \
+        "Powinny zostać zwrócone 2 najnowsze wiadomości w kolejności chronologicznej"
+
+
+# ====== TESTY get_messages_page ======
+
+def insert_numbered_messages(conn, count):
+    """Dodaje `count` wiadomości z rosnącymi timestampami, id = 1000 + i, seq = i + 1."""
+    conn.executemany(
+        "INSERT INTO messages (id, channel_id, user_id, text, created_at, seq) VALUES (?, ?, ?, ?, ?, ?)",
+        [(1000 + i, 1, 1, f"Wiadomość {i}", 1735689600000 + i * 1000, i + 1) for i in range(count)]
+    )
+    conn.commit()
+
+
+def numbered_ids(numbers):
+    """ID w API wiadomości dodanych przez insert_numbered_messages()."""
+    return [format_message_id(1000 + i) for i in numbers]
+
+
+def test_get_messages_page_returns_latest_page(temp_db_with_data):
+    """
+    Test 3.6: Strona bez kursora to najnowsze wiadomości + informacja has_more
+    """
+    conn = temp_db_with_data
+    conn.execute("DELETE FROM messages")
+    insert_numbered_messages(conn, 25)
+
+    page = get_messages_page(conn, "general", limit=10)
+
+    assert [m['id'] for m in page['messages']] == numbered_ids(range(15, 25))
+    assert page['has_more'] is True
+
+
+def test_get_messages_page_before_cursor_walks_back_without_gaps(temp_db_with_data):
+    """
+    Test 3.7: Kolejne strony z kursorem 'before' pokrywają całą historię bez powtórzeń
+    """
+    conn = temp_db_with_data
+    conn.execute("DELETE FROM messages")
+    insert_numbered_messages(conn, 25)
+
+    seen = []
+    page = get_messages_page(conn, "general", limit=10)
+    seen = page['messages'] + seen
+    while page['has_more']:
+        page = get_messages_page(conn, "general", limit=10, before=seen[0]['id'])
+        seen = page['messages'] + seen
+
+    assert [m['id'] for m in seen] == numbered_ids(range(25))
+
+
+def test_get_messages_page_after_cursor_returns_newer_messages(temp_db_with_data):
+    """
+    Test 3.8: Kursor 'after' zwraca wiadomości nowsze od wskazanej
+    """
+    conn = temp_db_with_data
+    conn.execute("DELETE FROM messages")
+    insert_numbered_messages(conn, 25)
+
+    page = get_messages_page(conn, "general", limit=5, after=numbered_ids([19])[0])
+
+    assert [m['id'] for m in page['messages']] == numbered_ids(range(20, 25))
+    assert page['has_more'] is False
+
+
+def test_get_messages_page_rejects_unknown_cursor(temp_db_with_data):
+    """
+    Test 3.9: Nieznany kursor (lub kursor z innego kanału) zgłasza ValueError
+    """
+    conn = temp_db_with_data
+
+    with pytest.raises(ValueError):
+        get_messages_page(conn, "general", before="msg_does_not_exist")
+
+    with pytest.raises(ValueError):
+        get_messages_page(conn, "random", before="msg_1")
+
+
+def test_get_messages_page_uses_channel_index(temp_db_with_data):
+    """
+    Test 3.10: Zapytanie o stronę historii korzysta z indeksu (bez skanu i sortowania)
+    """
+    conn = temp_db_with_data
+
+    plan = conn.execute("""
+        EXPLAIN QUERY PLAN
+        SELECT m.id FROM messages m
+        WHERE m.channel_id = ? AND m.seq < ?
+        ORDER BY m.seq DESC
+        LIMIT 51
+    """, ("general", 100)).fetchall()
+    details = " ".join(row[3] for row in plan)
+
+    assert "idx_messages_channel_seq" in details
+    assert "TEMP B-TREE" not in details, "Sortowanie powinno wynikać z indeksu"
+
+
+
+def test_get_messages_page_accepts_seq_cursor(temp_db_with_data):
+    """
+    Test 3.11: Kursorem może być numer seq - after_seq zwraca dokładnie brakujące wiadomości
+    """
+    conn = temp_db_with_data
+
+    page = get_messages_page(conn, "general", limit=10, after=4)
+    older = get_messages_page(conn, "general", limit=2, before=4)
+
+    assert [m['seq'] for m in page['messages']] == [5, 6, 7]
+    assert page['has_more'] is False
+    assert [m['id'] for m in older['messages']] == [format_message_id(2), format_message_id(3)]
+    assert older['has_more'] is True
+
+
 # ====== TESTY add_message ======
 
 def test_add_message_adds_to_database(temp_db_with_data):
@@ -356,27 +489,29 @@ def test_add_message_adds_to_database(temp_db_with_data):
 
     # Policz wiadomości przed dodaniem
     cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM messages WHERE channel_id = ?", ("general",))
+    cursor.execute("SELECT COUNT(*) FROM messages WHERE channel_id = (SELECT id FROM channels WHERE slug = ?)",
+                   ("general",))
     count_before = cursor.fetchone()[0]
 
     # Dodaj nową wiadomość
     message_id, timestamp = add_message(conn, "general", "user_1", "Test message")
 
     # Policz wiadomości po dodaniu
-    cursor.execute("SELECT COUNT(*) FROM messages WHERE channel_id = ?", ("general",))
+    cursor.execute("SELECT COUNT(*) FROM messages WHERE channel_id = (SELECT id FROM channels WHERE slug = ?)",
+                   ("general",))
     count_after = cursor.fetchone()[0]
 
     # Sprawdź że liczba wzrosła o 1
     assert count_after == count_before + 1, "Liczba wiadomości powinna wzrosnąć o 1"
 
     # Sprawdź że wiadomość istnieje w bazie
-    cursor.execute("SELECT * FROM messages WHERE id = ?", (message_id,))
+    cursor.execute("SELECT * FROM messages WHERE id = ?", (parse_message_id(message_id),))
     row = cursor.fetchone()
 
     assert row is not None, "Wiadomość powinna zostać dodana do bazy"
     assert row['text'] == "Test message"
-    assert row['user_id'] == "user_1"
-    assert row['channel_id'] == "general"
+    assert row['user_id'] == 1, "user_1 w bazie to klucz 1"
+    assert row['channel_id'] == 1, "general w bazie to klucz 1"
 
 
 def test_add_message_generates_valid_timestamp(temp_db_with_data):
@@ -439,7 +574,7 @@ def test_add_message_handles_utf8_characters(temp_db_with_data):
 
         # Pobierz wiadomość z bazy
         cursor = conn.cursor()
-        cursor.execute("SELECT text FROM messages WHERE id = ?", (message_id,))
+        cursor.execute("SELECT text FROM messages WHERE id = ?", (parse_message_id(message_id),))
         row = cursor.fetchone()
 
         # Sprawdź że tekst się zgadza (z UTF-8)
@@ -517,3 +652,157 @@ def test_get_timestamp_is_current_time():
     # Sprawdź że jest pomiędzy before i after (z tolerancją 1 sekundy)
     assert before <= timestamp <= after or (timestamp - before).total_seconds() <= 1, \
         "Timestamp powinien być z aktualnego czasu"
+
+
+def test_add_message_assigns_next_seq(temp_db_with_data):
+    """
+    Test 4.5: add_message() nadaje kolejny numer seq w kanale
+    """
+    conn = temp_db_with_data
+
+    add_message(conn, "general", "user_1", "Ósma")
+    add_message(conn, "random", "user_1", "Pierwsza w random")
+
+    assert get_last_seq(conn, "general") == 8
+    assert get_last_seq(conn, "random") == 1
+
+
+# ====== TESTY search_messages ======
+
+def test_search_messages_finds_words_without_diacritics(temp_db_with_data):
+    """
+    Test 7.1: Wyszukiwanie ignoruje wielkość liter i polskie znaki
+    """
+    conn = temp_db_with_data
+
+    results = search_messages(conn, "CZESC")
+
+    assert [m['text'] for m in results['messages']] == ["Cześć wszystkim!"]
+    assert results['messages'][0]['channel_id'] == "general"
+    assert results['messages'][0]['user'] == {"id": "user_2", "name": "Anna"}
+    assert results['has_more'] is False
+
+
+def test_search_messages_requires_all_words(temp_db_with_data):
+    """
+    Test 7.2: Wszystkie słowa zapytania muszą wystąpić w wiadomości
+    """
+    conn = temp_db_with_data
+
+    assert len(search_messages(conn, "wszystkim")['messages']) == 2
+    texts = [m['text'] for m in search_messages(conn, "powodzenia wszystkim")['messages']]
+    assert texts == ["Powodzenia wszystkim!"]
+
+
+def test_search_messages_ranks_best_match_first(temp_db_with_data):
+    """
+    Test 7.3: Lepiej dopasowana wiadomość jest wyżej niż nowsza, słabiej dopasowana
+    """
+    conn = temp_db_with_data
+    add_message(conn, "general", "user_1", "Serwer serwer serwer")
+    add_message(conn, "general", "user_1", "Restart, potem serwer wstał po długiej przerwie w nocy")
+
+    texts = [m['text'] for m in search_messages(conn, "serwer")['messages']]
+
+    assert texts[0] == "Serwer serwer serwer"
+    assert len(texts) == 2
+
+
+def test_search_messages_filters_by_channel(temp_db_with_data):
+    """
+    Test 7.4: Parametr channel_id zawęża wyniki do jednego kanału
+    """
+    conn = temp_db_with_data
+    add_message(conn, "random", "user_1", "Powodzenia na egzaminie!")
+
+    everywhere = search_messages(conn, "powodzenia")
+    in_random = search_messages(conn, "powodzenia", channel_id="random")
+
+    assert len(everywhere['messages']) == 2
+    assert [m['text'] for m in in_random['messages']] == ["Powodzenia na egzaminie!"]
+    assert search_messages(conn, "powodzenia", channel_id="nie-istnieje")['messages'] == []
+
+
+def test_search_messages_paginates_with_offset(temp_db_with_data):
+    """
+    Test 7.5: Strony wyników (limit/offset) pokrywają wszystkie trafienia bez powtórzeń
+    """
+    conn = temp_db_with_data
+    conn.execute("DELETE FROM messages")
+    insert_numbered_messages(conn, 25)
+
+    first = search_messages(conn, "wiadomosc", limit=10)
+    second = search_messages(conn, "wiadomosc", limit=10, offset=10)
+    last = search_messages(conn, "wiadomosc", limit=10, offset=20)
+
+    ids = [m['id'] for page in (first, second, last) for m in page['messages']]
+    assert sorted(ids) == sorted(numbered_ids(range(25)))
+    assert first['has_more'] is True
+    assert last['has_more'] is False
+    # Przy równym dopasowaniu - najpierw najnowsze
+    assert ids[0] == numbered_ids([24])[0]
+
+
+def test_search_index_follows_batch_inserts_and_edits(temp_db_with_data):
+    """
+    Test 7.6: Wyzwalacze aktualizują indeks przy zapisie paczek, edycji i usuwaniu
+    """
+    conn = temp_db_with_data
+    add_messages_batch(conn, [(5000, "general", 1, "Nowa funkcja wyszukiwania", 1735689600000, 8)])
+    assert len(search_messages(conn, "wyszukiwania")['messages']) == 1
+
+    conn.execute("UPDATE messages SET text = 'Poprawiona treść' WHERE id = 5000")
+    assert search_messages(conn, "wyszukiwania")['messages'] == []
+    assert len(search_messages(conn, "poprawiona")['messages']) == 1
+
+    conn.execute("DELETE FROM messages WHERE id = 5000")
+    assert search_messages(conn, "poprawiona")['messages'] == []
+
+
+def test_build_search_query_escapes_fts_syntax():
+    """
+    Test 7.7: Składnia FTS5 z zapytania nie jest wykonywana, prefiks tylko z gwiazdką
+    """
+    assert build_search_query('projekt OR "drop" NEAR(') == '"projekt" "OR" "drop" "NEAR"'
+    assert build_search_query("zacz*") == '"zacz"*'
+    assert build_search_query("za*") == '"za"', "Za krótki prefiks - pełne słowo"
+
+    with pytest.raises(ValueError):
+        build_search_query("?!* ")
+
+
+def test_search_messages_prefix_query(temp_db_with_data):
+    """
+    Test 7.8: Gwiazdka na końcu zapytania szuka słów zaczynających się od prefiksu
+    """
+    conn = temp_db_with_data
+
+    assert search_messages(conn, "zacz")['messages'] == []
+    assert [m['text'] for m in search_messages(conn, "zacz*")['messages']] == ["Ja zaczynam właśnie!"]
+
+
+def test_search_messages_pages_past_rank_window(temp_db_with_data, monkeypatch):
+    """
+    Test 7.9: Za oknem rankingu (SEARCH_RANK_WINDOW) są starsze trafienia - has_more nie kończy się na oknie
+    """
+    monkeypatch.setattr("config.SEARCH_RANK_WINDOW", 10)
+    conn = temp_db_with_data
+    conn.execute("DELETE FROM messages")
+    insert_numbered_messages(conn, 25)
+
+    pages = []
+    offset = 0
+    while True:
+        page = search_messages(conn, "wiadomosc", limit=4, offset=offset)
+        pages.append(page)
+        if not page['has_more']:
+            break
+        offset += 4
+
+    ids = [m['id'] for page in pages for m in page['messages']]
+    assert sorted(ids) == sorted(numbered_ids(range(25))), "Wszystkie trafienia, bez powtórzeń"
+    assert len(pages) == 7
+    # Strona na granicy okna: 2 ostatnie z rankingu + 2 najnowsze spoza okna
+    assert [m['id'] for m in pages[2]['messages']][2:] == numbered_ids([14, 13])
+    assert ids[10:] == numbered_ids(range(14, -1, -1)), "Starsze trafienia od najnowszych"
+    assert search_messages(conn, "wiadomosc", limit=4, offset=25) == {"messages": [], "has_more": False}
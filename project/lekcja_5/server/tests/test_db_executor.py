@@ -0,0 +1,158 @@
+"""
+Testy jednostkowe dla modułu db_executor.py
+
+Ten plik testuje:
+- Asynchroniczne odpowiedniki funkcji z database.py (AsyncDatabase)
+- Metryki puli wątków (głębokość kolejki, liczniki), także po anulowaniu czekających
+- Przekazywanie wyjątków z wątku puli do wywołującego
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import asyncio
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import create_tables, seed_sample_data
+from db_executor import AsyncDatabase
+
+
+# ====== FIXTURES ======
+
+@pytest.fixture
+def async_db():
+    """
+    Tworzy AsyncDatabase na tymczasowej bazie z przykładowymi danymi.
+    """
+    test_dir = tempfile.mkdtemp()
+    db_path = os.path.join(test_dir, 'chat.db')
+
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    create_tables(conn)
+    seed_sample_data(conn)
+
+    db = AsyncDatabase(conn)
+
+    yield db
+
+    # Cleanup
+    db.close()
+    conn.close()
+    try:
+        os.remove(db_path)
+        os.rmdir(test_dir)
+    except:
+        pass
+
+
+# ====== TESTY OPERACJI ======
+
+async def test_async_get_user_by_username(async_db):
+    """
+    Test 1.1: get_user_by_username() zwraca użytkownika przez pulę wątków
+    """
+    user = await async_db.get_user_by_username("Jan")
+
+    assert user is not None
+    assert user.to_dict()["id"] == "user_1"
+
+
+async def test_async_add_message_and_history(async_db):
+    """
+    Test 1.2: add_message() zapisuje wiadomość widoczną w historii
+    """
+    message_id, timestamp = await async_db.add_message("general", "user_1", "Async test")
+    messages = await async_db.get_messages_for_channel("general", limit=50)
+
+    assert message_id in [m["id"] for m in messages]
+
+
+async def test_async_operations_run_outside_event_loop_thread(async_db):
+    """
+    Test 1.3: Operacje wykonują się w wątku puli, a nie w wątku pętli zdarzeń
+    """
+    loop_thread = threading.get_ident()
+    worker_thread = await async_db.run(threading.get_ident)
+
+    assert worker_thread != loop_thread
+
+
+async def test_async_exception_is_propagated(async_db):
+    """
+    Test 1.4: Wyjątek z wątku puli trafia do wywołującego i jest liczony
+    """
+    def failing():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await async_db.run(failing)
+
+    assert async_db.get_stats()["failed"] == 1
+
+
+async def test_async_search_sees_new_messages(async_db):
+    """
+    Test 1.5: search_messages() na połączeniu do odczytu widzi zapisane wiadomości
+    """
+    message_id, _ = await async_db.add_message("general", "user_1", "Szukana fraza testowa")
+
+    results = await async_db.search_messages("szukana fraza", channel_id="general")
+
+    assert [m["id"] for m in results["messages"]] == [message_id]
+
+
+# ====== TESTY METRYK ======
+
+async def test_queue_depth_reflects_waiting_tasks(async_db):
+    """
+    Test 2.1: queue_depth pokazuje zadania czekające na wolny wątek
+    """
+    release = threading.Event()
+
+    # Pierwsze zadanie blokuje jedyny wątek puli
+    blocker = asyncio.ensure_future(async_db.run(release.wait))
+    waiting = [asyncio.ensure_future(async_db.run(lambda: None)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+
+    assert async_db.queue_depth == 3
+    assert async_db.get_stats()["running"] == 1
+
+    release.set()
+    await asyncio.gather(blocker, *waiting)
+
+    stats = async_db.get_stats()
+    assert stats["queue_depth"] == 0
+    assert stats["peak_queue_depth"] >= 3
+    assert stats["completed"] == 4
+
+
+async def test_cancelled_waiters_leave_queue(async_db):
+    """
+    Test 2.2: Anulowane wywołanie, którego zadanie czekało na wątek, nie zostaje w queue_depth
+    """
+    release = threading.Event()
+    calls = []
+
+    blocker = asyncio.ensure_future(async_db.run(release.wait))
+    waiting = [asyncio.ensure_future(async_db.run(calls.append, i)) for i in range(5)]
+    await asyncio.sleep(0.05)
+    assert async_db.queue_depth == 5
+
+    for task in waiting:
+        task.cancel()
+    await asyncio.gather(*waiting, return_exceptions=True)
+    release.set()
+    await blocker
+    await async_db.run(lambda: None)
+
+    stats = async_db.get_stats()
+    assert calls == [], "Anulowane zadania nie zostały wykonane"
+    assert stats["queue_depth"] == 0
+    assert stats["running"] == 0
+    assert stats["completed"] == 2
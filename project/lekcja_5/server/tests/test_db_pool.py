@@ -0,0 +1,170 @@
+"""
+Testy jednostkowe dla modułu db_pool.py
+
+Ten plik testuje:
+- Włączenie trybu WAL dla połączenia zapisującego
+- Połączenia tylko do odczytu (odrzucają zapis), także dla ścieżki ze znakami specjalnymi URI
+- Odczyt równolegle z trwającym zapisem
+- Konfigurowalne pragmy (synchronous, cache_size, mmap_size)
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import create_tables, seed_sample_data, get_all_channels, get_messages_for_channel
+from db_pool import ConnectionPool
+
+
+# ====== FIXTURES ======
+
+@pytest.fixture
+def writer_conn():
+    """
+    Tworzy połączenie zapisujące do tymczasowej bazy z przykładowymi danymi.
+    """
+    test_dir = tempfile.mkdtemp()
+    db_path = os.path.join(test_dir, 'chat.db')
+
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    create_tables(conn)
+    seed_sample_data(conn)
+
+    yield conn
+
+    # Cleanup
+    conn.close()
+    for name in os.listdir(test_dir):
+        os.remove(os.path.join(test_dir, name))
+    os.rmdir(test_dir)
+
+
+# ====== TESTY ======
+
+def test_pool_enables_wal_mode(writer_conn):
+    """
+    Test 1.1: Połączenie zapisujące działa w trybie WAL
+    """
+    pool = ConnectionPool(writer_conn, readers=2)
+
+    mode = writer_conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+    pool.close()
+
+
+def test_reader_connections_are_read_only(writer_conn):
+    """
+    Test 1.2: Połączenia z puli odczytu nie pozwalają na zapis
+    """
+    pool = ConnectionPool(writer_conn, readers=2)
+
+    with pool.reading() as conn:
+        assert len(get_all_channels(conn)) == 2
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM messages")
+
+    pool.close()
+
+
+def test_read_runs_while_writer_is_busy(writer_conn):
+    """
+    Test 1.3: Odczyt z puli nie czeka na trwającą transakcję zapisu
+    """
+    pool = ConnectionPool(writer_conn, readers=1)
+    result = {}
+
+    with pool.writing() as conn:
+        # Niezatwierdzona transakcja zapisu trzyma blokadę połączenia zapisującego
+        conn.execute(
+            "INSERT INTO messages (id, channel_id, user_id, text, created_at, seq) VALUES (?, ?, ?, ?, ?, ?)",
+            (999, 1, 1, "W trakcie", 1735689600000, 8)
+        )
+
+        def reader():
+            with pool.reading() as read_conn:
+                result["messages"] = get_messages_for_channel(read_conn, "general", limit=50)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        thread.join(timeout=2)
+
+        assert not thread.is_alive(), "Odczyt nie powinien czekać na zapis"
+        texts = [m["text"] for m in result["messages"]]
+        assert "W trakcie" not in texts, "Niezatwierdzony zapis nie powinien być widoczny"
+
+        conn.commit()
+
+    pool.close()
+
+
+def test_pool_applies_pragmas(writer_conn):
+    """
+    Test 1.4: Pragmy z konfiguracji są ustawiane na wszystkich połączeniach
+    """
+    pool = ConnectionPool(writer_conn, readers=1, synchronous="FULL", cache_size=-4000, mmap_size=0)
+
+    assert writer_conn.execute("PRAGMA synchronous").fetchone()[0] == 2  # FULL
+    with pool.reading() as conn:
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -4000
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+
+    pool.close()
+
+
+def test_pool_rejects_invalid_synchronous_mode(writer_conn):
+    """
+    Test 1.5: Niepoprawna wartość synchronous jest odrzucana
+    """
+    with pytest.raises(ValueError):
+        ConnectionPool(writer_conn, readers=0, synchronous="FAST")
+
+
+def test_in_memory_database_uses_writer_for_reads():
+    """
+    Test 1.6: Dla bazy w pamięci pula nie tworzy czytelników - odczyt przez writer
+    """
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    create_tables(conn)
+    seed_sample_data(conn)
+
+    pool = ConnectionPool(conn, readers=4)
+
+    assert pool.reader_count == 0
+    with pool.reading() as read_conn:
+        assert read_conn is conn
+
+    conn.close()
+
+
+def test_readers_open_path_with_uri_characters():
+    """
+    Test 1.7: Ścieżka ze spacją, "?", "#" i "%" otwiera ten sam plik bazy w trybie tylko do odczytu
+    """
+    test_dir = tempfile.mkdtemp(suffix=" czat?mode=rwc#1%20")
+    db_path = os.path.join(test_dir, "chat.db")
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    create_tables(conn)
+    seed_sample_data(conn)
+
+    pool = ConnectionPool(conn, readers=2)
+    with pool.reading() as read_conn:
+        assert read_conn is not conn
+        assert len(get_all_channels(read_conn)) == 2
+        with pytest.raises(sqlite3.OperationalError):
+            read_conn.execute("DELETE FROM messages")
+
+    pool.close()
+    conn.close()
+    for name in os.listdir(test_dir):
+        os.remove(os.path.join(test_dir, name))
+    os.rmdir(test_dir)
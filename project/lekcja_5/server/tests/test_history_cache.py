@@ -0,0 +1,410 @@
+"""
+Testy jednostkowe dla modułu history_cache.py
+
+Ten plik testuje:
+- Leniwe wypełnianie bufora z bazy przy pierwszym odczycie
+- Zwracanie kolejnych stron bez dostępu do bazy
+- Dopisywanie nowych wiadomości (write-through)
+- Ograniczenie pamięci (bufor pierścieniowy + LRU kanałów)
+- Zakodowane ramki chat_history (trafienia, unieważnianie)
+- Wiadomości przegapione od danego seq (get_since)
+- Strony historii z wiadomościami czekającymi w kolejce zapisu (MessageWriter)
+- Lista istniejących kanałów (has_channel)
+"""
+
+import os
+import asyncio
+import sys
+import json
+import sqlite3
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import create_tables, seed_sample_data
+from db_executor import AsyncDatabase
+from history_cache import HistoryCache
+from ids import format_message_id
+from message_writer import MessageWriter
+from models import Message
+
+
+# ====== FIXTURES ======
+
+@pytest.fixture
+def async_db():
+    """
+    Tworzy AsyncDatabase na tymczasowej bazie z przykładowymi danymi.
+    """
+    test_dir = tempfile.mkdtemp()
+    db_path = os.path.join(test_dir, 'chat.db')
+
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    create_tables(conn)
+    seed_sample_data(conn)
+
+    db = AsyncDatabase(conn)
+
+    yield db
+
+    # Cleanup
+    db.close()
+    conn.close()
+    for name in os.listdir(test_dir):
+        os.remove(os.path.join(test_dir, name))
+    os.rmdir(test_dir)
+
+
+def make_message(message_id: str, text: str = "Nowa") -> dict:
+    """Tworzy wiadomość w formacie Message.to_dict()."""
+    return {
+        "id": message_id,
+        "user": {"id": "user_1", "name": "Jan"},
+        "text": text,
+        "timestamp": "2030-01-01T00:00:00Z"
+    }
+
+
+def seeded_ids(*numbers: int) -> list:
+    """ID w API przykładowych wiadomości (w bazie klucze 1-7)."""
+    return [format_message_id(number) for number in numbers]
+
+
+def db_queries(db) -> int:
+    """Liczba zapytań wykonanych przez AsyncDatabase."""
+    return db.get_stats()["completed"]
+
+
+# ====== TESTY ======
+
+async def test_first_read_loads_from_database_then_hits_memory(async_db):
+    """
+    Test 1.1: Pierwszy odczyt pobiera dane z bazy, kolejne już nie
+    """
+    cache = HistoryCache(async_db, capacity=10)
+
+    first = await cache.get_latest("general", 5)
+    queries_after_first = db_queries(async_db)
+    second = await cache.get_latest("general", 5)
+
+    assert [m["id"] for m in first["messages"]] == seeded_ids(3, 4, 5, 6, 7)
+    assert first["has_more"] is True
+    assert second == first
+    assert db_queries(async_db) == queries_after_first, "Drugi odczyt nie powinien pytać bazy"
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+async def test_append_is_visible_without_database(async_db):
+    """
+    Test 1.2: Dopisana wiadomość jest od razu widoczna w najnowszej stronie
+    """
+    cache = HistoryCache(async_db, capacity=50)
+    await cache.get_latest("general", 50)
+
+    cache.append("general", make_message("msg_new"))
+    page = await cache.get_latest("general", 50)
+
+    assert page["messages"][-1]["id"] == "msg_new"
+    assert len(page["messages"]) == 8
+    assert page["has_more"] is False
+
+
+async def test_append_before_load_is_merged_with_database(async_db):
+    """
+    Test 1.3: Wiadomość dopisana przed wypełnieniem bufora nie ginie (i nie dubluje się)
+    """
+    cache = HistoryCache(async_db, capacity=50)
+
+    # Wiadomość jeszcze czeka w kolejce zapisu - bazy w niej nie ma
+    cache.append("general", make_message("msg_pending"))
+    page = await cache.get_latest("general", 50)
+
+    ids = [m["id"] for m in page["messages"]]
+    assert ids == seeded_ids(1, 2, 3, 4, 5, 6, 7) + ["msg_pending"]
+
+
+async def test_ring_buffer_keeps_last_k_messages(async_db):
+    """
+    Test 1.4: Bufor przechowuje najwyżej K wiadomości na kanał
+    """
+    cache = HistoryCache(async_db, capacity=3)
+    await cache.get_latest("random", 3)
+
+    for i in range(5):
+        cache.append("random", make_message(f"msg_r{i}"))
+    page = await cache.get_latest("random", 3)
+
+    assert [m["id"] for m in page["messages"]] == ["msg_r2", "msg_r3", "msg_r4"]
+    assert page["has_more"] is True, "Starsze wiadomości wypadły z bufora, ale istnieją"
+
+
+async def test_least_recently_used_channel_is_evicted(async_db):
+    """
+    Test 1.5: Przy limicie kanałów usuwany jest najdawniej używany
+    """
+    cache = HistoryCache(async_db, capacity=10, max_channels=2)
+
+    await cache.get_latest("general", 5)
+    await cache.get_latest("random", 5)
+    await cache.get_latest("general", 5)       # general staje się ostatnio używanym
+    await cache.get_latest("dm_user1_user2", 5)  # wypycha random
+
+    stats = cache.get_stats()
+    assert stats["channels"] == 2
+    assert stats["evictions"] == 1
+
+    await cache.get_latest("general", 5)
+    assert cache.get_stats()["hits"] == 2, "general powinien zostać w pamięci"
+
+
+async def test_channel_with_unsaved_messages_is_not_evicted(async_db):
+    """
+    Test 1.7: Kanał z niezapisanymi wiadomościami zostaje w pamięci - usuwany jest następny w kolejce LRU
+    """
+    unsaved = {"general"}
+    cache = HistoryCache(async_db, capacity=10, max_channels=2, has_unsaved=lambda channel_id: channel_id in unsaved)
+
+    await cache.get_latest("general", 5)
+    cache.append("general", make_message("msg_pending"))
+    await cache.get_latest("random", 5)
+    await cache.get_latest("dm_user1_user2", 5)   # general najdawniej używany, ale czeka na zapis
+
+    assert list(cache._channels) == ["general", "dm_user1_user2"]
+    page = await cache.get_latest("general", 5)
+    assert page["messages"][-1]["id"] == "msg_pending"
+
+
+async def test_page_larger_than_buffer_goes_to_database(async_db):
+    """
+    Test 1.6: Strona większa niż bufor jest pobierana z bazy
+    """
+    cache = HistoryCache(async_db, capacity=3)
+
+    page = await cache.get_latest("general", 5)
+
+    assert len(page["messages"]) == 5
+    assert cache.get_stats()["bypassed"] == 1
+
+
+# ====== TESTY ZAKODOWANYCH RAMEK ======
+
+async def test_latest_frame_is_encoded_once(async_db):
+    """
+    Test 2.1: Powtórne żądanie najnowszej strony zwraca tę samą gotową ramkę
+    """
+    cache = HistoryCache(async_db, capacity=50)
+
+    first = await cache.get_latest_frame("general", 50)
+    second = await cache.get_latest_frame("general", 50)
+
+    assert second is first
+    frame = json.loads(first)
+    assert frame["type"] == "chat_history"
+    assert frame["payload"]["channel_id"] == "general"
+    assert len(frame["payload"]["messages"]) == 7
+    stats = cache.get_stats()
+    assert stats["frame_hits"] == 1
+    assert stats["frame_misses"] == 1
+
+
+async def test_latest_frame_is_invalidated_by_new_message(async_db):
+    """
+    Test 2.2: Nowa wiadomość w kanale unieważnia ramkę najnowszej strony
+    """
+    cache = HistoryCache(async_db, capacity=50)
+    await cache.get_latest_frame("general", 50)
+
+    cache.append("general", make_message("msg_new"))
+    frame = json.loads(await cache.get_latest_frame("general", 50))
+
+    assert frame["payload"]["messages"][-1]["id"] == "msg_new"
+    assert cache.get_stats()["frame_misses"] == 2
+
+
+async def test_before_page_frames_are_cached(async_db):
+    """
+    Test 2.3: Ramki starszych stron są zapamiętywane, stron "after" - nie
+    """
+    cache = HistoryCache(async_db, capacity=50)
+
+    first = await cache.get_page_frame("general", 3, before="msg_7")
+    second = await cache.get_page_frame("general", 3, before="msg_7")
+    await cache.get_page_frame("general", 3, after="msg_2")
+    await cache.get_page_frame("general", 3, after="msg_2")
+
+    assert second is first
+    assert [m["id"] for m in json.loads(first)["payload"]["messages"]] == seeded_ids(4, 5, 6)
+    stats = cache.get_stats()
+    assert stats["frame_hits"] == 1
+    assert stats["frame_misses"] == 3
+    assert stats["page_frames"] == 1
+
+
+async def test_before_pages_with_unsaved_messages_are_not_cached(async_db):
+    """
+    Test 2.4: Strona kanału z niezapisanymi wiadomościami (MessageWriter) nie jest zapamiętywana
+    """
+    unsaved = {"general"}
+    cache = HistoryCache(async_db, capacity=50, has_unsaved=lambda channel_id: channel_id in unsaved)
+
+    await cache.get_page_frame("general", 3, before="msg_7")
+    assert cache.get_stats()["page_frames"] == 0
+
+    unsaved.clear()
+    await cache.get_page_frame("general", 3, before="msg_7")
+    assert cache.get_stats()["page_frames"] == 1
+
+
+async def test_before_seq_past_last_message_is_not_cached(async_db):
+    """
+    Test 2.5: Kursor seq za ostatnią wiadomością ("najnowsze") nie jest zapamiętywany - strona się zmieni
+    """
+    cache = HistoryCache(async_db, capacity=50)
+
+    future = json.loads(await cache.get_page_frame("general", 3, before=100))
+    await cache.get_page_frame("general", 3, before=5)
+
+    assert [m["seq"] for m in future["payload"]["messages"]] == [5, 6, 7]
+    assert list(cache._page_frames) == [("general", 5, 3)]
+
+
+async def test_commit_drops_page_frames_of_its_channels(async_db):
+    """
+    Test 2.6: drop_page_frames() usuwa ramki kanału; strona pobrana w trakcie zapisu nie jest zapamiętywana
+    """
+    cache = HistoryCache(async_db, capacity=50)
+    await cache.get_page_frame("general", 3, before="msg_7")
+    await cache.get_page_frame("general", 2, before="msg_7")
+
+    cache.drop_page_frames({"general"})
+    assert cache.get_stats()["page_frames"] == 0
+
+    read = asyncio.ensure_future(cache.get_page_frame("general", 3, before="msg_7"))
+    await asyncio.sleep(0)
+    cache.drop_page_frames({"general"})
+    await read
+    assert cache.get_stats()["page_frames"] == 0
+
+
+async def test_since_served_from_buffer_when_it_covers_gap(async_db):
+    """
+    Test 3.1: Wiadomości po krótkim rozłączeniu (get_since) pochodzą z bufora
+    """
+    cache = HistoryCache(async_db, capacity=5)
+    await cache.get_latest("general", 5)                             # bufor: seq 3-7
+    queries = db_queries(async_db)
+
+    page = await cache.get_since("general", 4, 50)
+    limited = await cache.get_since("general", 2, 2)
+
+    assert [m["id"] for m in page["messages"]] == seeded_ids(5, 6, 7)
+    assert page["has_more"] is False
+    assert [m["id"] for m in limited["messages"]] == seeded_ids(3, 4)
+    assert limited["has_more"] is True
+    assert db_queries(async_db) == queries, "Bufor obejmuje lukę - bez zapytań do bazy"
+
+
+async def test_since_goes_to_database_for_longer_gap(async_db):
+    """
+    Test 3.2: Luka sięgająca przed najstarszą wiadomość w buforze - odczyt z bazy
+    """
+    cache = HistoryCache(async_db, capacity=5)
+    await cache.get_latest("general", 5)
+    queries = db_queries(async_db)
+
+    page = await cache.get_since("general", 1, 50)
+
+    assert [m["id"] for m in page["messages"]] == seeded_ids(2, 3, 4, 5, 6, 7)
+    assert db_queries(async_db) == queries + 1
+
+
+async def test_concurrent_misses_share_one_database_read(async_db):
+    """
+    Test 3.3: Równoczesne chybienia tego samego kanału - jedno zapytanie do bazy
+    """
+    cache = HistoryCache(async_db, capacity=5)
+
+    pages = await asyncio.gather(*(cache.get_latest("general", 5) for _ in range(20)))
+
+    assert all(page == pages[0] for page in pages)
+    assert db_queries(async_db) == 1
+    assert cache.get_stats()["shared_loads"] == 19
+
+
+async def test_has_channel_loads_channel_list_once(async_db):
+    """
+    Test 4.1: has_channel() zna kanały z bazy - lista jest pobierana raz (ponownie po unieważnieniu)
+    """
+    cache = HistoryCache(async_db)
+
+    assert await cache.has_channel("general")
+    queries = db_queries(async_db)
+    assert await cache.has_channel("random")
+    assert not await cache.has_channel("ghost")
+    assert db_queries(async_db) == queries
+
+    cache.invalidate_channels()
+    assert await cache.has_channel("general")
+    assert db_queries(async_db) == queries + 1
+
+
+async def submit_unsaved(writer: MessageWriter, cache: HistoryCache, *texts: str) -> list:
+    """Wysyła wiadomości jak handle_send_message (kolejka zapisu + bufor); zwraca ich ID."""
+    ids = []
+    for text in texts:
+        message_key, created_at, seq = await writer.submit("general", 1, text)
+        message = Message(id=message_key, channel_id="general", user_id=1, username="Jan",
+                          text=text, timestamp=created_at, seq=seq).to_dict()
+        cache.append("general", message)
+        ids.append(message["id"])
+    return ids
+
+
+async def test_gap_pages_include_messages_waiting_for_flush(async_db):
+    """
+    Test 5.1: after_seq / after / before z wiadomościami jeszcze niezapisanymi w bazie (długi flush_interval)
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=60_000)
+    cache = HistoryCache(async_db, capacity=50, has_unsaved=writer.has_unsaved)
+    await cache.get_latest("general", 50)
+    unsaved = await submit_unsaved(writer, cache, "Osiem", "Dziewięć")
+    assert writer.pending_count == 2
+
+    gap = json.loads(await cache.get_page_frame("general", 50, after=7))["payload"]
+    assert [m["id"] for m in gap["messages"]] == unsaved
+    assert [m["seq"] for m in gap["messages"]] == [8, 9]
+    assert gap["has_more"] is False
+
+    # Kursor-ID wiadomości, której nie ma jeszcze w bazie
+    after_id = json.loads(await cache.get_page_frame("general", 50, after=unsaved[0]))["payload"]
+    assert [m["id"] for m in after_id["messages"]] == unsaved[1:]
+    before_id = json.loads(await cache.get_page_frame("general", 3, before=unsaved[1]))["payload"]
+    assert [m["id"] for m in before_id["messages"]] == seeded_ids(6, 7) + unsaved[:1]
+    assert before_id["has_more"] is True
+    assert cache.get_stats()["page_frames"] == 0, "Strona z niezapisaną wiadomością nie jest zapamiętywana"
+
+    await writer.close()
+
+
+async def test_gap_longer_than_buffer_merges_database_and_unsaved(async_db):
+    """
+    Test 5.2: Luka sięgająca przed bufor - zapisane wiadomości z bazy, niezapisane z bufora
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=60_000)
+    cache = HistoryCache(async_db, capacity=3, has_unsaved=writer.has_unsaved)
+    await cache.get_latest("general", 3)
+    unsaved = await submit_unsaved(writer, cache, "Osiem", "Dziewięć")
+
+    page = await cache.get_since("general", 2, 50)
+    assert [m["id"] for m in page["messages"]] == seeded_ids(3, 4, 5, 6, 7) + unsaved
+    assert page["has_more"] is False
+
+    limited = await cache.get_since("general", 2, 6)
+    assert [m["id"] for m in limited["messages"]] == seeded_ids(3, 4, 5, 6, 7) + unsaved[:1]
+    assert limited["has_more"] is True
+
+    await writer.close()
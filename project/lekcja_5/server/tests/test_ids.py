@@ -0,0 +1,113 @@
+"""
+Testy jednostkowe dla modułu ids.py
+
+Ten plik testuje:
+- Unikalność i monotoniczność ID (także przy wielu wątkach)
+- Stałą długość i sortowanie tekstowe ID
+- Odporność na cofnięcie się zegara
+- Odczyt czasu utworzenia z ID
+"""
+
+import os
+import sys
+import threading
+import time
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ids
+from ids import MessageIdGenerator, format_message_id, message_id_timestamp_ms
+
+
+# ====== TESTY ======
+
+def test_ids_are_unique_and_increasing():
+    """
+    Test 1.1: Kolejne ID rosną - także gdy powstają w tej samej milisekundzie
+    """
+    generator = MessageIdGenerator()
+
+    values = [generator.next_int() for _ in range(10_000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_text_ids_sort_like_numbers():
+    """
+    Test 1.2: ID tekstowe mają stałą długość, więc sortują się jak liczby
+    """
+    generator = MessageIdGenerator(node_id=3)
+
+    message_ids = [generator.next_id() for _ in range(100)]
+
+    assert all(len(message_id) == len("msg_") + 16 for message_id in message_ids)
+    assert message_ids == sorted(message_ids)
+    assert format_message_id(1) < format_message_id(16)
+
+
+def test_ids_are_unique_across_threads():
+    """
+    Test 1.3: Generator współdzielony przez wątki nie zwraca powtórzeń
+    """
+    generator = MessageIdGenerator()
+    results = []
+
+    def worker():
+        results.extend(generator.next_int() for _ in range(2_000))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 8_000
+
+
+def test_clock_going_back_does_not_decrease_ids(monkeypatch):
+    """
+    Test 1.4: Cofnięcie zegara systemowego nie powoduje malejących ID
+    """
+    generator = MessageIdGenerator()
+    first = generator.next_int()
+
+    one_minute_ago = time.time() - 60
+    monkeypatch.setattr(ids.time, "time", lambda: one_minute_ago)
+    second = generator.next_int()
+
+    assert second > first
+
+
+def test_different_nodes_never_collide():
+    """
+    Test 1.5: Dwa procesy z różnym node_id nie mogą wygenerować tego samego ID
+    """
+    node_a = MessageIdGenerator(node_id=1)
+    node_b = MessageIdGenerator(node_id=2)
+
+    a = {node_a.next_int() for _ in range(1_000)}
+    b = {node_b.next_int() for _ in range(1_000)}
+
+    assert not a & b
+
+
+def test_invalid_node_id_is_rejected():
+    """
+    Test 1.6: node_id spoza zakresu 10 bitów jest odrzucany
+    """
+    with pytest.raises(ValueError):
+        MessageIdGenerator(node_id=1024)
+
+
+def test_timestamp_can_be_read_from_id():
+    """
+    Test 1.7: Z ID można odczytać czas utworzenia wiadomości
+    """
+    generator = MessageIdGenerator()
+    now_ms = int(time.time() * 1000)
+
+    created_ms = message_id_timestamp_ms(generator.next_id())
+
+    assert abs(created_ms - now_ms) < 1000
@@ -0,0 +1,281 @@
+"""
+Testy jednostkowe dla modułu message_writer.py
+
+Ten plik testuje:
+- Natychmiastowe nadawanie ID, timestampu i numeru w kanale (przed zapisem)
+- Grupowy zapis paczek (jedna transakcja na wiele wiadomości)
+- Zapis po osiągnięciu max_batch i po interwale
+- Tryb ack_after_commit
+- Powiadomienie o niezapisanej wiadomości (on_failure)
+- Uzgadnianie seq z bazą po nieudanym zapisie
+- Zapis reszty kolejki przy zamykaniu (close)
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import asyncio
+import time
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import create_tables, seed_sample_data
+from db_executor import AsyncDatabase
+from message_writer import MessageWriter
+
+
+# ====== FIXTURES ======
+
+@pytest.fixture
+def async_db():
+    """
+    Tworzy AsyncDatabase na tymczasowej bazie z przykładowymi danymi.
+    """
+    test_dir = tempfile.mkdtemp()
+    db_path = os.path.join(test_dir, 'chat.db')
+
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    create_tables(conn)
+    seed_sample_data(conn)
+
+    db = AsyncDatabase(conn)
+
+    yield db
+
+    # Cleanup
+    db.close()
+    conn.close()
+    try:
+        os.remove(db_path)
+        os.rmdir(test_dir)
+    except:
+        pass
+
+
+def count_messages(db) -> int:
+    """Liczy wiadomości zapisane w bazie."""
+    return db.conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+
+# ====== TESTY ======
+
+async def test_submit_returns_id_before_commit(async_db):
+    """
+    Test 1.1: submit() zwraca ID, timestamp i seq zanim wiadomość trafi do bazy
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=10_000)
+    before = count_messages(async_db)
+
+    message_key, created_at, seq = await writer.submit("general", "user_1", "Hej!")
+
+    assert isinstance(message_key, int)
+    assert abs(created_at - time.time() * 1000) < 5000, "Czas w milisekundach od 1970 r."
+    assert seq == 8, "Przykładowe dane mają w kanale general seq 1-7"
+    assert writer.pending_count == 1
+    assert count_messages(async_db) == before, "Wiadomość nie powinna być jeszcze zapisana"
+
+    await writer.close()
+
+
+async def test_flush_writes_batch_in_one_transaction(async_db):
+    """
+    Test 1.2: flush() zapisuje wszystkie oczekujące wiadomości jedną paczką
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=10_000)
+    before = count_messages(async_db)
+
+    for i in range(5):
+        await writer.submit("general", "user_1", f"Wiadomość {i}")
+
+    written = await writer.flush()
+
+    assert written == 5
+    assert count_messages(async_db) == before + 5
+    assert writer.get_stats()["batches"] == 1
+
+
+async def test_full_batch_triggers_flush(async_db):
+    """
+    Test 1.3: Osiągnięcie max_batch zapisuje paczkę bez czekania na interwał
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=10_000, max_batch=3)
+    await writer.start()
+    before = count_messages(async_db)
+
+    for i in range(3):
+        await writer.submit("general", "user_1", f"Wiadomość {i}")
+    await asyncio.sleep(0.1)
+
+    assert count_messages(async_db) == before + 3
+
+    await writer.close()
+
+
+async def test_interval_triggers_flush(async_db):
+    """
+    Test 1.4: Wiadomości są zapisywane po upływie flush_interval_ms
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=20)
+    await writer.start()
+    before = count_messages(async_db)
+
+    await writer.submit("general", "user_1", "Po interwale")
+    await asyncio.sleep(0.2)
+
+    assert count_messages(async_db) == before + 1
+
+    await writer.close()
+
+
+async def test_ack_after_commit_waits_for_commit(async_db):
+    """
+    Test 1.5: W trybie ack_after_commit submit() wraca dopiero po zapisie
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=20, ack_after_commit=True)
+    await writer.start()
+
+    message_key, _, _ = await writer.submit("general", "user_1", "Trwała wiadomość")
+
+    row = async_db.conn.execute("SELECT text FROM messages WHERE id = ?", (message_key,)).fetchone()
+    assert row is not None, "Wiadomość powinna być już w bazie"
+
+    await writer.close()
+
+
+async def test_ack_after_commit_reports_rejected_message(async_db):
+    """
+    Test 1.6: Odrzucony wiersz nie blokuje paczki, a czekający dostaje wyjątek
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=10_000)
+    before = count_messages(async_db)
+
+    await writer.submit("general", "user_1", "Poprawna")
+    rejected = asyncio.ensure_future(
+        writer.submit("nonexistent_channel", "user_1", "Błędna", ack_after_commit=True)
+    )
+    while writer.pending_count < 2:
+        await asyncio.sleep(0.01)
+    await writer.flush()
+
+    with pytest.raises(sqlite3.IntegrityError):
+        await rejected
+    assert count_messages(async_db) == before + 1
+    assert writer.get_stats()["failed"] == 1
+
+
+async def test_rejected_message_is_reported_to_callback(async_db):
+    """
+    Test 1.9: Bez ack_after_commit o odrzuconym wierszu informuje on_failure (klucz i wyjątek)
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=10_000)
+    failures = []
+
+    await writer.submit("general", "user_1", "Poprawna", on_failure=lambda key, e: failures.append(key))
+    rejected, _, _ = await writer.submit("nonexistent_channel", "user_1", "Błędna",
+                                         on_failure=lambda key, e: failures.append((key, type(e))))
+    await writer.flush()
+
+    assert failures == [(rejected, sqlite3.IntegrityError)]
+
+
+async def test_close_flushes_pending_messages(async_db):
+    """
+    Test 1.7: close() zapisuje wszystko, co zostało w kolejce
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=10_000)
+    await writer.start()
+    before = count_messages(async_db)
+
+    for i in range(4):
+        await writer.submit("general", "user_1", f"Przed zamknięciem {i}")
+    await writer.close()
+
+    assert count_messages(async_db) == before + 4
+    assert writer.pending_count == 0
+
+
+async def test_seq_is_gapless_per_channel(async_db):
+    """
+    Test 1.8: Każdy kanał ma własną numerację seq - kolejne liczby bez przerw
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=10_000)
+
+    general = [await writer.submit("general", "user_1", f"G{i}") for i in range(3)]
+    random_ = [await writer.submit("random", "user_2", f"R{i}") for i in range(2)]
+    await writer.close()
+
+    assert [seq for _, _, seq in general] == [8, 9, 10]
+    assert [seq for _, _, seq in random_] == [1, 2]
+    stored = async_db.conn.execute(
+        "SELECT seq FROM messages WHERE channel_id = 1 ORDER BY seq"
+    ).fetchall()
+    assert [row[0] for row in stored] == list(range(1, 11))
+
+
+def fail_rows_with_text(db, text: str):
+    """Zapis wierszy z podaną treścią kończy się błędem dysku (pozostałe są zapisywane)."""
+    write = db.write
+
+    async def failing_write(function, rows):
+        if any(row[3] == text for row in rows):
+            raise sqlite3.OperationalError("disk I/O error")
+        return await write(function, rows)
+
+    db.write = failing_write
+
+
+async def test_failed_last_seq_is_not_reused(async_db):
+    """
+    Test 1.10: Niezapisana ostatnia wiadomość kanału - jej seq (już rozgłoszony) nie jest nadawany ponownie
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=10_000)
+    fail_rows_with_text(async_db, "Błędna")
+
+    _, _, failed = await writer.submit("general", "user_1", "Błędna")
+    await writer.flush()
+    _, _, next_seq = await writer.submit("general", "user_1", "Poprawna")
+    await writer.close()
+
+    assert (failed, next_seq) == (8, 9)
+    stats = writer.get_stats()
+    assert (stats["failed"], stats["seq_gaps"]) == (1, 1)
+
+
+async def test_failed_seq_followed_by_saved_message_is_gap(async_db):
+    """
+    Test 1.11: Niezapisana wiadomość przed zapisaną - trwała luka w seq, licznik bez zmian
+    """
+    writer = MessageWriter(async_db, flush_interval_ms=10_000)
+    fail_rows_with_text(async_db, "Błędna")
+
+    await writer.submit("general", "user_1", "Błędna")
+    await writer.submit("general", "user_1", "Poprawna")
+    await writer.flush()
+    _, _, next_seq = await writer.submit("general", "user_1", "Następna")
+    await writer.close()
+
+    assert next_seq == 10
+    stats = writer.get_stats()
+    assert (stats["failed"], stats["seq_gaps"]) == (1, 1)
+
+
+async def test_unsaved_channels_and_commit_callback(async_db):
+    """
+    Test 1.12: has_unsaved() do zapisu kanału; on_commit dostaje kanały zapisanej paczki
+    """
+    commits = []
+    writer = MessageWriter(async_db, flush_interval_ms=10_000, on_commit=commits.append)
+
+    await writer.submit("general", "user_1", "G")
+    await writer.submit("random", "user_1", "R")
+    await writer.submit("nonexistent_channel", "user_1", "Błędna")
+    assert writer.has_unsaved("general") and not writer.has_unsaved("tech")
+
+    await writer.flush()
+
+    assert not any(writer.has_unsaved(channel) for channel in ("general", "random", "nonexistent_channel"))
+    assert commits == [{"general", "random"}]
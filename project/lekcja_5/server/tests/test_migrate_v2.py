@@ -0,0 +1,187 @@
+"""
+Testy jednostkowe dla modułu migrate_v2.py
+
+Ten plik testuje:
+- Przeniesienie danych z bazy v1 (tekstowe klucze i daty) do schematu v2
+- Zachowanie publicznych ID (user_N, msg_..., slug kanału) i dat w API
+- Nadanie numerów seq bazom sprzed ich wprowadzenia
+- Automatyczną migrację w init_database()
+- Indeks wyszukiwania po migracji
+- Wycofanie migracji przy błędzie (baza bez zmian)
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import get_messages_page, get_user_by_username, get_all_channels, get_last_seq, search_messages
+from migrate_v2 import V1_SCHEMA, migrate, needs_migration
+
+
+# ====== FIXTURES ======
+
+@pytest.fixture
+def v1_db():
+    """
+    Tworzy tymczasową bazę w schemacie v1 z kilkoma wiadomościami.
+    """
+    test_dir = tempfile.mkdtemp()
+    original_cwd = os.getcwd()
+    os.chdir(test_dir)
+
+    conn = sqlite3.connect('chat.db', check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(V1_SCHEMA)
+    conn.executescript("""
+        INSERT INTO users VALUES ('user_1', 'Jan', 'haslo1', '2025-01-01T10:00:00Z');
+        INSERT INTO users VALUES ('user_2', 'Anna', 'haslo2', '2025-01-01T10:00:00Z');
+        INSERT INTO channels VALUES ('general', 'Ogólny', 'public', '2025-01-01T10:00:00Z');
+        INSERT INTO channels VALUES ('random', 'Ciekawostki', 'public', '2025-01-01T10:00:01Z');
+        INSERT INTO channel_members VALUES ('user_1', 'general');
+        INSERT INTO channel_members VALUES ('user_2', 'general');
+        INSERT INTO messages VALUES ('msg_1', 'general', 'user_2', 'Cześć!', '2025-01-01T10:01:00Z', NULL, 1);
+        INSERT INTO messages VALUES ('msg_3f2a9c1b', 'general', 'user_1', 'Hej 💪', '2025-01-01T10:02:00Z',
+                                     '2025-01-01T10:03:00Z', 2);
+        INSERT INTO messages VALUES ('msg_custom', 'general', 'user_2', 'Trzecia', '2025-01-01T10:04:00Z', NULL, 3);
+        INSERT INTO messages VALUES ('msg_2', 'random', 'user_1', 'W random', '2025-01-01T10:05:00Z', NULL, 1);
+    """)
+
+    yield conn
+
+    # Cleanup
+    conn.close()
+    os.chdir(original_cwd)
+    for name in os.listdir(test_dir):
+        os.remove(os.path.join(test_dir, name))
+    os.rmdir(test_dir)
+
+
+# ====== TESTY ======
+
+def test_migration_preserves_api_view_of_data(v1_db):
+    """
+    Test 1.1: Po migracji API widzi te same ID, teksty i daty co przed nią
+    """
+    assert needs_migration(v1_db)
+
+    stats = migrate(v1_db)
+
+    assert stats == {"users": 2, "channels": 2, "messages": 4, "skipped": 0}
+    assert not needs_migration(v1_db)
+
+    user = get_user_by_username(v1_db, "Anna")
+    assert user.to_dict() == {"id": "user_2", "name": "Anna"}
+    assert [c["id"] for c in get_all_channels(v1_db)] == ["general", "random"]
+
+    messages = get_messages_page(v1_db, "general")["messages"]
+    assert [m["text"] for m in messages] == ["Cześć!", "Hej 💪", "Trzecia"]
+    assert [m["seq"] for m in messages] == [1, 2, 3]
+    assert messages[1]["user"] == {"id": "user_1", "name": "Jan"}
+    assert messages[1]["timestamp"] == "2025-01-01T10:02:00Z"
+    assert messages[1]["edited_at"] == "2025-01-01T10:03:00Z"
+
+
+def test_migration_uses_integer_columns(v1_db):
+    """
+    Test 1.2: Klucze i daty w przebudowanych tabelach są liczbami
+    """
+    migrate(v1_db)
+
+    row = v1_db.execute("""
+        SELECT typeof(id), typeof(channel_id), typeof(user_id), typeof(created_at)
+        FROM messages LIMIT 1
+    """).fetchone()
+
+    assert tuple(row) == ("integer", "integer", "integer", "integer")
+    tables = {r[0] for r in v1_db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not any(name.endswith("_v1") for name in tables), "Stare tabele powinny zostać usunięte"
+
+
+def test_old_message_ids_still_work_as_cursors(v1_db):
+    """
+    Test 1.3: Stare ID wiadomości (msg_<hex>) nadal działają jako kursor historii
+    """
+    migrate(v1_db)
+
+    page = get_messages_page(v1_db, "general", before="msg_3f2a9c1b")
+    newer = get_messages_page(v1_db, "general", after="msg_1")
+
+    assert [m["text"] for m in page["messages"]] == ["Cześć!"]
+    assert [m["text"] for m in newer["messages"]] == ["Hej 💪", "Trzecia"]
+
+
+def test_migration_backfills_seq_for_older_databases():
+    """
+    Test 1.4: Baza sprzed numerów seq dostaje je w kolejności zapisu
+    """
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE users (id TEXT PRIMARY KEY, username TEXT, password_hash TEXT, created_at TEXT);
+        CREATE TABLE channels (id TEXT PRIMARY KEY, name TEXT, type TEXT, created_at TEXT);
+        CREATE TABLE channel_members (user_id TEXT, channel_id TEXT, PRIMARY KEY (user_id, channel_id));
+        CREATE TABLE messages (id TEXT PRIMARY KEY, channel_id TEXT NOT NULL, user_id TEXT NOT NULL,
+                               text TEXT NOT NULL, created_at TEXT NOT NULL, edited_at TEXT);
+        CREATE INDEX idx_messages_channel_created ON messages (channel_id, created_at, id);
+        INSERT INTO users VALUES ('user_1', 'Jan', 'x', '2025-01-01T00:00:00Z');
+        INSERT INTO channels VALUES ('general', 'Ogólny', 'public', '2025-01-01T00:00:00Z');
+        INSERT INTO channels VALUES ('random', 'Ciekawostki', 'public', '2025-01-01T00:00:00Z');
+        INSERT INTO messages VALUES ('msg_b', 'general', 'user_1', 'B', '2025-01-01T00:00:01Z', NULL);
+        INSERT INTO messages VALUES ('msg_a', 'general', 'user_1', 'A', '2025-01-01T00:00:01Z', NULL);
+        INSERT INTO messages VALUES ('msg_0', 'general', 'user_1', '0', '2025-01-01T00:00:00Z', NULL);
+        INSERT INTO messages VALUES ('msg_r', 'random', 'user_1', 'R', '2025-01-01T00:00:05Z', NULL);
+    """)
+
+    migrate(conn, vacuum=False)
+
+    texts = [m["text"] for m in get_messages_page(conn, "general")["messages"]]
+    assert texts == ["0", "B", "A"], "Ten sam timestamp - decyduje kolejność zapisu"
+    assert get_last_seq(conn, "general") == 3
+    assert get_last_seq(conn, "random") == 1
+    conn.close()
+
+
+def test_init_database_migrates_existing_v1_file(v1_db):
+    """
+    Test 1.5: init_database() sam przebudowuje starszą bazę przy starcie serwera
+    """
+    v1_db.close()
+
+    conn = database.init_database()
+
+    assert database.get_schema_version(conn) == database.SCHEMA_VERSION
+    assert len(get_messages_page(conn, "general")["messages"]) == 3
+    conn.close()
+
+
+def test_failed_migration_leaves_database_unchanged(v1_db):
+    """
+    Test 1.6: Błąd w trakcie migracji wycofuje wszystkie zmiany
+    """
+    v1_db.execute("UPDATE messages SET created_at = 'nie-data' WHERE id = 'msg_2'")
+    v1_db.commit()
+
+    with pytest.raises(ValueError):
+        migrate(v1_db)
+
+    assert needs_migration(v1_db)
+    row = v1_db.execute("SELECT id, channel_id FROM messages WHERE id = 'msg_1'").fetchone()
+    assert tuple(row) == ("msg_1", "general")
+
+
+def test_migrated_messages_are_searchable(v1_db):
+    """
+    Test 1.7: Migracja tworzy indeks wyszukiwania dla przepisanych wiadomości
+    """
+    migrate(v1_db, vacuum=False)
+
+    results = search_messages(v1_db, "hej")["messages"]
+
+    assert [m["text"] for m in results] == ["Hej 💪"]
+    assert results[0]["id"] == "msg_000000003f2a9c1b"
+
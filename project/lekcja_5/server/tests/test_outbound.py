@@ -0,0 +1,169 @@
+"""
+Testy jednostkowe dla modułu outbound.py
+
+Ten plik testuje:
+- Wysyłanie ramek w kolejności dodania przez zadanie kolejki
+- Polityki przepełnienia: drop_oldest, disconnect, coalesce
+- Zatrzymanie kolejki po błędzie wysyłania
+- Metryki: rozmiar zaległych ramek i czas wysyłania
+"""
+
+import os
+import sys
+import asyncio
+import time
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from outbound import OutboundQueue, close_websocket
+
+
+class FakeWebSocket:
+    """WebSocket, który wysyła ramki dopiero po otwarciu zaworu (gate)."""
+
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def send_text(self, text: str):
+        await self.gate.wait()
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+async def fill_stalled(queue: OutboundQueue, websocket: FakeWebSocket, frames):
+    """Wstrzymuje wysyłanie i dodaje ramki; pierwsza ramka utyka w send_text()."""
+    websocket.gate.clear()
+    for frame in frames:
+        if isinstance(frame, tuple):
+            queue.put(*frame)
+        else:
+            queue.put(frame)
+        await asyncio.sleep(0)
+
+
+async def test_frames_are_sent_in_order():
+    """
+    Test 1.1: Ramki są wysyłane w kolejności dodania
+    """
+    websocket = FakeWebSocket()
+    queue = OutboundQueue(websocket, max_size=10)
+
+    for number in range(5):
+        assert queue.put(str(number))
+    await queue.wait_idle()
+
+    assert websocket.sent == ["0", "1", "2", "3", "4"]
+    assert queue.get_stats()["sent"] == 5
+
+
+async def test_drop_oldest_keeps_newest_frames():
+    """
+    Test 1.2: Polityka drop_oldest usuwa najstarsze czekające ramki
+    """
+    websocket = FakeWebSocket()
+    queue = OutboundQueue(websocket, max_size=2, overflow_policy="drop_oldest")
+
+    await fill_stalled(queue, websocket, ["w drodze", "a", "b", "c"])
+    assert queue.depth == 2
+    websocket.gate.set()
+    await queue.wait_idle()
+
+    assert websocket.sent == ["w drodze", "b", "c"]
+    assert queue.dropped == 1
+
+
+async def test_disconnect_policy_closes_queue():
+    """
+    Test 1.3: Polityka disconnect zamyka kolejkę i oznacza ją jako przepełnioną
+    """
+    websocket = FakeWebSocket()
+    queue = OutboundQueue(websocket, max_size=2, overflow_policy="disconnect")
+
+    await fill_stalled(queue, websocket, ["w drodze", "a", "b", "c"])
+
+    assert queue.closed and queue.overflowed
+    assert queue.put("d") is False
+    assert queue.depth == 0
+
+
+async def test_coalesce_replaces_pending_frame_with_same_key():
+    """
+    Test 1.4: Polityka coalesce zastępuje czekającą ramkę o tym samym kluczu
+    """
+    websocket = FakeWebSocket()
+    queue = OutboundQueue(websocket, max_size=3, overflow_policy="coalesce")
+
+    await fill_stalled(queue, websocket, [
+        "w drodze", ("lista v1", "user_list_update"), "wiadomość", ("lista v2", "user_list_update")
+    ])
+    assert queue.depth == 2
+    websocket.gate.set()
+    await queue.wait_idle()
+
+    assert websocket.sent == ["w drodze", "lista v2", "wiadomość"]
+    assert queue.coalesced == 1
+
+
+async def test_send_error_stops_queue():
+    """
+    Test 1.5: Błąd wysyłania (zerwane połączenie) zamyka kolejkę
+    """
+    websocket = FakeWebSocket()
+
+    async def broken(text):
+        raise ConnectionError("zerwane")
+
+    websocket.send_text = broken
+    queue = OutboundQueue(websocket)
+    queue.put("a")
+    await queue.wait_idle()
+
+    assert queue.closed
+    assert queue.put("b") is False
+
+
+def test_unknown_policy_is_rejected():
+    """
+    Test 1.6: Nieznana polityka przepełnienia to błąd konfiguracji
+    """
+    with pytest.raises(ValueError):
+        OutboundQueue(FakeWebSocket(), overflow_policy="block")
+
+
+async def test_backlog_bytes_and_latency_of_stalled_client():
+    """
+    Test 1.7: Kolejka liczy rozmiar czekających ramek i czas trwającego wysyłania
+    """
+    websocket = FakeWebSocket()
+    queue = OutboundQueue(websocket, max_size=10, overflow_policy="coalesce")
+
+    await fill_stalled(queue, websocket, ["w drodze", "abc", ("12345", "lista"), ("123", "lista")])
+
+    assert queue.backlog_bytes == len("abc") + len("123")
+    assert queue.current_latency_ms(time.monotonic() + 5) >= 5000
+
+    websocket.gate.set()
+    await queue.wait_idle()
+    assert queue.backlog_bytes == 0
+    assert queue.current_latency_ms() < 5000
+
+
+async def test_close_websocket_gives_up_after_timeout():
+    """
+    Test 1.8: close_websocket() nie czeka w nieskończoność na klienta, który nie odbiera
+    """
+    websocket = FakeWebSocket()
+
+    async def hanging_close(code=1000):
+        await asyncio.Event().wait()
+
+    websocket.close = hanging_close
+
+    await asyncio.wait_for(close_websocket(websocket, 4001, timeout=0.05), 1)
+
@@ -0,0 +1,195 @@
+"""
+Testy jednostkowe dla modułu presence.py
+
+Ten plik testuje:
+- Jedną wspólną zmianę user_list_update na okno (added / removed, wersja)
+- Znoszenie się logowania i wylogowania w jednym oknie
+- Pełną listę w wersji (snapshot) i połączone zmiany od wersji klienta
+- Okres karencji przy ponownym połączeniu
+"""
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from presence import PresenceAggregator
+from websocket_handler import ConnectionManager
+
+
+class FakeWebSocket:
+    """Zastępuje WebSocket - zapamiętuje wysłane ramki."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+
+def login(manager, presence, number):
+    """Łączy użytkownika i zgłasza jego dołączenie; zwraca połączenie."""
+    websocket = FakeWebSocket()
+    manager.connect(websocket, f"user_{number}", f"Uzytkownik{number}", "general")
+    presence.user_joined({"id": f"user_{number}", "name": f"Uzytkownik{number}"})
+    return websocket
+
+
+async def test_login_storm_sends_one_update_per_window():
+    """
+    Test 1.1: 50 logowań w jednym oknie - każdy klient dostaje jedną zmianę, bez pełnej listy
+    """
+    manager = ConnectionManager()
+    presence = PresenceAggregator(manager, window_ms=250)
+    sockets = [login(manager, presence, number) for number in range(1, 51)]
+
+    assert await presence.flush() is True
+    await manager.flush()
+
+    for websocket in sockets:
+        assert [m["type"] for m in websocket.sent] == ["user_list_update"]
+    payload = sockets[0].sent[0]["payload"]
+    assert (payload["from_version"], payload["version"]) == (0, 1)
+    assert len(payload["added"]) == 50
+    assert payload["removed"] == []
+    assert "online_users" not in payload
+
+    assert await presence.flush() is False, "Bez zmian nic nie jest wysyłane"
+
+
+async def test_join_and_leave_in_same_window_cancel_out():
+    """
+    Test 1.2: Logowanie i wylogowanie w jednym oknie nie trafia do klientów ani nie zmienia wersji
+    """
+    manager = ConnectionManager()
+    presence = PresenceAggregator(manager)
+    observer = login(manager, presence, 1)
+    await presence.flush()
+    await manager.flush()
+    observer.sent.clear()
+
+    flapping = {"id": "user_2", "name": "Uzytkownik2"}
+    presence.user_joined(flapping)
+    presence.user_left(flapping)
+    # Wylogowanie i ponowne logowanie - dla pozostałych nic się nie zmieniło
+    presence.user_left({"id": "user_1", "name": "Uzytkownik1"})
+    presence.user_joined({"id": "user_1", "name": "Uzytkownik1"})
+
+    assert await presence.flush() is False
+    assert observer.sent == []
+    assert presence.version == 1
+    assert presence.get_stats()["changes_cancelled"] == 2
+
+
+async def test_snapshot_is_cached_per_version():
+    """
+    Test 1.3: snapshot() to lista opublikowana w bieżącej wersji, budowana raz na wersję
+    """
+    manager = ConnectionManager()
+    presence = PresenceAggregator(manager)
+    login(manager, presence, 1)
+    await presence.flush()
+
+    first = presence.snapshot()
+    assert first == [{"id": "user_1", "name": "Uzytkownik1"}]
+    assert presence.snapshot() is first, "Między zmianami lista nie jest budowana ponownie"
+
+    login(manager, presence, 2)
+    assert presence.snapshot() is first, "Zmiana jeszcze nieopublikowana"
+    await presence.flush()
+    assert [user["id"] for user in presence.snapshot()] == ["user_1", "user_2"]
+
+
+async def test_changes_since_merges_recent_versions():
+    """
+    Test 1.4: Klient z niedawną wersją dostaje połączoną zmianę, bez pełnej listy
+    """
+    manager = ConnectionManager()
+    presence = PresenceAggregator(manager)
+    for number in (1, 2):
+        login(manager, presence, number)
+    await presence.flush()                                           # wersja 1: +1, +2
+
+    login(manager, presence, 3)
+    await presence.flush()                                           # wersja 2: +3
+    presence.user_left({"id": "user_3", "name": "Uzytkownik3"})
+    presence.user_left({"id": "user_1", "name": "Uzytkownik1"})
+    await presence.flush()                                           # wersja 3: -3, -1
+
+    payload = presence.changes_since(1)["payload"]
+    assert (payload["from_version"], payload["version"]) == (1, 3)
+    assert payload["added"] == [], "Dołączenie i wyjście user_3 się znoszą"
+    assert payload["removed"] == [{"id": "user_1", "name": "Uzytkownik1"}]
+
+    payload = presence.changes_since(3)["payload"]
+    assert (payload["added"], payload["removed"]) == ([], [])
+
+
+async def test_changes_since_falls_back_to_snapshot_after_gap():
+    """
+    Test 1.5: Wersja spoza historii (lub brak wersji) - pełna lista
+    """
+    manager = ConnectionManager()
+    presence = PresenceAggregator(manager, history_size=2)
+    for number in range(1, 5):
+        login(manager, presence, number)
+        await presence.flush()
+
+    assert "from_version" in presence.changes_since(2)["payload"], "Wersje 3 i 4 są w historii"
+    for version in (None, 1, 99):
+        payload = presence.changes_since(version)["payload"]
+        assert payload["version"] == 4
+        assert len(payload["online_users"]) == 4
+    assert presence.get_stats()["snapshots_sent"] == 3
+
+
+async def test_reconnect_within_grace_is_silent():
+    """
+    Test 1.6: Powrót w okresie karencji - pozostali nie dostają żadnej zmiany
+    """
+    manager = ConnectionManager()
+    presence = PresenceAggregator(manager, reconnect_grace_ms=5000)
+    observer = login(manager, presence, 1)
+    login(manager, presence, 2)
+    await presence.flush(now=100.0)
+    await manager.flush()
+    observer.sent.clear()
+
+    flaky = {"id": "user_2", "name": "Uzytkownik2"}
+    for second in (101.0, 103.0, 106.0):
+        presence.user_left(flaky, now=second)
+        assert await presence.flush(now=second + 1) is False
+        presence.user_joined(flaky)
+        assert await presence.flush(now=second + 2) is False
+
+    await manager.flush()
+    assert observer.sent == []
+    assert presence.version == 1
+    assert presence.get_stats()["reconnects_resumed"] == 3
+
+
+async def test_leave_announced_after_grace():
+    """
+    Test 1.7: Wyjście bez powrotu jest ogłaszane po upływie okresu karencji
+    """
+    manager = ConnectionManager()
+    presence = PresenceAggregator(manager, reconnect_grace_ms=5000)
+    observer = login(manager, presence, 1)
+    login(manager, presence, 2)
+    await presence.flush(now=100.0)
+    await manager.flush()
+    observer.sent.clear()
+
+    presence.user_left({"id": "user_2", "name": "Uzytkownik2"}, now=101.0)
+    # Użytkownik, który nie został jeszcze ogłoszony, wychodzi bez karencji
+    presence.user_joined({"id": "user_3", "name": "Uzytkownik3"})
+    presence.user_left({"id": "user_3", "name": "Uzytkownik3"}, now=101.0)
+
+    assert await presence.flush(now=105.9) is False
+    assert presence.get_stats()["leaving"] == 1
+    assert await presence.flush(now=106.0) is True
+    await manager.flush()
+
+    assert [m["payload"]["removed"] for m in observer.sent] == [[{"id": "user_2", "name": "Uzytkownik2"}]]
+    assert presence.snapshot() == [{"id": "user_1", "name": "Uzytkownik1"}]
@@ -0,0 +1,113 @@
+"""
+Testy jednostkowe dla limitów zdarzeń (ratelimit.py)
+
+Ten plik testuje:
+- Token bucket: pojemność (burst), uzupełnianie w czasie, czas do ponownej próby
+- Osobne budżety dla typów zdarzeń i użytkowników, zdarzenia bez limitu
+- Usuwanie stanu bezczynnych użytkowników (expire) bez odnawiania budżetu
+- Ramkę error_message z retry_after_ms
+"""
+
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ratelimit import RateLimiter
+from websocket_handler import ConnectionManager, send_rate_limited
+
+
+class FakeWebSocket:
+    """Zastępuje WebSocket - zapamiętuje wysłane ramki."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+
+# ====== TESTY ======
+
+def test_bucket_allows_burst_then_refills():
+    """
+    Test 1.1: Pierwsze `burst` zdarzeń przechodzi, kolejne czekają na uzupełnienie wiadra
+    """
+    limiter = RateLimiter({"send_message": (5, 3)})
+
+    assert [limiter.acquire("ws", "send_message", now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("ws", "send_message", now=100.0) == pytest.approx(0.2), "1 żeton / (5 na s)"
+    assert limiter.acquire("ws", "send_message", now=100.1) == pytest.approx(0.1)
+
+    assert limiter.acquire("ws", "send_message", now=100.2) == 0.0, "Po 0.2 s jest nowy żeton"
+    assert limiter.acquire("ws", "send_message", now=100.2) > 0
+
+    assert limiter.acquire("ws", "send_message", now=1000.0) == 0.0
+    assert [limiter.acquire("ws", "send_message", now=1000.0) for _ in range(3)][-1] > 0, \
+        "Długa przerwa uzupełnia najwyżej do `burst`"
+    assert limiter.get_stats()["limited"]["send_message"] == 4
+
+
+def test_budgets_are_separate_per_event_and_user():
+    """
+    Test 1.2: Wyczerpany limit jednego zdarzenia nie blokuje innych zdarzeń ani użytkowników
+    """
+    limiter = RateLimiter({"send_message": (1, 1), "request_history": (1, 1), "request_channels": (0, 5)})
+
+    assert limiter.acquire("a", "send_message", now=0.0) == 0.0
+    assert limiter.acquire("a", "send_message", now=0.0) > 0
+    assert limiter.acquire("a", "request_history", now=0.0) == 0.0
+    assert limiter.acquire("b", "send_message", now=0.0) == 0.0
+
+    for _ in range(100):
+        assert limiter.acquire("a", "request_channels", now=0.0) == 0.0, "rate 0 - bez limitu"
+        assert limiter.acquire("a", "search_users", now=0.0) == 0.0, "Brak w konfiguracji - bez limitu"
+    assert "request_channels" not in limiter.get_stats()["limits"]
+
+
+def test_expire_keeps_budget_until_buckets_refill():
+    """
+    Test 1.3: expire() usuwa tylko użytkowników z pełnymi wiadrami - ponowne połączenie nie odnawia budżetu
+    """
+    limiter = RateLimiter({"send_message": (1, 2), "invalid": (0.5, 2)}, expire_interval=10.0)
+    limiter.acquire("user_1", "send_message", now=0.0)
+    limiter.acquire("user_1", "send_message", now=0.0)
+    limiter.acquire("user_2", "send_message", now=0.0)
+    limiter.acquire("user_2", "invalid", now=0.0)
+    limiter.acquire("user_2", "invalid", now=0.0)
+
+    # Rozłączenie i ponowne połączenie nie zmieniają stanu - budżet nadal wyczerpany
+    assert limiter.acquire("user_1", "send_message", now=0.5) > 0
+    assert limiter.expire(now=0.5) == 0
+    assert limiter.get_stats()["users"] == 2
+
+    # user_1 ma pełne wiadro po 2 s, user_2 czeka jeszcze na "invalid" (2 żetony / 0.5 na s)
+    assert limiter.expire(now=2.0) == 1
+    assert limiter.get_stats()["users"] == 1
+    assert limiter.acquire("user_2", "invalid", now=2.0) == 0.0
+    assert limiter.acquire("user_2", "invalid", now=2.0) > 0, "Budżet user_2 nie został odnowiony"
+
+    # acquire() sam wywołuje expire() co expire_interval sekund
+    assert limiter.acquire("user_3", "send_message", now=20.0) == 0.0
+    stats = limiter.get_stats()
+    assert stats["users"] == 1, "Bezczynny user_2 usunięty, został tylko user_3"
+    assert stats["expired"] == 2
+
+
+async def test_rate_limited_error_frame():
+    """
+    Test 1.4: error_message z kodem rate_limited, typem zdarzenia i retry_after_ms (w górę) - przez kolejkę klienta
+    """
+    manager = ConnectionManager()
+    websocket = FakeWebSocket()
+    manager.connect(websocket, "user_1", "Jan")
+    await send_rate_limited(websocket, "send_message", 0.1801, manager)
+    await manager.flush()
+
+    assert websocket.sent == [{"type": "error_message", "payload": {
+        "message": "Rate limit exceeded", "code": "rate_limited", "event": "send_message", "retry_after_ms": 181
+    }}]
+    assert manager.get_connection_stats()[0]["sent"] == 1, "Ramka przez kolejkę wychodzącą klienta"
+    manager.disconnect(websocket)
@@ -0,0 +1,51 @@
+"""
+Testy jednostkowe dla modułu resume.py
+
+Ten plik testuje:
+- Wystawianie i sprawdzanie tokenów wznowienia sesji
+- Odrzucanie tokenów zmienionych, z innym kluczem i wygasłych
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resume import ResumeTokens
+
+
+def test_issued_token_verifies():
+    """
+    Test 1.1: Token z issue() zwraca użytkownika (także z polskimi znakami w nazwie)
+    """
+    tokens = ResumeTokens("klucz", ttl_s=60)
+    token = tokens.issue("user_1", "Łucja", now=1000)
+
+    assert tokens.verify(token, now=1059) == {"id": "user_1", "name": "Łucja"}
+
+
+def test_tampered_or_foreign_token_is_rejected():
+    """
+    Test 1.2: Zmieniona treść, obcy klucz lub śmieci - ValueError
+    """
+    tokens = ResumeTokens("klucz")
+    token = tokens.issue("user_1", "Jan")
+    body, signature = token.split(".")
+    forged = ResumeTokens("klucz").issue("user_2", "Anna").split(".")[0]
+
+    for bad in (f"{forged}.{signature}", ResumeTokens("inny").issue("user_1", "Jan"),
+                body, "", "ąę.ść", f"{body}.{signature}x"):
+        with pytest.raises(ValueError, match="Invalid resume token"):
+            tokens.verify(bad)
+
+
+def test_expired_token_is_rejected():
+    """
+    Test 1.3: Token po czasie ważności - ValueError
+    """
+    tokens = ResumeTokens("klucz", ttl_s=60)
+    token = tokens.issue("user_1", "Jan", now=1000)
+
+    with pytest.raises(ValueError, match="expired"):
+        tokens.verify(token, now=1060)
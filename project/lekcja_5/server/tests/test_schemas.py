@@ -0,0 +1,147 @@
+"""
+Testy jednostkowe dla walidacji zdarzeń od klienta (schemas.py)
+
+Ten plik testuje:
+- Poprawne zdarzenia - typowane pola i wartości domyślne
+- Komunikaty błędów takie same jak wcześniej w handlerach
+- Nieznany typ, zdarzenie spoza fazy połączenia, ramka niebędąca obiektem
+- Odrzucanie za dużych i niepoprawnych ramek przed parsowaniem
+- Ramki MessagePack i łagodne pola resume_request
+"""
+
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec
+import config
+import schemas
+from schemas import AUTH_EVENTS, SESSION_EVENTS, InvalidEvent, parse_event
+
+
+def frame(event_type, payload=None):
+    """Ramka JSON zdarzenia (bez payloadu, gdy payload=None)."""
+    event = {"type": event_type}
+    if payload is not None:
+        event["payload"] = payload
+    return json.dumps(event, ensure_ascii=False)
+
+
+def error_of(data, events=SESSION_EVENTS):
+    """Komunikat błędu dla ramki (zdarzenie musi być odrzucone)."""
+    event = parse_event(data, events)
+    assert isinstance(event, InvalidEvent), f"Oczekiwano odrzucenia: {data}"
+    return event.message
+
+
+# ====== TESTY ======
+
+def test_valid_events_are_typed_with_defaults():
+    """
+    Test 1.1: Poprawne zdarzenia - pola po walidacji, brakujące z wartościami domyślnymi
+    """
+    event = parse_event(frame("send_message", {"channel_id": " general ", "text": "Cześć 👋", "extra": 1}),
+                        SESSION_EVENTS)
+    assert isinstance(event, schemas.SendMessage)
+    assert event.payload.channel_id == "general", "Kanał bez białych znaków"
+    assert event.payload.text == "Cześć 👋", "Treść bez zmian"
+
+    history = parse_event(frame("request_history", {"channel_id": "general", "before": ""}), SESSION_EVENTS)
+    assert history.payload.limit == config.HISTORY_PAGE_SIZE
+    assert history.payload.before is None, "Pusty kursor oznacza brak kursora"
+
+    search = parse_event(frame("search_messages", {"query": "kawa"}), SESSION_EVENTS).payload
+    assert (search.channel_id, search.limit, search.offset) == (None, config.SEARCH_PAGE_SIZE, 0)
+
+    assert parse_event(frame("request_channels"), SESSION_EVENTS).type == "request_channels"
+    assert parse_event(frame("request_user_list"), SESSION_EVENTS).payload.version is None
+
+    auth = parse_event(frame("auth_request", {"username": " Jan ", "password": "x", "bootstrap": {}}),
+                       AUTH_EVENTS)
+    assert (auth.payload.username, auth.payload.bootstrap) == ("Jan", {})
+
+
+def test_field_errors_match_handler_messages():
+    """
+    Test 1.2: Błędne pola - te same komunikaty, które wcześniej wysyłały handlery
+    """
+    assert error_of(frame("send_message", {"text": "Hej"})) == "Channel ID is required"
+    assert error_of(frame("send_message", {"channel_id": "general", "text": "   "})) == "Message cannot be empty"
+    assert error_of(frame("send_message", {"channel_id": "general", "text": "x" * 301})) == \
+        "Message too long (max 300 characters)"
+    assert error_of(frame("request_history", {"channel_id": "general", "before": "msg_1", "after_seq": 3})) == \
+        "Use only one of 'before', 'after', 'before_seq', 'after_seq'"
+    assert error_of(frame("request_history", {"channel_id": "general", "before_seq": -1})) == \
+        "Sequence cursor must be a non-negative integer"
+    assert error_of(frame("request_history", {"channel_id": "general", "limit": True})) == \
+        f"Limit must be between 1 and {config.HISTORY_MAX_PAGE_SIZE}"
+    assert error_of(frame("search_messages", {"query": "a", "limit": "5"})) == \
+        f"Limit must be between 1 and {config.SEARCH_MAX_PAGE_SIZE}", "Bez konwersji tekstu na liczbę"
+    assert error_of(frame("search_messages", {"query": "a", "channel_id": 5})) == "Channel ID must be a string"
+    assert error_of(frame("search_users", {"query": "  "})) == "Search query is required"
+    assert error_of(frame("request_user_list", {"version": -1})) == "Invalid version"
+
+    assert error_of(frame("auth_request", {"username": "Jo", "password": "x"}), AUTH_EVENTS) == \
+        "Username must be between 3 and 20 characters"
+    assert error_of(frame("auth_request", {"username": "Jan"}), AUTH_EVENTS) == "Password is required"
+    assert error_of(frame("auth_request", {"username": "Jan", "password": "x", "bootstrap": []}), AUTH_EVENTS) == \
+        "Bootstrap options must be an object"
+
+
+def test_unknown_type_and_non_object_frames():
+    """
+    Test 1.3: Nieznany typ, zdarzenie z innej fazy połączenia i ramki niebędące obiektem
+    """
+    assert error_of(frame("launch_rocket")) == "Unknown message type: launch_rocket"
+    assert error_of('{"payload": {}}') == "Unknown message type: None"
+
+    event = parse_event(frame("auth_request", {"username": "Jan", "password": "x"}), SESSION_EVENTS)
+    assert isinstance(event, InvalidEvent) and event.type == "auth_request", "Logowanie tylko przed sesją"
+    assert parse_event(frame("send_message", {}), AUTH_EVENTS).type == "send_message"
+
+    for data in ("[1, 2]", '"send_message"', "null"):
+        assert error_of(data) == "Message must be an object"
+    assert error_of(frame("send_message", [])) == "Payload must be an object"
+
+
+def test_oversized_and_malformed_frames_raise():
+    """
+    Test 1.4: Za duża ramka - FrameTooLarge przed parsowaniem; niepoprawny JSON - DecodeError
+    """
+    oversized = frame("send_message", {"channel_id": "general", "text": "x" * config.MAX_FRAME_BYTES})
+    with pytest.raises(schemas.FrameTooLarge):
+        parse_event(oversized, SESSION_EVENTS)
+    with pytest.raises(schemas.FrameTooLarge):
+        parse_event("{" * (config.MAX_FRAME_BYTES + 1), SESSION_EVENTS)
+    assert issubclass(schemas.FrameTooLarge, codec.DecodeError)
+
+    for data in ("{", "", '{"type": "send_message",}', "[1,"):
+        with pytest.raises(codec.DecodeError):
+            parse_event(data, SESSION_EVENTS)
+
+
+def test_msgpack_frames_and_lenient_resume_fields():
+    """
+    Test 1.5: Ramki MessagePack walidowane tak samo; błędne opcjonalne pola resume - wartości domyślne
+    """
+    msgpack = pytest.importorskip("msgpack")
+    event = parse_event(msgpack.packb({"type": "send_message", "payload": {"channel_id": "general", "text": "Hej"}}),
+                        SESSION_EVENTS)
+    assert event.payload.text == "Hej"
+    assert error_of(msgpack.packb({"type": "search_users", "payload": {}})) == "Search query is required"
+    with pytest.raises(codec.DecodeError):
+        parse_event(b"\xc1", SESSION_EVENTS)
+
+    resume = parse_event(frame("resume_request", {"resume_token": "t", "last_seq": {"general": 4},
+                                                  "presence_version": "7", "current_channel": ""}), AUTH_EVENTS)
+    assert resume.payload.last_seq == {"general": 4}
+    assert (resume.payload.presence_version, resume.payload.current_channel) == (None, "general")
+
+    assert error_of(frame("resume_request", {"last_seq": {}}), AUTH_EVENTS) == "Resume token is required"
+    too_many = {f"channel_{number}": 1 for number in range(config.RESUME_MAX_CHANNELS + 1)}
+    for last_seq in ({"general": -1}, {"general": True}, [], too_many):
+        assert error_of(frame("resume_request", {"resume_token": "t", "last_seq": last_seq}), AUTH_EVENTS) == \
+            "last_seq must map channel IDs to non-negative integers"
@@ -0,0 +1,81 @@
+"""
+Testy jednostkowe dla modułu user_index.py
+
+Ten plik testuje:
+- Wyszukiwanie użytkowników po prefiksie bez rozróżniania wielkości liter
+- Limit wyników i kolejność alfabetyczną
+- Dopisywanie nowych użytkowników do indeksu
+- Budowanie indeksu z tabeli users
+"""
+
+import os
+import sys
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import create_tables, get_all_users, seed_sample_data
+from user_index import UserIndex
+
+
+def make_index():
+    """Indeks z kilkoma użytkownikami o podobnych nazwach."""
+    return UserIndex([
+        {"id": "user_1", "name": "Jan"},
+        {"id": "user_2", "name": "AnnaNowak"},
+        {"id": "user_3", "name": "annaKowalska"},
+        {"id": "user_4", "name": "Andrzej"},
+        {"id": "user_5", "name": "Piotr"},
+    ])
+
+
+def test_search_matches_prefix_case_insensitive():
+    """
+    Test 1.1: Prefiks jest dopasowywany bez rozróżniania wielkości liter
+    """
+    index = make_index()
+
+    names = [user["name"] for user in index.search("ANN")]
+
+    assert names == ["annaKowalska", "AnnaNowak"]
+    assert index.search("ann")[0] == {"id": "user_3", "name": "annaKowalska"}
+
+
+def test_search_respects_limit_and_order():
+    """
+    Test 1.2: Wyniki są alfabetyczne i ograniczone do limitu
+    """
+    index = make_index()
+
+    assert [user["name"] for user in index.search("an", limit=2)] == ["Andrzej", "annaKowalska"]
+    assert index.search("x") == []
+    assert len(index.search("", limit=3)) == 3
+
+
+def test_add_inserts_user_in_sorted_position():
+    """
+    Test 1.3: Nowy użytkownik jest od razu widoczny w wynikach, bez duplikatów
+    """
+    index = make_index()
+
+    index.add("user_6", "Anastazja")
+    index.add("user_6", "Anastazja")
+
+    assert [user["name"] for user in index.search("an")] == ["Anastazja", "Andrzej", "annaKowalska", "AnnaNowak"]
+    assert len(index) == 6
+
+
+def test_index_built_from_database():
+    """
+    Test 1.4: Indeks zbudowany z tabeli users zawiera wszystkich użytkowników
+    """
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_tables(conn)
+    seed_sample_data(conn)
+
+    index = UserIndex(get_all_users(conn))
+
+    assert len(index) == 3
+    assert index.search("pi") == [{"id": "user_3", "name": "Piotr"}]
+    conn.close()
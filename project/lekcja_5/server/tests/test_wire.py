@@ -0,0 +1,135 @@
+"""
+Testy jednostkowe dla formatu ramek (wire.py)
+
+Ten plik testuje:
+- Wybór podprotokołu (msgpack / json / brak) podczas handshake
+- Rozgłaszanie na kanale z klientami JSON i MessagePack - jedno kodowanie na format
+- Sklejanie ramek z gotowych fragmentów (JSON bajt w bajt, MessagePack)
+- Dekodowanie ramek od klienta i błędy
+"""
+
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec
+import wire
+from websocket_handler import ConnectionManager
+
+msgpack = pytest.importorskip("msgpack")
+
+
+class FakeWebSocket:
+    """Zastępuje WebSocket - zapamiętuje ramki tekstowe i binarne."""
+
+    def __init__(self, subprotocols=()):
+        self.scope = {"type": "websocket", "subprotocols": list(subprotocols)}
+        self.sent = []
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def send_bytes(self, data: bytes):
+        self.sent.append(msgpack.unpackb(data))
+
+
+NEW_MESSAGE = {
+    "type": "new_message",
+    "payload": {
+        "channel_id": "general",
+        "message": {"id": "msg_1", "user": {"id": "user_1", "name": "Łukasz"},
+                    "text": "Zażółć 👋", "timestamp": "2025-09-28T10:00:00Z", "seq": 8}
+    }
+}
+
+
+# ====== TESTY ======
+
+def test_negotiate_subprotocol():
+    """
+    Test 1.1: msgpack ma pierwszeństwo, json jawnie, nieznany lub brak - JSON bez podprotokołu
+    """
+    assert wire.negotiate(FakeWebSocket(["json", "msgpack"])) == "msgpack"
+    assert wire.negotiate(FakeWebSocket(["json"])) == "json"
+    assert wire.negotiate(FakeWebSocket(["protobuf"])) is None
+    assert wire.negotiate(FakeWebSocket()) is None
+
+    assert wire.protocol_of(FakeWebSocket(["msgpack"])) == wire.MSGPACK
+    assert wire.protocol_of(FakeWebSocket(["json"])) == wire.JSON
+    assert wire.protocol_of(object()) == wire.JSON, "Obiekt bez scope - JSON"
+
+
+async def test_mixed_channel_encodes_once_per_protocol(monkeypatch):
+    """
+    Test 1.2: Kanał z klientami JSON i MessagePack - dwa kodowania zamiast jednego na odbiorcę
+    """
+    manager = ConnectionManager()
+    clients = [FakeWebSocket(["msgpack"] if number % 2 else []) for number in range(6)]
+    for number, websocket in enumerate(clients):
+        manager.connect(websocket, f"user_{number}", f"Uzytkownik{number}", "general")
+    assert manager.binary_connections == 3
+
+    calls = []
+    original = wire.encode
+    monkeypatch.setattr(wire, "encode", lambda message, protocol: calls.append(protocol) or original(message, protocol))
+
+    await manager.broadcast_to_channel(NEW_MESSAGE, "general")
+    await manager.broadcast_to_all({"type": "user_list_update", "payload": {"added": []}})
+    await manager.flush()
+
+    assert sorted(calls) == ["json", "json", "msgpack", "msgpack"]
+    for websocket in clients:
+        assert websocket.sent[0] == NEW_MESSAGE
+        assert websocket.sent[1]["type"] == "user_list_update"
+
+    for websocket in clients:
+        manager.disconnect(websocket)
+    assert manager.binary_connections == 0
+
+
+def test_build_frame_matches_encoded_dict():
+    """
+    Test 1.3: Ramka sklejona z fragmentów - JSON bajt w bajt, MessagePack po zdekodowaniu
+    """
+    channels = [{"id": "general", "name": "Ogólny", "type": "public"}]
+    fields = [("user_info", {"id": "user_1", "name": "Jan"}, False),
+              ("channels", codec.encode(channels), True),
+              ("presence_version", 7, False)]
+    expected = {"type": "auth_success", "payload": {"user_info": {"id": "user_1", "name": "Jan"},
+                                                    "channels": channels, "presence_version": 7}}
+
+    assert wire.build_frame("auth_success", fields, wire.JSON) == codec.encode(expected)
+    assert msgpack.unpackb(wire.build_frame("auth_success", fields, wire.MSGPACK)) == expected
+
+    many = [(f"field_{number}", number, False) for number in range(20)]
+    assert msgpack.unpackb(wire.build_frame("test", many, wire.MSGPACK))["payload"]["field_19"] == 19
+
+
+def test_from_json_transcodes_shared_frame_once():
+    """
+    Test 1.4: Ta sama ramka JSON przekodowana na MessagePack tylko raz
+    """
+    frame = codec.encode(NEW_MESSAGE)
+    assert wire.from_json(frame, wire.JSON) is frame
+
+    misses = wire.get_stats()["transcode_misses"]
+    first = wire.from_json(frame, wire.MSGPACK)
+    assert wire.from_json(frame, wire.MSGPACK) is first
+    assert wire.get_stats()["transcode_misses"] == misses + 1
+    assert msgpack.unpackb(first) == NEW_MESSAGE
+
+
+def test_decode_client_frames():
+    """
+    Test 1.5: Ramki od klienta - str jako JSON, bytes jako MessagePack, błędy jako DecodeError
+    """
+    request = {"type": "send_message", "payload": {"channel_id": "general", "text": "Cześć"}}
+    assert wire.decode(json.dumps(request)) == request
+    assert wire.decode(msgpack.packb(request)) == request
+
+    for data in (b"\xc1", msgpack.packb(request) + b"\x00", b"\x92", "{"):
+        with pytest.raises(codec.DecodeError):
+            wire.decode(data)
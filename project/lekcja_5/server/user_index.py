@@ -0,0 +1,75 @@
+"""
+Indeks nazw użytkowników do wyszukiwania po prefiksie (search_users).
+
+Zapytanie LIKE 'prefiks%' do tabeli users przy każdym naciśnięciu klawisza
+obciążałoby bazę, a bez indeksu COLLATE NOCASE skanowałoby całą tabelę.
+UserIndex trzyma posortowaną listę nazw w pamięci:
+- nazwy są porównywane bez rozróżniania wielkości liter (casefold)
+- wszystkie nazwy z danym prefiksem leżą w liście obok siebie, więc
+  wyszukiwanie to bisect (O(log n)) + odczyt co najwyżej `limit` elementów
+- indeks jest budowany przy starcie serwera z tabeli users, a nowi
+  użytkownicy są dopisywani przez add()
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List
+
+
+class UserIndex:
+    """
+    Posortowany indeks nazw użytkowników (wyszukiwanie po prefiksie).
+
+    Operacje wywoływane są z pętli zdarzeń - nie wymagają blokad.
+    """
+
+    def __init__(self, users: Iterable[Dict[str, str]] = ()):
+        """
+        Args:
+            users: Użytkownicy w formacie {"id": "user_1", "name": "Jan"}
+        """
+        entries = sorted((user["name"].casefold(), user["name"], user["id"]) for user in users)
+        # Klucze (casefold) w osobnej liście - bisect porównuje tylko napisy
+        self._keys: List[str] = [entry[0] for entry in entries]
+        self._users: List[Dict[str, str]] = [{"id": entry[2], "name": entry[1]} for entry in entries]
+        self._ids = {user["id"] for user in self._users}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, user_id: str, username: str) -> None:
+        """
+        Dopisuje nowego użytkownika (np. po rejestracji).
+
+        Args:
+            user_id: ID użytkownika ("user_1")
+            username: Nazwa użytkownika
+        """
+        if user_id in self._ids:
+            return
+        key = username.casefold()
+        position = bisect_left(self._keys, key)
+        # Przy równych kluczach zachowujemy kolejność jak w sorted() z __init__
+        while position < len(self._keys) and self._keys[position] == key and self._users[position]["name"] < username:
+            position += 1
+        self._keys.insert(position, key)
+        self._users.insert(position, {"id": user_id, "name": username})
+        self._ids.add(user_id)
+
+    def search(self, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+        """
+        Zwraca użytkowników, których nazwa zaczyna się od prefiksu.
+
+        Args:
+            prefix: Początek nazwy (wielkość liter nie ma znaczenia)
+            limit: Maksymalna liczba wyników
+
+        Returns:
+            Lista {"id", "name"} w kolejności alfabetycznej
+        """
+        key = prefix.casefold()
+        position = bisect_left(self._keys, key)
+        results = []
+        while position < len(self._keys) and len(results) < limit and self._keys[position].startswith(key):
+            results.append(self._users[position])
+            position += 1
+        return results
@@ -4,20 +4,33 @@ Zarządzanie połączeniami WebSocket i obsługa zdarzeń.
 Ten moduł zawiera:
 - ConnectionManager: zarządzanie sesjami użytkowników
 - Funkcje obsługi zdarzeń: autentykacja, wysyłanie wiadomości, historia
-- Walidacja danych wejściowych
+
+Funkcje obsługi dostają zdarzenia już zwalidowane przez schemas.parse_event.
 """
 
-import json
-import re
-from typing import Dict, List, Optional
+import asyncio
+import math
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
 from fastapi import WebSocket
 
-from database import (
-    get_user_by_username,
-    get_all_channels,
-    get_messages_for_channel,
-    add_message
-)
+import codec
+import config
+import wire
+from bootstrap import BootstrapSections, BootstrapSnapshot
+from cluster import ClusterNode
+from db_executor import AsyncDatabase
+from history_cache import HistoryCache
+from ids import format_message_id
+from message_writer import FailureCallback, MessageWriter
+from models import Message, parse_user_id
+from outbound import OVERFLOW_POLICIES, SLOW_CONSUMER_CLOSE_CODE, OutboundQueue, close_websocket
+from presence import ROSTER_COALESCE_KEY, PresenceAggregator
+from resume import ResumeTokens
+from schemas import (AuthRequest, InvalidEvent, RequestChannels, RequestHistory, RequestUserList, ResumeRequest,
+                     SearchMessages, SearchUsers, SendMessage, validate_message_text, validate_username)
+from user_index import UserIndex
 
 
 class ConnectionManager:
@@ -28,13 +41,62 @@ class ConnectionManager:
     - Aktywne połączenia WebSocket
     - Informacje o zalogowanych użytkownikach
     - Aktualny kanał każdego użytkownika
+    - Połączenia subskrybujące każdy kanał (indeks kanał -> połączenia)
+    - Kolejkę wychodzącą każdego połączenia (outbound.OutboundQueue)
+    - Format ramek każdego połączenia (wire: JSON lub MessagePack)
+    - Klientów, którzy nie nadążają z odbiorem (check_slow_consumers)
+
+    Rozgłaszanie tylko dopisuje ramki do kolejek i wraca od razu - wysyłaniem
+    zajmuje się osobne zadanie każdego połączenia, więc wolny klient nie
+    opóźnia pozostałych. Wiadomość jest kodowana raz na format ramek (a nie
+    raz na odbiorcę), także gdy na kanale są klienci JSON i MessagePack.
     """
 
-    def __init__(self):
+    def __init__(self, queue_size: int = 256, overflow_policy: str = "drop_oldest",
+                 slow_latency_ms: int = 2000, slow_backlog_bytes: int = 1_048_576, slow_grace_ms: int = 10_000):
+        """
+        Args:
+            queue_size: Maksymalna liczba ramek czekających na wysłanie do jednego klienta
+            overflow_policy: Polityka przepełnienia kolejki (outbound.OVERFLOW_POLICIES)
+            slow_latency_ms: Czas wysyłania ramki, powyżej którego klient jest uznawany za wolnego
+            slow_backlog_bytes: Rozmiar kolejki klienta, powyżej którego jest uznawany za wolnego
+            slow_grace_ms: Jak długo klient może być wolny, zanim zostanie rozłączony
+
+        Raises:
+            ValueError: Przy nieznanej polityce przepełnienia
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {', '.join(OVERFLOW_POLICIES)}")
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.slow_latency_ms = slow_latency_ms
+        self.slow_backlog_bytes = slow_backlog_bytes
+        self.slow_grace_ms = slow_grace_ms
         # Mapowanie: WebSocket -> informacje o użytkowniku
         self.active_connections: Dict[WebSocket, Dict[str, str]] = {}
         # Zbiór zalogowanych nazw użytkowników (dla szybkiego sprawdzania duplikatów)
         self.online_usernames: set = set()
+        # Nazwy zarezerwowane przez trwające logowania (między sprawdzeniem a connect())
+        self.pending_usernames: set = set()
+        # Lista z get_online_users() - budowana raz i ważna do następnej zmiany połączeń
+        self._online_users: Optional[List[Dict[str, str]]] = None
+        # Mapowanie: ID kanału -> połączenia, których current_channel to ten kanał.
+        # broadcast_to_channel odwiedza tylko subskrybentów, a nie wszystkie połączenia.
+        self.channel_subscribers: Dict[str, Set[WebSocket]] = {}
+        # Mapowanie: WebSocket -> kolejka ramek do wysłania
+        self.outbound: Dict[WebSocket, OutboundQueue] = {}
+        # Mapowanie: WebSocket -> format ramek (wire.JSON / wire.MSGPACK)
+        self.protocols: Dict[WebSocket, str] = {}
+        # Liczba połączeń MessagePack - przy zerze rozgłoszenie koduje tylko JSON
+        self.binary_connections = 0
+        # Ramki odrzucone przez kolejki już zamkniętych połączeń
+        self._dropped_closed = 0
+        # Mapowanie: WebSocket -> od kiedy (time.monotonic()) klient jest wolny
+        self._slow_since: Dict[WebSocket, float] = {}
+        # Liczniki: ile razy klient został uznany za wolnego, wrócił do normy, został rozłączony
+        self.slow_marked = 0
+        self.slow_recovered = 0
+        self.evicted = 0
 
     def connect(self, websocket: WebSocket, user_id: str, username: str, channel_id: str = "general"):
         """
@@ -52,6 +114,13 @@ class ConnectionManager:
             "current_channel": channel_id
         }
         self.online_usernames.add(username)
+        self._online_users = None
+        self.channel_subscribers.setdefault(channel_id, set()).add(websocket)
+        self.outbound[websocket] = OutboundQueue(websocket, self.queue_size, self.overflow_policy)
+        protocol = wire.protocol_of(websocket)
+        self.protocols[websocket] = protocol
+        if protocol == wire.MSGPACK:
+            self.binary_connections += 1
 
     def disconnect(self, websocket: WebSocket) -> Optional[Dict[str, str]]:
         """
@@ -66,10 +135,48 @@ class ConnectionManager:
         if websocket in self.active_connections:
             user_info = self.active_connections[websocket]
             self.online_usernames.discard(user_info["username"])
+            self._online_users = None
+            self._unsubscribe(websocket, user_info["current_channel"])
             del self.active_connections[websocket]
+            self._slow_since.pop(websocket, None)
+            queue = self.outbound.pop(websocket, None)
+            if queue is not None:
+                self._dropped_closed += queue.dropped
+                queue.close()
+            if self.protocols.pop(websocket, None) == wire.MSGPACK:
+                self.binary_connections -= 1
             return user_info
         return None
 
+    def set_channel(self, websocket: WebSocket, channel_id: str) -> bool:
+        """
+        Przełącza użytkownika na inny kanał (zmienia subskrypcję new_message).
+
+        Args:
+            websocket: Obiekt WebSocket
+            channel_id: ID nowego kanału
+
+        Returns:
+            True jeśli kanał się zmienił, False jeśli połączenie jest nieznane
+            lub użytkownik już jest na tym kanale
+        """
+        user_info = self.active_connections.get(websocket)
+        if user_info is None or user_info["current_channel"] == channel_id:
+            return False
+
+        self._unsubscribe(websocket, user_info["current_channel"])
+        user_info["current_channel"] = channel_id
+        self.channel_subscribers.setdefault(channel_id, set()).add(websocket)
+        return True
+
+    def _unsubscribe(self, websocket: WebSocket, channel_id: str):
+        """Usuwa połączenie z indeksu kanału (pusty kanał znika z indeksu)."""
+        subscribers = self.channel_subscribers.get(channel_id)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.channel_subscribers[channel_id]
+
     def is_username_taken(self, username: str) -> bool:
         """
         Sprawdza czy nazwa użytkownika jest już używana przez kogoś zalogowanego.
@@ -77,9 +184,52 @@ class ConnectionManager:
         Args:
             username: Nazwa do sprawdzenia
 
+        Nazwa zarezerwowana przez trwające logowanie (reserve_username) też jest zajęta.
+
         Returns:
             True jeśli nazwa jest zajęta, False w przeciwnym razie
         """
+        return username in self.online_usernames or username in self.pending_usernames
+
+    def reserve_username(self, username: str) -> bool:
+        """
+        Rezerwuje nazwę na czas logowania (zapytanie do bazy, budowa auth_success).
+
+        Sprawdzenie i rezerwacja odbywają się bez await pomiędzy - dwa
+        równoczesne logowania na ten sam nick nie mogą obu się udać.
+        Rezerwację trzeba zwolnić przez release_username() - po connect()
+        nazwa pozostaje zajęta jako zalogowana.
+
+        Args:
+            username: Nazwa do zarezerwowania
+
+        Returns:
+            True jeśli nazwa została zarezerwowana, False jeśli jest już zajęta
+        """
+        if self.is_username_taken(username):
+            return False
+        self.pending_usernames.add(username)
+        return True
+
+    def release_username(self, username: str):
+        """
+        Zwalnia rezerwację nazwy z reserve_username().
+
+        Args:
+            username: Zarezerwowana nazwa
+        """
+        self.pending_usernames.discard(username)
+
+    def is_online(self, username: str) -> bool:
+        """
+        Sprawdza czy użytkownik jest zalogowany.
+
+        Args:
+            username: Nazwa użytkownika
+
+        Returns:
+            True jeśli użytkownik ma aktywne połączenie
+        """
         return username in self.online_usernames
 
     def get_user_info(self, websocket: WebSocket) -> Optional[Dict[str, str]]:
@@ -98,122 +248,212 @@ class ConnectionManager:
         """
         Zwraca listę wszystkich zalogowanych użytkowników.
 
+        Lista jest budowana raz i współdzielona do następnego connect() /
+        disconnect() - nie wolno jej modyfikować.
+
         Returns:
             Lista słowników z id i name użytkowników
         """
-        users = []
-        for user_info in self.active_connections.values():
-            users.append({
-                "id": user_info["user_id"],
-                "name": user_info["username"]
-            })
-        return users
-
-    async def broadcast_to_channel(self, message: dict, channel_id: str, exclude_ws: Optional[WebSocket] = None):
+        if self._online_users is None:
+            self._online_users = [
+                {"id": user_info["user_id"], "name": user_info["username"]}
+                for user_info in self.active_connections.values()
+            ]
+        return self._online_users
+
+    async def broadcast_to_channel(self, message: dict, channel_id: str, exclude_ws: Optional[WebSocket] = None,
+                                   coalesce_key: Optional[str] = None):
         """
         Wysyła wiadomość do wszystkich użytkowników na danym kanale.
 
+        Wiadomość jest kodowana raz i dopisywana do kolejek odbiorców -
+        metoda nie czeka na wysłanie.
+
         Args:
             message: Słownik z wiadomością do wysłania
             channel_id: ID kanału
             exclude_ws: Opcjonalnie wyklucz jedno połączenie (np. nadawcę)
+            coalesce_key: Klucz dla polityki coalesce (nowsza ramka zastępuje starszą)
         """
-        message_json = json.dumps(message, ensure_ascii=False)
+        subscribers = self.channel_subscribers.get(channel_id)
+        if not subscribers:
+            return
 
-        for websocket, user_info in self.active_connections.items():
-            if websocket != exclude_ws and user_info["current_channel"] == channel_id:
-                # Wysyłamy tylko do użytkowników którzy są na danym kanale
-                try:
-                    await websocket.send_text(message_json)
-                except Exception as e:
-                    print(f"Błąd wysyłania do {user_info['username']}: {e}")
+        self._enqueue(message, subscribers, exclude_ws, coalesce_key)
 
-    async def broadcast_to_all(self, message: dict, exclude_ws: Optional[WebSocket] = None):
+    async def broadcast_to_all(self, message: dict, exclude_ws: Optional[WebSocket] = None,
+                               coalesce_key: Optional[str] = None):
         """
-        Wysyła wiadomość do wszystkich połączonych klientów.
+        Wysyła wiadomość do wszystkich połączonych klientów (przez ich kolejki).
 
         Args:
             message: Słownik z wiadomością do wysłania
             exclude_ws: Opcjonalnie wyklucz jedno połączenie
+            coalesce_key: Klucz dla polityki coalesce (np. presence.ROSTER_COALESCE_KEY)
         """
-        message_json = json.dumps(message, ensure_ascii=False)
+        self._enqueue(message, self.outbound, exclude_ws, coalesce_key)
+
+    def _enqueue(self, message: dict, connections: Iterable[WebSocket], exclude_ws: Optional[WebSocket],
+                 coalesce_key: Optional[str]):
+        """Koduje wiadomość raz na format ramek i dopisuje ją do kolejek połączeń."""
+        if not self.binary_connections:
+            message_json = codec.encode(message)
+            for websocket in connections:
+                if websocket != exclude_ws:
+                    self.outbound[websocket].put(message_json, coalesce_key)
+            return
 
-        for websocket in self.active_connections.keys():
+        frames: Dict[str, wire.Frame] = {}
+        for websocket in connections:
             if websocket != exclude_ws:
-                try:
-                    await websocket.send_text(message_json)
-                except Exception as e:
-                    print(f"Błąd wysyłania broadcast: {e}")
+                protocol = self.protocols[websocket]
+                frame = frames.get(protocol)
+                if frame is None:
+                    frame = frames[protocol] = wire.encode(message, protocol)
+                self.outbound[websocket].put(frame, coalesce_key)
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
+    async def send_personal_message(self, message: dict, websocket: WebSocket, coalesce_key: Optional[str] = None):
         """
         Wysyła wiadomość do konkretnego klienta.
 
+        Zalogowany klient dostaje ją przez swoją kolejkę (w kolejności
+        z rozgłoszeniami), pozostali - bezpośrednio.
+
         Args:
             message: Słownik z wiadomością do wysłania
             websocket: Docelowe połączenie WebSocket
+            coalesce_key: Klucz dla polityki coalesce (np. presence.ROSTER_COALESCE_KEY)
         """
-        message_json = json.dumps(message, ensure_ascii=False)
+        queue = self.outbound.get(websocket)
+        if queue is not None:
+            queue.put(wire.encode(message, self.protocols[websocket]), coalesce_key)
+            return
         try:
-            await websocket.send_text(message_json)
+            await wire.send(websocket, wire.encode(message, wire.protocol_of(websocket)))
         except Exception as e:
             print(f"Błąd wysyłania wiadomości osobistej: {e}")
 
+    def send_personal_frame(self, frame: wire.Frame, websocket: WebSocket) -> bool:
+        """
+        Dopisuje gotową (zakodowaną) ramkę do kolejki zalogowanego klienta.
 
-# ====== FUNKCJE WALIDACJI ======
-
-def validate_username(username: str) -> tuple[bool, Optional[str]]:
-    """
-    Waliduje nazwę użytkownika.
-
-    Zasady:
-    - 3-20 znaków
-    - Tylko litery, cyfry i podkreślniki
-
-    Returns:
-        (is_valid, error_message)
-    """
-    if not username:
-        return False, "Username cannot be empty"
-
-    if len(username) < 3 or len(username) > 20:
-        return False, "Username must be between 3 and 20 characters"
+        Args:
+            frame: Ramka w formacie połączenia (str - JSON, bytes - MessagePack)
+            websocket: Docelowe połączenie WebSocket
 
-    if not re.match(r'^[a-zA-Z0-9_]+$', username):
-        return False, "Username can only contain letters, numbers, and underscores"
+        Returns:
+            False jeśli klient nie jest zalogowany lub ramka została odrzucona
+        """
+        queue = self.outbound.get(websocket)
+        return queue is not None and queue.put(frame)
 
-    return True, None
+    def check_slow_consumers(self, now: Optional[float] = None) -> List[WebSocket]:
+        """
+        Sprawdza kolejki wszystkich połączeń i wybiera klientów do rozłączenia.
 
+        Klient jest wolny, gdy wysłanie ramki trwa dłużej niż slow_latency_ms
+        albo w kolejce czeka więcej niż slow_backlog_bytes. Wolny klient ma
+        slow_grace_ms na powrót do normy - potem jest wybierany do rozłączenia.
+        Od razu wybierane są połączenia z zamkniętą kolejką (przepełnienie
+        w polityce disconnect lub zerwane połączenie).
 
-def validate_message_text(text: str) -> tuple[bool, Optional[str]]:
-    """
-    Waliduje treść wiadomości.
+        Args:
+            now: Aktualny czas z time.monotonic() (domyślnie - teraz)
 
-    Zasady:
-    - Nie może być pusta
-    - Maksymalnie 300 znaków
+        Returns:
+            Lista połączeń do rozłączenia (metoda ich nie rozłącza)
+        """
+        now = time.monotonic() if now is None else now
+        to_evict = []
+
+        for websocket, queue in self.outbound.items():
+            if queue.closed:
+                to_evict.append(websocket)
+                if queue.overflowed:
+                    self.evicted += 1
+                continue
+
+            slow = (queue.current_latency_ms(now) > self.slow_latency_ms
+                    or queue.backlog_bytes > self.slow_backlog_bytes)
+            slow_since = self._slow_since.get(websocket)
+
+            if not slow:
+                if slow_since is not None:
+                    del self._slow_since[websocket]
+                    self.slow_recovered += 1
+            elif slow_since is None:
+                self._slow_since[websocket] = now
+                self.slow_marked += 1
+                print(f"🐢 {self.active_connections[websocket]['username']} nie nadąża z odbiorem wiadomości")
+            elif (now - slow_since) * 1000 >= self.slow_grace_ms:
+                to_evict.append(websocket)
+                self.evicted += 1
+
+        return to_evict
+
+    async def flush(self):
+        """Czeka, aż kolejki wszystkich połączeń zostaną opróżnione."""
+        for queue in list(self.outbound.values()):
+            await queue.wait_idle()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Zwraca zbiorcze metryki połączeń i kolejek wychodzących.
 
-    Returns:
-        (is_valid, error_message)
-    """
-    if not text or not text.strip():
-        return False, "Message cannot be empty"
+        Returns:
+            Słownik z liczbą połączeń, ramek w kolejkach i odrzuconych ramek
+        """
+        queues = list(self.outbound.values())
+        return {
+            "connections": len(self.active_connections),
+            "channels": len(self.channel_subscribers),
+            "queue_size": self.queue_size,
+            "overflow_policy": self.overflow_policy,
+            "queued_frames": sum(queue.depth for queue in queues),
+            "max_queue_depth": max((queue.depth for queue in queues), default=0),
+            "dropped": self._dropped_closed + sum(queue.dropped for queue in queues),
+            "coalesced": sum(queue.coalesced for queue in queues),
+            "backlog_bytes": sum(queue.backlog_bytes for queue in queues),
+            "slow": len(self._slow_since),
+            "slow_marked": self.slow_marked,
+            "slow_recovered": self.slow_recovered,
+            "evicted": self.evicted
+        }
 
-    if len(text) > 300:
-        return False, "Message too long (max 300 characters)"
+    def get_connection_stats(self) -> List[Dict[str, Any]]:
+        """
+        Zwraca metryki kolejki każdego połączenia (od najdłuższej kolejki).
 
-    return True, None
+        Returns:
+            Lista słowników z użytkownikiem, kanałem i metrykami jego kolejki
+        """
+        connections = []
+        for websocket, queue in self.outbound.items():
+            user_info = self.active_connections[websocket]
+            connections.append({
+                "user_id": user_info["user_id"],
+                "username": user_info["username"],
+                "channel_id": user_info["current_channel"],
+                "slow": websocket in self._slow_since,
+                **queue.get_stats()
+            })
+        connections.sort(key=lambda connection: connection["depth"], reverse=True)
+        return connections
 
 
 # ====== FUNKCJE OBSŁUGI ZDARZEŃ ======
 
-async def send_error(websocket: WebSocket, message: str):
+async def send_error(websocket: WebSocket, message: str, manager: ConnectionManager):
     """
     Wysyła wiadomość o błędzie do klienta.
 
+    Zalogowany klient dostaje ją przez swoją kolejkę wychodzącą (w kolejności
+    z pozostałymi ramkami), niezalogowany - bezpośrednio.
+
     Args:
         websocket: Połączenie WebSocket
         message: Treść komunikatu o błędzie
+        manager: Menedżer połączeń
     """
     error_msg = {
         "type": "error_message",
@@ -221,7 +461,68 @@ async def send_error(websocket: WebSocket, message: str):
             "message": message
         }
     }
-    await websocket.send_text(json.dumps(error_msg, ensure_ascii=False))
+    await manager.send_personal_message(error_msg, websocket)
+
+
+async def send_rate_limited(websocket: WebSocket, event_type: str, retry_after: float, manager: ConnectionManager):
+    """
+    Wysyła error_message o przekroczonym limicie zdarzeń (ratelimit.py).
+
+    Args:
+        websocket: Połączenie WebSocket
+        event_type: Typ odrzuconego zdarzenia
+        retry_after: Po ilu sekundach klient może wysłać je ponownie
+        manager: Menedżer połączeń (kolejka wychodząca klienta)
+    """
+    error_msg = {
+        "type": "error_message",
+        "payload": {
+            "message": "Rate limit exceeded",
+            "code": "rate_limited",
+            "event": event_type,
+            "retry_after_ms": math.ceil(retry_after * 1000)
+        }
+    }
+    await manager.send_personal_message(error_msg, websocket)
+
+
+def report_unsaved_message(manager: ConnectionManager, websocket: WebSocket, history: HistoryCache,
+                           channel_id: str) -> FailureCallback:
+    """
+    Tworzy callback dla MessageWriter: niezapisana wiadomość znika z pamięci
+    historii, a jej nadawca dostaje error_message.
+
+    Wiadomość została już rozgłoszona (zapis odbywa się w tle), więc klient
+    dowiaduje się, która z nich nie trafiła do historii (message_id). Jej seq
+    nie jest nadawany ponownie - w numeracji kanału zostaje luka.
+
+    Args:
+        manager: Menedżer połączeń
+        websocket: Połączenie nadawcy
+        history: Pamięć ostatnich wiadomości kanałów
+        channel_id: Kanał wiadomości
+
+    Returns:
+        Callback (klucz wiadomości, wyjątek) -> None
+    """
+    def notify(message_key: int, error: Exception):
+        history.remove(channel_id, format_message_id(message_key))
+        protocol = manager.protocols.get(websocket)
+        if protocol is None:
+            # Nadawca już się rozłączył
+            return
+        error_msg = {
+            "type": "error_message",
+            "payload": {
+                "message": "Message could not be saved",
+                "code": "message_not_saved",
+                "channel_id": channel_id,
+                "message_id": format_message_id(message_key)
+            }
+        }
+        manager.send_personal_frame(wire.encode(error_msg, protocol), websocket)
+
+    return notify
 
 
 async def send_auth_failure(websocket: WebSocket, reason: str):
@@ -238,176 +539,278 @@ async def send_auth_failure(websocket: WebSocket, reason: str):
             "reason": reason
         }
     }
-    await websocket.send_text(json.dumps(auth_failure, ensure_ascii=False))
+    await wire.send(websocket, wire.encode(auth_failure, wire.protocol_of(websocket)))
     await websocket.close()
 
 
-async def handle_auth_request(data: dict, websocket: WebSocket, manager: ConnectionManager, db_conn):
+async def handle_auth_request(request: Union[AuthRequest, InvalidEvent], websocket: WebSocket,
+                              manager: ConnectionManager, db: AsyncDatabase, bootstrap: BootstrapSnapshot,
+                              presence: PresenceAggregator, tokens: ResumeTokens):
     """
     Obsługuje żądanie autentykacji użytkownika.
 
     Proces:
-    1. Walidacja danych wejściowych (username, password)
-    2. Sprawdzenie duplikatów (czy nick nie jest już używany)
+    1. Odrzucenie ramki z błędnymi polami (walidacja w schemas.parse_event)
+       i sprawdzenie sekcji bootstrap
+    2. Sprawdzenie duplikatów (czy nick nie jest już używany) i rezerwacja
+       nicku do czasu rejestracji
     3. Weryfikacja w bazie danych
     4. Rejestracja w ConnectionManager
-    5. Wysłanie auth_success z pełnymi danymi inicjalizacyjnymi
-    6. Rozgłoszenie user_joined i user_list_update do innych
+    5. Wysłanie auth_success z wybranymi sekcjami stanu początkowego
+       (domyślnie wszystkimi) i tokenem wznowienia
+    6. Zgłoszenie dołączenia do PresenceAggregator (zbiorczy user_list_update)
 
     Args:
-        data: Dane żądania (type, payload)
+        request: Zwalidowane auth_request albo InvalidEvent (błędne pola)
         websocket: Połączenie WebSocket
         manager: Menedżer połączeń
-        db_conn: Połączenie z bazą danych
+        db: Asynchroniczna warstwa dostępu do bazy (AsyncDatabase)
+        bootstrap: Wspólny stan początkowy (kanały, historia general, lista online)
+        presence: Zbiorcze powiadomienia o obecności
+        tokens: Wystawca tokenów wznowienia sesji
 
     Returns:
         True jeśli autentykacja powiodła się, False w przeciwnym razie
     """
     try:
-        payload = data.get("payload", {})
-        username = payload.get("username", "").strip()
-        password = payload.get("password", "")
-
-        # Walidacja username
-        is_valid, error_msg = validate_username(username)
-        if not is_valid:
-            await send_auth_failure(websocket, error_msg)
+        # Błędna nazwa, brak hasła itp. - odrzucenie bez dostępu do bazy
+        if isinstance(request, InvalidEvent):
+            await send_auth_failure(websocket, request.message)
             return False
 
-        # Walidacja hasła
-        if not password:
-            await send_auth_failure(websocket, "Password is required")
+        username = request.payload.username
+        password = request.payload.password
+
+        # Sekcje auth_success, których klient potrzebuje (np. bot bez historii)
+        try:
+            sections = BootstrapSections.parse(request.payload.bootstrap, config.HISTORY_PAGE_SIZE,
+                                               config.HISTORY_MAX_PAGE_SIZE)
+        except ValueError as e:
+            await send_auth_failure(websocket, str(e))
             return False
 
-        # Sprawdzenie czy nick nie jest już używany
-        if manager.is_username_taken(username):
+        # Sprawdzenie czy nick nie jest już używany (także na innym procesie serwera)
+        # i rezerwacja na czas zapytania do bazy - równoczesne logowanie na ten sam
+        # nick dostanie "Nickname already in use."
+        if presence.is_connected_elsewhere(username) or not manager.reserve_username(username):
             await send_auth_failure(websocket, "Nickname already in use.")
             return False
 
-        # Sprawdzenie w bazie danych
-        user = get_user_by_username(db_conn, username)
+        try:
+            # Sprawdzenie w bazie danych
+            user = await db.get_user_by_username(username)
+
+            if not user:
+                await send_auth_failure(websocket, "User not found.")
+                return False
+
+            # Weryfikacja hasła (na razie proste porównanie - w produkcji użyj bcrypt!)
+            if user.password_hash != password:
+                await send_auth_failure(websocket, "Invalid password.")
+                return False
+
+            # Autentykacja pomyślna - rejestracja w ConnectionManager (z ID w formacie API)
+            user_public = user.to_dict()
+            manager.connect(websocket, user_public["id"], user.username, "general")
+        finally:
+            manager.release_username(username)
+
+        # Wysłanie auth_success - kanały, historia general i lista online pochodzą
+        # ze wspólnych, zakodowanych fragmentów. Lista online jest w wersji
+        # presence_version - kolejne user_list_update przychodzą jako zmiany od
+        # tej wersji (także dołączenie tego użytkownika)
+        auth_success = await bootstrap.auth_success_frame(
+            user_public, tokens.issue(user_public["id"], user.username), sections, manager.protocols[websocket]
+        )
+        manager.send_personal_frame(auth_success, websocket)
+
+        # Pozostali dostaną zmianę w najbliższym zbiorczym user_list_update
+        presence.user_joined(user_public)
 
-        if not user:
-            await send_auth_failure(websocket, "User not found.")
+        print(f"✓ Użytkownik {username} zalogowany pomyślnie")
+        return True
+
+    except Exception as e:
+        print(f"Błąd podczas autentykacji: {e}")
+        # Błąd po connect() (np. przy budowie auth_success) - połączenie nie może
+        # zostać w ConnectionManager, bo nick byłby zajęty do restartu serwera
+        manager.disconnect(websocket)
+        await send_error(websocket, "Authentication error", manager)
+        await websocket.close()
+        return False
+
+
+async def send_resume_failure(websocket: WebSocket, reason: str):
+    """
+    Wysyła resume_failure - połączenie pozostaje otwarte, klient może
+    zalogować się na nim zwykłym auth_request.
+
+    Args:
+        websocket: Połączenie WebSocket
+        reason: Przyczyna odrzucenia wznowienia
+    """
+    resume_failure = {
+        "type": "resume_failure",
+        "payload": {
+            "reason": reason
+        }
+    }
+    await wire.send(websocket, wire.encode(resume_failure, wire.protocol_of(websocket)))
+
+
+async def handle_resume_request(request: Union[ResumeRequest, InvalidEvent], websocket: WebSocket,
+                                manager: ConnectionManager, history: HistoryCache, presence: PresenceAggregator,
+                                tokens: ResumeTokens):
+    """
+    Obsługuje wznowienie sesji po ponownym połączeniu (zamiast auth_request).
+
+    Klient podaje token z auth_success / resume_success, ostatni znany seq
+    każdego kanału i wersję listy obecności. Zamiast pełnego auth_success
+    dostaje tylko to, co go ominęło - bez sprawdzania hasła w bazie, a
+    przegapione wiadomości zwykle pochodzą z HistoryCache. Nieistniejące
+    kanały w last_seq są pomijane, a nieistniejący current_channel
+    zastępuje "general".
+
+    Args:
+        request: Zwalidowane resume_request albo InvalidEvent (błędne pola)
+        websocket: Połączenie WebSocket
+        manager: Menedżer połączeń
+        history: Pamięć ostatnich wiadomości kanałów (HistoryCache)
+        presence: Zbiorcze powiadomienia o obecności
+        tokens: Wystawca tokenów wznowienia sesji
+
+    Returns:
+        True jeśli sesja została wznowiona, False jeśli nie (wysłano resume_failure)
+    """
+    try:
+        # Brak tokenu, błędne last_seq - odrzucenie przed sprawdzeniem tokenu
+        if isinstance(request, InvalidEvent):
+            await send_resume_failure(websocket, request.message)
             return False
 
-        # Weryfikacja hasła (na razie proste porównanie - w produkcji użyj bcrypt!)
-        if user.password_hash != password:
-            await send_auth_failure(websocket, "Invalid password.")
+        payload = request.payload
+        last_seq = payload.last_seq
+        current_channel = payload.current_channel
+
+        try:
+            user_public = tokens.verify(payload.resume_token)
+        except ValueError as e:
+            await send_resume_failure(websocket, str(e))
             return False
 
-        # Autentykacja pomyślna - rejestracja w ConnectionManager
-        manager.connect(websocket, user.id, user.username, "general")
+        # Tylko istniejące kanały - nieznane nazwy nie trafiają do pamięci historii
+        # ani do indeksu subskrypcji (kanał mógł też zostać usunięty)
+        known_seq = {channel_id: seq for channel_id, seq in last_seq.items() if await history.has_channel(channel_id)}
+        if not await history.has_channel(current_channel):
+            current_channel = "general"
 
-        # Pobieranie danych dla klienta
-        channels = get_all_channels(db_conn)
-        initial_history = get_messages_for_channel(db_conn, "general", limit=50)
-        online_users = manager.get_online_users()
+        if manager.is_username_taken(user_public["name"]) or presence.is_connected_elsewhere(user_public["name"]):
+            await send_resume_failure(websocket, "Nickname already in use.")
+            return False
 
-        # Wysłanie auth_success do zalogowanego użytkownika
-        auth_success = {
-            "type": "auth_success",
-            "payload": {
-                "user_info": {
-                    "id": user.id,
-                    "name": user.username
-                },
-                "channels": channels,
-                "online_users": online_users,
-                "initial_channel_history": {
-                    "channel_id": "general",
-                    "messages": initial_history
-                }
-            }
-        }
-        await manager.send_personal_message(auth_success, websocket)
+        manager.connect(websocket, user_public["id"], user_public["name"], current_channel)
 
-        # Rozgłoszenie user_joined do innych
-        user_joined_msg = {
-            "type": "user_joined",
-            "payload": {
-                "user": {
-                    "id": user.id,
-                    "name": user.username
-                }
-            }
-        }
-        await manager.broadcast_to_all(user_joined_msg, exclude_ws=websocket)
+        missed_messages = {}
+        for channel_id, seq in known_seq.items():
+            missed_messages[channel_id] = await history.get_since(channel_id, seq, config.HISTORY_PAGE_SIZE)
 
-        # Rozgłoszenie zaktualizowanej listy użytkowników do wszystkich
-        user_list_update = {
-            "type": "user_list_update",
+        resume_success = {
+            "type": "resume_success",
             "payload": {
-                "online_users": online_users
+                "user_info": user_public,
+                "resume_token": tokens.issue(user_public["id"], user_public["name"]),
+                "missed_messages": missed_messages,
+                "user_list": presence.changes_since(payload.presence_version)["payload"]
             }
         }
-        await manager.broadcast_to_all(user_list_update)
+        await manager.send_personal_message(resume_success, websocket)
 
-        print(f"✓ Użytkownik {username} zalogowany pomyślnie")
+        # Powrót w okresie karencji nie zmienia listy obecności dla pozostałych
+        presence.user_joined(user_public)
+
+        print(f"✓ Użytkownik {user_public['name']} wznowił sesję")
         return True
 
     except Exception as e:
-        print(f"Błąd podczas autentykacji: {e}")
-        await send_error(websocket, "Authentication error")
-        await websocket.close()
+        print(f"Błąd podczas wznawiania sesji: {e}")
+        manager.disconnect(websocket)
+        await send_resume_failure(websocket, "Resume error")
         return False
 
 
-async def handle_send_message(data: dict, websocket: WebSocket, manager: ConnectionManager, db_conn):
+async def handle_send_message(request: SendMessage, websocket: WebSocket, manager: ConnectionManager,
+                              writer: MessageWriter, history: HistoryCache, cluster: Optional[ClusterNode] = None):
     """
     Obsługuje wysłanie nowej wiadomości.
 
     Proces:
     1. Pobiera informacje o użytkowniku
-    2. Waliduje dane (channel_id, text)
-    3. Zapisuje wiadomość w bazie
-    4. Rozgłasza new_message do wszystkich na kanale
+    2. (channel_id i text są już zwalidowane - schemas.SendMessagePayload)
+       Sprawdza, czy kanał istnieje - zanim wiadomość dostanie seq
+    3. Przekazuje wiadomość do kolejki zapisu (ID i timestamp nadawane od razu);
+       jeśli zapis się nie uda, nadawca dostanie error_message
+    4. Dopisuje wiadomość do pamięci ostatnich wiadomości kanału
+    5. Rozgłasza new_message do wszystkich na kanale
+
+    W trybie wielu procesów kroki 3-5 wykonuje każdy worker po otrzymaniu
+    wiadomości od brokera (ClusterNode) - tu wiadomość jest tylko wysyłana.
 
     Args:
-        data: Dane żądania
+        request: Zwalidowane zdarzenie send_message
         websocket: Połączenie WebSocket
         manager: Menedżer połączeń
-        db_conn: Połączenie z bazą danych
+        writer: Kolejka zapisu wiadomości (MessageWriter)
+        history: Pamięć ostatnich wiadomości kanałów (HistoryCache)
+        cluster: Worker w trybie wielu procesów (None - jeden proces)
     """
     try:
         # Pobierz info o użytkowniku
         user_info = manager.get_user_info(websocket)
         if not user_info:
-            await send_error(websocket, "User not authenticated")
+            await send_error(websocket, "User not authenticated", manager)
             return
 
-        payload = data.get("payload", {})
-        channel_id = payload.get("channel_id", "").strip()
-        text = payload.get("text", "")
+        channel_id = request.payload.channel_id
+        text = request.payload.text
 
-        # Walidacja channel_id
-        if not channel_id:
-            await send_error(websocket, "Channel ID is required")
+        # Nieznany kanał - odrzucenie, zanim wiadomość dostanie seq, trafi do
+        # pamięci historii i do odbiorców (w bazie i tak nie dałoby się jej zapisać)
+        if not await history.has_channel(channel_id):
+            await send_error(websocket, "Channel not found", manager)
             return
 
-        # Walidacja tekstu wiadomości
-        is_valid, error_msg = validate_message_text(text)
-        if not is_valid:
-            await send_error(websocket, error_msg)
+        user_key = parse_user_id(user_info["user_id"])
+        on_failure = report_unsaved_message(manager, websocket, history, channel_id)
+
+        if cluster is not None:
+            # seq nada broker; zapis i rozgłoszenie - po powrocie wiadomości od brokera
+            cluster.publish_message(channel_id, user_key, user_info["username"], text, on_failure)
+            print(f"✓ Wiadomość od {user_info['username']} w kanale {channel_id}: {text[:50]}")
             return
 
-        # Zapisz wiadomość w bazie - zwraca tuple (message_id, timestamp)
-        message_id, timestamp = add_message(db_conn, channel_id, user_info["user_id"], text)
+        # Przekaż wiadomość do zapisu - zwraca tuple (message_key, created_at_ms, seq).
+        # W trybie ack_after_commit czeka na commit, w przeciwnym razie wraca od razu.
+        message_key, created_at, seq = await writer.submit(channel_id, user_key, text, on_failure=on_failure)
+
+        message = Message(
+            id=message_key,
+            channel_id=channel_id,
+            user_id=user_key,
+            username=user_info["username"],
+            text=text,
+            timestamp=created_at,
+            seq=seq
+        ).to_dict()
+
+        # Dopisz do pamięci historii - kolejne request_history nie muszą pytać bazy
+        history.append(channel_id, message)
 
         # Rozgłoś new_message do wszystkich
         new_message = {
             "type": "new_message",
             "payload": {
                 "channel_id": channel_id,
-                "message": {
-                    "id": message_id,
-                    "user": {
-                        "id": user_info["user_id"],
-                        "name": user_info["username"]
-                    },
-                    "text": text,
-                    "timestamp": timestamp
-                }
+                "message": message
             }
         }
 
@@ -417,42 +820,268 @@ async def handle_send_message(data: dict, websocket: WebSocket, manager: Connect
 
     except Exception as e:
         print(f"Błąd podczas wysyłania wiadomości: {e}")
-        await send_error(websocket, "Error sending message")
+        await send_error(websocket, "Error sending message", manager)
 
 
-async def handle_request_history(data: dict, websocket: WebSocket, db_conn):
+async def handle_request_history(request: RequestHistory, websocket: WebSocket, manager: ConnectionManager,
+                                 history: HistoryCache):
     """
     Obsługuje żądanie historii wiadomości dla kanału.
 
+    Payload może zawierać kursor stronicowania:
+    - brak kursora: najnowsze wiadomości
+    - "before": ID wiadomości - starsze wiadomości (przewijanie w górę)
+    - "after": ID wiadomości - nowsze wiadomości (doczytanie brakujących)
+    - "before_seq" / "after_seq": to samo, ale kursorem jest numer wiadomości
+      w kanale (seq) - klient, który zauważy lukę w numerach new_message,
+      pobiera tylko brakujące wiadomości przez after_seq=ostatni znany seq
+    - "limit": liczba wiadomości na stronie (1 - HISTORY_MAX_PAGE_SIZE)
+
+    Typy, zakresy i wykluczanie się kursorów sprawdza schemas.RequestHistoryPayload.
+    Żądanie bez kursora oznacza przełączenie kanału (api_design.md) -
+    od tej chwili użytkownik dostaje new_message z nowego kanału.
+    Nieistniejący kanał dostaje error_message "Channel not found".
+
+    Odpowiedź trafia do kolejki wychodzącej klienta jako gotowa, zakodowana
+    ramka z HistoryCache.
+
     Args:
-        data: Dane żądania
+        request: Zwalidowane zdarzenie request_history
         websocket: Połączenie WebSocket
-        db_conn: Połączenie z bazą danych
+        manager: Menedżer połączeń (subskrypcja kanału)
+        history: Pamięć ostatnich wiadomości kanałów (HistoryCache)
     """
     try:
-        payload = data.get("payload", {})
-        channel_id = payload.get("channel_id", "").strip()
+        payload = request.payload
+        channel_id = payload.channel_id
+        # Najwyżej jeden kursor (schemas) - seq lub ID wiadomości
+        before = payload.before if payload.before_seq is None else payload.before_seq
+        after = payload.after if payload.after_seq is None else payload.after_seq
+
+        # Nieznany kanał - bez przełączenia i bez bufora w pamięci historii
+        if not await history.has_channel(channel_id):
+            await send_error(websocket, "Channel not found", manager)
+            return
 
-        if not channel_id:
-            await send_error(websocket, "Channel ID is required")
+        # Przełączenie kanału - subskrypcja przed pobraniem historii, żeby nie zgubić
+        # wiadomości wysłanej w międzyczasie (ewentualny duplikat klient rozpozna po id)
+        if before is None and after is None:
+            manager.set_channel(websocket, channel_id)
+
+        # Gotowa ramka z pamięci (najnowsza strona lub wcześniej zakodowana starsza),
+        # w przeciwnym razie strona z bufora / bazy (z wiadomościami czekającymi
+        # jeszcze na zapis) zakodowana raz
+        try:
+            frame = await history.get_page_frame(channel_id, payload.limit, before=before, after=after)
+        except ValueError:
+            await send_error(websocket, "Invalid history cursor", manager)
             return
 
-        # Pobierz historię z bazy
-        messages = get_messages_for_channel(db_conn, channel_id, limit=50)
+        manager.send_personal_frame(wire.from_json(frame, wire.protocol_of(websocket)), websocket)
+
+        print(f"✓ Historia kanału {channel_id} wysłana")
+
+    except Exception as e:
+        print(f"Błąd podczas pobierania historii: {e}")
+        await send_error(websocket, "Error fetching history", manager)
+
+
+async def handle_search_messages(request: SearchMessages, websocket: WebSocket, manager: ConnectionManager,
+                                 db: AsyncDatabase):
+    """
+    Obsługuje wyszukiwanie wiadomości (pełnotekstowe, indeks FTS5).
+
+    Payload:
+    - "query": szukane słowa (wszystkie muszą wystąpić; "wiadom*" - prefiks)
+    - "channel_id": opcjonalnie - szukaj tylko w tym kanale
+    - "limit": liczba wyników na stronie (1 - SEARCH_MAX_PAGE_SIZE)
+    - "offset": liczba wyników do pominięcia (kolejne strony)
 
-        # Wyślij odpowiedź
-        history_response = {
-            "type": "chat_history",
+    Odpowiedź message_search_results zawiera wyniki od najlepiej dopasowanych.
+
+    Args:
+        request: Zwalidowane zdarzenie search_messages
+        websocket: Połączenie WebSocket
+        manager: Menedżer połączeń (kolejka wychodząca klienta)
+        db: Asynchroniczny dostęp do bazy danych
+    """
+    try:
+        payload = request.payload
+        query, channel_id, offset = payload.query, payload.channel_id, payload.offset
+
+        try:
+            results = await db.search_messages(query, channel_id, payload.limit, offset)
+        except ValueError:
+            await send_error(websocket, "Search query must contain at least one word", manager)
+            return
+        except sqlite3.OperationalError:
+            # SQLite bez modułu FTS5 - create_search_index() nie utworzył indeksu
+            await send_error(websocket, "Search is not available", manager)
+            return
+
+        response = {
+            "type": "message_search_results",
             "payload": {
+                "query": query,
                 "channel_id": channel_id,
-                "messages": messages
+                "messages": results["messages"],
+                "has_more": results["has_more"],
+                "offset": offset
+            }
+        }
+        await manager.send_personal_message(response, websocket)
+
+        print(f"🔎 Wyszukiwanie '{query}': {len(results['messages'])} wyników")
+
+    except Exception as e:
+        print(f"Błąd podczas wyszukiwania: {e}")
+        await send_error(websocket, "Error searching messages", manager)
+
+
+async def handle_search_users(request: SearchUsers, websocket: WebSocket, manager: ConnectionManager,
+                              users: UserIndex, presence: PresenceAggregator):
+    """
+    Obsługuje wyszukiwanie użytkowników po początku nazwy.
+
+    Wyszukiwanie obejmuje wszystkich zarejestrowanych użytkowników (indeks
+    w pamięci, bez zapytań do bazy); każdy wynik ma informację, czy
+    użytkownik jest teraz online.
+
+    Args:
+        request: Zwalidowane zdarzenie search_users
+        websocket: Połączenie WebSocket
+        manager: Menedżer połączeń (status online)
+        users: Indeks nazw użytkowników
+        presence: Obecność (użytkownicy połączeni z innymi procesami serwera)
+    """
+    try:
+        query = request.payload.query
+        results = [
+            {"id": user["id"], "name": user["name"],
+             "online": manager.is_online(user["name"]) or presence.is_connected_elsewhere(user["name"])}
+            for user in users.search(query, config.USER_SEARCH_LIMIT)
+        ]
+
+        response = {
+            "type": "search_results",
+            "payload": {
+                "query": query,
+                "users": results
             }
         }
+        await manager.send_personal_message(response, websocket)
 
-        await websocket.send_text(json.dumps(history_response, ensure_ascii=False))
+    except Exception as e:
+        print(f"Błąd podczas wyszukiwania użytkowników: {e}")
+        await send_error(websocket, "Error searching users", manager)
+
+
+async def handle_request_user_list(request: RequestUserList, websocket: WebSocket, manager: ConnectionManager,
+                                   presence: PresenceAggregator):
+    """
+    Obsługuje żądanie listy użytkowników online (np. po luce w wersjach).
 
-        print(f"✓ Historia kanału {channel_id} wysłana ({len(messages)} wiadomości)")
+    Klient podaje wersję listy, którą ma. Jeśli zmiany od tej wersji są
+    jeszcze pamiętane, dostaje tylko je; w przeciwnym razie (lub bez
+    wersji) - pełną listę.
+
+    Args:
+        request: Zwalidowane zdarzenie request_user_list
+        websocket: Połączenie WebSocket
+        manager: Menedżer połączeń
+        presence: Zbiorcze powiadomienia o obecności
+    """
+    try:
+        response = presence.changes_since(request.payload.version)
+        # Czekająca pełna lista może zostać zastąpiona nowszą
+        coalesce_key = ROSTER_COALESCE_KEY if "online_users" in response["payload"] else None
+        await manager.send_personal_message(response, websocket, coalesce_key)
 
     except Exception as e:
-        print(f"Błąd podczas pobierania historii: {e}")
-        await send_error(websocket, "Error fetching history")
+        print(f"Błąd podczas pobierania listy użytkowników: {e}")
+        await send_error(websocket, "Error getting user list", manager)
+
+
+async def handle_request_channels(request: RequestChannels, websocket: WebSocket, manager: ConnectionManager,
+                                  bootstrap: BootstrapSnapshot):
+    """
+    Obsługuje żądanie listy kanałów (dla klientów, które pominęły ją w auth_success).
+
+    Args:
+        request: Zwalidowane zdarzenie request_channels
+        websocket: Połączenie WebSocket
+        manager: Menedżer połączeń
+        bootstrap: Wspólny stan początkowy (zakodowana lista kanałów)
+    """
+    try:
+        manager.send_personal_frame(await bootstrap.channel_list_frame(wire.protocol_of(websocket)), websocket)
+
+    except Exception as e:
+        print(f"Błąd podczas pobierania listy kanałów: {e}")
+        await send_error(websocket, "Error getting channel list", manager)
+
+
+# ====== ROZŁĄCZANIE ======
+
+async def handle_disconnect(websocket: WebSocket, manager: ConnectionManager,
+                            presence: PresenceAggregator) -> Optional[Dict[str, str]]:
+    """
+    Wyrejestrowuje połączenie i zgłasza wyjście użytkownika do PresenceAggregator
+    (pozostali dostaną je w zbiorczym user_list_update).
+
+    Bezpieczne przy wielokrotnym wywołaniu - wyjście jest zgłaszane tylko raz.
+
+    Args:
+        websocket: Połączenie WebSocket
+        manager: Menedżer połączeń
+        presence: Zbiorcze powiadomienia o obecności
+
+    Returns:
+        Informacje o rozłączonym użytkowniku lub None, jeśli już był rozłączony
+    """
+    user_info = manager.disconnect(websocket)
+    if not user_info:
+        return None
+
+    presence.user_left({"id": user_info["user_id"], "name": user_info["username"]})
+
+    print(f"✓ Użytkownik {user_info['username']} rozłączył się")
+    return user_info
+
+
+async def evict_slow_consumers(manager: ConnectionManager, presence: PresenceAggregator) -> int:
+    """
+    Rozłącza klientów wybranych przez manager.check_slow_consumers().
+
+    Wyjście użytkownika trafia do zwykłego user_list_update, a połączenie jest
+    zamykane kodem SLOW_CONSUMER_CLOSE_CODE (z limitem czasu - klient,
+    który nie odbiera, może nie odebrać też zamknięcia).
+
+    Returns:
+        Liczba rozłączonych klientów
+    """
+    to_evict = manager.check_slow_consumers()
+    for websocket in to_evict:
+        user_info = await handle_disconnect(websocket, manager, presence)
+        if user_info:
+            print(f"🐢 Użytkownik {user_info['username']} rozłączony - nie odbierał wiadomości")
+
+    await asyncio.gather(*(close_websocket(websocket, SLOW_CONSUMER_CLOSE_CODE) for websocket in to_evict))
+    return len(to_evict)
+
+
+async def monitor_slow_consumers(manager: ConnectionManager, presence: PresenceAggregator, interval_ms: int):
+    """
+    Zadanie w tle: co `interval_ms` sprawdza klientów i rozłącza tych, którzy nie nadążają.
+
+    Args:
+        manager: Menedżer połączeń
+        presence: Zbiorcze powiadomienia o obecności
+        interval_ms: Odstęp między sprawdzeniami
+    """
+    while True:
+        await asyncio.sleep(interval_ms / 1000)
+        try:
+            await evict_slow_consumers(manager, presence)
+        except Exception as e:
+            print(f"Błąd podczas sprawdzania wolnych klientów: {e}")
@@ -0,0 +1,208 @@
+"""
+Format ramek na połączeniu WebSocket: JSON (ramki tekstowe) albo
+MessagePack (ramki binarne).
+
+Klient wybiera format podczas handshake nagłówkiem Sec-WebSocket-Protocol:
+
+    msgpack - te same zdarzenia {"type", "payload"} zakodowane w MessagePack
+              (wymaga pakietu msgpack na serwerze)
+    json    - JSON jawnie (tak samo jak bez nagłówka)
+
+Bez nagłówka, przy nieznanym protokole albo bez zainstalowanego msgpack
+połączenie używa JSON - jak dotąd. W obie strony płyną te same zdarzenia
+o tej samej strukturze; zmienia się tylko kodowanie.
+
+Ramki budowane raz dla wielu odbiorców (strony historii, lista kanałów,
+fragmenty auth_success) są kodowane jako JSON. Klient MessagePack dostaje
+je przekodowane przez from_json() - wynik jest zapamiętywany (LRU), więc
+ta sama ramka historii jest przekodowywana raz, a nie przy każdym żądaniu.
+
+Przykład:
+    protocol = protocol_of(websocket)
+    await websocket.accept(subprotocol=negotiate(websocket))
+    request = schemas.parse_event(await receive(websocket, protocol), schemas.SESSION_EVENTS)
+    await send(websocket, encode({"type": "error_message", "payload": {...}}, protocol))
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import codec
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# Obsługiwane podprotokoły w kolejności preferencji serwera
+SUBPROTOCOLS = (MSGPACK, JSON) if msgpack is not None else (JSON,)
+
+# Liczba przekodowanych ramek JSON -> MessagePack pamiętanych przez from_json()
+TRANSCODE_CACHE_SIZE = 256
+
+Frame = Union[str, bytes]
+
+_packer = msgpack.Packer() if msgpack is not None else None
+
+
+def negotiate(websocket) -> Optional[str]:
+    """
+    Wybiera podprotokół spośród zaproponowanych przez klienta.
+
+    Args:
+        websocket: Połączenie WebSocket (przed accept())
+
+    Returns:
+        Nazwa podprotokołu do odesłania w accept() albo None (klient
+        żadnego nie zaproponował lub żaden nie jest obsługiwany)
+    """
+    scope = getattr(websocket, "scope", None) or {}
+    offered = scope.get("subprotocols") or ()
+    for name in SUBPROTOCOLS:
+        if name in offered:
+            return name
+    return None
+
+
+def protocol_of(websocket) -> str:
+    """
+    Zwraca format ramek połączenia.
+
+    Args:
+        websocket: Połączenie WebSocket
+
+    Returns:
+        MSGPACK albo JSON
+    """
+    return MSGPACK if negotiate(websocket) == MSGPACK else JSON
+
+
+def encode(message: Dict[str, Any], protocol: str) -> Frame:
+    """
+    Koduje zdarzenie w formacie połączenia.
+
+    Args:
+        message: Zdarzenie {"type": ..., "payload": ...}
+        protocol: JSON lub MSGPACK
+
+    Returns:
+        str (JSON) lub bytes (MessagePack)
+    """
+    if protocol == MSGPACK:
+        return _packer.pack(message)
+    return codec.encode(message)
+
+
+@lru_cache(maxsize=TRANSCODE_CACHE_SIZE)
+def _transcode(frame: str) -> bytes:
+    """Przekodowuje tekst JSON na MessagePack (wynik w pamięci LRU)."""
+    return _packer.pack(codec.decode(frame))
+
+
+def from_json(frame: str, protocol: str) -> Frame:
+    """
+    Dostosowuje gotową ramkę JSON (wspólną dla wielu odbiorców) do formatu połączenia.
+
+    Args:
+        frame: Zakodowana ramka lub fragment JSON
+        protocol: JSON lub MSGPACK
+
+    Returns:
+        Ta sama ramka (JSON) albo przekodowana (MessagePack)
+    """
+    if protocol == MSGPACK:
+        return _transcode(frame)
+    return frame
+
+
+def build_frame(frame_type: str, fields: List[Tuple[str, Any, bool]], protocol: str) -> Frame:
+    """
+    Skleja ramkę z pól, z których część jest już zakodowana (bez kodowania całości).
+
+    Args:
+        frame_type: Typ zdarzenia
+        fields: Pola payloadu (klucz, wartość, czy_zakodowana) - zakodowana
+                wartość to wspólny fragment JSON (np. lista kanałów), dla
+                MessagePack przekodowywany raz (jak w from_json())
+        protocol: JSON lub MSGPACK
+
+    Returns:
+        str (JSON) lub bytes (MessagePack)
+    """
+    if protocol == MSGPACK:
+        pack = _packer.pack
+        parts = [b"\x82", pack("type"), pack(frame_type), pack("payload"), _map_header(len(fields))]
+        for key, value, encoded in fields:
+            parts.append(pack(key))
+            parts.append(_transcode(value) if encoded else pack(value))
+        return b"".join(parts)
+
+    body = ",".join(f'"{key}":{value if encoded else codec.encode(value)}' for key, value, encoded in fields)
+    return '{"type":' + codec.encode(frame_type) + ',"payload":{' + body + '}}'
+
+
+def _map_header(size: int) -> bytes:
+    """Nagłówek mapy MessagePack o `size` parach."""
+    if size < 16:
+        return bytes([0x80 | size])
+    return b"\xde" + size.to_bytes(2, "big")
+
+
+def decode(data: Frame) -> Any:
+    """
+    Dekoduje ramkę od klienta (str - JSON, bytes - MessagePack).
+
+    Raises:
+        codec.DecodeError: Niepoprawny JSON / MessagePack
+    """
+    if isinstance(data, str):
+        return codec.decode(data)
+    try:
+        return msgpack.unpackb(data)
+    except (ValueError, TypeError) as e:
+        raise codec.DecodeError(str(e)) from e
+
+
+async def receive(websocket, protocol: str) -> Frame:
+    """
+    Odbiera jedną ramkę od klienta (bez dekodowania - robi to schemas.parse_event).
+
+    Args:
+        websocket: Połączenie WebSocket
+        protocol: JSON (ramki tekstowe) lub MSGPACK (ramki binarne)
+
+    Returns:
+        str (JSON) lub bytes (MessagePack)
+
+    Raises:
+        WebSocketDisconnect: Klient się rozłączył
+    """
+    if protocol == MSGPACK:
+        return await websocket.receive_bytes()
+    return await websocket.receive_text()
+
+
+async def send(websocket, frame: Frame):
+    """Wysyła zakodowaną ramkę (bytes jako ramkę binarną, str jako tekstową)."""
+    if isinstance(frame, bytes):
+        await websocket.send_bytes(frame)
+    else:
+        await websocket.send_text(frame)
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Zwraca metryki formatów ramek.
+
+    Returns:
+        Słownik z obsługiwanymi podprotokołami i trafieniami pamięci przekodowań
+    """
+    info = _transcode.cache_info()
+    return {
+        "subprotocols": list(SUBPROTOCOLS),
+        "transcode_hits": info.hits,
+        "transcode_misses": info.misses
+    }